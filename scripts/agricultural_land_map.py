@@ -35,14 +35,13 @@ from rasterio.enums import Resampling
 from rasterio.warp import calculate_default_transform, reproject
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
-from utils.cache import CacheMissingError, iceland_constants  # noqa: E402
+from utils.cache import CacheMissingError, base_layer, iceland_constants  # noqa: E402
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
     sys.stderr.reconfigure(encoding="utf-8")
 
 ROOT = Path(__file__).resolve().parent.parent
-GEODATA = ROOT / "data" / "geodata"
 NATT_RAW = ROOT / "data" / "raw" / "natt" / "vistgerdir"
 SOURCE_GLOB = "vistgerd_dn95_*m.tif"
 OUT_PNG = ROOT / "reports" / "agricultural-land-map.png"
@@ -134,11 +133,10 @@ def read_mask(src_path: Path, target_px_m: float
 def load_base_layers() -> dict[str, gpd.GeoDataFrame]:
     layers = {}
     for name in ("Landmask", "LandIceArea", "Lake_Reservoir"):
-        path = GEODATA / f"{name}.geojson"
-        if not path.exists():
-            raise SystemExit(f"Missing base layer {path}. "
-                             "Run: uv run python scripts/lmi.py download")
-        layers[name] = gpd.read_file(path).to_crs(DST_CRS)
+        try:
+            layers[name] = base_layer(name, DST_CRS)
+        except CacheMissingError as e:
+            raise SystemExit(f"Missing base layer {name}. {e.hint}")
     return layers
 
 
@@ -0,0 +1,448 @@
+"""
+Alþingi ballot matrix — every recorded ballot as one int8 votes × MPs array.
+
+Built from the althingi.py datasets (fetch `votes` and `members` first). The
+matrix and a same-shaped party-at-the-time array are saved as .npy and
+memory-mapped on load; the row (vote), column (MP) and party index maps sit
+beside them as parquet. Cohesion, agreement and rebels are then array
+operations — a ``bincount`` per row block, or a matrix product — not
+group-bys over millions of ballot rows.
+
+Usage:
+    uv run python scripts/althingi_matrix.py build
+    uv run python scripts/althingi_matrix.py cohesion --thing 156
+    uv run python scripts/althingi_matrix.py agreement --thing 150-156 --mp 1039
+    uv run python scripts/althingi_matrix.py rebels --thing 156 --top 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from althingi import PROCESSED_DIR, parse_thing_arg, scan  # noqa: E402
+from utils.bench import register  # noqa: E402
+
+MATRIX_DIR = PROCESSED_DIR / "althingi_matrix"
+
+# Ballot codes. NO_RECORD is "not in this vote's atkvæðaskrá" — not an MP at
+# the time, or a show of hands. The two absences stay distinct (SKILL.md).
+NO_RECORD, JA, NEI, GREIDIR_EKKI, FJARVERANDI, BODADI_FJARVIST = range(6)
+CODES = {
+    "já": JA,
+    "nei": NEI,
+    "greiðir ekki atkvæði": GREIDIR_EKKI,
+    "fjarverandi": FJARVERANDI,
+    "boðaði fjarvist": BODADI_FJARVIST,
+}
+LABELS = {code: label for label, code in CODES.items()} | {NO_RECORD: None}
+N_CODES = len(CODES) + 1
+# Positions taken in the chamber. Cohesion, agreement and the party line are
+# computed over these; absences are neither agreement nor dissent.
+POSITIONS = (JA, NEI, GREIDIR_EKKI)
+NO_PARTY = -1
+
+BLOCK_ROWS = 4096   # votes per block when a pass needs int64 scratch space
+
+
+@dataclass
+class BallotMatrix:
+    ballots: np.ndarray     # int8 (votes, mps), CODES
+    party: np.ndarray       # int16 (votes, mps), row of ``parties`` or NO_PARTY
+    votes: pl.DataFrame     # row i: atkvgr_nr, thing, timi
+    mps: pl.DataFrame       # column j: thingmadur_id, nafn
+    parties: pl.DataFrame   # party k: thingflokkur_id, thingflokkur
+
+    def rows(self, things: list[int] | None = None) -> np.ndarray:
+        """Row indices of the votes in ``things`` (every row when None)."""
+        if not things:
+            return np.arange(len(self.votes))
+        return np.flatnonzero(self.votes["thing"].is_in(things).to_numpy())
+
+    def save(self, out_dir: Path = MATRIX_DIR) -> None:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name, arr in (("ballots", self.ballots), ("party", self.party)):
+            tmp = out_dir / f"{name}.tmp.npy"
+            mm = np.lib.format.open_memmap(tmp, mode="w+", dtype=arr.dtype, shape=arr.shape)
+            mm[:] = arr
+            mm.flush()
+            del mm
+            tmp.replace(out_dir / f"{name}.npy")
+        for name in ("votes", "mps", "parties"):
+            getattr(self, name).write_parquet(out_dir / f"{name}.parquet")
+        (out_dir / "codes.json").write_text(
+            json.dumps(CODES, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, out_dir: Path = MATRIX_DIR) -> BallotMatrix:
+        """Memory-map a saved matrix; only the rows a query touches are read."""
+        if not (out_dir / "ballots.npy").exists():
+            raise SystemExit(f"No ballot matrix in {out_dir} — run: "
+                             "uv run python scripts/althingi_matrix.py build")
+        return cls(
+            np.load(out_dir / "ballots.npy", mmap_mode="r"),
+            np.load(out_dir / "party.npy", mmap_mode="r"),
+            pl.read_parquet(out_dir / "votes.parquet"),
+            pl.read_parquet(out_dir / "mps.parquet"),
+            pl.read_parquet(out_dir / "parties.parquet"),
+        )
+
+
+# --------------------------------------------------------------------------
+# Build
+# --------------------------------------------------------------------------
+
+
+def build(ballots: pl.DataFrame, votes: pl.DataFrame, members: pl.DataFrame) -> BallotMatrix:
+    """Scatter the long ballot table into the dense matrix.
+
+    Rows are the votes that recorded a ballot, in time order; columns are
+    every MP who cast one. An MP's party is the one of the þingseta spell
+    covering the vote's date, so a mid-term switch is attributed correctly.
+    """
+    vote_index = (
+        votes.filter(pl.col("atkvgr_nr").is_in(ballots["atkvgr_nr"].unique().implode()))
+        .select("atkvgr_nr", "thing", "timi")
+        .sort("timi", "atkvgr_nr", nulls_last=True)
+        .with_row_index("row")
+    )
+    mp_index = (
+        ballots.group_by("thingmadur_id").agg(pl.col("nafn").last())
+        .sort("thingmadur_id")
+        .with_row_index("col")
+    )
+    spells = members.filter(pl.col("thingflokkur").is_not_null())
+    party_index = (
+        spells.group_by("thingflokkur_id").agg(pl.col("thingflokkur").last())
+        .sort("thingflokkur_id")
+        .with_row_index("party")
+    )
+
+    cells = (
+        ballots.select("atkvgr_nr", "thingmadur_id", "atkvaedi")
+        .join(vote_index, on="atkvgr_nr")
+        .join(mp_index.select("thingmadur_id", "col"), on="thingmadur_id")
+        .with_columns(
+            pl.col("atkvaedi").replace_strict(CODES, default=NO_RECORD, return_dtype=pl.Int8)
+            .fill_null(NO_RECORD).alias("code"),
+            pl.col("timi").dt.date().alias("dagur"),
+        )
+    )
+    unknown = cells.filter((pl.col("code") == NO_RECORD) & pl.col("atkvaedi").is_not_null())
+    if len(unknown):
+        values = sorted(unknown["atkvaedi"].unique().to_list())
+        print(f"  WARN: {len(unknown):,} ballots with an unknown value {values} "
+              "left as NO_RECORD", file=sys.stderr)
+
+    shape = (len(vote_index), len(mp_index))
+    matrix = np.zeros(shape, dtype=np.int8)
+    r, c = cells["row"].to_numpy(), cells["col"].to_numpy()
+    matrix[r, c] = cells["code"].to_numpy()
+
+    party = np.full(shape, NO_PARTY, dtype=np.int16)
+    if len(spells):
+        seated = (
+            cells.select("row", "col", "thing", "thingmadur_id", "dagur")
+            .join(spells.select("thingmadur_id", "thing", "thingflokkur_id", "inn", "ut"),
+                  on=["thingmadur_id", "thing"])
+            .filter((pl.col("inn").is_null() | (pl.col("inn") <= pl.col("dagur")))
+                    & (pl.col("ut").is_null() | (pl.col("ut") >= pl.col("dagur"))))
+            .unique(["row", "col"], keep="first")
+            .join(party_index.select("thingflokkur_id", "party"), on="thingflokkur_id")
+        )
+        party[seated["row"].to_numpy(), seated["col"].to_numpy()] = seated["party"].to_numpy()
+
+    return BallotMatrix(matrix, party, vote_index.drop("row"), mp_index.drop("col"),
+                        party_index.drop("party"))
+
+
+# --------------------------------------------------------------------------
+# Analytics
+# --------------------------------------------------------------------------
+
+
+def took_position(codes: np.ndarray) -> np.ndarray:
+    """Where a position was taken. POSITIONS are the contiguous codes
+    JA..GREIDIR_EKKI, so two compares instead of ``np.isin``."""
+    return (codes >= JA) & (codes <= GREIDIR_EKKI)
+
+
+def party_counts(m: BallotMatrix, rows: np.ndarray) -> np.ndarray:
+    """``(len(rows), n_parties + 1, N_CODES)`` ballot counts per vote, party
+    and code; the last party slot collects MPs with no known party. One
+    ``bincount`` over ``(vote * parties + party) * codes + code`` per block."""
+    n_parties = len(m.parties) + 1
+    out = np.zeros((len(rows), n_parties, N_CODES), dtype=np.int32)
+    for b0 in range(0, len(rows), BLOCK_ROWS):
+        block = rows[b0:b0 + BLOCK_ROWS]
+        codes = np.asarray(m.ballots[block], dtype=np.int64)
+        party = np.asarray(m.party[block], dtype=np.int64)
+        party[party == NO_PARTY] = n_parties - 1
+        idx = (np.arange(len(block))[:, None] * n_parties + party) * N_CODES + codes
+        out[b0:b0 + len(block)] = np.bincount(
+            idx.ravel(), minlength=len(block) * n_parties * N_CODES
+        ).reshape(len(block), n_parties, N_CODES)
+    return out
+
+
+def party_line(counts: np.ndarray) -> np.ndarray:
+    """Each party's position on each vote: the plurality of já / nei /
+    abstain among its members, or NO_RECORD when none voted or it was tied."""
+    pos = counts[..., POSITIONS]
+    top = pos.max(axis=-1)
+    line = np.asarray(POSITIONS, dtype=np.int8)[pos.argmax(axis=-1)]
+    tied = (pos == top[..., None]).sum(axis=-1) > 1
+    return np.where((top > 0) & ~tied, line, NO_RECORD).astype(np.int8)
+
+
+def cohesion(m: BallotMatrix, rows: np.ndarray) -> pl.DataFrame:
+    """Hix–Noury–Roland agreement index per party, averaged over the votes
+    in ``rows`` where it cast a position: 1 when it voted as one bloc, 0
+    when split evenly three ways. ``rice`` is the já/nei-only Rice index."""
+    counts = party_counts(m, rows)[:, :-1].astype(np.float64)
+    pos = counts[..., POSITIONS]
+    total = pos.sum(axis=-1)
+    top = pos.max(axis=-1)
+    yes_no = pos[..., 0] + pos[..., 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ai = (top - (total - top) / 2) / total
+        rice = np.abs(pos[..., 0] - pos[..., 1]) / yes_no
+    voted = total > 0
+    out = []
+    for k, party in enumerate(m.parties.iter_rows(named=True)):
+        if not voted[:, k].any():
+            continue
+        split = yes_no[:, k] > 0
+        out.append({
+            **party,
+            "votes": int(voted[:, k].sum()),
+            "ballots": int(total[:, k].sum()),
+            "agreement_index": round(float(ai[voted[:, k], k].mean()), 4),
+            "rice": round(float(rice[split, k].mean()), 4) if split.any() else None,
+        })
+    if not out:
+        return pl.DataFrame()
+    return pl.DataFrame(out).sort("agreement_index", descending=True)
+
+
+def agreement(m: BallotMatrix, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """MP × MP agreement over ``rows``: ``(same, shared)``, where
+    ``shared[i, j]`` counts votes on which both took a position and
+    ``same[i, j]`` those on which it was the same one. Both are sums of
+    per-position indicator products, ``Xᵀ X``, accumulated block by block."""
+    n = m.ballots.shape[1]
+    same = np.zeros((n, n), dtype=np.float64)
+    shared = np.zeros((n, n), dtype=np.float64)
+    for b0 in range(0, len(rows), BLOCK_ROWS):
+        codes = np.asarray(m.ballots[rows[b0:b0 + BLOCK_ROWS]])
+        present = np.zeros(codes.shape, dtype=np.float32)
+        for code in POSITIONS:
+            x = (codes == code).astype(np.float32)
+            same += x.T @ x
+            present += x
+        shared += present.T @ present
+    return same, shared
+
+
+def agreement_with(m: BallotMatrix, rows: np.ndarray, thingmadur_id: int,
+                   min_shared: int = 10) -> pl.DataFrame:
+    """How often every other MP took the same position as ``thingmadur_id``."""
+    ids = m.mps["thingmadur_id"].to_list()
+    if thingmadur_id not in ids:
+        raise SystemExit(f"MP {thingmadur_id} has no ballots in the matrix")
+    j = ids.index(thingmadur_id)
+    # Row j of XᵀX is X[:, j] · X — no need for the whole n × n product.
+    same = np.zeros(len(ids))
+    shared = np.zeros(len(ids))
+    for b0 in range(0, len(rows), BLOCK_ROWS):
+        codes = np.asarray(m.ballots[rows[b0:b0 + BLOCK_ROWS]])
+        present = np.zeros(codes.shape, dtype=np.float32)
+        for code in POSITIONS:
+            x = (codes == code).astype(np.float32)
+            same += x[:, j] @ x
+            present += x
+        shared += present[:, j] @ present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = same / shared
+    return (
+        m.mps.with_columns(
+            pl.Series("shared", shared.astype(np.int64)),
+            pl.Series("agreement", np.round(rate, 4)),
+        )
+        .filter((pl.col("thingmadur_id") != thingmadur_id) & (pl.col("shared") >= min_shared))
+        .sort("agreement", descending=True)
+    )
+
+
+def rebels(m: BallotMatrix, rows: np.ndarray) -> pl.DataFrame:
+    """Every ballot that took a position other than its party's line."""
+    n_parties = len(m.parties) + 1
+    found = []
+    for b0 in range(0, len(rows), BLOCK_ROWS):
+        block = rows[b0:b0 + BLOCK_ROWS]
+        codes = np.asarray(m.ballots[block])
+        party = np.asarray(m.party[block], dtype=np.int64)
+        party[party == NO_PARTY] = n_parties - 1
+        line = party_line(party_counts(m, block))
+        line[:, -1] = NO_RECORD                    # no party, no line to break
+        cell_line = np.take_along_axis(line, party, axis=1)
+        hit = took_position(codes) & (cell_line != NO_RECORD) & (codes != cell_line)
+        r, c = np.nonzero(hit)
+        found.append((block[r], c, party[r, c], codes[r, c], cell_line[r, c]))
+    if not found or not sum(len(f[0]) for f in found):
+        return pl.DataFrame()
+    r, c, p, code, lin = (np.concatenate(x) for x in zip(*found))
+    label = np.array([LABELS[i] for i in range(N_CODES)], dtype=object)
+    out = pl.concat([
+        m.votes[r],
+        m.mps[c],
+        m.parties[p],
+        pl.DataFrame({"atkvaedi": label[code].tolist(), "flokkslina": label[lin].tolist()}),
+    ], how="horizontal")
+    return out.sort("timi", "thingmadur_id")
+
+
+# --------------------------------------------------------------------------
+# Benchmark (scripts/bench_maps.py micro)
+# --------------------------------------------------------------------------
+
+
+def _bench_matrix(votes: int = 3000, mps: int = 70, parties: int = 8) -> BallotMatrix:
+    """A seeded parliament-sized matrix: party blocs that mostly vote together."""
+    rng = np.random.default_rng(20)
+    member_party = rng.integers(0, parties, size=mps)
+    lines = rng.choice(POSITIONS, size=(votes, parties))
+    codes = lines[:, member_party].astype(np.int8)
+    noise = rng.random((votes, mps))
+    codes[noise < 0.05] = rng.choice(POSITIONS, size=int((noise < 0.05).sum()))
+    codes[noise > 0.9] = FJARVERANDI
+    return BallotMatrix(
+        codes,
+        np.broadcast_to(member_party.astype(np.int16), (votes, mps)).copy(),
+        pl.DataFrame({"atkvgr_nr": np.arange(votes), "thing": np.full(votes, 156),
+                      "timi": [datetime(2025, 1, 6) + timedelta(minutes=i) for i in range(votes)]}),
+        pl.DataFrame({"thingmadur_id": np.arange(mps), "nafn": [f"MP {i}" for i in range(mps)]}),
+        pl.DataFrame({"thingflokkur_id": np.arange(parties),
+                      "thingflokkur": [f"Flokkur {k}" for k in range(parties)]}),
+    )
+
+
+@register("althingi_matrix", setup=_bench_matrix)
+def _bench_analytics(stage, m):
+    """Cohesion, MP × MP agreement and rebels over a 3000 × 70 ballot matrix."""
+    rows = m.rows()
+    with stage("cohesion"):
+        cohesion(m, rows)
+    with stage("agreement"):
+        agreement(m, rows)
+    with stage("rebels"):
+        rebels(m, rows)
+
+
+# --------------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------------
+
+
+def _rows(m: BallotMatrix, thing: str | None) -> np.ndarray:
+    rows = m.rows(parse_thing_arg(thing) if thing else None)
+    if not len(rows):
+        raise SystemExit(f"No votes with ballots for þing {thing} in the matrix")
+    return rows
+
+
+def cmd_build(args) -> None:
+    try:
+        ballots = scan("ballots").collect()
+        votes = scan("votes").collect()
+        members = scan("members").collect()
+    except FileNotFoundError as e:
+        raise SystemExit(f"{e}\nFetch first: uv run python scripts/althingi.py fetch "
+                         "--dataset votes (and --dataset members)") from None
+    m = build(ballots, votes, members)
+    m.save(args.out)
+    n_votes, n_mps = m.ballots.shape
+    print(f"{len(ballots):,} ballots -> {n_votes:,} votes × {n_mps:,} MPs "
+          f"({m.ballots.nbytes / 1e6:.1f} MB int8), {len(m.parties)} parties -> {args.out}")
+    unplaced = int(((m.party == NO_PARTY) & took_position(m.ballots)).sum())
+    if unplaced:
+        print(f"  {unplaced:,} positions have no party — fetch members for those þing",
+              file=sys.stderr)
+
+
+def cmd_cohesion(args) -> None:
+    m = BallotMatrix.load(args.out)
+    print(cohesion(m, _rows(m, args.thing)))
+
+
+def cmd_agreement(args) -> None:
+    m = BallotMatrix.load(args.out)
+    rows = _rows(m, args.thing)
+    if args.mp is not None:
+        df = agreement_with(m, rows, args.mp, args.min_shared)
+        with pl.Config(tbl_rows=args.top):
+            print(f"Most alike MP {args.mp}:\n{df.head(args.top)}\n")
+            print(f"Least alike:\n{df.tail(args.top).reverse()}")
+        return
+    same, shared = agreement(m, rows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = np.where(shared >= args.min_shared, same / shared, np.nan)
+    out = args.out / "agreement.npy"
+    np.save(out, rate.astype(np.float32))
+    print(f"{rate.shape[0]:,} × {rate.shape[1]:,} agreement matrix -> {out} "
+          f"(columns in {args.out / 'mps.parquet'}; NaN below {args.min_shared} shared votes)")
+
+
+def cmd_rebels(args) -> None:
+    m = BallotMatrix.load(args.out)
+    df = rebels(m, _rows(m, args.thing))
+    if df.is_empty():
+        print("No ballots against a party line")
+        return
+    print(f"{len(df):,} ballots against the party line\n")
+    top = (df.group_by("thingmadur_id", "nafn", "thingflokkur").len("rebellions")
+           .sort("rebellions", descending=True).head(args.top))
+    with pl.Config(tbl_rows=args.top):
+        print(top)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--out", type=Path, default=MATRIX_DIR,
+                        help="matrix directory (default data/processed/althingi_matrix)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="build the matrix from the processed datasets")
+    p_build.set_defaults(func=cmd_build)
+
+    p_coh = sub.add_parser("cohesion", help="agreement index per party")
+    p_coh.add_argument("--thing", help="parliament: 156, 150-156 or 150,153 (default: all)")
+    p_coh.set_defaults(func=cmd_cohesion)
+
+    p_agr = sub.add_parser("agreement", help="MP × MP agreement")
+    p_agr.add_argument("--thing", help="parliament: 156, 150-156 or 150,153 (default: all)")
+    p_agr.add_argument("--mp", type=int, help="thingmadur_id: rank everyone against this MP")
+    p_agr.add_argument("--min-shared", type=int, default=10,
+                       help="votes two MPs must share to be compared (default 10)")
+    p_agr.add_argument("--top", type=int, default=10, help="rows to show (default 10)")
+    p_agr.set_defaults(func=cmd_agreement)
+
+    p_reb = sub.add_parser("rebels", help="ballots against the party line")
+    p_reb.add_argument("--thing", help="parliament: 156, 150-156 or 150,153 (default: all)")
+    p_reb.add_argument("--top", type=int, default=20, help="MPs to show (default 20)")
+    p_reb.set_defaults(func=cmd_rebels)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
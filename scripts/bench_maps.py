@@ -1,6 +1,6 @@
-"""Wall-clock + peak-memory benchmark harness for map-construction scripts.
+"""Benchmark harness: map-construction scripts, plus the offline registry.
 
-Three modes:
+``run`` times the map scripts end to end. Three modes:
 
 - ``cold``      — wipes ``data/cache/`` AND ``data/raw/lmi_hrl/`` first
                   (full re-download path; expensive, run sparingly).
@@ -10,22 +10,38 @@ Three modes:
 
 Each map runs in a subprocess so memory peaks are measured cleanly. Results
 land in stdout *and* are appended to ``data/cache/benchmarks.json`` with a
-timestamp. When a previous ``warm`` baseline is present the stdout table
-shows a delta column.
+timestamp, together with the overview levels of each Tier 3 raster. When a
+previous ``warm`` baseline is present the stdout table shows a delta column —
+e.g. the warm-render drop once ``build_cache.py rasters`` adds pyramids.
+
+``micro`` runs the benches registered with ``utils.bench.register`` in
+``BENCH_MODULES`` — DSR decode, json-stat flattening, the althingi vote
+and speech parses, ballot-matrix analytics, umferd collect, skodanakannanir
+prose extraction — in process, on offline fixtures, reporting median / IQR
+over ``--repeat`` runs and a per-stage breakdown.
+
+Both commands take ``--fail-over PCT``: exit 1 when any median is more than
+PCT percent slower than the last recorded baseline (the last ``warm`` run
+for maps, the last ``micro`` run for benches). A regressed result is
+recorded but flagged, and never becomes the next baseline.
 
 Usage::
 
     bench_maps.py run                       # warm mode, all maps
     bench_maps.py run --mode warm-raw
-    bench_maps.py run --maps grassland,grassland_prob
+    bench_maps.py run --maps grassland,grassland_prob --repeat 3
     bench_maps.py run --mode cold --maps grassland   # use sparingly
+    bench_maps.py micro                     # every registered bench
+    bench_maps.py micro --only json_stat,dsr_decode --fail-over 20
+    bench_maps.py list
 """
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
-import os
 import shutil
+import statistics
 import subprocess
 import sys
 import time
@@ -33,7 +49,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
-from utils.cache import CACHE, ROOT  # noqa: E402
+from utils.bench import BENCHES, DEFAULT_REPEAT, measure, regressions  # noqa: E402
+from utils.cache import CACHE, RASTERS_DIR, ROOT  # noqa: E402
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -59,6 +76,10 @@ MAPS: dict[str, dict] = {
 
 MODES = ("cold", "warm-raw", "warm")
 
+# Modules whose import registers offline benches (see utils/bench.py).
+BENCH_MODULES = ("powerbi", "eurostat", "althingi", "althingi_matrix", "umferd",
+                 "skodanakannanir")
+
 
 # ── prep ─────────────────────────────────────────────────────────────────
 
@@ -107,6 +128,16 @@ def _ensure_raw_for_cold() -> None:
         )
 
 
+def _cache_state() -> dict:
+    """Overview levels of each Tier 3 raster, recorded with every run so a
+    warm-render delta can be read against the pyramid it rendered from."""
+    state = {}
+    for side in sorted(RASTERS_DIR.glob("*.json")) if RASTERS_DIR.exists() else []:
+        meta = json.loads(side.read_text(encoding="utf-8"))
+        state[side.stem] = {"overviews": meta.get("overviews") or []}
+    return state
+
+
 # ── run one map ──────────────────────────────────────────────────────────
 
 def _run_one(name: str, *, mode: str) -> dict:
@@ -168,6 +199,38 @@ def _run_one(name: str, *, mode: str) -> dict:
     }
 
 
+def _run_map(name: str, *, mode: str, repeat: int) -> dict:
+    """``_run_one`` ``repeat`` times; wall time as median / IQR, memory as
+    the worst peak."""
+    runs = [_run_one(name, mode=mode) for _ in range(repeat)]
+    first = runs[0]
+    if repeat == 1 or "skipped" in first:
+        return first
+    failed = [r for r in runs if r["exit_code"]]
+    if failed:
+        return failed[0]
+    walls = [r["wall_seconds"] for r in runs]
+    q1, _, q3 = statistics.quantiles(walls, n=4, method="inclusive")
+    peaks = [r["peak_rss_mb"] for r in runs if r.get("peak_rss_mb")]
+    return first | {"wall_seconds": round(statistics.median(walls), 2),
+                    "wall_iqr_seconds": round(q3 - q1, 2), "runs": repeat,
+                    "peak_rss_mb": max(peaks) if peaks else None}
+
+
+# ── offline benches ──────────────────────────────────────────────────────
+
+def load_benches() -> tuple[dict, dict[str, str]]:
+    """Import ``BENCH_MODULES`` so their benches register; returns the
+    registry and the modules that failed to import (name → error)."""
+    failed = {}
+    for mod in BENCH_MODULES:
+        try:
+            importlib.import_module(mod)
+        except ImportError as e:
+            failed[mod] = str(e)
+    return BENCHES, failed
+
+
 # ── reporting ────────────────────────────────────────────────────────────
 
 def _load_history() -> list[dict]:
@@ -191,14 +254,75 @@ def _last_warm_baseline(history: list[dict], name: str) -> float | None:
         if rec.get("mode") != "warm":
             continue
         for r in rec.get("results", []):
-            if r.get("name") == name and r.get("exit_code") == 0:
+            if r.get("name") == name and r.get("exit_code") == 0 and not r.get("regressed"):
                 return r.get("wall_seconds")
     return None
 
 
+def _last_micro_baseline(history: list[dict], name: str) -> float | None:
+    for rec in reversed(history):
+        if rec.get("mode") != "micro":
+            continue
+        for r in rec.get("results", []):
+            if r.get("name") == name and "median_s" in r and not r.get("regressed"):
+                return r["median_s"]
+    return None
+
+
+def _gate(record: dict, baseline: dict[str, float], fail_over: float | None,
+          *, key: str = "median_s") -> list[dict]:
+    """Flag results over the ``--fail-over`` threshold in ``record``."""
+    if fail_over is None:
+        return []
+    timed = [{"name": r["name"], "median_s": r[key]} for r in record["results"]
+             if r.get(key) is not None and not r.get("exit_code")]
+    bad = regressions(timed, baseline, fail_over)
+    names = {b["name"] for b in bad}
+    for r in record["results"]:
+        if r["name"] in names:
+            r["regressed"] = True
+    return bad
+
+
+def _report_gate(bad: list[dict], fail_over: float) -> None:
+    for b in bad:
+        print(f"REGRESSION  {b['name']}: {b['baseline_s'] * 1000:.1f} ms → "
+              f"{b['median_s'] * 1000:.1f} ms ({b['delta_pct']:+.1f}% > {fail_over:g}%)",
+              file=sys.stderr)
+    if bad:
+        raise SystemExit(1)
+
+
+def _print_micro(record: dict, history: list[dict]) -> None:
+    print()
+    print(f"=== bench  micro  repeat={record.get('repeat')}  ({record['built_at']}) ===")
+    hdr = f"{'bench':<24}  {'median ms':>10}  {'IQR ms':>8}  {'Δ vs. last':>16}"
+    print(hdr)
+    print("-" * len(hdr))
+    for r in record["results"]:
+        if "skipped" in r:
+            print(f"{r['name']:<24}  (skipped: {r['skipped']})")
+            continue
+        prev = _last_micro_baseline(history[:-1], r["name"])
+        if prev:
+            delta = (r["median_s"] - prev) / prev * 100
+            delta_s = f"{delta:+.1f}%" + (" !" if r.get("regressed") else "")
+        else:
+            delta_s = "—"
+        print(f"{r['name']:<24}  {r['median_s'] * 1000:>10.1f}  {r['iqr_s'] * 1000:>8.1f}  {delta_s:>16}")
+        for stage, st in r.get("stages", {}).items():
+            print(f"  · {stage:<20}  {st['median_s'] * 1000:>10.1f}  {st['iqr_s'] * 1000:>8.1f}")
+
+
 def _print_table(record: dict, history: list[dict]) -> None:
+    if record.get("mode") == "micro":
+        _print_micro(record, history)
+        return
     print()
     print(f"=== bench  mode={record['mode']}  ({record['built_at']}) ===")
+    for name, state in (record.get("rasters") or {}).items():
+        levels = state["overviews"]
+        print(f"  {name}: {'overviews ' + '/'.join(map(str, levels)) if levels else 'no overviews'}")
     hdr = f"{'map':<18}  {'wall (s)':>9}  {'peak MB':>8}  {'png MB':>7}  {'Δ vs. last warm':>15}"
     print(hdr)
     print("-" * len(hdr))
@@ -216,6 +340,8 @@ def _print_table(record: dict, history: list[dict]) -> None:
         png = f"{r['output_size_mb']:.2f}" if r.get("output_size_mb") else " —"
         print(f"{r['name']:<18}  {r['wall_seconds']:>9.2f}  "
               f"{peak:>8}  {png:>7}  {delta_s:>15}")
+        if r.get("wall_iqr_seconds") is not None:
+            print(f"{'':<18}  ±{r['wall_iqr_seconds']:>7.2f}  IQR over {r['runs']} runs")
 
 
 # ── CLI ──────────────────────────────────────────────────────────────────
@@ -240,14 +366,60 @@ def cmd_run(args: argparse.Namespace) -> None:
         "mode": args.mode,
         "python": sys.version.split()[0],
         "platform": sys.platform,
+        "rasters": _cache_state(),
         "results": [],
     }
     for t in targets:
         print(f"  [bench] running {t} ...", file=sys.stderr)
-        record["results"].append(_run_one(t, mode=args.mode))
+        record["results"].append(_run_map(t, mode=args.mode, repeat=args.repeat))
     history = _load_history()
+    bad = []
+    if args.mode == "warm":
+        baseline = {r["name"]: _last_warm_baseline(history, r["name"]) for r in record["results"]}
+        bad = _gate(record, baseline, args.fail_over, key="wall_seconds")
+    elif args.fail_over is not None:
+        print("  --fail-over gates warm runs only; not checked", file=sys.stderr)
     _save_history(history, record)
     _print_table(record, history)
+    _report_gate(bad, args.fail_over)
+
+
+def cmd_micro(args: argparse.Namespace) -> None:
+    benches, failed = load_benches()
+    names = list(benches) if not args.only else [n.strip() for n in args.only.split(",")]
+    for n in names:
+        if n not in benches:
+            raise SystemExit(f"unknown bench {n!r}; choices: {sorted(benches)}")
+
+    record = {
+        "built_at": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        "mode": "micro",
+        "repeat": args.repeat,
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": [{"name": m, "skipped": f"import failed: {e}"} for m, e in failed.items()],
+    }
+    for n in names:
+        print(f"  [bench] {n} ...", file=sys.stderr)
+        record["results"].append(measure(benches[n], repeat=args.repeat))
+    history = _load_history()
+    baseline = {r["name"]: _last_micro_baseline(history, r["name"]) for r in record["results"]}
+    bad = _gate(record, baseline, args.fail_over)
+    _save_history(history, record)
+    _print_table(record, history)
+    _report_gate(bad, args.fail_over)
+
+
+def cmd_list(_: argparse.Namespace) -> None:
+    benches, failed = load_benches()
+    print("maps (run):")
+    for name, spec in MAPS.items():
+        print(f"  {name:<24} {spec['script']}")
+    print("benches (micro):")
+    for b in benches.values():
+        print(f"  {b.name:<24} {b.help}  [{b.module}]")
+    for mod, err in failed.items():
+        print(f"  ({mod}: not importable — {err})")
 
 
 def cmd_history(_: argparse.Namespace) -> None:
@@ -268,8 +440,23 @@ def main() -> None:
     r.add_argument("--mode", choices=MODES, default="warm",
                    help="cold | warm-raw | warm  (default: warm)")
     r.add_argument("--maps", help="comma-separated subset, e.g. grassland,grassland_prob")
+    r.add_argument("--repeat", type=int, default=1,
+                   help="runs per map; wall time is reported as median / IQR (default 1)")
+    r.add_argument("--fail-over", type=float, metavar="PCT",
+                   help="exit 1 if a map's wall time is PCT%% over the last warm run")
     r.set_defaults(fn=cmd_run)
 
+    m = sp.add_parser("micro", help="run the registered offline benches")
+    m.add_argument("--only", help="comma-separated subset, e.g. json_stat,dsr_decode")
+    m.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                   help=f"timed runs per bench (default {DEFAULT_REPEAT})")
+    m.add_argument("--fail-over", type=float, metavar="PCT",
+                   help="exit 1 if a bench's median is PCT%% over the last micro run")
+    m.set_defaults(fn=cmd_micro)
+
+    ls = sp.add_parser("list", help="list the maps and the registered benches")
+    ls.set_defaults(fn=cmd_list)
+
     h = sp.add_parser("history", help="print last 5 bench records")
     h.set_defaults(fn=cmd_history)
 
@@ -8,7 +8,11 @@ Reads from the existing source tiers:
 …and writes:
 
     data/cache/constants.json    (Iceland scalars + bboxes  — Tier 4)
-    data/cache/rasters/*.tif     (LZW + EPSG:3057 reprojections — Tier 3)
+    data/cache/rasters/*.tif     (LZW + EPSG:3057 reprojections with
+                                  internal overviews — Tier 3)
+    data/cache/tiles/<layer>/    (z/x/y pyramids for the Leaflet maps,
+                                  see ``scripts/utils/tiles.py``)
+    data/cache/graph.json        (what each graph node was last built from)
 
 See ``scripts/utils/cache.py`` and ``.agents/skills/kortagerd/SKILL.md`` for the
 full caching strategy.
@@ -17,32 +21,53 @@ Subcommands::
 
     build_cache.py constants   — recompute Tier 4 only
     build_cache.py rasters     — recompute Tier 3 only (use --only NAME for one)
-    build_cache.py all         — both
+    build_cache.py all         — every dirty node of the cache graph (below)
+    build_cache.py build NODE  — one node and what it depends on
     build_cache.py status      — print what is cached / stale / missing
 
 Re-running is safe: cache entries with a matching source SHA-256 are skipped
 unless ``--force`` is passed. Stale entries (mismatched SHA) are rebuilt.
+Digests come from the fingerprint index (``utils.cache.fingerprint``), so an
+untouched source is never re-read — ``status`` costs a ``stat`` per file.
+
+The graph (``graph()``) declares every derived map input — the Tier 3
+rasters, constants.json, the NÍ habitat masks, the GRAVPI decode and the
+``tiles:<layer>`` pyramids cut from all of those and the LMI layers — with its
+inputs, build step and params. ``all`` / ``build`` rebuild only dirty nodes,
+in dependency order, independent ones in parallel; remote nodes download
+only with ``--fetch``. ``status`` prints the whole graph.
+
+Sources are read once per build by a block-parallel engine (``_scan_source``):
+``--workers`` threads decode tile-aligned row bands that feed a value histogram
+and a banded reprojection together, and each build prints per-stage timings.
 """
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable
 
-import geopandas as gpd
 import numpy as np
 import rasterio
 from rasterio.enums import Resampling
-from rasterio.warp import calculate_default_transform, reproject
+from rasterio.warp import calculate_default_transform, reproject, transform_bounds
+from rasterio.windows import Window
 
 # Make ``utils.cache`` importable when running as ``python scripts/build_cache.py``.
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from utils.cache import (  # noqa: E402
-    ARRAYS_DIR, CACHE, CONSTANTS_PATH, RASTERS_DIR, ROOT, sha256_file,
+    ARRAYS_DIR, CACHE, CONSTANTS_PATH, RASTERS_DIR, ROOT, _rel, base_layer, cached_array,
+    fingerprint, known_fingerprint,
 )
+from utils import tiles  # noqa: E402
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -62,6 +87,8 @@ HRL_SOURCES: dict[str, dict] = {
         "dst_crs": "EPSG:3057",
         "compute_areas": True,        # area where pixel == 1
         "value_for_area": 1,
+        "overview_resampling": "mode",  # class raster: majority, never a blend
+        "fetch": "uv run python scripts/lmi_hrl.py fetch grassland",
     },
     # GRAVPI is fetched as styled RGB by reports/grassland_probability_heatmap.py
     # — its decoded probability array is Tier 5 (.npy), not a raster.
@@ -88,6 +115,236 @@ def _atomic_write_json(path: Path, data: dict) -> None:
     tmp.replace(path)
 
 
+# ── block engine ─────────────────────────────────────────────────────────
+#
+# One pass over a source raster feeds every consumer. Row bands aligned to the
+# file's internal blocks are decoded on a thread pool (one dataset handle per
+# thread — GDAL releases the GIL while decoding), then handed *in order* to
+# the consumers: a value histogram (Tier 4 areas) and a reprojecting writer
+# (Tier 3). The writer keeps a sliding window of source rows and warps each
+# 512-row destination band as soon as the rows it needs have arrived, on the
+# same pool. The source SHA-256 is over file bytes, not pixels, so it runs as
+# one more pool task next to the decode (and is a stat lookup once the
+# fingerprint index knows the file).
+
+BAND_ROWS = 512  # destination band height — matches the Tier 3 block size
+WORKERS = os.cpu_count() or 4
+WORKERS_HELP = f"threads for block decode / histogram / reprojection (default {WORKERS})"
+
+
+class _Timings:
+    """Seconds per stage, summed over threads (so they can exceed wall time)."""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, t0: float) -> None:
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - t0
+
+    def line(self, wall: float, workers: int) -> str:
+        parts = " · ".join(f"{k} {v:.1f} s" for k, v in self.seconds.items())
+        return f"    stages: {parts}  (wall {wall:.1f} s, {workers} workers)"
+
+
+class _Histogram:
+    """Value counts of band 1, summed over blocks."""
+
+    def __init__(self, pool: ThreadPoolExecutor, timings: _Timings) -> None:
+        self.pool, self.timings, self.futures = pool, timings, []
+
+    def feed(self, row_off: int, block: np.ndarray) -> None:
+        self.futures.append(self.pool.submit(self._count, block[0]))
+
+    def _count(self, band: np.ndarray) -> np.ndarray:
+        t0 = time.perf_counter()
+        if band.dtype.kind == "u" and band.dtype.itemsize <= 2:
+            out = np.bincount(band.ravel(), minlength=1 << (8 * band.dtype.itemsize))
+        else:
+            values, counts = np.unique(band, return_counts=True)
+            out = dict(zip(values.tolist(), counts.tolist()))
+        self.timings.add("histogram", t0)
+        return out
+
+    def close(self) -> dict[int, int]:
+        total: dict[int, int] = {}
+        for f in self.futures:
+            part = f.result()
+            items = ((v, c) for v, c in enumerate(part.tolist()) if c) if isinstance(part, np.ndarray) \
+                else part.items()
+            for v, c in items:
+                total[int(v)] = total.get(int(v), 0) + int(c)
+        return total
+
+
+class _Reprojector:
+    """Warp the source into an open destination dataset band by band, as the
+    source rows each band needs stream past (nearest-neighbour, like a single
+    whole-raster ``reproject``)."""
+
+    def __init__(self, src, dst, pool: ThreadPoolExecutor, timings: _Timings) -> None:
+        self.src, self.dst, self.pool, self.timings = src, dst, pool, timings
+        self.nodata = src.nodata
+        self.bands = [self._source_rows(i) for i in range((dst.height + BAND_ROWS - 1) // BAND_ROWS)]
+        # Rows before the smallest start of any band not yet submitted can go.
+        self.keep_from = [min(r0 for r0, _ in self.bands[i:]) for i in range(len(self.bands))]
+        self.next_band = 0
+        self.buffer: list[tuple[int, np.ndarray]] = []   # (row_off, block) in row order
+        self.pending: list = []                            # futures, in band order
+
+    def _source_rows(self, i: int) -> tuple[int, int]:
+        """Source row range [r0, r1) covering destination band ``i``."""
+        if not self.src.transform.is_rectilinear:
+            return 0, self.src.height      # rotated grid: every band sees it all
+        top = i * BAND_ROWS
+        h = min(BAND_ROWS, self.dst.height - top)
+        t = self.dst.transform
+        left, right = t.c, t.c + t.a * self.dst.width
+        ymax, ymin = t.f + t.e * top, t.f + t.e * (top + h)
+        _, sb, _, st = transform_bounds(self.dst.crs, self.src.crs, left, ymin, right, ymax, densify_pts=51)
+        s = self.src.transform
+        r0 = int(np.floor((s.f - st) / -s.e)) - 2
+        r1 = int(np.ceil((s.f - sb) / -s.e)) + 2
+        return max(0, r0), min(self.src.height, r1)
+
+    def feed(self, row_off: int, block: np.ndarray) -> None:
+        self.buffer.append((row_off, block))
+        end = row_off + block.shape[1]
+        while self.next_band < len(self.bands) and (self.bands[self.next_band][1] <= end or
+                                                    end >= self.src.height):
+            self._submit(self.next_band)
+            self.next_band += 1
+            if self.next_band < len(self.bands):
+                keep = self.keep_from[self.next_band]
+                self.buffer = [(o, b) for o, b in self.buffer if o + b.shape[1] > keep]
+        self._drain(block=False)
+
+    def _submit(self, i: int) -> None:
+        r0, r1 = self.bands[i]
+        rows = None
+        if r1 > r0:
+            parts = [b[:, max(r0 - o, 0):min(r1 - o, b.shape[1])] for o, b in self.buffer
+                     if o < r1 and o + b.shape[1] > r0]
+            rows = np.concatenate(parts, axis=1)
+        self.pending.append(self.pool.submit(self._warp, i, r0, rows))
+
+    def _warp(self, i: int, r0: int, rows: np.ndarray | None) -> tuple[int, np.ndarray]:
+        t0 = time.perf_counter()
+        top = i * BAND_ROWS
+        h = min(BAND_ROWS, self.dst.height - top)
+        out = np.full((self.src.count, h, self.dst.width),
+                      self.nodata if self.nodata is not None else 0, dtype=self.src.dtypes[0])
+        if rows is not None:
+            band_transform = rasterio.windows.transform(Window(0, top, self.dst.width, h), self.dst.transform)
+            src_transform = rasterio.windows.transform(Window(0, r0, self.src.width, rows.shape[1]),
+                                                       self.src.transform)
+            reproject(source=rows, destination=out,
+                      src_transform=src_transform, src_crs=self.src.crs, src_nodata=self.nodata,
+                      dst_transform=band_transform, dst_crs=self.dst.crs, dst_nodata=self.nodata,
+                      resampling=Resampling.nearest, num_threads=1)
+        self.timings.add("reproject", t0)
+        return i, out
+
+    def _drain(self, *, block: bool) -> None:
+        # Writes stay on the calling thread (a GDAL dataset is not thread-safe)
+        # and in band order.
+        while self.pending and (block or self.pending[0].done()):
+            i, out = self.pending.pop(0).result()
+            t0 = time.perf_counter()
+            self.dst.write(out, window=Window(0, i * BAND_ROWS, self.dst.width, out.shape[1]))
+            self.timings.add("write", t0)
+
+    def close(self) -> None:
+        while self.next_band < len(self.bands):
+            self._submit(self.next_band)
+            self.next_band += 1
+        self._drain(block=True)
+
+
+def _scan_source(src_path: Path, *, workers: int, histogram: bool = False,
+                 dst_path: Path | None = None, dst_crs: str | None = None,
+                 profile_updates: dict | None = None) -> dict:
+    """Single block-parallel pass over ``src_path``.
+
+    Returns ``{"sha256", "histogram" (if asked), "timings", "wall"}`` and, with
+    ``dst_path``, writes the reprojection of the source to ``dst_crs``.
+    """
+    t_wall = time.perf_counter()
+    timings = _Timings()
+    local = threading.local()
+    handles: list = []
+    handles_lock = threading.Lock()
+
+    def read(window: Window) -> np.ndarray:
+        t0 = time.perf_counter()
+        ds = getattr(local, "ds", None)
+        if ds is None:
+            ds = local.ds = rasterio.open(src_path)
+            with handles_lock:
+                handles.append(ds)
+        block = ds.read(window=window)
+        timings.add("read", t0)
+        return block
+
+    def digest() -> str:
+        t0 = time.perf_counter()
+        out = fingerprint(src_path)
+        timings.add("hash", t0)
+        return out
+
+    result: dict = {}
+    with rasterio.open(src_path) as src, ThreadPoolExecutor(max_workers=workers) as pool:
+        sha_future = pool.submit(digest)
+        block_h = src.block_shapes[0][0]
+        rows = max(block_h, (1024 // block_h) * block_h)
+        windows = [Window(0, off, src.width, min(rows, src.height - off))
+                   for off in range(0, src.height, rows)]
+        consumers: list = []
+        hist = _Histogram(pool, timings) if histogram else None
+        if hist:
+            consumers.append(hist)
+        dst = None
+        if dst_path is not None:
+            dst_transform, w, h = calculate_default_transform(
+                src.crs, dst_crs, src.width, src.height, *src.bounds)
+            profile = src.profile.copy()
+            profile.update(driver="GTiff", crs=dst_crs, transform=dst_transform, width=w, height=h,
+                           **(profile_updates or {}))
+            dst = rasterio.open(dst_path, "w", **profile)
+            consumers.append(_Reprojector(src, dst, pool, timings))
+        try:
+            # Bounded read-ahead keeps memory flat while every worker stays busy.
+            ahead: list = []
+            queue = iter(windows)
+            for win in queue:
+                ahead.append((win, pool.submit(read, win)))
+                if len(ahead) >= 2 * workers:
+                    break
+            while ahead:
+                win, fut = ahead.pop(0)
+                block = fut.result()
+                nxt = next(queue, None)
+                if nxt is not None:
+                    ahead.append((nxt, pool.submit(read, nxt)))
+                for consumer in consumers:
+                    consumer.feed(int(win.row_off), block)
+            for consumer in consumers:
+                out = consumer.close()
+                if consumer is hist:
+                    result["histogram"] = out
+        finally:
+            if dst is not None:
+                dst.close()
+            for ds in handles:
+                ds.close()
+        result["sha256"] = sha_future.result()
+        result["pixel_area_m2"] = abs(src.transform.a * src.transform.e)
+    result["timings"] = timings
+    result["wall"] = time.perf_counter() - t_wall
+    return result
+
+
 # ── Tier 4: constants.json ───────────────────────────────────────────────
 
 def _iceland_total_area_km2() -> tuple[float, dict]:
@@ -96,12 +353,12 @@ def _iceland_total_area_km2() -> tuple[float, dict]:
         raise SystemExit(
             f"Missing {landmask.relative_to(ROOT)} — run: "
             "uv run python scripts/lmi.py download")
-    gdf = gpd.read_file(landmask).to_crs("EPSG:3057")
+    gdf = base_layer("Landmask", "EPSG:3057")   # GeoParquet store, rebuilt if stale
     area_km2 = float(gdf.geometry.area.sum() / 1e6)
     bxs = gdf.total_bounds.tolist()  # [minx, miny, maxx, maxy] in 3057
     return area_km2, {
         "source": str(landmask.relative_to(ROOT)).replace("\\", "/"),
-        "sha256": sha256_file(landmask),
+        "sha256": fingerprint(landmask),
         "n_features": int(len(gdf)),
         "bbox_3057": bxs,
     }
@@ -125,27 +382,40 @@ def _bbox_in_other_crses(bbox_3057: list[float]) -> dict:
     return out
 
 
-def _hrl_value_count(src_path: Path, value: int) -> tuple[int, float]:
+def _hrl_value_count(src_path: Path, value: int, *, workers: int) -> tuple[int, float]:
     """Return (pixel_count, area_km2) of ``value`` in the source raster.
 
-    Reads in 4096-row chunks so the 826 MB TIFF doesn't materialise in RAM.
+    A histogram-only block scan (``_scan_source``) — the 826 MB TIFF never
+    materialises in RAM.
     """
-    with rasterio.open(src_path) as src:
-        px_area_m2 = abs(src.transform.a * src.transform.e)
-        block_h = 4096
-        total = 0
-        for off in range(0, src.height, block_h):
-            h = min(block_h, src.height - off)
-            window = rasterio.windows.Window(0, off, src.width, h)
-            arr = src.read(1, window=window)
-            total += int((arr == value).sum())
-    return total, total * px_area_m2 / 1e6
+    scan = _scan_source(src_path, workers=workers, histogram=True)
+    print(scan["timings"].line(scan["wall"], workers), file=sys.stderr)
+    total = scan["histogram"].get(value, 0)
+    return total, total * scan["pixel_area_m2"] / 1e6
+
+
+def _raster_value_count(short: str, sha: str, value: int) -> tuple[int, float] | None:
+    """The value count a Tier 3 build of ``short`` already took from ``sha``
+    (the rasters pass histograms every block it reads), or None."""
+    side = RASTERS_DIR / f"{short}.json"
+    if not side.exists():
+        return None
+    meta = json.loads(side.read_text(encoding="utf-8"))
+    counts = meta.get("value_counts")
+    if meta.get("source_sha256") != sha or counts is None:
+        return None
+    total = int(counts.get(str(value), 0))
+    return total, total * meta["pixel_area_m2"] / 1e6
 
 
 def cmd_constants(args: argparse.Namespace) -> None:
+    build_constants(force=args.force, workers=args.workers)
+
+
+def build_constants(*, force: bool, workers: int) -> None:
     print("Building Tier 4 constants ...", file=sys.stderr)
     t0 = time.perf_counter()
-    existing = _load_existing_constants() if not args.force else {}
+    existing = _load_existing_constants() if not force else {}
 
     out: dict = {"version": 1, "built_at": _now()}
 
@@ -164,20 +434,26 @@ def cmd_constants(args: argparse.Namespace) -> None:
             print(f"  [skip] {short}: source {src.relative_to(ROOT)} absent",
                   file=sys.stderr)
             continue
-        sha = sha256_file(src)
+        sha = fingerprint(src)
         prev = (existing.get("hrl_sources") or {}).get(short, {})
-        if not args.force and prev.get("source_sha256") == sha and \
+        if not force and prev.get("source_sha256") == sha and \
                 prev.get("area_km2") is not None:
             print(f"  [reuse] {short}: source unchanged", file=sys.stderr)
             out["hrl_sources"][short] = prev
             continue
         if meta.get("compute_areas"):
-            print(f"  computing {short} value-{meta['value_for_area']} area ...",
-                  file=sys.stderr)
-            cnt, akm = _hrl_value_count(src, meta["value_for_area"])
+            counted = _raster_value_count(short, sha, meta["value_for_area"])
+            if counted is not None:
+                print(f"  {short}: value counts from the Tier 3 build", file=sys.stderr)
+                cnt, akm = counted
+            else:
+                print(f"  computing {short} value-{meta['value_for_area']} area ...",
+                      file=sys.stderr)
+                cnt, akm = _hrl_value_count(src, meta["value_for_area"], workers=workers)
             out["hrl_sources"][short] = {
                 "source": str(src.relative_to(ROOT)).replace("\\", "/"),
                 "source_sha256": sha,
+                "source_partial": fingerprint(src, partial=True),
                 "value": meta["value_for_area"],
                 "pixel_count": cnt,
                 "area_km2": akm,
@@ -192,66 +468,98 @@ def cmd_constants(args: argparse.Namespace) -> None:
 
 # ── Tier 3: derived rasters ──────────────────────────────────────────────
 
-def _build_one_raster(short: str, meta: dict, *, force: bool) -> dict | None:
+OVERVIEW_MIN_PX = 512   # stop halving once a level's short side drops below this
+
+
+def _overview_factors(height: int, width: int) -> list[int]:
+    factors, f = [], 2
+    while min(height, width) // f >= OVERVIEW_MIN_PX:
+        factors.append(f)
+        f *= 2
+    return factors
+
+
+def _build_overviews(out: Path, meta: dict, *, workers: int, timings: _Timings) -> dict:
+    """Add internal overview levels (2×, 4×, … down to OVERVIEW_MIN_PX) to a
+    Tier 3 raster, so renders read the coarsest level that still covers their
+    output shape (``utils.cache.open_cached_raster``) instead of decimating
+    every full-resolution block. Returns the sidecar fields."""
+    t0 = time.perf_counter()
+    resampling = meta.get("overview_resampling", "nearest")
+    with rasterio.Env(GDAL_NUM_THREADS=workers, COMPRESS_OVERVIEW="LZW", PREDICTOR_OVERVIEW=2), \
+            rasterio.open(out, "r+") as d:
+        factors = _overview_factors(d.height, d.width)
+        if factors:
+            d.build_overviews(factors, Resampling[resampling])
+            d.update_tags(ns="rio_overview", resampling=resampling)
+    timings.add("overviews", t0)
+    print(f"    overviews {factors or 'none'} ({resampling}, "
+          f"{time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+    return {"overviews": factors, "overview_resampling": resampling}
+
+
+def _build_one_raster(short: str, meta: dict, *, force: bool, workers: int) -> dict | None:
     src = RAW_HRL / meta["src"]
     if not src.exists():
         print(f"  [skip] {short}: source absent", file=sys.stderr)
         return None
     out = RASTERS_DIR / f"{short}.tif"
     side = out.with_suffix(".json")
-    sha = sha256_file(src)
     if not force and out.exists() and side.exists():
         prev = json.loads(side.read_text(encoding="utf-8"))
-        if prev.get("source_sha256") == sha:
+        # An untouched source answers from the fingerprint index; a touched
+        # one whose sampled digest moved is rebuilt without a serial rehash
+        # (the scan hashes it alongside the reprojection). Only a touched
+        # source whose samples still match needs the full digest here.
+        sha = known_fingerprint(src)
+        if sha is None and fingerprint(src, partial=True) == prev.get("source_partial"):
+            sha = fingerprint(src)
+        if sha is not None and prev.get("source_sha256") == sha:
             print(f"  [reuse] {short}: cached raster matches source",
                   file=sys.stderr)
+            if "overviews" not in prev:     # built before pyramids existed
+                prev.update(_build_overviews(out, meta, workers=workers, timings=_Timings()))
+                side.write_text(json.dumps(prev, indent=2), encoding="utf-8")
             return prev
     out.parent.mkdir(parents=True, exist_ok=True)
     print(f"  reprojecting {short}: {src.name} → {out.name}", file=sys.stderr)
+    # Destination grid sized to the source's pixel scale (preserve ground
+    # resolution as closely as possible); the same pass histograms the
+    # source so ``constants`` doesn't read it again.
     t0 = time.perf_counter()
-    with rasterio.open(src) as s:
-        # Choose a destination grid sized to the source's pixel scale (preserve
-        # ground resolution as closely as possible).
-        dst_transform, w, h = calculate_default_transform(
-            s.crs, meta["dst_crs"], s.width, s.height, *s.bounds,
-        )
-        profile = s.profile.copy()
-        profile.update(
-            driver="GTiff",
-            crs=meta["dst_crs"],
-            transform=dst_transform,
-            width=w,
-            height=h,
-            compress="lzw",
-            predictor=2,        # delta predictor, halves the size on uint8
-            tiled=True,
-            blockxsize=512,
-            blockysize=512,
-        )
-        with rasterio.open(out, "w", **profile) as d:
-            for b in range(1, s.count + 1):
-                reproject(
-                    source=rasterio.band(s, b),
-                    destination=rasterio.band(d, b),
-                    src_transform=s.transform, src_crs=s.crs,
-                    dst_transform=dst_transform, dst_crs=meta["dst_crs"],
-                    resampling=Resampling.nearest,
-                    num_threads=4,
-                )
+    scan = _scan_source(
+        src, workers=workers, histogram=bool(meta.get("compute_areas")),
+        dst_path=out, dst_crs=meta["dst_crs"],
+        profile_updates={
+            "compress": "lzw",
+            "predictor": 2,     # delta predictor, halves the size on uint8
+            "tiled": True,
+            "blockxsize": BAND_ROWS,
+            "blockysize": BAND_ROWS,
+            "num_threads": workers,  # GDAL compresses tiles on its own pool
+        },
+    )
+    pyramid = _build_overviews(out, meta, workers=workers, timings=scan["timings"])
     dt = time.perf_counter() - t0
     sidecar = {
         "source": str(src.relative_to(ROOT)).replace("\\", "/"),
-        "source_sha256": sha,
+        "source_sha256": scan["sha256"],
+        "source_partial": fingerprint(src, partial=True),
         "dst_crs": meta["dst_crs"],
         "compress": "lzw",
         "built_in_seconds": round(dt, 1),
         "size_bytes": out.stat().st_size,
         "src_bytes": src.stat().st_size,
+        "pixel_area_m2": scan["pixel_area_m2"],
+        **pyramid,
     }
+    if "histogram" in scan:
+        sidecar["value_counts"] = {str(v): c for v, c in sorted(scan["histogram"].items())}
     side.write_text(json.dumps(sidecar, indent=2), encoding="utf-8")
     print(f"    wrote {out.name}  "
           f"{src.stat().st_size / 1e6:.0f} MB → {out.stat().st_size / 1e6:.0f} MB  "
           f"({dt:.1f} s)", file=sys.stderr)
+    print(scan["timings"].line(dt, workers), file=sys.stderr)
     return sidecar
 
 
@@ -265,14 +573,327 @@ def cmd_rasters(args: argparse.Namespace) -> None:
                              f"choices: {sorted(HRL_SOURCES)}")
     RASTERS_DIR.mkdir(parents=True, exist_ok=True)
     for short, meta in targets:
-        _build_one_raster(short, meta, force=args.force)
+        _build_one_raster(short, meta, force=args.force, workers=args.workers)
+
+
+# ── derived-cache graph ──────────────────────────────────────────────────
+#
+# Every derived map input is a node: the file it writes, the files it reads
+# (``inputs``), the nodes it reads (``deps``), a build function and the
+# parameters that function bakes in. A node is dirty when its output is
+# missing, its params changed, or the SHA-256 of an input or dep output
+# differs from the one recorded in data/cache/graph.json at its last build —
+# one staleness rule for every tier. ``run_graph`` builds only dirty nodes,
+# each after its deps, and runs independent nodes concurrently.
+
+GRAPH_PATH = CACHE / "graph.json"
+GRAVPI_RAW = RAW_HRL / "gravpi_full.tif"
+
+# Habitat masks the maps read (agricultural_land_map.py: L14.2 Tún og akurlendi).
+NATT_MASKS: dict[str, dict] = {
+    "vistgerd_dn95_50m": {"dn": 95, "res_m": 50.0},
+}
+
+# Class rasters cut into PNG tile pyramids for the Leaflet pages, keyed by the
+# node that writes them (RGBA per pixel value; other values are transparent).
+# The GRAVPI palette is the EEA legend, added in ``graph()``.
+RASTER_TILES: dict[str, dict] = {
+    "grassland_isn93": {"palette": {1: (46, 139, 87, 190)}, "label": "Graslendi (HRL)"},
+    "vistgerd_dn95_50m": {"palette": {1: (211, 84, 0, 190)}, "label": "Tún og akurlendi (NÍ L14.2)"},
+}
+
+
+@dataclass
+class Node:
+    """One derived artifact. ``remote`` nodes download their output; they
+    build only when it is missing or their params change, and only with
+    ``--fetch`` — a plain ``all`` never starts a 30-minute WCS mosaic."""
+
+    name: str
+    output: Path
+    build: Callable[[Node, bool, int], object]   # (node, force, workers)
+    inputs: tuple[Path, ...] = ()
+    deps: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()     # order-only: rebuilt after these, never blocked by them
+    params: dict = field(default_factory=dict)
+    remote: bool = False
+    hint: str = ""
+
+
+def _raster_node(node: Node, force: bool, workers: int) -> None:
+    _build_one_raster(node.name, HRL_SOURCES[node.name], force=force, workers=workers)
+
+
+def _constants_node(node: Node, force: bool, workers: int) -> None:
+    build_constants(force=force, workers=workers)
+
+
+def _natt_mask_node(node: Node, force: bool, workers: int) -> None:
+    import natt
+
+    natt.build_mask(node.params["dn"], node.params["res_m"])
+
+
+def _gravpi_fetch_node(node: Node, force: bool, workers: int) -> None:
+    import grassland_probability_heatmap as ghm
+
+    node.output.unlink(missing_ok=True)      # fetch_gravpi reuses an existing file
+    ghm.fetch_gravpi(node.output)
+
+
+def _gravpi_prob_node(node: Node, force: bool, workers: int) -> None:
+    import grassland_probability_heatmap as ghm
+
+    ghm.build_prob_3057(GRAVPI_RAW)
+
+
+def _vector_tiles_node(node: Node, force: bool, workers: int) -> None:
+    tiles.build_layer_tiles(node.params["layer"], zooms=tuple(node.params["zooms"]), force=force)
+
+
+def _raster_tiles_node(node: Node, force: bool, workers: int) -> None:
+    p = node.params
+    palette = {int(k): tuple(v) for k, v in p["palette"].items()}
+    source = ROOT / p["source"]
+    sha = None
+    if source.suffix == ".npy":
+        from rasterio.transform import from_bounds
+
+        codes, meta = cached_array(source.stem)
+        xmin, xmax, ymin, ymax = meta["extent"]
+        source = (codes, from_bounds(xmin, ymin, xmax, ymax, codes.shape[1], codes.shape[0]),
+                  p["crs"])
+        sha = fingerprint(ROOT / p["source"])
+    tiles.build_raster_tiles(node.name.split(":", 1)[1], source, palette, source_sha256=sha,
+                             label=p["label"], zooms=tuple(p["zooms"]), force=force)
+
+
+def graph() -> dict[str, Node]:
+    """Every derived artifact, keyed by name, in dependency order."""
+    import grassland_probability_heatmap as ghm
+    import natt
+
+    nodes = [
+        Node(short, RASTERS_DIR / f"{short}.tif", _raster_node,
+             inputs=(RAW_HRL / meta["src"],),
+             params={k: v for k, v in meta.items() if k != "fetch"},
+             hint=meta.get("fetch", ""))
+        for short, meta in HRL_SOURCES.items()
+    ]
+    # Ordered after the rasters, whose sidecars carry the value counts, so
+    # constants never rescans a source the rasters just read — but still
+    # built (Iceland area + bboxes) when an HRL source hasn't been fetched.
+    nodes.append(Node("constants", CONSTANTS_PATH, _constants_node,
+                      inputs=(GEODATA / "Landmask.geojson",), after=tuple(HRL_SOURCES),
+                      params={"bbox_crses": BBOX_CRSES},
+                      hint="uv run python scripts/lmi.py download"))
+    for name, spec in NATT_MASKS.items():
+        # build_mask cuts the mask out of the all-codes class raster when one
+        # is on disk (natt.py classes) and only fetches otherwise. While that
+        # raster exists it is the node's input and the build is local;
+        # (re)fetching it rebuilds the mask from it.
+        classes = natt.class_raster_path(spec["res_m"])
+        local = classes.exists()
+        nodes.append(Node(name, natt.mask_path(spec["dn"], spec["res_m"]), _natt_mask_node,
+                          inputs=(classes,) if local else (),
+                          params=spec, remote=not local,
+                          hint=f"uv run python scripts/natt.py habitat --dn {spec['dn']} "
+                               f"--res {spec['res_m']:g}"))
+    nodes.append(Node("gravpi_full", GRAVPI_RAW, _gravpi_fetch_node, remote=True,
+                      params={"bbox_3857": ghm.BBOX_3857, "size": [ghm.WMS_W, ghm.WMS_H]},
+                      hint="build_cache.py build gravpi_full --fetch"))
+    nodes.append(Node(ghm.PROB_CACHE, ARRAYS_DIR / f"{ghm.PROB_CACHE}.npy", _gravpi_prob_node,
+                      deps=("gravpi_full",),
+                      params={"legend": ghm.LEGEND_PROB.tolist(), "dst": [ghm.DST_W, ghm.DST_H],
+                              "max_swatch_dist_sq": ghm.MAX_SWATCH_DIST_SQ}))
+    # Tile pyramids: one per LMI layer, one per class raster above.
+    for layer in tiles.VECTOR_LAYERS:
+        nodes.append(Node(f"tiles:{layer}", tiles.manifest_path(layer), _vector_tiles_node,
+                          inputs=(GEODATA / f"{layer}.geojson",),
+                          params={"layer": layer, "zooms": tiles.VECTOR_ZOOMS,
+                                  "version": tiles.TILES_VERSION},
+                          hint="uv run python scripts/lmi.py download"))
+    raster_tiles = {**RASTER_TILES, ghm.PROB_CACHE: {
+        "palette": {i + 1: (*rgb, 200) for i, rgb in enumerate(ghm.LEGEND_RGB.tolist())},
+        "label": "Líkur á graslendi (GRAVPI)"}}
+    by_name = {n.name: n for n in nodes}
+    for name, spec in raster_tiles.items():
+        nodes.append(Node(f"tiles:{name}", tiles.manifest_path(name), _raster_tiles_node,
+                          deps=(name,),
+                          params={**spec, "source": _rel(by_name[name].output),
+                                  "crs": "EPSG:3057", "zooms": tiles.RASTER_ZOOMS,
+                                  "version": tiles.TILES_VERSION}))
+    return _toposort({n.name: n for n in nodes})
+
+
+def _toposort(nodes: dict[str, Node]) -> dict[str, Node]:
+    order: dict[str, Node] = {}
+    visiting: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"cache graph has a cycle through {name!r}")
+        if name not in nodes:
+            raise ValueError(f"cache graph: unknown dependency {name!r}")
+        visiting.add(name)
+        for dep in (*nodes[name].deps, *nodes[name].after):
+            visit(dep)
+        visiting.discard(name)
+        order[name] = nodes[name]
+
+    for name in nodes:
+        visit(name)
+    return order
+
+
+def _closure(nodes: dict[str, Node], targets: list[str]) -> list[str]:
+    """``targets`` plus everything they depend on, in dependency order."""
+    want: set[str] = set()
+    stack = list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in nodes:
+            raise SystemExit(f"unknown node {name!r}; choices: {list(nodes)}")
+        if name not in want:
+            want.add(name)
+            stack.extend((*nodes[name].deps, *nodes[name].after))
+    return [n for n in nodes if n in want]
+
+
+def _load_records() -> dict:
+    if GRAPH_PATH.exists():
+        return json.loads(GRAPH_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def _node_inputs(node: Node, nodes: dict[str, Node]) -> list[Path]:
+    return [*node.inputs, *(nodes[d].output for d in node.deps)]
+
+
+def _params(node: Node) -> dict:
+    return json.loads(json.dumps(node.params))   # tuples → lists, as stored
+
+
+def _dirty(node: Node, nodes: dict[str, Node], records: dict, *, fast: bool = False) -> str | None:
+    """Why ``node`` needs a rebuild, or None when it is up to date."""
+    if not node.output.exists():
+        return "output missing"
+    rec = records.get(node.name)
+    if rec is None:
+        # A download predating the graph is adopted as is; a local build is
+        # redone once so its inputs get recorded (the step's own sidecar
+        # check usually makes that a reuse).
+        return None if node.remote else "no build record"
+    if rec.get("params") != _params(node):
+        return "params changed"
+    for p in _node_inputs(node, nodes):
+        prev = rec["inputs"].get(_rel(p))
+        if not p.exists() or prev is None:
+            return f"input {p.name} {'missing' if not p.exists() else 'added'}"
+        if _source_changed(p, prev, fast=fast):
+            return f"{p.name} changed"
+    return None
+
+
+def _record(node: Node, nodes: dict[str, Node], seconds: float | None) -> dict:
+    return {
+        "output": _rel(node.output),
+        "params": _params(node),
+        "inputs": {_rel(p): {"source_sha256": fingerprint(p),
+                             "source_partial": fingerprint(p, partial=True)}
+                   for p in _node_inputs(node, nodes)},
+        "built_at": _now(),
+        "seconds": seconds,
+    }
+
+
+def run_graph(targets: list[str] | None = None, *, force: bool = False,
+              workers: int = WORKERS, fetch: bool = False) -> dict[str, str]:
+    """Bring ``targets`` (default: every node) and their deps up to date.
+
+    Returns ``{node: "clean" | "built" | "skipped" | "blocked" | "failed"}``.
+    A node starts as soon as its deps are settled, so independent branches
+    (the HRL rasters vs. the GRAVPI decode) build side by side.
+    """
+    nodes = graph()
+    wanted = _closure(nodes, targets or list(nodes))
+    records = _load_records()
+    lock = threading.Lock()
+    status: dict[str, str] = {}
+
+    def visit(name: str) -> str:
+        node = nodes[name]
+        if any(status[d] in ("skipped", "blocked", "failed") for d in node.deps):
+            print(f"  [blocked] {name}: waiting on {', '.join(node.deps)}", file=sys.stderr)
+            return "blocked"
+        missing = [p for p in node.inputs if not p.exists()]
+        if missing:
+            print(f"  [blocked] {name}: {_rel(missing[0])} absent"
+                  f"{'  → ' + node.hint if node.hint else ''}", file=sys.stderr)
+            return "blocked"
+        reason = _dirty(node, nodes, records)
+        rebuilt = [a for a in node.after if status.get(a) == "built"]
+        if reason is None and rebuilt:
+            reason = f"after {', '.join(rebuilt)} rebuilt"
+        if force and not node.remote:
+            reason = reason or "--force"
+        if reason is None:
+            if name not in records:
+                with lock:
+                    records[name] = _record(node, nodes, None)
+                    _atomic_write_json(GRAPH_PATH, records)
+            return "clean"
+        if node.remote and not fetch:
+            print(f"  [skip] {name}: {reason} — remote; pass --fetch or run: {node.hint}",
+                  file=sys.stderr)
+            return "skipped"
+        print(f"  [build] {name}: {reason}", file=sys.stderr)
+        t0 = time.perf_counter()
+        # Without a record the step's own sidecar check may still reuse its
+        # output; any other reason means the graph knows the output is stale.
+        node.build(node, reason != "no build record", workers)
+        rec = _record(node, nodes, round(time.perf_counter() - t0, 1))
+        with lock:
+            records[name] = rec
+            _atomic_write_json(GRAPH_PATH, records)
+        return "built"
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(wanted)))) as pool:
+        pending = list(wanted)
+        running: dict = {}
+        while pending or running:
+            for name in [n for n in pending
+                         if all(d in status for d in (*nodes[n].deps, *nodes[n].after))]:
+                pending.remove(name)
+                running[pool.submit(visit, name)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    status[name] = fut.result()
+                except (Exception, SystemExit) as e:
+                    print(f"  [failed] {name}: {type(e).__name__}: {e}", file=sys.stderr)
+                    status[name] = "failed"
+    return {n: status[n] for n in wanted}
+
+
+def cmd_build(args: argparse.Namespace) -> None:
+    t0 = time.perf_counter()
+    status = run_graph(args.nodes or None, force=args.force, workers=args.workers,
+                       fetch=args.fetch)
+    print(f"\nGraph: " + ", ".join(f"{n} {s}" for n, s in status.items())
+          + f"  ({time.perf_counter() - t0:.1f} s)", file=sys.stderr)
+    if "failed" in status.values():
+        raise SystemExit(1)
 
 
 # ── all + status ─────────────────────────────────────────────────────────
 
 def cmd_all(args: argparse.Namespace) -> None:
-    cmd_rasters(args)
-    cmd_constants(args)
+    args.nodes = [args.only] if args.only else []
+    cmd_build(args)
 
 
 def _status_line(label: str, exists: bool, *, hint: str = "") -> str:
@@ -280,7 +901,16 @@ def _status_line(label: str, exists: bool, *, hint: str = "") -> str:
     return f"  [{badge}] {label}{('   ' + hint) if hint and not exists else ''}"
 
 
-def cmd_status(_: argparse.Namespace) -> None:
+def _source_changed(src: Path, meta: dict, *, fast: bool) -> bool:
+    """Whether ``src`` differs from what ``meta`` was built from. Digests come
+    from the fingerprint index, so an untouched source costs one ``stat``;
+    ``fast`` compares the sampled digest instead of rehashing a touched one."""
+    if fast and meta.get("source_partial"):
+        return fingerprint(src, partial=True) != meta["source_partial"]
+    return fingerprint(src) != meta["source_sha256"]
+
+
+def cmd_status(args: argparse.Namespace) -> None:
     print(f"Cache root: {CACHE.relative_to(ROOT) if CACHE.exists() else 'data/cache'}\n",
           file=sys.stderr)
     print(_status_line(f"constants.json", CONSTANTS_PATH.exists(),
@@ -304,12 +934,13 @@ def cmd_status(_: argparse.Namespace) -> None:
             if ok:
                 meta = json.loads(side.read_text(encoding="utf-8"))
                 src = ROOT / meta["source"]
-                if src.exists():
-                    cur = sha256_file(src)
-                    if cur != meta["source_sha256"]:
-                        stale = "  (STALE — source changed)"
+                if src.exists() and _source_changed(src, meta, fast=args.fast):
+                    stale = "  (STALE — source changed)"
                 size_mb = tif.stat().st_size / 1e6
-                print(f"  [ OK ] rasters/{short}.tif  ({size_mb:.0f} MB){stale}")
+                levels = meta.get("overviews")
+                pyramid = (f", overviews {levels[0]}–{levels[-1]}×" if levels
+                           else ", no overviews — rebuild with: build_cache.py rasters")
+                print(f"  [ OK ] rasters/{short}.tif  ({size_mb:.0f} MB{pyramid}){stale}")
             else:
                 print(_status_line(f"rasters/{short}.tif", False,
                                    hint=f"→ build_cache.py rasters --only {short}"))
@@ -321,7 +952,34 @@ def cmd_status(_: argparse.Namespace) -> None:
     if ARRAYS_DIR.exists():
         for npy in sorted(ARRAYS_DIR.glob("*.npy")):
             size_mb = npy.stat().st_size / 1e6
-            print(f"  [ OK ] arrays/{npy.name}  ({size_mb:.1f} MB)")
+            side = npy.with_suffix(".json")
+            meta = json.loads(side.read_text(encoding="utf-8")) if side.exists() else {}
+            kind = meta.get("dtype", "?") + (" + LUT" if "lut" in meta else "")
+            print(f"  [ OK ] arrays/{npy.name}  ({size_mb:.1f} MB, {kind})")
+
+    _print_graph(fast=args.fast)
+
+
+def _print_graph(*, fast: bool) -> None:
+    nodes = graph()
+    records = _load_records()
+    print(f"\nGraph ({_rel(GRAPH_PATH)}):")
+    dirty: set[str] = set()
+    for name, node in nodes.items():
+        reason = _dirty(node, nodes, records, fast=fast)
+        upstream = [d for d in (*node.deps, *node.after) if d in dirty]
+        if reason is None and upstream:
+            reason = f"after {', '.join(upstream)}"
+        if reason is not None:
+            dirty.add(name)
+        badge = " OK " if reason is None else ("miss" if reason == "output missing" else "STALE")
+        sources = [_rel(p) for p in node.inputs] + list(node.deps)
+        after = f"  (after {', '.join(node.after)})" if node.after else ""
+        print(f"  [{badge}] {name}{'  (remote)' if node.remote else ''}"
+              f"  ← {', '.join(sources) or 'network'}{after}")
+        if reason is not None:
+            print(f"          {reason}  → "
+                  f"{node.hint if node.remote else 'build_cache.py build ' + name}")
 
 
 # ── CLI ──────────────────────────────────────────────────────────────────
@@ -334,19 +992,34 @@ def main() -> None:
     c = sp.add_parser("constants", help="rebuild Tier 4 constants.json")
     c.add_argument("--force", action="store_true",
                    help="ignore cached values, recompute everything")
+    c.add_argument("--workers", type=int, default=WORKERS, help=WORKERS_HELP)
     c.set_defaults(fn=cmd_constants)
 
     r = sp.add_parser("rasters", help="rebuild Tier 3 derived rasters")
     r.add_argument("--force", action="store_true")
     r.add_argument("--only", help=f"build only this entry: {sorted(HRL_SOURCES)}")
+    r.add_argument("--workers", type=int, default=WORKERS, help=WORKERS_HELP)
     r.set_defaults(fn=cmd_rasters)
 
-    a = sp.add_parser("all", help="constants + rasters")
-    a.add_argument("--force", action="store_true")
-    a.add_argument("--only", default=None)
+    a = sp.add_parser("all", help="every dirty node of the cache graph")
+    a.add_argument("--force", action="store_true",
+                   help="rebuild every local node, dirty or not")
+    a.add_argument("--only", default=None, help="just this node and what it depends on")
+    a.add_argument("--fetch", action="store_true",
+                   help="also download missing remote inputs (HRL WMS, NÍ WCS masks)")
+    a.add_argument("--workers", type=int, default=WORKERS, help=WORKERS_HELP)
     a.set_defaults(fn=cmd_all)
 
+    b = sp.add_parser("build", help="bring named graph nodes (and their deps) up to date")
+    b.add_argument("nodes", nargs="*", help="node names (default: all) — see status")
+    b.add_argument("--force", action="store_true")
+    b.add_argument("--fetch", action="store_true")
+    b.add_argument("--workers", type=int, default=WORKERS, help=WORKERS_HELP)
+    b.set_defaults(fn=cmd_build)
+
     s = sp.add_parser("status", help="show what is cached / stale / missing")
+    s.add_argument("--fast", action="store_true",
+                   help="compare sampled (partial) digests for sources touched since the last hash")
     s.set_defaults(fn=cmd_status)
 
     args = ap.parse_args()
@@ -35,6 +35,10 @@ from pathlib import Path
 import httpx
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.bench import register  # noqa: E402
+from utils.profiling import add_profile_argument, profiled, span  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 
@@ -72,9 +76,12 @@ def get_json(code: str, filters: dict[str, str], retries: int = 3) -> dict:
     url = f"{BASE}/{code}"
     for attempt in range(retries):
         try:
-            r = httpx.get(url, params=params, timeout=60, follow_redirects=True)
-            r.raise_for_status()
-            return r.json()
+            with span("network", code) as s:
+                r = httpx.get(url, params=params, timeout=60, follow_redirects=True)
+                r.raise_for_status()
+                s.add(bytes=len(r.content))
+            with span("parse", f"{code} json"):
+                return r.json()
         except httpx.HTTPStatusError as e:
             if attempt == retries - 1:
                 raise
@@ -117,6 +124,37 @@ def json_stat_to_long(js: dict) -> pl.DataFrame:
     return pl.DataFrame(rows)
 
 
+def _bench_response(sizes=(1, 5, 3, 40, 60)) -> str:
+    """A json-stat2 body shaped like a prc_/nama_ response: freq × unit ×
+    sex × geo × time, ~5% of cells missing, as the API's text."""
+    import json
+    import random
+
+    rnd = random.Random(0)
+    dims = ["freq", "unit", "sex", "geo", "time"]
+    dimension = {
+        d: {"category": {"index": {f"{d}{i}": i for i in range(n)},
+                         "label": {f"{d}{i}": f"{d} {i}" for i in range(n)}}}
+        for d, n in zip(dims, sizes)
+    }
+    total = 1
+    for n in sizes:
+        total *= n
+    value = {str(i): round(rnd.random() * 100, 1) for i in range(total) if rnd.random() > 0.05}
+    return json.dumps({"id": dims, "size": list(sizes), "dimension": dimension, "value": value})
+
+
+@register("json_stat", setup=_bench_response)
+def _bench_json_stat(stage, text):
+    """json-stat2 → long rows for a 36k-cell Eurostat-shaped response."""
+    import json
+
+    with stage("decode"):
+        js = json.loads(text)
+    with stage("flatten"):
+        json_stat_to_long(js)
+
+
 def cmd_list(_args=None):
     for code, meta in DATASETS.items():
         print(f"{code}\n    {meta['title']}\n    dims: {meta['dims']}")
@@ -134,15 +172,20 @@ def cmd_fetch(args):
         filters[k.strip()] = v.strip()
     print(f"Fetching {args.dataset} {filters}", file=sys.stderr)
     js = get_json(args.dataset, filters)
-    df = json_stat_to_long(js)
+    with span("transform", "json_stat_to_long") as s:
+        df = json_stat_to_long(js)
+        s.add(rows=df.height)
     out = Path(args.out) if args.out else OUT_DIR / f"{args.dataset}.csv"
-    df.write_csv(out)
+    with span("write", out.name) as s:
+        df.write_csv(out)
+        s.add(bytes=out.stat().st_size, rows=df.height)
     print(f"→ {out} ({df.height} rows × {df.width} cols)", file=sys.stderr)
     print(df.head(3))
 
 
 def main():
     ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_profile_argument(ap)
     sub = ap.add_subparsers(dest="cmd", required=True)
 
     pl_ = sub.add_parser("list", help="curated Eurostat datasets used in this repo")
@@ -156,7 +199,8 @@ def main():
     pf.set_defaults(func=cmd_fetch)
 
     args = ap.parse_args()
-    args.func(args)
+    with profiled("eurostat", args.profile):
+        args.func(args)
 
 
 if __name__ == "__main__":
@@ -13,6 +13,9 @@ import json
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 if hasattr(sys.stderr, "reconfigure"):
@@ -30,46 +33,39 @@ def embed_url() -> str:
     return f"https://app.powerbi.com/view?r={token}"
 
 
-async def _scrape() -> list[dict]:
-    from playwright.async_api import async_playwright
-
+async def _scrape(pool: BrowserPool | None = None) -> list[dict]:
     url = embed_url()
     results: list[dict] = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            page = await browser.new_page()
-
-            async def on_response(r):
-                u = r.url.lower()
-                wanted = (
-                    u.startswith("blob:")
-                    or "querydata" in u
-                    or "executequeries" in u
-                    or "modelsandexploration" in u
-                    or "conceptualschema" in u
-                    or "resourcepackage" in u
-                )
-                if wanted and r.status == 200:
-                    try:
-                        body = await r.json()
-                        results.append({"url": r.url, "body": body})
-                        return
-                    except Exception:
-                        pass
-                    try:
-                        text = await r.text()
-                        if text:
-                            results.append({"url": r.url, "text": text[:200000]})
-                    except Exception:
-                        pass
-
-            page.on("response", on_response)
-            print(f"Loading {url}", file=sys.stderr)
-            await page.goto(url, wait_until="networkidle", timeout=90000)
-            await asyncio.sleep(25)
-        finally:
-            await browser.close()
+    async with borrow_page(pool) as page:
+
+        async def on_response(r):
+            u = r.url.lower()
+            wanted = (
+                u.startswith("blob:")
+                or "querydata" in u
+                or "executequeries" in u
+                or "modelsandexploration" in u
+                or "conceptualschema" in u
+                or "resourcepackage" in u
+            )
+            if wanted and r.status == 200:
+                try:
+                    body = await r.json()
+                    results.append({"url": r.url, "body": body})
+                    return
+                except Exception:
+                    pass
+                try:
+                    text = await r.text()
+                    if text:
+                        results.append({"url": r.url, "text": text[:200000]})
+                except Exception:
+                    pass
+
+        page.on("response", on_response)
+        print(f"Loading {url}", file=sys.stderr)
+        await page.goto(url, wait_until="networkidle", timeout=90000)
+        await asyncio.sleep(25)
     return results
 
 
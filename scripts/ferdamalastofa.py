@@ -14,11 +14,16 @@ Usage:
 import argparse
 import asyncio
 import json
+import sys
 from datetime import datetime
 from pathlib import Path
 
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import powerbi as pb  # noqa: E402
+from utils.browser import USER_AGENT, BrowserPool, borrow_page  # noqa: E402
+
 BASE_URL = "https://www.maelabordferdathjonustunnar.is"
 
 RAW_DIR = Path(__file__).parent.parent / "data" / "raw" / "ferdamalastofa"
@@ -53,69 +58,35 @@ DASHBOARDS = {
 # ---------------------------------------------------------------------------
 
 def decompress_dsr(dsr_data: dict) -> list[dict]:
-    """Decompress Power BI DSR format with ValueDicts and repeat flags.
+    """Decompress a Power BI DSR into flat row dicts via `powerbi.DSRDecoder`.
 
-    Power BI compresses data by:
-    1. ValueDicts: shared string arrays referenced by index (C field)
-    2. R (repeat): bitmask indicating which G values repeat from previous row
-    3. Ø (null): marks null/missing values
+    Every DM level is emitted (hierarchical visuals nest DM1 rows under DM0);
+    each row carries its ancestors' columns, its own DSR columns (G0, M0, …,
+    with ValueDicts, R repeats and Ø nulls resolved) and each matrix cell of
+    `X` flattened to `X{i}_{key}`.
     """
-    value_dicts = dsr_data.get("ValueDicts", {})
     all_rows = []
+    for r in pb.DSRDecoder().dsr(dsr_data):
+        current = {}
+        for node in _lineage(r):
+            current.update(node.values)
+        for xi, x in enumerate(r.X):
+            if isinstance(x, dict):
+                for mk, mv in x.items():
+                    current[f"X{xi}_{mk}"] = mv
+            else:
+                current[f"X{xi}"] = x
+        all_rows.append(current)
+    return all_rows
 
-    for ds in dsr_data.get("DS", []):
-        # Column metadata
-        col_info = []
-        for sh in ds.get("SH", []):
-            for dm_def in sh.get("DM1", sh.get("DM0", [])):
-                s_items = dm_def.get("S", [])
-                for s in s_items:
-                    col_info.append(s)
-
-        for ph in ds.get("PH", []):
-            dm = ph.get("DM0", ph.get("DM1", []))
-            prev_values = {}
-
-            for row in dm:
-                current = {}
-                repeat_mask = row.get("R", 0)
-
-                # Resolve G (group/dimension) values
-                for i in range(10):
-                    key = f"G{i}"
-                    if key in row:
-                        current[key] = row[key]
-                        prev_values[key] = row[key]
-                    elif repeat_mask & (1 << i) and key in prev_values:
-                        current[key] = prev_values[key]
-
-                # Resolve C (compressed dict reference) values
-                if "C" in row:
-                    for idx, val in enumerate(row["C"]):
-                        dict_key = f"D{idx}"
-                        if dict_key in value_dicts and isinstance(val, int):
-                            try:
-                                current[f"C{idx}"] = value_dicts[dict_key][val]
-                            except IndexError:
-                                current[f"C{idx}"] = val
-                        else:
-                            current[f"C{idx}"] = val
-
-                # Extract X (measure) values
-                for xi, x in enumerate(row.get("X", [])):
-                    if isinstance(x, dict):
-                        for mk, mv in x.items():
-                            current[f"X{xi}_{mk}"] = mv
-                    else:
-                        current[f"X{xi}"] = x
-
-                # Extract Ø (null markers)
-                if "Ø" in row:
-                    current["_null_mask"] = row["Ø"]
-
-                all_rows.append(current)
 
-    return all_rows
+def _lineage(row: pb.DSRRow) -> list[pb.DSRRow]:
+    """Root-first chain of rows ending at `row`."""
+    chain = []
+    while row is not None:
+        chain.append(row)
+        row = row.parent
+    return chain[::-1]
 
 
 def extract_queries_from_results(raw_results: list[dict]) -> list[dict]:
@@ -150,19 +121,13 @@ def extract_queries_from_results(raw_results: list[dict]) -> list[dict]:
 # Playwright scraping
 # ---------------------------------------------------------------------------
 
-async def scrape_dashboard(page_path: str, wait_seconds: int = 15) -> list[dict]:
+async def scrape_dashboard(page_path: str, wait_seconds: int = 15,
+                           pool: BrowserPool | None = None) -> list[dict]:
     """Load a dashboard page and intercept Power BI data responses."""
-    from playwright.async_api import async_playwright
-
     query_results = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(
-            viewport={"width": 1400, "height": 900},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        )
-        page = await context.new_page()
+    # This scraper has always presented as desktop Chrome; keep it that way.
+    async with borrow_page(pool, user_agent=USER_AGENT, viewport={"width": 1400, "height": 900}) as page:
 
         async def handle_response(response):
             url = response.url
@@ -187,8 +152,6 @@ async def scrape_dashboard(page_path: str, wait_seconds: int = 15) -> list[dict]
         print(f"  Waiting {wait_seconds}s for Power BI data...")
         await asyncio.sleep(wait_seconds)
 
-        await browser.close()
-
     return query_results
 
 
@@ -1042,54 +1042,45 @@ def extract_command(pdf_path: str, output_format: str = "json", is_bank: bool =
 
 async def company_command(kennitala: str, year: int | None, output_format: str) -> None:
     """Full pipeline: download PDF from skatturinn and extract."""
-    # Import skatturinn functions
+    # Import skatturinn functions (plain httpx — no browser involved)
     try:
         # Try relative import first, then absolute
         try:
             from skatturinn import get_company_info, download_annual_report
         except ImportError:
             from scripts.skatturinn import get_company_info, download_annual_report
-        from playwright.async_api import async_playwright
     except ImportError as e:
         print(f"Import error: {e}")
-        print("Make sure skatturinn.py and playwright are available")
+        print("Make sure skatturinn.py is available")
         sys.exit(1)
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    # Get company info
+    print(f"Fetching company info for {kennitala}...")
+    company = await get_company_info(kennitala)
 
-        # Get company info
-        print(f"Fetching company info for {kennitala}...")
-        company = await get_company_info(page, kennitala)
+    if not company:
+        print(f"Company {kennitala} not found")
+        return
 
-        if not company:
-            print(f"Company {kennitala} not found")
-            await browser.close()
-            return
-
-        print(f"Company: {company.name}")
-
-        # Determine which year to download
-        if year:
-            target_year = year
-        elif company.available_reports:
-            target_year = max(r.year for r in company.available_reports)
-            print(f"Using latest available year: {target_year}")
-        else:
-            print("No reports available")
-            await browser.close()
-            return
+    print(f"Company: {company.name}")
 
-        # Download PDF
-        print(f"Downloading report for {target_year}...")
-        pdf_path = await download_annual_report(page, kennitala, target_year, RAW_DIR)
+    # Determine which year to download
+    if year:
+        target_year = year
+    elif company.available_reports:
+        target_year = max(r.year for r in company.available_reports)
+        print(f"Using latest available year: {target_year}")
+    else:
+        print("No reports available")
+        return
 
-        await browser.close()
+    # Download PDF
+    print(f"Downloading report for {target_year}...")
+    pdf_path = await download_annual_report(kennitala, target_year, RAW_DIR)
 
-        if not pdf_path:
-            print("Download failed")
-            return
+    if not pdf_path:
+        print("Download failed")
+        return
 
     # Extract financials
     print("Extracting financials...")
@@ -1141,10 +1132,9 @@ async def bank_command(kennitala: str, year: int | None, output_format: str) ->
     """Full pipeline for bank annual reports: download PDF and extract with bank-specific patterns."""
     try:
         from scripts.skatturinn import get_company_info, download_annual_report
-        from playwright.async_api import async_playwright
     except ImportError as e:
         print(f"Import error: {e}")
-        print("Make sure skatturinn.py and playwright are available")
+        print("Make sure skatturinn.py is available")
         sys.exit(1)
 
     # Known bank kennitalas
@@ -1155,42 +1145,34 @@ async def bank_command(kennitala: str, year: int | None, output_format: str) ->
         "5407992500": "Kvika banki hf.",
     }
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    # Get company info
+    print(f"Fetching bank info for {kennitala}...")
+    company = await get_company_info(kennitala)
 
-        # Get company info
-        print(f"Fetching bank info for {kennitala}...")
-        company = await get_company_info(page, kennitala)
+    if not company:
+        print(f"Bank {kennitala} not found")
+        return
 
-        if not company:
-            print(f"Bank {kennitala} not found")
-            await browser.close()
-            return
-
-        bank_name = BANK_NAMES.get(kennitala, company.name)
-        print(f"Bank: {bank_name}")
-
-        # Determine which year to download
-        if year:
-            target_year = year
-        elif company.available_reports:
-            target_year = max(r.year for r in company.available_reports)
-            print(f"Using latest available year: {target_year}")
-        else:
-            print("No reports available")
-            await browser.close()
-            return
+    bank_name = BANK_NAMES.get(kennitala, company.name)
+    print(f"Bank: {bank_name}")
 
-        # Download PDF
-        print(f"Downloading annual report for {target_year}...")
-        pdf_path = await download_annual_report(page, kennitala, target_year, RAW_DIR)
+    # Determine which year to download
+    if year:
+        target_year = year
+    elif company.available_reports:
+        target_year = max(r.year for r in company.available_reports)
+        print(f"Using latest available year: {target_year}")
+    else:
+        print("No reports available")
+        return
 
-        await browser.close()
+    # Download PDF
+    print(f"Downloading annual report for {target_year}...")
+    pdf_path = await download_annual_report(kennitala, target_year, RAW_DIR)
 
-        if not pdf_path:
-            print("Download failed")
-            return
+    if not pdf_path:
+        print("Download failed")
+        return
 
     # Extract with bank-specific patterns
     print("Extracting bank financials...")
@@ -1234,7 +1216,6 @@ async def group_command(kennitala: str, depth: int = 3) -> None:
             from skatturinn import get_company_info
         except ImportError:
             from scripts.skatturinn import get_company_info
-        from playwright.async_api import async_playwright
     except ImportError as e:
         print(f"Import error: {e}")
         sys.exit(1)
@@ -1248,15 +1229,9 @@ async def group_command(kennitala: str, depth: int = 3) -> None:
 
         visited.add(kt)
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-
-            company = await get_company_info(page, kt)
-            await browser.close()
-
-            if not company:
-                return {"kennitala": kt, "not_found": True}
+        company = await get_company_info(kt)
+        if not company:
+            return {"kennitala": kt, "not_found": True}
 
         node = {
             "kennitala": kt,
@@ -34,7 +34,7 @@ from rasterio.warp import calculate_default_transform, reproject
 # .agents/skills/kortagerd/SKILL.md "Caching strategy").
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
 from utils.cache import (  # noqa: E402
-    CacheMissingError, cached_raster, iceland_constants,
+    CacheMissingError, base_layer, iceland_constants, open_cached_raster,
 )
 
 if hasattr(sys.stdout, "reconfigure"):
@@ -42,7 +42,6 @@ if hasattr(sys.stdout, "reconfigure"):
     sys.stderr.reconfigure(encoding="utf-8")
 
 ROOT = Path(__file__).resolve().parent.parent
-GEODATA = ROOT / "data" / "geodata"
 SOURCE_20M = ROOT / "data" / "raw" / "lmi_hrl" / "grassland_20m.tif"
 SOURCE_100M = ROOT / "data" / "raw" / "lmi_hrl" / "grassland_100m.tif"
 OUT_PNG = ROOT / "reports" / "grassland-map.png"
@@ -61,20 +60,19 @@ def _load_base_layers() -> dict[str, gpd.GeoDataFrame]:
     needed = ["Landmask", "LandIceArea", "Lake_Reservoir", "CoastalLine"]
     layers: dict[str, gpd.GeoDataFrame] = {}
     for name in needed:
-        path = GEODATA / f"{name}.geojson"
-        if not path.exists():
-            raise SystemExit(
-                f"Missing base layer {path}. Run: uv run python scripts/lmi.py download")
-        gdf = gpd.read_file(path)
-        layers[name] = gdf.to_crs(DST_CRS)
+        try:
+            layers[name] = base_layer(name, DST_CRS)   # GeoParquet, pre-projected
+        except CacheMissingError as e:
+            raise SystemExit(f"Missing base layer {name}. {e.hint}")
     return layers
 
 
 def _read_grassland_from_cache() -> tuple[np.ndarray, tuple[float, float, float, float]]:
     """Read the Tier-3 cached, ISN93-reprojected, LZW-compressed raster directly
-    at PNG resolution. ~50-100× faster than the from-source reproject path."""
-    cache_path = cached_raster("grassland_isn93")  # raises CacheMissingError if absent
-    with rasterio.open(cache_path) as src:
+    at PNG resolution, from the coarsest overview level that still covers it.
+    ~50-100× faster than the from-source reproject path."""
+    # raises CacheMissingError if absent
+    with open_cached_raster("grassland_isn93", out_shape=(PNG_HEIGHT, PNG_WIDTH)) as src:
         arr = src.read(1, out_shape=(PNG_HEIGHT, PNG_WIDTH),
                        resampling=Resampling.nearest)
         # Build the extent matching the source's footprint, scaled to our shape.
@@ -26,25 +26,25 @@ Output: ``reports/grassland-probability-heatmap.png``
 """
 from __future__ import annotations
 
-import json
 import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import geopandas as gpd
 import httpx
-import matplotlib.pyplot as plt
 import numpy as np
 import rasterio
-from matplotlib.colors import ListedColormap
-from matplotlib.patches import Patch
 from rasterio.enums import Resampling
 from rasterio.io import MemoryFile
 from rasterio.transform import from_bounds
 from rasterio.warp import calculate_default_transform, reproject
 
+if TYPE_CHECKING:
+    import geopandas as gpd
+
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
 from utils.cache import (  # noqa: E402
-    CacheMissingError, cached_array, iceland_constants,
+    CacheMissingError, base_layer, cached_array, iceland_constants, lut_encode, write_array,
 )
 
 if hasattr(sys.stdout, "reconfigure"):
@@ -52,7 +52,6 @@ if hasattr(sys.stdout, "reconfigure"):
     sys.stderr.reconfigure(encoding="utf-8")
 
 ROOT = Path(__file__).resolve().parent.parent
-GEODATA = ROOT / "data" / "geodata"
 RAW = ROOT / "data" / "raw" / "lmi_hrl"
 OUT_PNG = ROOT / "reports" / "grassland-probability-heatmap.png"
 
@@ -91,6 +90,9 @@ OUTSIDE_RGB = (153, 153, 153)         # "Unclassifiable / Outside area"
 # Reject pixels whose nearest legend swatch is more than this RGB distance
 # (squared) — about 30 RGB units in the worst channel.
 MAX_SWATCH_DIST_SQ = 2700
+DECODE_ROWS = 256                     # ~0.9 Mpx of the 3500-px-wide WMS image per step
+
+PROB_CACHE = "gravpi_prob_3057"
 
 
 def fetch_gravpi(out: Path) -> Path:
@@ -116,32 +118,58 @@ def fetch_gravpi(out: Path) -> Path:
     return out
 
 
+@lru_cache(maxsize=1)
+def swatch_lut() -> np.ndarray:
+    """24-bit packed RGB → bin lookup table (16 MB, int8, built once).
+
+    ``lut[(r << 16) | (g << 8) | b]`` is 1-10 for the nearest legend swatch
+    (ties go to the lower bin, as ``argmin`` does) and 0 when even that
+    swatch is more than ``MAX_SWATCH_DIST_SQ`` away. Only colours inside
+    some swatch's ±√MAX_SWATCH_DIST_SQ cube can be accepted, so only those
+    cubes are scored — ~1M colours per swatch, not all 16.7M.
+    """
+    lut = np.zeros(1 << 24, dtype=np.int8)
+    r = int(np.sqrt(MAX_SWATCH_DIST_SQ))
+    swatch_sq = (LEGEND_RGB * LEGEND_RGB).sum(axis=1)
+    for sr, sg, sb in LEGEND_RGB:
+        g, b = np.meshgrid(np.arange(max(sg - r, 0), min(sg + r, 255) + 1),
+                           np.arange(max(sb - r, 0), min(sb + r, 255) + 1), indexing="ij")
+        gb = np.stack([g.ravel(), b.ravel()], axis=1).astype(np.int32)
+        for red in range(max(sr - r, 0), min(sr + r, 255) + 1):
+            rgb = np.column_stack([np.full(len(gb), red, dtype=np.int32), gb])
+            # |c - s|² = |c|² - 2c·s + |s|²: one small matmul instead of a
+            # (colours × swatches × 3) difference tensor.
+            d2 = (rgb * rgb).sum(axis=1)[:, None] - 2 * rgb @ LEGEND_RGB.T + swatch_sq
+            nearest = d2.argmin(axis=1)
+            ok = d2[np.arange(len(rgb)), nearest] <= MAX_SWATCH_DIST_SQ
+            packed = (red << 16) | (gb[ok, 0] << 8) | gb[ok, 1]
+            lut[packed] = nearest[ok] + 1
+    return lut
+
+
 def decode_rgb_to_probability(rgb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """Map each RGB pixel to its closest legend swatch.
 
+    A table lookup per pixel (``swatch_lut``), ``DECODE_ROWS`` rows at a
+    time, so temporaries stay at a few MB whatever the image size.
+
     Returns
     -------
     prob : float32 array, NaN for non-grassland or outside-area
     bin  : int8 array, 1-10 for grassland bins, 0 = non-grassland, -1 = outside
     """
     h, w, _ = rgb.shape
-    flat = rgb.reshape(-1, 3).astype(np.int32)   # int32 to avoid overflow
-
-    diffs = flat[:, None, :] - LEGEND_RGB[None, :, :]
-    d2 = (diffs * diffs).sum(axis=2)
-    nearest = d2.argmin(axis=1)
-    nearest_d2 = d2.min(axis=1)
-
-    prob = LEGEND_PROB[nearest].astype(np.float32)
-    bin_idx = (nearest + 1).astype(np.int8)
-
-    # Reject any pixel whose nearest swatch is too far away (i.e. white,
-    # grey, ocean, or anti-aliased boundary pixels).
-    too_far = nearest_d2 > MAX_SWATCH_DIST_SQ
-    prob[too_far] = np.nan
-    bin_idx[too_far] = 0
-
-    return prob.reshape(h, w), bin_idx.reshape(h, w)
+    lut = swatch_lut()
+    prob_of_bin = np.concatenate([[np.nan], LEGEND_PROB]).astype(np.float32)
+    prob = np.empty((h, w), dtype=np.float32)
+    bin_idx = np.empty((h, w), dtype=np.int8)
+    for r0 in range(0, h, DECODE_ROWS):
+        band = rgb[r0:r0 + DECODE_ROWS].astype(np.uint32)
+        packed = (band[..., 0] << 16) | (band[..., 1] << 8) | band[..., 2]
+        # Rejected pixels (white, grey, ocean, anti-aliased edges) are bin 0.
+        bin_idx[r0:r0 + DECODE_ROWS] = lut[packed]
+        prob[r0:r0 + DECODE_ROWS] = prob_of_bin[bin_idx[r0:r0 + DECODE_ROWS]]
+    return prob, bin_idx
 
 
 def reproject_to_iceland(arr: np.ndarray, *, nodata: float) -> tuple[np.ndarray, tuple[float, float, float, float]]:
@@ -173,10 +201,10 @@ def reproject_to_iceland(arr: np.ndarray, *, nodata: float) -> tuple[np.ndarray,
 def _load_base_layers() -> dict[str, gpd.GeoDataFrame]:
     layers = {}
     for name in ("Landmask", "LandIceArea", "Lake_Reservoir"):
-        path = GEODATA / f"{name}.geojson"
-        if not path.exists():
-            raise SystemExit(f"Missing {path} — run scripts/lmi.py download")
-        layers[name] = gpd.read_file(path).to_crs(DST_CRS)
+        try:
+            layers[name] = base_layer(name, DST_CRS)
+        except CacheMissingError as e:
+            raise SystemExit(f"Missing base layer {name} — {e.hint}")
     return layers
 
 
@@ -194,41 +222,42 @@ def _decode_and_reproject(raster_path: Path) -> tuple[np.ndarray, tuple[float, f
     return prob_3057, extent
 
 
-def _load_or_compute_prob_3057(raster_path: Path) -> tuple[np.ndarray, tuple[float, float, float, float]]:
-    """Tier 5 cache: write the decoded+reprojected probability grid to .npy
-    on first run; reuse on subsequent runs when the source TIFF is unchanged."""
-    npy = cached_array("gravpi_prob_3057")
-    sidecar = npy.with_suffix(".json")
-    src_mtime = raster_path.stat().st_mtime
-    if npy.exists() and sidecar.exists():
-        try:
-            meta = json.loads(sidecar.read_text(encoding="utf-8"))
-            if meta.get("source_mtime") == src_mtime:
-                print(f"  Tier-5 cache hit — reading {npy.name}", file=sys.stderr)
-                arr = np.load(npy)
-                ex = tuple(meta["extent"])
-                return arr, ex                                # type: ignore[return-value]
-        except (OSError, ValueError, KeyError):
-            pass
+def _load_or_compute_prob_3057(raster_path: Path) -> tuple[np.ndarray, np.ndarray, tuple[float, float, float, float]]:
+    """Tier 5 cache: the decoded+reprojected probability grid as uint8 bin
+    codes + LUT (``lut[codes]`` is the probability, NaN for code 0). Written
+    on first run; later runs memory-map it while the source TIFF's SHA-256
+    is unchanged."""
+    try:
+        codes, meta = cached_array(PROB_CACHE, source=raster_path)
+        print(f"  Tier-5 cache hit — mapping {PROB_CACHE}.npy", file=sys.stderr)
+        return codes, np.asarray(meta["lut"], dtype=np.float32), tuple(meta["extent"])  # type: ignore[return-value]
+    except CacheMissingError as e:
+        print(f"  {e}", file=sys.stderr)
+    return build_prob_3057(raster_path)
+
+
+def build_prob_3057(raster_path: Path) -> tuple[np.ndarray, np.ndarray, tuple[float, float, float, float]]:
+    """Decode + reproject + LUT-encode, and write the Tier 5 memo. Also the
+    build step of the ``gravpi_prob_3057`` node in ``scripts/build_cache.py``."""
     print("Decoding RGB → probability bins + reprojecting ...", file=sys.stderr)
-    arr, extent = _decode_and_reproject(raster_path)
-    np.save(npy, arr)
-    sidecar.write_text(json.dumps(
-        {"source": str(raster_path).replace("\\", "/"),
-         "source_mtime": src_mtime,
-         "extent": list(extent),
-         "shape": list(arr.shape)}, indent=2),
-        encoding="utf-8")
+    prob, extent = _decode_and_reproject(raster_path)
+    codes, lut = lut_encode(prob, LEGEND_PROB)
+    npy = write_array(PROB_CACHE, codes, source=raster_path, extent=extent, lut=lut)
     print(f"  wrote Tier-5 cache → {npy.name} ({npy.stat().st_size / 1e6:.1f} MB)",
           file=sys.stderr)
-    return arr, extent
+    return codes, lut, extent
 
 
 def main() -> None:
+    # Plotting imports live here so build_cache.py can read this module's
+    # constants (BBOX_3857, LEGEND_*, PROB_CACHE) without loading matplotlib.
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+
     raster_path = RAW / "gravpi_full.tif"
     fetch_gravpi(raster_path)
 
-    prob_3057, (xmin, xmax, ymin, ymax) = _load_or_compute_prob_3057(raster_path)
+    codes, lut, (xmin, xmax, ymin, ymax) = _load_or_compute_prob_3057(raster_path)
 
     pixel_w = (xmax - xmin) / DST_W
     pixel_h = (ymax - ymin) / DST_H
@@ -237,10 +266,11 @@ def main() -> None:
           f"({pixel_area_m2 / 1e4:.2f} ha)", file=sys.stderr)
 
     # ── statistics ────────────────────────────────────────────────────────
-    valid = ~np.isnan(prob_3057)
-    n_valid = int(valid.sum())
-    n_over_50 = int(((prob_3057 > 50.0) & valid).sum())
-    n_any = int((valid).sum())
+    # Everything below is a per-code lookup — the grid itself stays uint8.
+    counts = np.bincount(codes.ravel(), minlength=len(lut))
+    over_50 = np.nan_to_num(lut, nan=0.0) > 50.0
+    n_over_50 = int(counts[over_50].sum())
+    n_any = int(counts[1:].sum())
     area_over_50_km2 = n_over_50 * pixel_area_m2 / 1e6
     area_any_km2 = n_any * pixel_area_m2 / 1e6
 
@@ -291,11 +321,10 @@ def main() -> None:
                                 linewidth=0.15, zorder=3)
 
     # Quantize probability into 10 bins so the colour mapping is discrete and
-    # legible (matches EEA's documented bin structure). NaN cells are masked
-    # before casting to avoid the np.floor(NaN)→int conversion warning.
-    masked = np.ma.masked_invalid(prob_3057)
-    bin_idx = np.clip(np.floor(masked.filled(0.0) / 10.0), 0, 9).astype(np.int8)
-    binned = np.ma.masked_array(bin_idx, mask=masked.mask)
+    # legible (matches EEA's documented bin structure) — done on the 11-entry
+    # LUT, then gathered; code 0 (NaN) is masked.
+    bin_lut = np.clip(np.floor(np.nan_to_num(lut, nan=0.0) / 10.0), 0, 9).astype(np.int8)
+    binned = np.ma.masked_array(bin_lut[codes], mask=codes == 0)
 
     im = ax.imshow(binned, extent=(xmin, xmax, ymin, ymax),
                    origin="upper", cmap=blue_to_green,
@@ -7,6 +7,7 @@ Usage:
     uv run python scripts/hagstofan.py             # fetch all tables (default)
     uv run python scripts/hagstofan.py list        # show the tariff tables
     uv run python scripts/hagstofan.py fetch       # explicit fetch
+    uv run python scripts/hagstofan.py --profile   # + stage trace in data/cache/profiles/
 """
 
 import argparse
@@ -17,6 +18,9 @@ from pathlib import Path
 import httpx
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.profiling import add_profile_argument, profiled, span  # noqa: E402
+
 BASE_URL = "https://px.hagstofa.is/pxis/api/v1/is"
 HEADERS = {"User-Agent": "icelandic-data/1.0 (data toolkit fetcher)"}
 
@@ -46,7 +50,10 @@ def fetch_table(path: str, tariff_codes: list[str]) -> str | None:
     
     # First get metadata to find the correct variable code
     try:
-        meta = httpx.get(url, timeout=30, headers=HEADERS).json()
+        with span("network", f"{path} metadata") as s:
+            resp = httpx.get(url, timeout=30, headers=HEADERS)
+            s.add(bytes=len(resp.content))
+        meta = resp.json()
     except Exception as e:
         print(f"  WARN: metadata fetch failed for {path}: {e}", file=sys.stderr)
         return None
@@ -89,7 +96,9 @@ def fetch_table(path: str, tariff_codes: list[str]) -> str | None:
     }
     
     try:
-        resp = httpx.post(url, json=query, timeout=60, headers=HEADERS)
+        with span("network", path) as s:
+            resp = httpx.post(url, json=query, timeout=60, headers=HEADERS)
+            s.add(bytes=len(resp.content))
         if resp.status_code != 200:
             print(f"  WARN: fetch failed for {path}: HTTP {resp.status_code} — {resp.text[:200]}",
                   file=sys.stderr)
@@ -206,7 +215,8 @@ def cmd_fetch(args) -> int:
         if csv_text:
             # Save raw
             raw_file = raw_dir / f"{source_name}.csv"
-            raw_file.write_text(csv_text, encoding="utf-8")
+            with span("write", raw_file.name):
+                raw_file.write_text(csv_text, encoding="utf-8")
             print(f"  Saved raw to {raw_file}")
         else:
             failed_tables.append(source_name)
@@ -215,7 +225,9 @@ def cmd_fetch(args) -> int:
     print("\nParsing raw files...")
     for raw_file in raw_dir.glob("*.csv"):
         print(f"  Parsing {raw_file.name}...")
-        df = parse_wide_csv(raw_file)
+        with span("parse", raw_file.name) as s:
+            df = parse_wide_csv(raw_file)
+            s.add(bytes=raw_file.stat().st_size, rows=len(df))
         if not df.is_empty():
             all_data.append(df)
             print(f"    Got {len(df)} records")
@@ -225,36 +237,40 @@ def cmd_fetch(args) -> int:
         return 1
     
     # Combine all data
-    combined = pl.concat(all_data)
-    
-    # Pivot to get cif and units as separate columns, then aggregate
-    summary = (
-        combined
-        .filter(pl.col("value") > 0)
-        .group_by(["year", "category", "metric"])
-        .agg(pl.col("value").sum())
-        .pivot(on="metric", index=["year", "category"], values="value")
-        .fill_null(0)
-        .sort(["year", "category"])
-    )
+    with span("transform", "summary") as s:
+        combined = pl.concat(all_data)
     
-    # Ensure expected columns exist
-    if "cif_isk" not in summary.columns:
-        summary = summary.with_columns(pl.lit(0).alias("cif_isk"))
-    if "units" not in summary.columns:
-        summary = summary.with_columns(pl.lit(0).alias("units"))
+        # Pivot to get cif and units as separate columns, then aggregate
+        summary = (
+            combined
+            .filter(pl.col("value") > 0)
+            .group_by(["year", "category", "metric"])
+            .agg(pl.col("value").sum())
+            .pivot(on="metric", index=["year", "category"], values="value")
+            .fill_null(0)
+            .sort(["year", "category"])
+        )
     
-    # Select and rename for output
-    output = summary.select([
-        pl.col("year"),
-        pl.col("category"),
-        pl.col("cif_isk").alias("total_cif_isk"),
-        pl.col("units").alias("total_units")
-    ])
+        # Ensure expected columns exist
+        if "cif_isk" not in summary.columns:
+            summary = summary.with_columns(pl.lit(0).alias("cif_isk"))
+        if "units" not in summary.columns:
+            summary = summary.with_columns(pl.lit(0).alias("units"))
     
+        # Select and rename for output
+        output = summary.select([
+            pl.col("year"),
+            pl.col("category"),
+            pl.col("cif_isk").alias("total_cif_isk"),
+            pl.col("units").alias("total_units")
+        ])
+        s.add(rows=len(output))
+
     # Save processed
     output_file = output_dir / "bike_imports_all.csv"
-    output.write_csv(output_file)
+    with span("write", output_file.name) as s:
+        output.write_csv(output_file)
+        s.add(bytes=output_file.stat().st_size, rows=len(output))
     print(f"\nSaved {len(output)} rows to {output_file}")
     print(output)
     
@@ -272,8 +288,10 @@ def main() -> int:
     f = sub.add_parser("fetch", help="fetch bike/e-bike imports → data/processed/bike_imports_all.csv")
     f.set_defaults(func=cmd_fetch)
     ap.set_defaults(func=cmd_fetch)  # bare run == fetch (AGENTS.md quick command)
+    add_profile_argument(ap)
     args = ap.parse_args()
-    return args.func(args)
+    with profiled("hagstofan", args.profile):
+        return args.func(args)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,8 @@
 Iceland map generator — static and interactive maps from cached LMI geodata.
 
 Reads pre-downloaded GeoJSON layers from data/geodata/ and produces either
-interactive Leaflet HTML reports or static PNG/SVG maps via geopandas+matplotlib.
+interactive Leaflet HTML reports (layers served as z/x/y tiles from
+data/cache/tiles/) or static PNG/SVG maps via geopandas+matplotlib.
 
 Usage:
     uv run python scripts/kortagerð.py html -o reports/iceland-map.html
@@ -13,9 +14,14 @@ Usage:
 
 import argparse
 import json
+import sys
 from datetime import date
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.cache import CacheMissingError, base_layer  # noqa: E402
+from utils.tiles import LEAFLET_JS, build_layer_tiles, cut_layers, layer_options, tiles_url  # noqa: E402
+
 GEODATA_DIR = Path(__file__).parent.parent / "data" / "geodata"
 REPORTS_DIR = Path(__file__).parent.parent / "reports"
 
@@ -34,12 +40,12 @@ BOUNDS_PRESETS = {
 
 
 def load_layer(name: str):
-    """Load a cached GeoJSON layer by short name (e.g., 'Landmask')."""
-    path = GEODATA_DIR / f"{name}.geojson"
-    if not path.exists():
+    """Load a cached layer by short name (e.g., 'Landmask') as a WGS84
+    GeoDataFrame from the GeoParquet store, or None if it was never fetched."""
+    try:
+        return base_layer(name, "EPSG:4326")
+    except CacheMissingError:
         return None
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
 
 
 def available_layers() -> list[str]:
@@ -53,23 +59,43 @@ def available_layers() -> list[str]:
 # Interactive HTML map (Leaflet)
 # ---------------------------------------------------------------------------
 
+def tile_layer(name: str, out: Path) -> dict | None:
+    """Cut (or reuse) the tile pyramid of a cached layer and return the
+    options the page needs to load it, or None if it was never fetched."""
+    try:
+        build_layer_tiles(name)
+    except CacheMissingError:
+        return None
+    return layer_options(name, out)
+
+
 def cmd_html(args):
-    """Generate interactive Leaflet HTML map."""
+    """Generate interactive Leaflet HTML map.
+
+    The page carries no geometry: every layer is a z/x/y pyramid under
+    data/cache/tiles/ (cut on first use, re-cut when its GeoJSON changes),
+    referenced by a relative URL, so Leaflet loads only the tiles in view.
+    Derived raster pyramids built by ``build_cache.py`` are offered as
+    extra overlays."""
     layers = available_layers()
     if not layers:
         print("No cached geodata. Run: uv run python scripts/lmi.py download")
         return
 
-    # Load core layers for the interactive map
-    landmask = load_layer("Landmask")
-    roads = load_layer("RoadLines")
-    glaciers = load_layer("LandIceArea")
-    lakes = load_layer("Lake_Reservoir")
-    settlements = load_layer("BuiltupAreaPoints")
-    admin = load_layer("AdministrativeUnit_level2")
-    if admin is None:
-        admin = load_layer("AdministrativeAreas")
-    nature = load_layer("NatureParkArea")
+    out = Path(args.output) if args.output else REPORTS_DIR / "iceland-map.html"
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    # Tile the core layers for the interactive map
+    tiled = {
+        "landmask": tile_layer("Landmask", out),
+        "roads": tile_layer("RoadLines", out),
+        "glaciers": tile_layer("LandIceArea", out),
+        "lakes": tile_layer("Lake_Reservoir", out),
+        "settlements": tile_layer("BuiltupAreaPoints", out),
+        "admin": tile_layer("AdministrativeUnit_level2", out) or tile_layer("AdministrativeAreas", out),
+        "nature": tile_layer("NatureParkArea", out),
+    }
+    rasters = [layer_options(m["name"], out) for m in cut_layers("raster")]
 
     # Determine bounds
     if args.bounds and args.bounds in BOUNDS_PRESETS:
@@ -83,10 +109,6 @@ def cmd_html(args):
 
     title = args.title or "Iceland"
 
-    # Serialize layers
-    def to_json(layer):
-        return json.dumps(layer, ensure_ascii=False) if layer else "null"
-
     html = f"""<!DOCTYPE html>
 <html lang="is">
 <head>
@@ -112,6 +134,7 @@ def cmd_html(args):
 <div class="title-overlay">{title}</div>
 <div id="map"></div>
 <script>
+{LEAFLET_JS}
 const map = L.map('map').setView([{center_lat}, {center_lon}], {zoom});
 
 L.tileLayer('https://{{s}}.basemaps.cartocdn.com/light_nolabels/{{z}}/{{x}}/{{y}}@2x.png', {{
@@ -119,26 +142,25 @@ L.tileLayer('https://{{s}}.basemaps.cartocdn.com/light_nolabels/{{z}}/{{x}}/{{y}
   maxZoom: 18
 }}).addTo(map);
 
-// --- Layers ---
-const landmask = {to_json(landmask)};
-const roads = {to_json(roads)};
-const glaciers = {to_json(glaciers)};
-const lakes = {to_json(lakes)};
-const settlements = {to_json(settlements)};
-const admin = {to_json(admin)};
-const nature = {to_json(nature)};
+// --- Layers (tile pyramids, see scripts/utils/tiles.py) ---
+const T = {json.dumps(tiled, ensure_ascii=False)};
+const rasters = {json.dumps(rasters, ensure_ascii=False)};
 
 const overlays = {{}};
 
-if (landmask) {{
-  const lm = L.geoJSON(landmask, {{
+if (T.landmask) {{
+  const lm = new L.GeoJSONTiles(T.landmask, {{
     style: {{ fillColor: '#f8f4ec', fillOpacity: 1, color: '#2d3436', weight: 1.2 }}
   }}).addTo(map);
   overlays['Land'] = lm;
 }}
 
-if (admin) {{
-  const adm = L.geoJSON(admin, {{
+for (const r of rasters) {{
+  overlays[r.label] = L.pngTiles(r);
+}}
+
+if (T.admin) {{
+  const adm = new L.GeoJSONTiles(T.admin, {{
     style: {{ fillColor: 'transparent', fillOpacity: 0, color: '#b2bec3', weight: 0.6, dashArray: '4 3' }},
     onEachFeature: (f, layer) => {{
       const p = f.properties;
@@ -148,8 +170,8 @@ if (admin) {{
   overlays['Municipalities'] = adm;
 }}
 
-if (nature) {{
-  const nat = L.geoJSON(nature, {{
+if (T.nature) {{
+  const nat = new L.GeoJSONTiles(T.nature, {{
     style: {{ fillColor: '#a8e6cf', fillOpacity: 0.35, color: '#00b894', weight: 1 }},
     onEachFeature: (f, layer) => {{
       layer.bindPopup(`<strong>${{f.properties.namn1 || ''}}</strong><br>Nature reserve`);
@@ -158,22 +180,22 @@ if (nature) {{
   overlays['Nature Parks'] = nat;
 }}
 
-if (glaciers) {{
-  const gl = L.geoJSON(glaciers, {{
+if (T.glaciers) {{
+  const gl = new L.GeoJSONTiles(T.glaciers, {{
     style: {{ fillColor: '#dfe6e9', fillOpacity: 0.9, color: '#b2bec3', weight: 0.8 }}
   }}).addTo(map);
   overlays['Glaciers'] = gl;
 }}
 
-if (lakes) {{
-  const lk = L.geoJSON(lakes, {{
+if (T.lakes) {{
+  const lk = new L.GeoJSONTiles(T.lakes, {{
     style: {{ fillColor: '#74b9ff', fillOpacity: 0.6, color: '#0984e3', weight: 0.7 }}
   }}).addTo(map);
   overlays['Lakes'] = lk;
 }}
 
-if (roads) {{
-  const rd = L.geoJSON(roads, {{
+if (T.roads) {{
+  const rd = new L.GeoJSONTiles(T.roads, {{
     style: f => {{
       const rtt = f.properties.rtt;
       if (rtt <= 3) return {{ color: '#d63031', weight: 2.5, opacity: 0.8 }};
@@ -188,8 +210,8 @@ if (roads) {{
   overlays['Roads'] = rd;
 }}
 
-if (settlements) {{
-  const st = L.geoJSON(settlements, {{
+if (T.settlements) {{
+  const st = new L.GeoJSONTiles(T.settlements, {{
     pointToLayer: (f, latlng) => {{
       const pop = f.properties.ppl || 0;
       const r = pop > 10000 ? 8 : pop > 1000 ? 5 : 3;
@@ -225,11 +247,9 @@ L.control.scale({{ imperial: false, position: 'bottomleft' }}).addTo(map);
 </body>
 </html>"""
 
-    out = Path(args.output) if args.output else REPORTS_DIR / "iceland-map.html"
-    out.parent.mkdir(parents=True, exist_ok=True)
     out.write_text(html, encoding="utf-8")
-    size_mb = out.stat().st_size / (1024 * 1024)
-    print(f"Interactive map: {out} ({size_mb:.1f} MB)")
+    size_kb = out.stat().st_size / 1024
+    print(f"Interactive map: {out} ({size_kb:.0f} KB; tiles under {tiles_url(out)}/)")
 
 
 # ---------------------------------------------------------------------------
@@ -238,7 +258,6 @@ L.control.scale({{ imperial: false, position: 'bottomleft' }}).addTo(map);
 
 def cmd_static(args):
     """Generate static PNG/SVG map via geopandas + matplotlib."""
-    import geopandas as gpd
     import matplotlib.pyplot as plt
     from matplotlib.patches import Patch
 
@@ -264,33 +283,27 @@ def cmd_static(args):
     fig, ax = plt.subplots(1, 1, figsize=(fig_w, fig_h), facecolor="#f0f4f8")
     ax.set_facecolor("#c8d6e5")  # Ocean color
 
-    def load_gdf(name):
-        path = GEODATA_DIR / f"{name}.geojson"
-        if path.exists():
-            return gpd.read_file(path)
-        return None
-
     # --- Draw layers bottom to top ---
 
     # Landmask
-    gdf = load_gdf("Landmask")
+    gdf = load_layer("Landmask")
     if gdf is not None:
         gdf.plot(ax=ax, color="#f5f0e6", edgecolor="#2d3436", linewidth=0.6, zorder=1)
 
     # Islands
-    gdf = load_gdf("IslandArea")
+    gdf = load_layer("IslandArea")
     if gdf is not None:
         gdf.plot(ax=ax, color="#f5f0e6", edgecolor="#2d3436", linewidth=0.4, zorder=1)
 
     # Nature parks
-    gdf = load_gdf("NatureParkArea")
+    gdf = load_layer("NatureParkArea")
     if gdf is not None:
         gdf.plot(ax=ax, color="#a8e6cf", alpha=0.4, edgecolor="#00b894", linewidth=0.5, zorder=2)
 
     # Administrative boundaries — prefer EBM (has namn) over ERM (code-based)
-    gdf = load_gdf("AdministrativeUnit_level2")
+    gdf = load_layer("AdministrativeUnit_level2")
     if gdf is None:
-        gdf = load_gdf("AdministrativeAreas")
+        gdf = load_layer("AdministrativeAreas")
     if gdf is not None:
         name_col = "namn" if "namn" in gdf.columns else "namn1" if "namn1" in gdf.columns else None
         if args.highlight and name_col:
@@ -301,22 +314,22 @@ def cmd_static(args):
             gdf.plot(ax=ax, facecolor="none", edgecolor="#b2bec3", linewidth=0.3, linestyle="--", zorder=3)
 
     # Glaciers
-    gdf = load_gdf("LandIceArea")
+    gdf = load_layer("LandIceArea")
     if gdf is not None:
         gdf.plot(ax=ax, color="#dfe6e9", edgecolor="#b2bec3", linewidth=0.4, zorder=4)
 
     # Lakes
-    gdf = load_gdf("Lake_Reservoir")
+    gdf = load_layer("Lake_Reservoir")
     if gdf is not None:
         gdf.plot(ax=ax, color="#74b9ff", edgecolor="#0984e3", linewidth=0.3, zorder=5)
 
     # Rivers
-    gdf = load_gdf("WatercourseLine")
+    gdf = load_layer("WatercourseLine")
     if gdf is not None:
         gdf.plot(ax=ax, color="#0984e3", linewidth=0.25, alpha=0.5, zorder=6)
 
     # Roads
-    gdf = load_gdf("RoadLines")
+    gdf = load_layer("RoadLines")
     if gdf is not None:
         if "rtt" in gdf.columns:
             major = gdf[gdf["rtt"].fillna(99) <= 3]
@@ -332,7 +345,7 @@ def cmd_static(args):
             gdf.plot(ax=ax, color="#e17055", linewidth=0.5, zorder=7)
 
     # Settlements
-    gdf = load_gdf("BuiltupAreaPoints")
+    gdf = load_layer("BuiltupAreaPoints")
     if gdf is not None:
         gdf = gdf.cx[bbox[0]:bbox[2], bbox[1]:bbox[3]]
         if not gdf.empty:
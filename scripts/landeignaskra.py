@@ -21,6 +21,9 @@ import sys
 import zipfile
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
     sys.stderr.reconfigure(encoding="utf-8")
@@ -51,17 +54,12 @@ def _download_httpx(url: str, dest: Path) -> None:
         print(file=sys.stderr)
 
 
-async def _discover_blob_url() -> str:
-    from playwright.async_api import async_playwright
-    async with async_playwright() as p:
-        b = await p.chromium.launch(headless=True)
-        ctx = await b.new_context()
-        page = await ctx.new_page()
+async def _discover_blob_url(pool: BrowserPool | None = None) -> str:
+    async with borrow_page(pool) as page:
         await page.goto(LANDING_URL, wait_until="networkidle", timeout=120000)
         hrefs = await page.evaluate(
             "() => Array.from(document.querySelectorAll('a')).map(a => a.href)"
         )
-        await b.close()
     for h in hrefs:
         if h.lower().endswith(".zip") and "landeign" in h.lower():
             return h
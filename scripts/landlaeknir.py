@@ -18,6 +18,9 @@ from pathlib import Path
 
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 if hasattr(sys.stderr, "reconfigure"):
@@ -87,32 +90,43 @@ def cmd_list(args):
     print(f"Catalog: {out}")
 
 
-async def _scrape_one(slug: str, url: str) -> list[dict]:
-    from playwright.async_api import async_playwright
-
+async def _scrape_one(slug: str, url: str, pool: BrowserPool | None = None) -> list[dict]:
     results: list[dict] = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            page = await browser.new_page()
-
-            async def on_response(r):
-                u = r.url.lower()
-                if ("querydata" in u or "executequeries" in u) and r.status == 200:
-                    try:
-                        results.append(await r.json())
-                    except Exception:
-                        pass
-
-            page.on("response", on_response)
-            print(f"  [{slug}] loading {url}", file=sys.stderr)
-            await page.goto(url, wait_until="networkidle", timeout=90000)
-            await asyncio.sleep(15)
-        finally:
-            await browser.close()
+    async with borrow_page(pool) as page:
+
+        async def on_response(r):
+            u = r.url.lower()
+            if ("querydata" in u or "executequeries" in u) and r.status == 200:
+                try:
+                    results.append(await r.json())
+                except Exception:
+                    pass
+
+        page.on("response", on_response)
+        print(f"  [{slug}] loading {url}", file=sys.stderr)
+        await page.goto(url, wait_until="networkidle", timeout=90000)
+        await asyncio.sleep(15)
     return results
 
 
+async def _scrape_all(targets: list[str], by_slug: dict, concurrency: int) -> None:
+    """Scrape `targets` through one shared browser, `concurrency` at a time."""
+    async with BrowserPool(contexts=concurrency) as pool:
+
+        async def one(slug):
+            name, key = by_slug[slug]
+            print(f"\n=== {slug} — {name} ===", file=sys.stderr)
+            try:
+                results = await _scrape_one(slug, embed_url(key), pool)
+            except Exception as e:
+                print(f"  [error] {slug}: {e}", file=sys.stderr)
+                return
+            out = _save(slug, results)
+            print(f"  captured {len(results)} query responses → {out}", file=sys.stderr)
+
+        await asyncio.gather(*(one(slug) for slug in targets))
+
+
 def _save(slug: str, results: list[dict]) -> Path:
     RAW_DIR.mkdir(parents=True, exist_ok=True)
     out = RAW_DIR / f"{slug}.json"
@@ -131,17 +145,7 @@ def cmd_fetch(args):
     else:
         sys.exit("specify --slug <name> or --all")
 
-    for slug in targets:
-        name, key = by_slug[slug]
-        url = embed_url(key)
-        print(f"\n=== {slug} — {name} ===", file=sys.stderr)
-        try:
-            results = asyncio.run(_scrape_one(slug, url))
-        except Exception as e:
-            print(f"  [error] {slug}: {e}", file=sys.stderr)
-            continue
-        out = _save(slug, results)
-        print(f"  captured {len(results)} query responses → {out}", file=sys.stderr)
+    asyncio.run(_scrape_all(targets, by_slug, args.concurrency))
 
 
 def main():
@@ -154,6 +158,8 @@ def main():
     p_fetch = sub.add_parser("fetch", help="Scrape one or all dashboards")
     p_fetch.add_argument("--slug", help="Single dashboard slug (see `list`)")
     p_fetch.add_argument("--all", action="store_true", help="Scrape every dashboard")
+    p_fetch.add_argument("--concurrency", type=int, default=2, metavar="N",
+                         help="dashboards loaded at once, each in its own browser context (default 2)")
     p_fetch.set_defaults(func=cmd_fetch)
 
     args = ap.parse_args()
@@ -8,6 +8,10 @@ Usage:
     uv run python scripts/lmi.py list              # Show available layers and cache status
     uv run python scripts/lmi.py download           # Download core layer bundle
     uv run python scripts/lmi.py fetch ERM:Landmask # Fetch a specific layer
+
+Each downloaded layer is also stored as GeoParquet, pre-projected to ISN93
+(EPSG:3057) and WGS84, under data/cache/geodata/ — renderers read that via
+``utils.cache.base_layer`` instead of re-parsing the GeoJSON.
 """
 
 import argparse
@@ -17,6 +21,9 @@ from pathlib import Path
 
 import httpx
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.cache import base_layer_is_fresh, write_base_layer  # noqa: E402
+
 WFS_BASE = "https://gis.lmi.is/geoserver/{workspace}/wfs"
 
 GEODATA_DIR = Path(__file__).parent.parent / "data" / "geodata"
@@ -72,6 +79,16 @@ def layer_filename(layer: str) -> str:
     return layer.split(":")[-1] + ".geojson"
 
 
+def store_layer(layer: str) -> None:
+    """Write the GeoParquet copies of a downloaded layer unless current."""
+    name = layer.split(":")[-1]
+    if base_layer_is_fresh(name):
+        return
+    paths = write_base_layer(name)
+    size_mb = sum(p.stat().st_size for p in paths) / (1024 * 1024)
+    print(f"  {layer:40s} → GeoParquet ({len(paths)} CRSes, {size_mb:>5.1f} MB)")
+
+
 def layer_workspace(layer: str) -> str:
     """Extract workspace from 'ERM:RoadLines' -> 'ERM'."""
     return layer.split(":")[0]
@@ -175,6 +192,11 @@ def cmd_download():
     ) / (1024 * 1024)
     print(f"\nDone: {success}/{len(CORE_LAYERS)} layers, {total_size:.1f} MB total")
 
+    print("\nGeoParquet store (data/cache/geodata/):")
+    for layer in CORE_LAYERS:
+        if (GEODATA_DIR / layer_filename(layer)).exists():
+            store_layer(layer)
+
 
 # ---------------------------------------------------------------------------
 # fetch
@@ -198,11 +220,13 @@ def cmd_fetch(layer: str):
     if path.exists():
         size_mb = path.stat().st_size / (1024 * 1024)
         print(f"Already cached: {path} ({size_mb:.1f} MB)")
+        store_layer(layer)
         return
 
     print(f"Fetching {layer}...")
     GEODATA_DIR.mkdir(parents=True, exist_ok=True)
-    fetch_layer(layer, path)
+    if fetch_layer(layer, path):
+        store_layer(layer)
 
 
 # ---------------------------------------------------------------------------
@@ -23,6 +23,10 @@ CLI:
 
     # list known coverages
     uv run python scripts/lmi_hrl.py list
+
+Coverages are pulled as tiles, ``--concurrency`` at a time, and stitched into
+the output GeoTIFF as they land; an interrupted fetch resumes from the tiles
+spooled under data/raw/lmi_hrl/.spool/ (see ``scripts/utils/wcs.py``).
 """
 from __future__ import annotations
 
@@ -30,7 +34,8 @@ import argparse
 import sys
 from pathlib import Path
 
-import httpx
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.wcs import DEFAULT_CONCURRENCY, describe_coverage, fetch_coverage  # noqa: E402
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -38,6 +43,7 @@ if hasattr(sys.stdout, "reconfigure"):
 
 WCS = "https://gis.lmi.is/geoserver/High_Resolution_Layer/wcs"
 RAW = Path(__file__).resolve().parent.parent / "data" / "raw" / "lmi_hrl"
+DEFAULT_TILE_PX = 4096    # 82 km square at 20 m — ~17 MB uncompressed per request
 
 COVERAGES = {
     "grassland": "High_Resolution_Layer__Grassland",
@@ -48,34 +54,25 @@ COVERAGES = {
 }
 
 
-def fetch(coverage: str, *, out: Path, scale: float | None = None) -> None:
-    params = {
-        "service": "WCS",
-        "version": "2.0.1",
-        "request": "GetCoverage",
-        "coverageId": coverage,
-        "format": "image/tiff",
-    }
-    if scale is not None:
-        params["scaleFactor"] = str(scale)
-    out.parent.mkdir(parents=True, exist_ok=True)
-    with httpx.stream("GET", WCS, params=params, timeout=600.0,
-                      follow_redirects=True) as r:
-        r.raise_for_status()
-        ctype = r.headers.get("content-type", "")
-        if "tiff" not in ctype.lower():
-            body = r.read()
-            raise RuntimeError(
-                f"unexpected content-type {ctype!r}: {body[:300]!r}")
-        total = 0
-        with out.open("wb") as f:
-            for chunk in r.iter_bytes(chunk_size=1 << 16):
-                f.write(chunk)
-                total += len(chunk)
-                print(f"\r  ...{total / 1e6:>7.1f} MB",
-                      end="", file=sys.stderr)
-        print(file=sys.stderr)
+def fetch(coverage: str, *, out: Path, scale: float | None = None,
+          concurrency: int = DEFAULT_CONCURRENCY, tile_px: int = DEFAULT_TILE_PX) -> dict:
+    """Download one coverage as a GeoTIFF through the tiled WCS fetcher.
+
+    The grid comes from DescribeCoverage; ``scale`` (WCS ``scaleFactor``)
+    coarsens it. Tiles are requested ``concurrency`` at a time, spooled under
+    ``RAW/.spool/`` so an interrupted pull resumes, and written straight into
+    ``out`` — the ~860 MB grassland raster never sits in memory.
+    """
+    desc = describe_coverage(WCS, coverage)
+    res = desc["res"] / scale if scale else desc["res"]
+    params = {"scaleFactor": str(scale)} if scale is not None else {}
+    stats = fetch_coverage(
+        WCS, coverage, out, bounds=desc["bounds"], res=res, crs=desc["crs"],
+        params=params, axis_labels=tuple(desc["axis_labels"]), tile_px=tile_px,
+        concurrency=concurrency,
+        spool_dir=RAW / ".spool" / f"{coverage}_{res:g}m")
     print(f"Wrote {out}  ({out.stat().st_size / 1e6:.1f} MB)", file=sys.stderr)
+    return stats
 
 
 def cmd_fetch(args: argparse.Namespace) -> None:
@@ -86,7 +83,8 @@ def cmd_fetch(args: argparse.Namespace) -> None:
     suffix = f"_{int(20 / args.scale)}m" if args.scale else "_20m"
     out = args.output or RAW / f"{args.layer}{suffix}.tif"
     print(f"Fetching {cov} -> {out}", file=sys.stderr)
-    fetch(cov, out=Path(out), scale=args.scale)
+    fetch(cov, out=Path(out), scale=args.scale, concurrency=args.concurrency,
+          tile_px=args.tile_px)
 
 
 def cmd_list(_: argparse.Namespace) -> None:
@@ -103,6 +101,10 @@ def main() -> None:
     f.add_argument("--scale", type=float, default=None,
                    help="WCS scaleFactor (e.g. 0.2 -> 100 m, 0.5 -> 40 m)")
     f.add_argument("-o", "--output", help="output path (default: data/raw/lmi_hrl/...)")
+    f.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                   help=f"WCS requests in flight (default {DEFAULT_CONCURRENCY})")
+    f.add_argument("--tile-px", type=int, default=DEFAULT_TILE_PX,
+                   help=f"WCS request tile size in output pixels (default {DEFAULT_TILE_PX})")
     f.set_defaults(fn=cmd_fetch)
 
     l = sp.add_parser("list", help="list known coverages")
@@ -7,7 +7,10 @@ The dashboard's "Eftir búi" page contains a hierarchical matrix visual:
     3=Garðyrkja, 4=Rammasamningur.
   - DM2 on each farm: that farm's column totals (sauðfé, nautgripir, land, …).
 
-Power BI virtualises matrix rows, so we scroll-paginate. We keep *every* farm
+Power BI caps each response at one DataShape window, so we capture the
+matrix's query once and replay it window by window, following the
+RestartTokens continuation (`powerbi.replay_pages`), decoding each page with
+one shared `powerbi.DSRDecoder` as it arrives. We keep *every* farm
 that ever contributed to a Nautgriparækt (G1 == 1) row — those are the recipients
 of a Nautgriparæktarsamningur payment.
 
@@ -27,7 +30,10 @@ import sys
 from pathlib import Path
 
 import polars as pl
-from playwright.async_api import async_playwright
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import powerbi as pb  # noqa: E402
+from utils.browser import BrowserPool  # noqa: E402
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -51,75 +57,20 @@ NAUTGRIPA_IDX = 1  # canonical position; runtime uses d0.index(NAUTGRIPA_LABEL)
 # DM parsing
 # ---------------------------------------------------------------------------
 
-def _walk_results(body: dict):
-    """Yield every (ph_dict, schema_cols) pair anywhere in the body."""
-    for res in body.get("results", []):
-        yield from _walk_data(res.get("result", {}).get("data", {}).get("dsr", {}))
-
-
-def _walk_data(obj):
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            if isinstance(k, str) and k.startswith("DM") and isinstance(v, list):
-                # This is a list of rows; surface it
-                yield k, v
-            yield from _walk_data(v)
-    elif isinstance(obj, list):
-        for it in obj:
-            yield from _walk_data(it)
-
-
-def _rows_from_dm(dm: list[dict], fallback_schema: list[str] | None = None) -> list[dict]:
-    """Decompress a DM list — handles R (repeat) and Ø (null) bitmasks.
-
-    Power BI only emits the schema ("S") on the first row of each DM block in
-    the first body it is sent in; subsequent rows (or subsequent bodies, for
-    paginated fetches) rely on the client already knowing it. Callers pass the
-    resolved schema via ``fallback_schema``.
-    """
-    if not dm:
-        return []
-    schema = [s.get("N") for s in dm[0].get("S", [])] if dm[0].get("S") else fallback_schema
-    out = []
-    prev = {}
-    for row in dm:
-        if row.get("S"):
-            schema = [s.get("N") for s in row["S"]]
-        if not schema:
-            continue
-        vals = {}
-        r_mask = row.get("R", 0)
-        null_mask = row.get("Ø", 0)
-        c = row.get("C", [])
-        named_direct = {k: v for k, v in row.items() if k in schema}
-        ci = 0
-        for i, name in enumerate(schema):
-            bit = 1 << i
-            if name in named_direct:
-                vals[name] = named_direct[name]
-            elif r_mask & bit:
-                vals[name] = prev.get(name)
-            elif null_mask & bit:
-                vals[name] = None
-            elif ci < len(c):
-                vals[name] = c[ci]
-                ci += 1
-        prev = vals
-        if "M" in row:
-            vals["_M"] = row["M"]
-        if "X" in row:
-            vals["_X"] = row["X"]
-        out.append(vals)
-    return out
-
-
-# Hard-coded fallback schemas for the three matrix-body DM blocks. The first
-# body sent by Power BI declares them in its descriptor; paginated follow-ups
-# omit the "S" field and rely on the client remembering.
+# Fallback schemas for the two per-farm DM blocks. The first body sent by Power
+# BI declares them in its descriptor; paginated follow-ups omit the "S" field
+# and rely on the client remembering. `pb.DSRDecoder` remembers them across
+# bodies; these seed it for a body decoded on its own.
 DM2_SCHEMA = ["A7", "A8", "A9", "A10", "A11", "A12", "A13"]
 DM3_SCHEMA = ["G1", "M0", "M1", "M2", "M3", "M4", "M5", "M6"]
 
 
+def matrix_decoder() -> pb.DSRDecoder:
+    """A DSR decoder seeded with the matrix's DM2/DM3 schemas. Share one across
+    the bodies of a paginated scrape, in capture order."""
+    return pb.DSRDecoder(schemas={"DM2": DM2_SCHEMA, "DM3": DM3_SCHEMA})
+
+
 def _find_value_dict(body: dict, key: str = "D0") -> list | None:
     """Return the Power BI ValueDicts entry for *key* in this body.
 
@@ -145,50 +96,46 @@ def _find_value_dict(body: dict, key: str = "D0") -> list | None:
     return _walk(body)
 
 
-def parse_matrix(body: dict):
+def parse_matrix(body: dict, decoder: pb.DSRDecoder | None = None):
     """Extract farm-level rows from the Eftir búi matrix query body.
 
-    Yields dicts: {busnr, nafn, total_upphaed, nautgripir, nautgripa_upphaed}
+    Yields dicts: {busnr, nafn, total_upphaed, nautgripir, nautgripa_upphaed}.
+    Pass the scrape's shared `decoder` so schemas carry across pages.
     """
+    decoder = decoder or matrix_decoder()
     d0 = _find_value_dict(body, "D0") or []
     try:
         nautgripa_idx = d0.index(NAUTGRIPA_LABEL)
     except ValueError:
         nautgripa_idx = None  # this body's batch has no Nautgriparækt rows
-    for name, dm in _walk_results(body):
-        if name != "DM1":
+    farm = None
+    for r in decoder.feed(body):
+        if r.level == "DM1":
+            if farm:
+                yield farm
+            m = FARM_LABEL_RE.match(r.values.get("G0") or "")
+            farm = {
+                "busnr": m.group(1),
+                "nafn": m.group(2),
+                "nautgripir": None,
+                "nautgripa_upphaed": None,
+                "total_upphaed": None,
+            } if m else None
+        elif farm is None or r.parent is None or r.parent.level != "DM1":
             continue
-        for frow in dm:
-            label = frow.get("G0") or ""
-            m = FARM_LABEL_RE.match(label)
-            if not m:
-                continue
-            busnr = m.group(1)
-            nafn = m.group(2)
-            total_upphaed = None
-            nautgripir = None
-            nautgripa_upphaed = None
-            for sub in frow.get("M", []):
-                for subname, subdm in _walk_data(sub):
-                    if subname == "DM2":
-                        rows = _rows_from_dm(subdm, fallback_schema=DM2_SCHEMA)
-                        for r in rows:
-                            if r.get("A13") is not None:
-                                total_upphaed = r["A13"]
-                            if r.get("A10") is not None:
-                                nautgripir = r["A10"]
-                    elif subname == "DM3" and nautgripa_idx is not None:
-                        rows = _rows_from_dm(subdm, fallback_schema=DM3_SCHEMA)
-                        for r in rows:
-                            if r.get("G1") == nautgripa_idx and r.get("M6") is not None:
-                                nautgripa_upphaed = r["M6"]
-            yield {
-                "busnr": busnr,
-                "nafn": nafn,
-                "nautgripir": nautgripir,
-                "nautgripa_upphaed": nautgripa_upphaed,
-                "total_upphaed": total_upphaed,
-            }
+        elif r.level == "DM2":
+            if r.values.get("A13") is not None:
+                farm["total_upphaed"] = r.values["A13"]
+            if r.values.get("A10") is not None:
+                farm["nautgripir"] = r.values["A10"]
+        elif r.level == "DM3":
+            # G1 arrives as a D0 code, or already resolved when S carries a DN.
+            g1 = r.values.get("G1")
+            is_nautgripa = g1 == NAUTGRIPA_LABEL or (nautgripa_idx is not None and g1 == nautgripa_idx)
+            if is_nautgripa and r.values.get("M6") is not None:
+                farm["nautgripa_upphaed"] = r.values["M6"]
+    if farm:
+        yield farm
 
 
 # ---------------------------------------------------------------------------
@@ -242,81 +189,76 @@ async def _set_year(page, year: str) -> bool:
         return False
 
 
-async def _scrape(headed: bool, year: str | None) -> list[dict]:
-    captured: list[dict] = []
+def _matrix_template(bodies) -> dict | None:
+    """The Eftir búi matrix among the captured querydata bodies: the visual
+    with a row hierarchy (most Primary groupings). The last capture wins, so
+    a body re-queried after a slicer change replaces the default one."""
+    best, depth = None, 2  # a flat visual (one grouping) is never the matrix
+    for body in bodies:
+        try:
+            groupings = len(pb.binding_of(body).get("Primary", {}).get("Groupings", []))
+        except (KeyError, IndexError):
+            continue
+        if groupings >= depth:
+            best, depth = body, groupings
+    return best
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=not headed)
-        ctx = await browser.new_context(viewport={"width": 1600, "height": 1000})
-        page = await ctx.new_page()
 
-        async def on_resp(response):
-            if "querydata" in response.url.lower():
-                try:
-                    if response.status == 200:
-                        body = await response.json()
-                        captured.append(body)
-                except Exception:
-                    pass
-
-        page.on("response", on_resp)
-
-        nav = f"{REPORT}&pageName={EFTIR_BUI_PAGE}"
-        print(f"Loading {nav}", file=sys.stderr)
-        await page.goto(nav, wait_until="load", timeout=90000)
-        await asyncio.sleep(12)
-
-        if year:
-            print(f"  selecting Greiðsluár = {year}", file=sys.stderr)
-            ok = await _set_year(page, year)
-            print(f"  year switch ok={ok}", file=sys.stderr)
-            # Let the query re-run
-            await asyncio.sleep(6)
-
-        # Focus the matrix visual and scroll its body to paginate.
-        print("  paging matrix via keyboard…", file=sys.stderr)
-        # Power BI renders the matrix inside a visual container with role=group
-        # and an inner .bodyCells that actually scrolls.
-        target = None
-        for sel in [".bodyCells", ".pivotTable .bodyCells", "[class*='pivotTable']"]:
-            target = await page.query_selector(sel)
-            if target:
-                print(f"    using selector: {sel}", file=sys.stderr)
-                break
+async def _scrape(headed: bool, year: str | None, window: int) -> tuple[dict[str, dict], int]:
+    """Capture the matrix query once, then pull the whole table by replaying
+    it window by window (`pb.replay_pages`, following RestartTokens).
 
-        if target:
-            try:
-                await target.click()
-            except Exception:
-                pass
-
-        seen_farms = 0
-        stable_rounds = 0
-        for round_idx in range(80):
-            # PageDown + End both help Power BI ask for more rows
-            for _ in range(30):
-                await page.keyboard.press("PageDown")
-                await asyncio.sleep(0.15)
-            await page.keyboard.press("End")
-            await asyncio.sleep(2)
-
-            farms = set()
-            for body in captured:
-                for r in parse_matrix(body):
-                    farms.add(r["busnr"])
-            print(f"    round {round_idx + 1}: distinct_farms={len(farms)} queries={len(captured)}",
-                  file=sys.stderr)
-            if len(farms) == seen_farms:
-                stable_rounds += 1
-                if stable_rounds >= 4:
-                    break
-            else:
-                stable_rounds = 0
-            seen_farms = len(farms)
-
-        await browser.close()
-
-    return captured
+    Bodies are streamed straight to OUT_RAW (still one JSON array) and folded
+    into the per-farm merge; none are kept in memory. Returns (farms, n_queries).
+    """
+    merged: dict[str, dict] = {}
+    decoder = matrix_decoder()
+    OUT_RAW.parent.mkdir(parents=True, exist_ok=True)
+    n_queries = 0
+
+    with OUT_RAW.open("w", encoding="utf-8") as raw:
+        raw.write("[")
+        try:
+            async with BrowserPool(contexts=1, headless=not headed) as pool, \
+                    pool.page(viewport={"width": 1600, "height": 1000}) as page:
+                captured: list = []
+                pb.capture_requests(page, captured)
+
+                nav = f"{REPORT}&pageName={EFTIR_BUI_PAGE}"
+                print(f"Loading {nav}", file=sys.stderr)
+                await page.goto(nav, wait_until="load", timeout=90000)
+                await asyncio.sleep(12)
+
+                if year:
+                    print(f"  selecting Greiðsluár = {year}", file=sys.stderr)
+                    ok = await _set_year(page, year)
+                    print(f"  year switch ok={ok}", file=sys.stderr)
+                    # Let the query re-run so its filtered body is captured
+                    await asyncio.sleep(6)
+
+                key = pb.key_of(REPORT)
+                template = _matrix_template(body for k, body in captured if k == key)
+                if template is None:
+                    raise RuntimeError(f"no matrix query among {len(captured)} captured — "
+                                       "the Eftir búi page layout changed?")
+
+                async def the_frame():
+                    return page.main_frame
+
+                target = await pb.AutoTransport(REPORT, the_frame).start()
+                print(f"  paging matrix in windows of {window} ({target.mode})", file=sys.stderr)
+                try:
+                    async for body in pb.replay_pages(target, key, template, count=window):
+                        raw.write(("," if n_queries else "") + json.dumps(body, ensure_ascii=False))
+                        n_queries += 1
+                        for row in parse_matrix(body, decoder):
+                            _merge(merged, row)
+                        print(f"    window {n_queries}: distinct_farms={len(merged)}", file=sys.stderr)
+                finally:
+                    await target.aclose()
+        finally:
+            raw.write("]")
+    return merged, n_queries
 
 
 # ---------------------------------------------------------------------------
@@ -328,38 +270,44 @@ def busnr_to_landsnr(busnr: str | int) -> int:
     return int(str(busnr)) // 10
 
 
-def _flatten(captured: list[dict]) -> list[dict]:
+def _merge(merged: dict[str, dict], row: dict) -> None:
     # Merge farm rows across captures, picking the record with the largest
     # total_upphaed (a farm can be partially visible across multiple fetches).
+    busnr = row["busnr"]
+    prev = merged.get(busnr)
+    if prev is None or (row.get("total_upphaed") or 0) > (prev.get("total_upphaed") or 0):
+        merged[busnr] = row
+    else:
+        # Fill any missing fields from the new row
+        for k, v in row.items():
+            if prev.get(k) is None and v is not None:
+                prev[k] = v
+
+
+def _flatten(captured: list[dict]) -> list[dict]:
     merged: dict[str, dict] = {}
+    decoder = matrix_decoder()
     for body in captured:
-        for row in parse_matrix(body):
-            busnr = row["busnr"]
-            prev = merged.get(busnr)
-            if prev is None or (row.get("total_upphaed") or 0) > (prev.get("total_upphaed") or 0):
-                merged[busnr] = row
-            else:
-                # Fill any missing fields from the new row
-                for k, v in row.items():
-                    if prev.get(k) is None and v is not None:
-                        prev[k] = v
+        for row in parse_matrix(body, decoder):
+            _merge(merged, row)
     return list(merged.values())
 
 
 def cmd_fetch(args: argparse.Namespace) -> None:
-    captured = asyncio.run(_scrape(headed=args.headed, year=args.year))
-    OUT_RAW.parent.mkdir(parents=True, exist_ok=True)
-    OUT_RAW.write_text(json.dumps(captured, ensure_ascii=False), encoding="utf-8")
-    print(f"  wrote {OUT_RAW} ({OUT_RAW.stat().st_size:,} bytes, {len(captured)} queries)",
+    merged, n_queries = asyncio.run(_scrape(headed=args.headed, year=args.year, window=args.window))
+    print(f"  wrote {OUT_RAW} ({OUT_RAW.stat().st_size:,} bytes, {n_queries} queries)",
           file=sys.stderr)
-    cmd_parse(args)
+    _write_csv(list(merged.values()))
 
 
 def cmd_parse(args: argparse.Namespace) -> None:
     if not OUT_RAW.exists():
         sys.exit(f"Missing {OUT_RAW}. Run `fetch` first.")
     captured = json.loads(OUT_RAW.read_text(encoding="utf-8"))
-    all_farms = _flatten(captured)
+    _write_csv(_flatten(captured))
+
+
+def _write_csv(all_farms: list[dict]) -> None:
     # Strict: only farms that *received* a Nautgriparækt payment this year.
     # (Farms with cattle on record but zero payment are noise for this map.)
     recipients = [f for f in all_farms if (f.get("nautgripa_upphaed") or 0) > 0]
@@ -392,6 +340,8 @@ def main() -> None:
     f.add_argument("--headed", action="store_true")
     f.add_argument("--year", default=None,
                    help="Greiðsluár to select (e.g. 2025). Default: dashboard default (current year).")
+    f.add_argument("--window", type=int, default=500, metavar="N",
+                   help="farms per querydata window when paging the matrix (default 500)")
     f.set_defaults(func=cmd_fetch)
 
     p = sub.add_parser("parse", help="Re-parse existing raw JSON into CSV")
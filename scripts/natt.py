@@ -21,8 +21,20 @@ CLI::
     uv run python scripts/natt.py habitat --code L14.2 --res 100 # ~1 min, map-grade
     uv run python scripts/natt.py habitat --dn 95 --res 20       # ~30 min, detail work
 
-The fetch is server-bound, not bandwidth-bound: WCS is asked for one
-``scaleFactor`` -downsampled tile at a time and the tiles are stitched locally.
+The fetch is server-bound, not bandwidth-bound: WCS is asked for
+``scaleFactor`` -downsampled tiles, ``--concurrency`` at a time, and each is
+written into its window of the output GeoTIFF as it lands. Tiles are spooled
+to disk first, so an interrupted run picks up where it stopped
+(``scripts/utils/wcs.py``).
+
+Exploring several habitat types costs one fetch, not one per code: the
+``classes`` command (or ``habitat`` with more than one code) mosaics the
+unmasked code raster once per resolution, and masks, per-code areas and
+per-municipality histograms are then cut from it locally (row-band
+``bincount``, no requests)::
+
+    uv run python scripts/natt.py classes --res 50 --by-municipality
+    uv run python scripts/natt.py habitat --code L14.2 L10.1 L8.6
 
     # DN -> htxt inventory (73 codes) straight off the raster colormap
     uv run python scripts/natt.py inventory
@@ -31,6 +43,9 @@ Output::
 
     data/raw/natt/vistgerdir/vistgerd_dn<DN>_<RES>m.tif    (EPSG:3057, uint8 mask)
     data/raw/natt/vistgerdir/vistgerd_dn<DN>_<RES>m.json   (sidecar: label, area)
+    data/raw/natt/vistgerdir/vistgerd_classes_<RES>m.tif   (EPSG:3057, every code)
+    data/raw/natt/vistgerdir/vistgerd_classes_<RES>m_areas.csv
+    data/raw/natt/vistgerdir/vistgerd_classes_<RES>m_by_municipality.csv
     data/raw/natt/vistgerdir/inventory.csv                 (DN -> htxt map)
 """
 from __future__ import annotations
@@ -38,14 +53,15 @@ from __future__ import annotations
 import argparse
 import csv
 import json
-import math
 import sys
 from pathlib import Path
 
 import httpx
 import numpy as np
 import rasterio
-from rasterio.io import MemoryFile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.wcs import DEFAULT_CONCURRENCY, fetch_coverage  # noqa: E402
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -76,6 +92,7 @@ DEFAULT_DN = 95           # L14.2 Tún og akurlendi
 # total to within 0.1% (1,805.8–1,807.5 km²).
 DEFAULT_RES_M = 50
 DEFAULT_TILE_PX = 5000    # 250 km square at 50 m — ~25 MB per WCS request
+BAND_ROWS = 512           # rows per read when scanning a class raster locally
 
 RAW = Path(__file__).resolve().parent.parent / "data" / "raw" / "natt" / "vistgerdir"
 
@@ -132,98 +149,201 @@ def dn_for_code(code: str, table: list[tuple[int, str]] | None = None) -> int:
 
 # ── WCS: fetch band 1 and mask it to one habitat code ────────────────────
 
-def _dest_grid(res_m: float) -> tuple[int, int, rasterio.Affine]:
-    xmin, _ymin, _xmax, ymax = NATIVE_BOUNDS
-    factor = res_m / NATIVE_RES_M
-    width = math.ceil(NATIVE_WIDTH / factor)
-    height = math.ceil(NATIVE_HEIGHT / factor)
-    transform = rasterio.Affine(res_m, 0.0, xmin, 0.0, -res_m, ymax)
-    return width, height, transform
-
-
-def _wcs_tile(x0: float, y0: float, x1: float, y1: float, res_m: float,
-              *, timeout: float = 300.0) -> tuple[np.ndarray, rasterio.Affine]:
-    """GetCoverage for one bbox, band 1 only, scaled to ``res_m``."""
-    params = {
-        "service": "WCS", "version": "2.0.1", "request": "GetCoverage",
-        "coverageId": COVERAGE,
-        "format": "image/tiff",
-        "rangeSubset": "GRAY_INDEX",         # band 1 = habitat code; skip alpha
-        "scaleFactor": NATIVE_RES_M / res_m,
-    }
-    # httpx keeps repeated keys, which is how WCS 2.0 expresses a 2-D subset.
-    query = list(params.items()) + [
-        ("subset", f"X({x0},{x1})"), ("subset", f"Y({y0},{y1})")]
-    r = httpx.get(WCS, params=query, timeout=timeout, follow_redirects=True)
-    r.raise_for_status()
-    if r.content[:5] == b"<?xml":
-        raise RuntimeError(f"WCS returned an exception: {r.text[:300]}")
-    with MemoryFile(r.content) as mem, mem.open() as src:
-        return src.read(1), src.transform
-
-
-def fetch_mask(dn: int, *, res_m: float = DEFAULT_RES_M,
-               tile_px: int = DEFAULT_TILE_PX) -> tuple[np.ndarray, rasterio.Affine]:
-    """Mosaic the whole country at ``res_m`` and return a uint8 ``==dn`` mask.
+def fetch_mask(dn: int, out: Path, *, res_m: float = DEFAULT_RES_M,
+               tile_px: int = DEFAULT_TILE_PX, concurrency: int = DEFAULT_CONCURRENCY,
+               keep_spool: bool = False) -> int:
+    """Mosaic the whole country at ``res_m`` into a uint8 ``==dn`` mask at
+    ``out`` and return its pixel count.
 
     The 5 m source is 7.5 Gpx, so it is never fetched whole: WCS is asked for
-    ``scaleFactor`` -downsampled tiles (nearest-neighbour server-side) and the
-    tiles are stitched on the destination grid.
+    ``scaleFactor`` -downsampled tiles (nearest-neighbour server-side),
+    ``concurrency`` at a time, and each is written into its window of a tiled
+    + LZW GeoTIFF (ISN93, predictor=2, 512 px blocks — the Tier-3 cache's
+    conventions). Raw tiles are spooled under ``RAW/.spool/`` keyed by bbox
+    and resolution, not DN, so an interrupted run resumes — and with
+    ``keep_spool`` a mask for another DN at the same resolution costs no
+    requests at all.
     """
     if res_m % NATIVE_RES_M:
         raise SystemExit(f"--res must be a multiple of {NATIVE_RES_M:g} m "
                          f"(the native grid), got {res_m:g}")
-    width, height, transform = _dest_grid(res_m)
-    out = np.zeros((height, width), dtype=np.uint8)
-    xmin, _ymin, _xmax, ymax = NATIVE_BOUNDS
-
-    cols = math.ceil(width / tile_px)
-    rows = math.ceil(height / tile_px)
-    print(f"  destination grid {width:,} × {height:,} px @ {res_m:g} m "
-          f"({rows}×{cols} tiles)", file=sys.stderr)
-
-    n = 0
-    for r_i in range(rows):
-        for c_i in range(cols):
-            j0, j1 = c_i * tile_px, min((c_i + 1) * tile_px, width)
-            i0, i1 = r_i * tile_px, min((r_i + 1) * tile_px, height)
-            tx0 = xmin + j0 * res_m
-            tx1 = xmin + j1 * res_m
-            ty1 = ymax - i0 * res_m
-            ty0 = ymax - i1 * res_m
-            band, t = _wcs_tile(tx0, ty0, tx1, ty1, res_m)
-            # Place by the tile's own georeference rather than trusting that the
-            # server honoured the requested bbox exactly.
-            oj = int(round((t.c - transform.c) / res_m))
-            oi = int(round((transform.f - t.f) / res_m))
-            h = min(band.shape[0], height - oi)
-            w = min(band.shape[1], width - oj)
-            if h > 0 and w > 0:
-                out[oi:oi + h, oj:oj + w] = (band[:h, :w] == dn)
-            n += 1
-            print(f"    tile {n}/{rows * cols}  {band.shape[1]}×{band.shape[0]} px  "
-                  f"→ [{oi}:{oi + h}, {oj}:{oj + w}]", file=sys.stderr)
-    return out, transform
-
-
-def write_mask(mask: np.ndarray, transform: rasterio.Affine, out: Path) -> None:
-    """Tiled + LZW GeoTIFF, same on-disk conventions as the Tier-3 cache
-    (``scripts/build_cache.py``): ISN93, uint8, predictor=2, 512 px blocks."""
-    out.parent.mkdir(parents=True, exist_ok=True)
-    with rasterio.open(
-        out, "w", driver="GTiff", dtype="uint8", count=1,
-        width=mask.shape[1], height=mask.shape[0],
-        crs=CRS, transform=transform, nodata=0,
-        compress="lzw", predictor=2, tiled=True,
-        blockxsize=512, blockysize=512,
-    ) as dst:
-        dst.write(mask, 1)
+    fetch_coverage(
+        WCS, COVERAGE, out, bounds=NATIVE_BOUNDS, res=res_m, crs=CRS,
+        params={"rangeSubset": "GRAY_INDEX",        # band 1 = habitat code; skip alpha
+                "scaleFactor": NATIVE_RES_M / res_m},
+        tile_px=tile_px, band_fn=lambda band: band == dn, dtype="uint8", nodata=0,
+        concurrency=concurrency, spool_dir=RAW / ".spool" / f"{COVERAGE}_{res_m:g}m",
+        keep_spool=keep_spool)
+    with rasterio.open(out) as src:
+        return sum(int(np.count_nonzero(src.read(1, window=w)))
+                   for _, w in src.block_windows(1))
+
+
+# ── class raster: fetch every code once, derive masks and tables locally ──
+
+def class_raster_path(res_m: float) -> Path:
+    return RAW / f"vistgerd_classes_{res_m:g}m.tif"
+
+
+def fetch_classes(res_m: float = DEFAULT_RES_M, *, tile_px: int = DEFAULT_TILE_PX,
+                  concurrency: int = DEFAULT_CONCURRENCY, keep_spool: bool = False) -> Path:
+    """Mosaic band 1 unmasked — every habitat code — into
+    ``class_raster_path(res_m)``, in the coverage's own integer type (uint8
+    today; uint16 would work unchanged). One pass over the same tiles
+    ``fetch_mask`` requests; every mask, area table and municipality
+    histogram at this resolution is then derived locally."""
+    if res_m % NATIVE_RES_M:
+        raise SystemExit(f"--res must be a multiple of {NATIVE_RES_M:g} m "
+                         f"(the native grid), got {res_m:g}")
+    out = class_raster_path(res_m)
+    print(f"Fetching all habitat codes at {res_m:g} m ...", file=sys.stderr)
+    fetch_coverage(
+        WCS, COVERAGE, out, bounds=NATIVE_BOUNDS, res=res_m, crs=CRS,
+        params={"rangeSubset": "GRAY_INDEX", "scaleFactor": NATIVE_RES_M / res_m},
+        tile_px=tile_px, concurrency=concurrency,
+        spool_dir=RAW / ".spool" / f"{COVERAGE}_{res_m:g}m", keep_spool=keep_spool)
+    print(f"Wrote {out}  ({out.stat().st_size / 1e6:.1f} MB)", file=sys.stderr)
+    return out
+
+
+def _row_bands(src, rows: int = BAND_ROWS):
+    from rasterio.windows import Window
+
+    for r0 in range(0, src.height, rows):
+        yield Window(0, r0, src.width, min(rows, src.height - r0))
+
+
+def _n_codes(dtype) -> int:
+    return 1 << (8 * np.dtype(dtype).itemsize)
+
+
+def class_histogram(path: Path, zones=None) -> np.ndarray:
+    """Pixel count per habitat code in a class raster, read in row bands.
+
+    With ``zones`` (a list of polygons in the raster's CRS), returns a
+    ``(len(zones) + 1, n_codes)`` table instead: row ``z + 1`` counts the
+    pixels inside ``zones[z]``, row 0 those outside every zone. Zones are
+    burnt per band, and each band is one ``bincount`` over
+    ``zone * n_codes + code``.
+    """
+    from rasterio.features import rasterize
+
+    with rasterio.open(path) as src:
+        k = _n_codes(src.dtypes[0])
+        n_rows = 1 if zones is None else len(zones) + 1
+        counts = np.zeros(n_rows * k, dtype=np.int64)
+        shapes = None if zones is None else [(g, z + 1) for z, g in enumerate(zones)]
+        for w in _row_bands(src):
+            codes = src.read(1, window=w).astype(np.int64, copy=False)
+            if shapes is not None:
+                zone = rasterize(shapes, out_shape=codes.shape,
+                                 transform=src.window_transform(w), fill=0, dtype="int32")
+                codes = zone.astype(np.int64) * k + codes
+            counts += np.bincount(codes.ravel(), minlength=n_rows * k)
+    return counts.reshape(n_rows, k) if zones is not None else counts
+
+
+def mask_from_classes(dn: int, out: Path, classes: Path) -> int:
+    """Write the ``==dn`` mask of a class raster to ``out`` (the conventions
+    of ``fetch_mask``'s output) and return its pixel count — no requests."""
+    px = 0
+    tmp = out.with_suffix(".tmp.tif")
+    with rasterio.open(classes) as src:
+        profile = src.profile | {"dtype": "uint8", "nodata": 0}
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with rasterio.open(tmp, "w", **profile) as dst:
+            for w in _row_bands(src):
+                mask = (src.read(1, window=w) == dn).astype(np.uint8)
+                px += int(np.count_nonzero(mask))
+                dst.write(mask, 1, window=w)
+    tmp.replace(out)
+    return px
+
+
+def area_table(counts: np.ndarray, res_m: float,
+               table: list[tuple[int, str]]) -> list[dict]:
+    """One row (dn, code, htxt, pixels, area_km2) per colormap entry present
+    in ``counts``, largest first. Codes outside the colormap — nodata, the
+    sea — are left out."""
+    rows = [{"dn": dn, "code": ht.split()[0], "htxt": ht, "pixels": int(counts[dn]),
+             "area_km2": round(int(counts[dn]) * res_m ** 2 / 1e6, 3)}
+            for dn, ht in table if dn < len(counts) and counts[dn]]
+    return sorted(rows, key=lambda r: -r["pixels"])
+
+
+def _municipalities():
+    """Municipality polygons in ISN93 and their names, from the LMI store.
+
+    Only AdministrativeUnit_level2 will do: AdministrativeAreas is 2,713
+    unnamed zones, and a table keyed by their row numbers looks like an
+    answer without being one.
+    """
+    from utils.cache import CacheMissingError, base_layer
+
+    try:
+        gdf = base_layer("AdministrativeUnit_level2", CRS)
+    except CacheMissingError as e:
+        raise SystemExit(f"No municipality layer cached ({e}) — run: {e.hint}")
+    col = next((c for c in ("namn", "namn1", "name") if c in gdf.columns), None)
+    if col is None:
+        raise SystemExit("AdministrativeUnit_level2 carries no name column "
+                         f"(columns: {', '.join(gdf.columns)}) — re-run: "
+                         "uv run python scripts/lmi.py download")
+    return list(gdf.geometry), gdf[col].astype(str).tolist()
+
+
+def _write_csv(path: Path, rows: list[dict]) -> None:
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["dn"])
+        w.writeheader()
+        w.writerows(rows)
+    print(f"Wrote {len(rows):,} rows to {path}", file=sys.stderr)
 
 
 def mask_path(dn: int, res_m: float) -> Path:
     return RAW / f"vistgerd_dn{dn}_{res_m:g}m.tif"
 
 
+def build_mask(dn: int, res_m: float, *, label: str | None = None,
+               tile_px: int = DEFAULT_TILE_PX, concurrency: int = DEFAULT_CONCURRENCY,
+               keep_spool: bool = False) -> Path:
+    """Fetch, write and describe one habitat mask; returns ``mask_path``.
+
+    Masks are cut locally from ``class_raster_path(res_m)`` when that
+    exists (``natt.py classes``); otherwise only this DN is fetched.
+    Also the build step of the ``vistgerd_dn<DN>_<RES>m`` node in
+    ``scripts/build_cache.py``, which decides when it needs rerunning.
+    """
+    if label is None:
+        label = dict(legend()).get(dn)
+        if label is None:
+            raise SystemExit(f"DN={dn} is not in the raster colormap")
+    out = mask_path(dn, res_m)
+    classes = class_raster_path(res_m)
+    if classes.exists():
+        print(f"Masking DN={dn} ({label}) out of {classes.name} ...", file=sys.stderr)
+        px = mask_from_classes(dn, out, classes)
+    else:
+        print(f"Fetching DN={dn} ({label}) at {res_m:g} m ...", file=sys.stderr)
+        px = fetch_mask(dn, out, res_m=res_m, tile_px=tile_px, concurrency=concurrency,
+                        keep_spool=keep_spool)
+    area_km2 = px * (res_m ** 2) / 1e6
+    side = out.with_suffix(".json")
+    side.write_text(json.dumps({
+        "dn": dn,
+        "htxt": label,
+        "code": label.split()[0],
+        "resolution_m": res_m,
+        "crs": CRS,
+        "coverage": COVERAGE,
+        "pixel_count": px,
+        "area_km2": area_km2,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Wrote {out}  ({out.stat().st_size / 1e6:.1f} MB)", file=sys.stderr)
+    print(f"  {px:,} px  →  {area_km2:,.1f} km²  ({label})", file=sys.stderr)
+    return out
+
+
 # ── commands ─────────────────────────────────────────────────────────────
 
 def cmd_habitat(args: argparse.Namespace) -> None:
@@ -238,35 +358,46 @@ def cmd_habitat(args: argparse.Namespace) -> None:
 
     table = legend()
     if args.code:
-        dn = dn_for_code(args.code, table)
+        dns = [dn_for_code(c, table) for c in args.code]
     else:
-        dn = args.dn if args.dn is not None else DEFAULT_DN
-    label = dict(table).get(dn)
-    if label is None:
-        raise SystemExit(
-            f"DN={dn} is not in the raster colormap — run: "
-            f"uv run python scripts/natt.py inventory")
+        dns = args.dn or [DEFAULT_DN]
+    labels = dict(table)
+    for dn in dns:
+        if dn not in labels:
+            raise SystemExit(
+                f"DN={dn} is not in the raster colormap — run: "
+                f"uv run python scripts/natt.py inventory")
+
+    # Several codes: fetch every code once, then cut each mask locally.
+    if len(set(dns)) > 1 and not class_raster_path(args.res).exists():
+        fetch_classes(args.res, tile_px=args.tile_px, concurrency=args.concurrency,
+                      keep_spool=args.keep_spool)
+    for dn in dict.fromkeys(dns):
+        build_mask(dn, args.res, label=labels[dn], tile_px=args.tile_px,
+                   concurrency=args.concurrency, keep_spool=args.keep_spool)
+
+
+def cmd_classes(args: argparse.Namespace) -> None:
+    path = class_raster_path(args.res)
+    if args.refetch or not path.exists():
+        fetch_classes(args.res, tile_px=args.tile_px, concurrency=args.concurrency,
+                      keep_spool=args.keep_spool)
+    table = legend()
 
-    print(f"Fetching DN={dn} ({label}) at {args.res:g} m ...", file=sys.stderr)
-    mask, transform = fetch_mask(dn, res_m=args.res, tile_px=args.tile_px)
+    counts = class_histogram(path)
+    rows = area_table(counts, args.res, table)
+    _write_csv(path.with_name(f"{path.stem}_areas.csv"), rows)
+    for r in rows[:10]:
+        print(f"  DN={r['dn']:>4}  {r['area_km2']:>10,.1f} km²  {r['htxt']}")
 
-    px = int(mask.sum())
-    area_km2 = px * (args.res ** 2) / 1e6
-    out = mask_path(dn, args.res)
-    write_mask(mask, transform, out)
-    side = out.with_suffix(".json")
-    side.write_text(json.dumps({
-        "dn": dn,
-        "htxt": label,
-        "code": label.split()[0],
-        "resolution_m": args.res,
-        "crs": CRS,
-        "coverage": COVERAGE,
-        "pixel_count": px,
-        "area_km2": area_km2,
-    }, ensure_ascii=False, indent=2), encoding="utf-8")
-    print(f"Wrote {out}  ({out.stat().st_size / 1e6:.1f} MB)", file=sys.stderr)
-    print(f"  {px:,} px  →  {area_km2:,.1f} km²  ({label})", file=sys.stderr)
+    if args.by_municipality:
+        zones, names = _municipalities()
+        hist = class_histogram(path, zones)
+        out = []
+        for z, name in enumerate(names, start=1):
+            out += [{"municipality": name, **r}
+                    for r in area_table(hist[z], args.res, table)]
+        _write_csv(path.with_name(f"{path.stem}_by_municipality.csv"), out)
 
 
 def cmd_inventory(_: argparse.Namespace) -> None:
@@ -288,21 +419,43 @@ def main() -> None:
         formatter_class=argparse.RawDescriptionHelpFormatter)
     sp = ap.add_subparsers(dest="cmd", required=True)
 
-    h = sp.add_parser("habitat", help="download one habitat type as a raster mask")
+    h = sp.add_parser("habitat", help="download habitat types as raster masks")
     g = h.add_mutually_exclusive_group()
-    g.add_argument("--dn", type=int,
-                   help=f"raster code, e.g. {DEFAULT_DN} = L14.2 (default)")
-    g.add_argument("--code", help="L-code, e.g. L14.2 — resolved via the colormap")
+    g.add_argument("--dn", type=int, nargs="+",
+                   help=f"raster code(s), e.g. {DEFAULT_DN} = L14.2 (default)")
+    g.add_argument("--code", nargs="+",
+                   help="L-code(s), e.g. L14.2 — resolved via the colormap")
     h.add_argument("--res", type=float, default=DEFAULT_RES_M, metavar="METRES",
                    help=f"output resolution, multiple of {NATIVE_RES_M:g} "
                         f"(default {DEFAULT_RES_M})")
     h.add_argument("--tile-px", type=int, default=DEFAULT_TILE_PX,
                    help="WCS request tile size in output pixels "
                         f"(default {DEFAULT_TILE_PX})")
+    h.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                   help=f"WCS requests in flight (default {DEFAULT_CONCURRENCY})")
+    h.add_argument("--keep-spool", action="store_true",
+                   help="keep the raw tiles after a successful run, so a mask for "
+                        "another DN at the same --res needs no requests")
     h.add_argument("--format", choices=["geotiff", "geojson"], default="geotiff",
                    help="geojson is retired — kept only to explain the change")
     h.set_defaults(fn=cmd_habitat)
 
+    c = sp.add_parser("classes", help="fetch every habitat code once; area tables")
+    c.add_argument("--res", type=float, default=DEFAULT_RES_M, metavar="METRES",
+                   help=f"output resolution, multiple of {NATIVE_RES_M:g} "
+                        f"(default {DEFAULT_RES_M})")
+    c.add_argument("--by-municipality", action="store_true",
+                   help="also tabulate every code per municipality (LMI boundaries)")
+    c.add_argument("--refetch", action="store_true",
+                   help="fetch the class raster again even if it exists")
+    c.add_argument("--tile-px", type=int, default=DEFAULT_TILE_PX,
+                   help=f"WCS request tile size in output pixels (default {DEFAULT_TILE_PX})")
+    c.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                   help=f"WCS requests in flight (default {DEFAULT_CONCURRENCY})")
+    c.add_argument("--keep-spool", action="store_true",
+                   help="keep the raw tiles after a successful run")
+    c.set_defaults(fn=cmd_classes)
+
     inv = sp.add_parser("inventory", help="dump the DN→htxt mapping (73 codes)")
     inv.set_defaults(fn=cmd_inventory)
 
@@ -10,14 +10,15 @@ Pipeline (end-to-end smoke test of the búsnúmer → landsnúmer conversion):
      historical landnúmer, whereas HMS Landeignaskrá only has formally
      surveyed parcels (~89k, ~3.4k of which are JÖRÐ), so the HMS registry
      misses many farms — iceaddr is the pragmatic map source.
-  4. Render a static PNG over the cached LMI landmask + a single-file HTML
-     with Leaflet.
+  4. Render a static PNG over the cached LMI landmask + a Leaflet HTML page
+     whose markers load as z/x/y tiles from data/cache/tiles/.
 
 Output: reports/nautgripa-map.png, reports/nautgripa-map.html
 """
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import sqlite3
 import sys
@@ -26,16 +27,25 @@ from pathlib import Path
 
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.cache import base_layer  # noqa: E402
+from utils.tiles import LEAFLET_JS, build_frame_tiles, layer_options  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
     sys.stderr.reconfigure(encoding="utf-8")
 
 RECIPIENTS_CSV = Path(__file__).resolve().parent.parent / "data" / "processed" / "nautgripa_recipients.csv"
-GEODATA = Path(__file__).resolve().parent.parent / "data" / "geodata"
 
 OUT_PNG = Path("reports/nautgripa-map.png")
 OUT_HTML = Path("reports/nautgripa-map.html")
 
+# The HTML map's farm markers are cut into data/cache/tiles/<TILES_LAYER>/;
+# these raster pyramids (``build_cache.py build tiles:<name>``) are offered
+# as overlays when they have been cut.
+TILES_LAYER = "nautgripa_recipients"
+OVERLAY_TILES = ("grassland_isn93", "vistgerd_dn95_50m")
+
 
 # ---------------------------------------------------------------------------
 # Geocoding via iceaddr SQLite (búsnúmer // 10 = landsnúmer = stadfong.landnr)
@@ -96,12 +106,11 @@ def geocode(df: pl.DataFrame) -> pl.DataFrame:
 # ---------------------------------------------------------------------------
 
 def render_static(df: pl.DataFrame, out: Path) -> None:
-    import geopandas as gpd
     import matplotlib.pyplot as plt
 
-    land = gpd.read_file(GEODATA / "Landmask.geojson")
-    glaciers = gpd.read_file(GEODATA / "LandIceArea.geojson")
-    lakes = gpd.read_file(GEODATA / "Lake_Reservoir.geojson")
+    land = base_layer("Landmask", "EPSG:4326")
+    glaciers = base_layer("LandIceArea", "EPSG:4326")
+    lakes = base_layer("Lake_Reservoir", "EPSG:4326")
 
     hit = df.filter(pl.col("lat").is_not_null())
     lons = hit["lon"].to_list()
@@ -140,7 +149,7 @@ def render_static(df: pl.DataFrame, out: Path) -> None:
 
 
 # ---------------------------------------------------------------------------
-# Interactive Leaflet map (single file, no build step)
+# Interactive Leaflet map (markers served as tiles, no build step)
 # ---------------------------------------------------------------------------
 
 HTML_TEMPLATE = """<!doctype html>
@@ -167,25 +176,34 @@ HTML_TEMPLATE = """<!doctype html>
 </div>
 <div id="map"></div>
 <script>
-const data = {points_json};
+{leaflet_js}
+const farms = {farms_json};
+const rasters = {rasters_json};
 const map = L.map('map',{{zoomSnap:0.25}}).setView([64.9,-18.5],6.6);
 L.tileLayer('https://cartodb-basemaps-{{s}}.global.ssl.fastly.net/light_all/{{z}}/{{x}}/{{y}}.png',{{
   attribution:'&copy; OSM &copy; CARTO',maxZoom:18
 }}).addTo(map);
-const max = Math.max(...data.map(d=>d.v));
-for(const d of data){{
-  const r = Math.max(4, 22*Math.sqrt(d.v/max));
-  L.circleMarker([d.lat,d.lon],{{
-    radius:r,color:'#6b1f15',weight:1,fillColor:'#c0392b',fillOpacity:0.6
-  }})
-  .bindPopup(
-    `<b>${{d.n}}</b><br>bú nr. ${{d.b}} &middot; land nr. ${{d.l}}<br>`+
-    `nautgriparækt: <b>${{d.v.toLocaleString('is-IS')}} kr.</b><br>`+
-    (d.c?`nautgripir: ${{d.c.toLocaleString('is-IS')}}<br>`:'')+
-    `heildarfjárhæð: ${{d.t.toLocaleString('is-IS')}} kr.`
-  )
-  .addTo(map);
+const max = {max_isk};
+const overlays = {{}};
+for (const r of rasters) overlays[r.label] = L.pngTiles(r);
+if (farms) {{
+  overlays['Bú'] = new L.GeoJSONTiles(farms, {{
+    pointToLayer: (f, latlng) => L.circleMarker(latlng, {{
+      radius: Math.max(4, 22*Math.sqrt(f.properties.v/max)),
+      color:'#6b1f15',weight:1,fillColor:'#c0392b',fillOpacity:0.6
+    }}),
+    onEachFeature: (f, layer) => {{
+      const d = f.properties;
+      layer.bindPopup(
+        `<b>${{d.n}}</b><br>bú nr. ${{d.b}} &middot; land nr. ${{d.l}}<br>`+
+        `nautgriparækt: <b>${{d.v.toLocaleString('is-IS')}} kr.</b><br>`+
+        (d.c?`nautgripir: ${{d.c.toLocaleString('is-IS')}}<br>`:'')+
+        `heildarfjárhæð: ${{d.t.toLocaleString('is-IS')}} kr.`
+      );
+    }}
+  }}).addTo(map);
 }}
+if (rasters.length) L.control.layers(null, overlays, {{collapsed:false}}).addTo(map);
 const legend = L.control({{position:'bottomright'}});
 legend.onAdd = () => {{
   const div = L.DomUtil.create('div','legend');
@@ -199,6 +217,10 @@ legend.addTo(map);
 
 
 def render_html(df: pl.DataFrame, out: Path) -> None:
+    """Leaflet page whose farm markers are a tile pyramid (cut again only when
+    the geocoded rows change) plus any cut grassland / habitat overlays."""
+    import geopandas as gpd
+
     hit = df.filter(pl.col("lat").is_not_null())
     points = [
         {
@@ -216,11 +238,25 @@ def render_html(df: pl.DataFrame, out: Path) -> None:
     n_farms = len(df)
     n_geocoded = len(hit)
     total = int(df["nautgripa_upphaed"].sum() or 0)
+    farms = None
+    if points:
+        frame = gpd.GeoDataFrame(
+            points, geometry=gpd.points_from_xy([p["lon"] for p in points],
+                                                [p["lat"] for p in points]),
+            crs="EPSG:4326")
+        digest = hashlib.sha256(json.dumps(points, ensure_ascii=False).encode()).hexdigest()
+        build_frame_tiles(TILES_LAYER, frame, source_sha256=digest,
+                          properties=("b", "l", "n", "v", "t", "c"))
+        farms = layer_options(TILES_LAYER, out)
+    rasters = [o for o in (layer_options(n, out) for n in OVERLAY_TILES) if o]
     html = HTML_TEMPLATE.format(
         n_farms=f"{n_farms:,}",
         n_geocoded=f"{n_geocoded:,}",
         total_isk=f"{total:,}",
-        points_json=json.dumps(points, ensure_ascii=False),
+        leaflet_js=LEAFLET_JS,
+        farms_json=json.dumps(farms, ensure_ascii=False),
+        rasters_json=json.dumps(rasters, ensure_ascii=False),
+        max_isk=max((p["v"] for p in points), default=1) or 1,
     )
     out.parent.mkdir(parents=True, exist_ok=True)
     out.write_text(html, encoding="utf-8")
@@ -19,14 +19,19 @@ WHAT IS GENERALIZABLE
    cold httpx client 401s after a few requests, and a POST from any origin other
    than the app.powerbi.com iframe is rejected. So the robust extraction is to
    REPLAY queries with `fetch()` executed *inside the iframe* (`replay()`),
-   reusing the report's own live session. `discover()` sets that up.
+   reusing the report's own live session. `discover()` sets that up. Some
+   grants do accept a warmed plain-HTTP session against the tenant's resolved
+   cluster; `AutoTransport` tries that first and opens the iframe only when
+   it is rejected.
 4. Request body — a `SemanticQueryDataShapeCommand`; the POST must keep its
    top-level `modelId`/`version`/`cancelQueries` or you get 400. Capture the
    report's own request as a template and rewrite its `Where` (`where_in()`).
 5. Response — a DSR (DataShapeResult), a *compressed* columnar format:
    `ValueDicts` (int→string), an `R` repeat-bitmask (carry the value from the
    previous row) and a `Ø` null-bitmask. `parse_dsr()` / `group_counts()`
-   decode it. This is the single most-reinvented, most-error-prone piece.
+   decode it (columnar: `dsr_columns()` / `dsr_frame()`); hierarchical
+   matrices and paginated scrapes stream through `DSRDecoder`. This is the
+   single most-reinvented, most-error-prone piece.
 
 WHAT IS NOT
 -----------
@@ -36,17 +41,36 @@ once with a `page.on("request")` listener (see `capture_requests`).
 
 Requires Playwright (`uv run playwright install chromium`). Geo-fenced hosts
 must be driven from an IP in the right country.
+
+Usage:
+    uv run python scripts/powerbi.py bench                          # synthetic body
+    uv run python scripts/powerbi.py bench data/raw/landlaeknir/*.json
 """
 from __future__ import annotations
 
+import argparse
 import base64
 import binascii
+import calendar
 import copy
+import datetime as dt
+import hashlib
 import json
+import re
+import sqlite3
+import sys
+import time
+import zlib
 from dataclasses import dataclass, field
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.bench import register  # noqa: E402
 
 QUERYDATA_HINT = "querydata"  # substring identifying a data request
 
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "powerbi"
+
 # fetch() body run inside the app.powerbi.com iframe; returns JSON or {__status}.
 _JS_REPLAY = """async ({url, key, payload}) => {
     const r = await fetch(url, {
@@ -158,33 +182,489 @@ async def discover(page, spa_url, *, anchor=None, settle=10.0, goto_settle=3.0):
     return Discovery(frame=frame, key=key, templates=templates, requests=captured)
 
 
+DEFAULT_API_HOST = "wabi-europe-north-b-api.analysis.windows.net"
+
+
 def query_url(frame):
-    """Best-effort querydata endpoint. The region cluster is baked into the
-    wabi host; the public path is stable, so a fixed default works for every
-    tenant observed so far. Override per-source if a dashboard differs."""
-    return "https://wabi-europe-north-b-api.analysis.windows.net/public/reports/querydata?synchronous=true"
+    """The querydata endpoint for a replay target. A transport that resolved
+    its tenant's cluster (`HttpTransport`, `AutoTransport`) knows the exact
+    wabi host; a bare iframe falls back to the europe-north-b default, which
+    has served every tenant observed so far."""
+    host = getattr(frame, "api_host", None) or DEFAULT_API_HOST
+    return f"https://{host}/public/reports/querydata?synchronous=true"
+
+
+async def _post(target, url, key, payload):
+    """One querydata POST through `target` — an iframe (fetch() inside it) or a
+    transport with `fetch_query`. Returns parsed JSON or `{__status: code}`."""
+    if hasattr(target, "fetch_query"):
+        return await target.fetch_query(url, key, payload)
+    return await target.evaluate(_JS_REPLAY, {"url": url, "key": key, "payload": payload})
 
 
-async def replay(frame, key, payload, *, url=None, retries=1, backoff=5.0):
-    """POST `payload` from inside the iframe; return parsed JSON. Retries once
-    on the transient 401/429 the anonymous grant throws under load."""
+THROTTLED = (401, 429)  # how the anonymous grant says "slow down"
+
+
+def _backoff_delay(attempt, base, cap):
+    """Full-jitter exponential backoff: uniform in [base/2, base·2^attempt],
+    capped — retries from parallel requests spread out instead of re-colliding."""
+    import random
+
+    return min(cap, random.uniform(base / 2, base * 2 ** attempt))
+
+
+async def replay(frame, key, payload, *, url=None, retries=1, backoff=5.0, cache=None, ttl=None):
+    """POST `payload` from inside the iframe; return parsed JSON. Retries
+    (jittered exponential backoff from `backoff` s) on any non-2xx — chiefly the
+    transient 401/429 the anonymous grant throws under load. With a
+    `QueryCache`, a live entry is returned without replaying and a fresh
+    answer is stored for `ttl` seconds (None = the cache's default)."""
     import asyncio
 
+    if cache is not None and (hit := cache.get(key, payload)) is not None:
+        return hit
     url = url or query_url(frame)
     for attempt in range(retries + 1):
-        out = await frame.evaluate(_JS_REPLAY, {"url": url, "key": key, "payload": payload})
+        out = await _post(frame, url, key, payload)
         if not (isinstance(out, dict) and out.get("__status")):
+            if cache is not None:
+                cache.put(key, payload, out, ttl=ttl)
             return out
         if attempt == retries:
             raise RuntimeError(f"querydata HTTP {out['__status']}")
-        await asyncio.sleep(backoff)
+        await asyncio.sleep(_backoff_delay(attempt, backoff, 60.0))
+
+
+class _AdaptiveLimit:
+    """AIMD concurrency gate: +1 slot after a window of clean responses, halve
+    on every throttle. Converges on the rate the anonymous grant tolerates."""
+
+    def __init__(self, start, maximum):
+        import asyncio
+
+        self.limit = max(1, min(start, maximum))
+        self.maximum = maximum
+        self.in_flight = 0
+        self.peak = 0
+        self._clean = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def ok(self):
+        self._clean += 1
+        if self._clean >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._clean = 0
+
+    def throttled(self):
+        self.limit = max(1, self.limit // 2)
+        self._clean = 0
+
+
+async def replay_many(frame, key, payloads, *, url=None, concurrency=4, max_concurrency=8,
+                      retries=5, backoff=1.0, max_backoff=30.0, stats=None, cache=None, ttls=None):
+    """Replay many `payloads` with a bounded number of fetches in flight inside
+    the iframe; returns the parsed responses in input order.
+
+    Concurrency starts at `concurrency` and adapts (AIMD, capped at
+    `max_concurrency`) to the 401/429 rate: each throttle halves it, a clean
+    window grows it by one. A throttled request backs off with jittered
+    exponential delay and is retried up to `retries` times; any other non-2xx
+    raises at once. Pass a dict as `stats` to get request/throttle/cached
+    counts and the final + peak concurrency back.
+
+    With a `QueryCache`, payloads with a live entry never leave the process;
+    fresh answers are stored with the matching entry of `ttls` (seconds,
+    `FOREVER`, or None = the cache default — see `period_ttl`)."""
+    import asyncio
+
+    url = url or query_url(frame)
+    gate = _AdaptiveLimit(concurrency, max_concurrency)
+    counts = {"requests": 0, "throttled": 0, "cached": 0}
+    payloads = list(payloads)
+    ttls = list(ttls) if ttls is not None else [None] * len(payloads)
+
+    async def one(payload, ttl):
+        if cache is not None and (hit := cache.get(key, payload)) is not None:
+            counts["cached"] += 1
+            return hit
+        for attempt in range(retries + 1):
+            async with gate:
+                counts["requests"] += 1
+                out = await _post(frame, url, key, payload)
+            status = out.get("__status") if isinstance(out, dict) else None
+            if not status:
+                gate.ok()
+                if cache is not None:
+                    cache.put(key, payload, out, ttl=ttl)
+                return out
+            if status not in THROTTLED or attempt == retries:
+                raise RuntimeError(f"querydata HTTP {status}")
+            counts["throttled"] += 1
+            gate.throttled()
+            await asyncio.sleep(_backoff_delay(attempt, backoff, max_backoff))
+
+    tasks = [asyncio.ensure_future(one(p, t)) for p, t in zip(payloads, ttls)]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:                        # one hard failure stops the batch
+            t.cancel()
+        raise
+    if stats is not None:
+        stats.update(counts, concurrency=gate.limit, peak=gate.peak)
+    return list(results)
+
+
+# ---------------------------------------------------------------------------
+# browserless transport
+# ---------------------------------------------------------------------------
+# The public API refusing a session that is not the iframe's. 401 is not in
+# here: the grant sends it for "slow down" too (THROTTLED), and flipping a
+# whole run to the browser on one throttle would be the wrong trade.
+REJECTED = (403,)
+# ...but a 401 that keeps coming back is the cold-client rejection from the
+# module docstring: this many in a row, with no 2xx between, counts as one.
+UNAUTHORIZED_STREAK = 2
+USER_AGENT = "icelandic-data (+https://github.com/jokull/icelandic-data)"
+
+_FIXED_CLUSTER_RE = re.compile(r'"FixedClusterUri"\s*:\s*"https://([^"/]+)')
+
+
+def api_host_from_shell(html):
+    """The tenant's wabi-* APIM host from the /view?r= shell page, or None.
+
+    The shell is static, but the server stamps a per-tenant `FixedClusterUri`
+    into it — the only way to learn which cluster serves a tenant. Mirrors the
+    shell's own `getAPIMUrl()`: drop `-redirect`/`global-` from the first
+    label, append `-api`."""
+    match = _FIXED_CLUSTER_RE.search(html)
+    if not match:
+        return None
+    label, _, domain = match.group(1).partition(".")
+    return f"{label.replace('-redirect', '').replace('global-', '')}-api.{domain}"
+
+
+class HttpTransport:
+    """Plain-HTTP querydata client for a public embed — no browser.
+
+    `start()` GETs the /view shell to resolve the tenant's cluster, then warms
+    the session with the same `modelsAndExploration` call the report makes
+    before its first query (which also yields the model). Queries are POSTed
+    with the iframe's headers. Whether the anonymous grant accepts them is up
+    to Power BI: a rejection comes back as `{__status: 403}`, exactly like
+    the in-iframe replay, so callers can fall back (see `AutoTransport`)."""
+
+    def __init__(self, view_url, *, client=None):
+        self.view_url = view_url
+        self.key = key_of(view_url)
+        self.api_host = None
+        self.model = None
+        self._client = client
+        self._owns_client = client is None
+
+    def _headers(self, key=None):
+        return {"Accept": "application/json", "Origin": "https://app.powerbi.com",
+                "Referer": "https://app.powerbi.com/", "X-PowerBI-ResourceKey": key or self.key}
+
+    async def start(self):
+        """Resolve the cluster and warm the session. Returns whether the API
+        accepted it (False = rejected, fall back)."""
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=60, follow_redirects=True,
+                                             headers={"User-Agent": USER_AGENT})
+        r = await self._client.get(self.view_url)
+        r.raise_for_status()
+        self.api_host = api_host_from_shell(r.text)
+        if not self.api_host:
+            raise RuntimeError(f"{self.view_url}: no FixedClusterUri in the embed shell — "
+                               "Power BI changed the publish-to-web bootstrap")
+        r = await self._client.get(f"https://{self.api_host}/public/reports/{self.key}"
+                                   "/modelsAndExploration?preferReadOnlySession=true",
+                                   headers=self._headers())
+        if r.status_code in REJECTED:
+            return False
+        r.raise_for_status()
+        self.model = r.json()
+        return True
+
+    async def fetch_query(self, url, key, payload):
+        r = await self._client.post(url or query_url(self), json=payload, headers=self._headers(key))
+        if r.status_code >= 400:
+            return {"__status": r.status_code}
+        return r.json()
+
+    async def aclose(self):
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+
+
+class AutoTransport:
+    """Replay target that tries plain HTTP first and drops to the in-iframe
+    `fetch()` only once HTTP is rejected: a 403, or UNAUTHORIZED_STREAK 401s
+    in a row. A lone 401 is passed back like any other throttle, for
+    `replay` / `replay_many` to back off and retry.
+
+    `open_frame` is an async callable returning the report's iframe (e.g.
+    launch Chromium + `discover`); it is only awaited on the first rejection,
+    so a dashboard whose grant accepts browserless sessions never starts a
+    browser. After falling back, every later query goes through the iframe —
+    still against the cluster resolved over HTTP. Pass it to `replay` /
+    `replay_many` in place of a frame."""
+
+    def __init__(self, view_url, open_frame, *, client=None):
+        import asyncio
+
+        self.http = HttpTransport(view_url, client=client)
+        self.mode = "http"
+        self.frame = None
+        self._open_frame = open_frame
+        self._lock = asyncio.Lock()
+        self._unauthorized = 0
+
+    @property
+    def api_host(self):
+        return self.http.api_host
+
+    async def start(self):
+        import httpx
+
+        try:
+            if not await self.http.start():
+                self.mode = "browser"
+        except (httpx.HTTPError, RuntimeError) as e:
+            print(f"  plain-HTTP setup failed ({type(e).__name__}: {e}) — using the iframe", file=sys.stderr)
+            self.mode = "browser"
+        return self
+
+    async def fetch_query(self, url, key, payload):
+        if self.mode == "http":
+            out = await self.http.fetch_query(url, key, payload)
+            status = out.get("__status") if isinstance(out, dict) else None
+            if status == 401:
+                self._unauthorized += 1
+                if self._unauthorized < UNAUTHORIZED_STREAK:
+                    return out
+            elif status not in REJECTED:
+                if not status:
+                    self._unauthorized = 0
+                return out
+            if self.mode == "http":
+                print(f"  plain-HTTP replay rejected (HTTP {out['__status']}) — "
+                      "falling back to the in-iframe replay", file=sys.stderr)
+                self.mode = "browser"
+        async with self._lock:
+            if self.frame is None:
+                self.frame = await self._open_frame()
+        return await _post(self.frame, url, key, payload)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+# ---------------------------------------------------------------------------
+# template registry
+# ---------------------------------------------------------------------------
+TEMPLATES_DIR = CACHE_DIR / "templates"
+
+
+def report_fingerprint(model):
+    """Structural identity of a published report, from `modelsAndExploration`:
+    the model id plus the page list. Data refreshes leave it alone; a
+    republish that changes pages or the model (and so the template
+    `modelId`s) changes it."""
+    sections = sorted((s.get("name", ""), s.get("displayName", ""))
+                      for s in model.get("exploration", {}).get("sections", []))
+    model_id = (model.get("models") or [{}])[0].get("id")
+    return hashlib.sha256(json.dumps([model_id, sections], ensure_ascii=False).encode()).hexdigest()[:16]
+
+
+def load_templates(name):
+    """The stored registry entry for dashboard `name`, or None."""
+    p = TEMPLATES_DIR / f"{name}.json"
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else None
+
+
+def save_templates(name, *, view_url, key, templates, model):
+    """Persist a discovery's templates with what they were captured against."""
+    TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
+    first = next(iter(templates.values()), {})
+    entry = {
+        "view_url": view_url,
+        "key": key,
+        "model_id": first.get("modelId"),
+        "version": first.get("version"),
+        "fingerprint": report_fingerprint(model) if model else None,
+        "saved": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "templates": templates,
+    }
+    (TEMPLATES_DIR / f"{name}.json").write_text(json.dumps(entry, ensure_ascii=False, indent=1), encoding="utf-8")
+    return entry
+
+
+@dataclass
+class Dashboard:
+    key: str
+    templates: dict                      # first-Select-column -> request body
+    target: AutoTransport                # pass to replay / replay_many
+    discovered: bool                     # True if this run had to discover
+
+
+async def open_dashboard(name, discover_fn, *, refresh=False, client=None):
+    """Templates + a replay target for dashboard `name`, skipping discovery
+    whenever the stored templates are still valid.
+
+    With a registry entry, one plain-HTTP `modelsAndExploration` call yields
+    the live fingerprint; if it matches, the stored templates are used and
+    the returned `AutoTransport` only calls `discover_fn` (an async callable
+    that launches a browser and returns a `Discovery`) if HTTP replays are
+    later rejected. On a missing entry, a changed fingerprint, a rejected
+    session or `refresh=True`, `discover_fn` runs now and the entry is
+    rewritten."""
+    stored = None if refresh else load_templates(name)
+    if stored and stored.get("fingerprint"):
+        async def open_frame():
+            return (await discover_fn()).frame
+
+        target = await AutoTransport(stored["view_url"], open_frame, client=client).start()
+        model = target.http.model
+        if model and report_fingerprint(model) == stored["fingerprint"]:
+            return Dashboard(stored["key"], stored["templates"], target, discovered=False)
+        await target.aclose()
+        print(f"  {name}: report changed or session rejected — re-discovering", file=sys.stderr)
+
+    disc = await discover_fn()
+
+    async def the_frame():
+        return disc.frame
+
+    target = await AutoTransport(disc.frame.url, the_frame, client=client).start()
+    save_templates(name, view_url=disc.frame.url, key=disc.key, templates=disc.templates,
+                   model=target.http.model)
+    return Dashboard(disc.key, disc.templates, target, discovered=True)
+
+
+# ---------------------------------------------------------------------------
+# query-result cache
+# ---------------------------------------------------------------------------
+# Request-body keys that vary between otherwise identical queries (per-visual
+# context, client query ids, the cancel list) — dropped before hashing.
+_VOLATILE_KEYS = frozenset({"cancelQueries", "QueryId", "ApplicationContext"})
+
+FOREVER = float("inf")
+
+
+def _canonical(obj):
+    if isinstance(obj, dict):
+        return {k: _canonical(v) for k, v in obj.items() if k not in _VOLATILE_KEYS}
+    if isinstance(obj, list):
+        return [_canonical(v) for v in obj]
+    return obj
+
+
+def cache_key(key, payload):
+    """Content address of a replay: resource key + model id + a hash of the
+    canonicalized query (sorted keys, volatile fields dropped)."""
+    canon = json.dumps(_canonical(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{key}\n{payload.get('modelId')}\n{canon}".encode()).hexdigest()
+
+
+def period_ttl(year=None, month=None, *, current=6 * 3600, grace_days=31, today=None):
+    """TTL (seconds) for a query filtered to one period.
+
+    A period that ended more than `grace_days` ago is closed — its numbers no
+    longer change, so the answer is cached `FOREVER`. The running period (or
+    an unfiltered snapshot, `year=None`) gets the short `current` TTL."""
+    if year is None:
+        return current
+    end = dt.date(year, month, calendar.monthrange(year, month)[1]) if month else dt.date(year, 12, 31)
+    closed = (today or dt.date.today()) - end > dt.timedelta(days=grace_days)
+    return FOREVER if closed else current
+
+
+class QueryCache:
+    """Persistent content-addressed cache of querydata responses.
+
+    One SQLite file under `data/cache/powerbi/`; bodies are zlib-compressed
+    JSON keyed by `cache_key`. Each entry carries its own expiry (`FOREVER`
+    for closed periods, see `period_ttl`) and a last-used stamp: when the file
+    grows past `max_bytes` the least-recently-used entries go first. `hits` /
+    `misses` count lookups, i.e. how many replays the cache avoided."""
+
+    def __init__(self, path=None, *, max_bytes=256 << 20, default_ttl=6 * 3600):
+        self.path = Path(path) if path else CACHE_DIR / "querydata.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = self.misses = 0
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (k TEXT PRIMARY KEY, body BLOB NOT NULL,"
+                         " size INTEGER NOT NULL, used REAL NOT NULL, expires REAL)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def get(self, key, payload):
+        """The cached response for this replay, or None if absent/expired."""
+        k, now = cache_key(key, payload), time.time()
+        row = self._db.execute("SELECT body, expires FROM entries WHERE k = ?", (k,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < now):
+            self.misses += 1
+            return None
+        self._db.execute("UPDATE entries SET used = ? WHERE k = ?", (now, k))
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, payload, response, *, ttl=None):
+        """Store `response`; `ttl` in seconds, `FOREVER`, or None for the default."""
+        ttl = self.default_ttl if ttl is None else ttl
+        blob = zlib.compress(json.dumps(response, separators=(",", ":"), ensure_ascii=False).encode())
+        now = time.time()
+        self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                         (cache_key(key, payload), blob, len(blob), now,
+                          None if ttl == FOREVER else now + ttl))
+        self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for k, size in self._db.execute("SELECT k, size FROM entries ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((k,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE k = ?", doomed)
+
+    def summary(self):
+        looked = self.hits + self.misses
+        return f"cache: {self.hits}/{looked} replays avoided ({self.path.name})"
 
 
 # ---------------------------------------------------------------------------
 # query rewriting
 # ---------------------------------------------------------------------------
 def query_of(body):
-    """The SemanticQuery inside a request body (Select/Where/OrderBy/Binding)."""
+    """The SemanticQuery inside a request body (Select/Where/OrderBy)."""
     return body["queries"][0]["Query"]["Commands"][0]["SemanticQueryDataShapeCommand"]["Query"]
 
 
@@ -230,42 +710,266 @@ def where_drop(body, *columns):
                       .get("Column", {}).get("Property")) not in drop]
     return b
 
+
+def binding_of(body):
+    """The `Binding` beside the query (Primary/Secondary groupings, DataReduction)."""
+    return body["queries"][0]["Query"]["Commands"][0]["SemanticQueryDataShapeCommand"].setdefault("Binding", {})
+
+
+def with_window(body, count, restart_tokens=None):
+    """Clone `body` with its primary axis reduced to a `Window` of `count` rows,
+    resuming after `restart_tokens` (a response's `RT`) when given. The
+    Secondary axis (matrix columns) and `DataVolume` are left as captured."""
+    b = copy.deepcopy(body)
+    reduction = binding_of(b).setdefault("DataReduction", {"DataVolume": 4})
+    window = {"Count": count}
+    if restart_tokens:
+        window["RestartTokens"] = restart_tokens
+    reduction["Primary"] = {"Window": window}
+    return b
+
+
+def restart_tokens_of(body):
+    """The `RT` continuation of a response's first DataSet, or None when the
+    window held everything."""
+    for res in body.get("results", []):
+        for ds in (res.get("result") or {}).get("data", {}).get("dsr", {}).get("DS", []):
+            return ds.get("RT") or None
+    return None
+
+
+async def replay_pages(frame, key, template, *, count=500, max_pages=1000, url=None,
+                       retries=3, backoff=2.0, cache=None, ttl=None):
+    """Replay `template` window by window, following `RestartTokens`, and
+    yield each response body in order — a full-table pull as one sequence
+    of API calls instead of scrolling a virtualised visual. Feed the bodies
+    to one shared `DSRDecoder` (the follow-up pages may omit `S`).
+
+    Stops when a page carries no `RT`, or repeats the previous one; raises
+    after `max_pages` so a server that never terminates cannot loop us."""
+    tokens = None
+    for _ in range(max_pages):
+        body = await replay(frame, key, with_window(template, count, tokens), url=url,
+                            retries=retries, backoff=backoff, cache=cache, ttl=ttl)
+        yield body
+        nxt = restart_tokens_of(body)
+        if not nxt or nxt == tokens:
+            return
+        tokens = nxt
+    raise RuntimeError(f"querydata paging did not finish after {max_pages} windows of {count}")
+
 # ---------------------------------------------------------------------------
 # DSR response decoding
 # ---------------------------------------------------------------------------
+@dataclass
+class DSRRow:
+    """One decoded row at any level of a DataShape result.
+
+    `values` maps the DSR column names (`G0`, `M0`, `A7`, …) to decoded values,
+    in descriptor order; `parent` is the enclosing row one level up (None at
+    the top), so a hierarchical matrix can be read back as row paths. `X` is the
+    row's secondary-axis (matrix column) cells, passed through as received."""
+    level: str                                   # "DM0", "DM1", …
+    values: dict
+    parent: DSRRow | None = None
+    X: list = field(default_factory=list)
+    raw: dict = field(default_factory=dict, repr=False)
+
+
+def _dm_lists(obj):
+    """The `(DMn, rows)` lists directly inside a PH entry or an `M` child."""
+    return [(k, v) for k, v in obj.items() if k.startswith("DM") and isinstance(v, list)]
+
+
+class DSRDecoder:
+    """Streaming decoder for querydata response bodies — every DM level.
+
+    Feed it bodies one at a time (`feed`) or as an iterable (`iter_dsr`); it
+    yields `DSRRow`s depth-first (a row, then its `M` children), so nothing
+    but the current body is ever held. Per cell the rules are, in order: a key
+    named after the column on the row itself (`"G0": "…"`) wins; a set `Ø` bit
+    is None; a set `R` bit carries the previous row's value; otherwise the next
+    `C` entry. A `DN` in the descriptor resolves integer codes via `ValueDicts`.
+
+    Power BI sends each level's `S` descriptor once — on the first row of the
+    first body — and paginated follow-ups rely on the client remembering it.
+    `schemas` carries them across `feed` calls, and can be seeded
+    (`{"DM2": ["A7", …]}`) for bodies captured mid-pagination. After each body,
+    `restart_tokens` holds the DataSet's `RT` continuation (None when the window
+    was exhaustive) and `complete` its `IC` flag.
+
+    `named_cells=False` drops the first rule and reads every cell positionally
+    — the historical `parse_dsr` / `group_counts` output, which `_dm0_rows`
+    keeps byte for byte."""
+
+    def __init__(self, schemas=None, *, named_cells=True):
+        self.named_cells = named_cells
+        self.schemas = {level: [c if isinstance(c, dict) else {"N": c} for c in cols]
+                        for level, cols in (schemas or {}).items()}
+        self.restart_tokens = None
+        self.complete = True
+        self.bodies = 0
+
+    def feed(self, body):
+        """Decode one querydata response body."""
+        self.bodies += 1
+        for res in body.get("results", []):
+            yield from self.dsr((res.get("result") or {}).get("data", {}).get("dsr", {}))
+
+    def dsr(self, dsr):
+        """Decode the `dsr` object of one result."""
+        for ds in dsr.get("DS", []):
+            yield from self.dataset(ds, ds.get("ValueDicts") or dsr.get("ValueDicts") or {})
+
+    def dataset(self, ds, vds=None):
+        """Decode one DataSet. `R` carries across its PH entries, as one block."""
+        vds = ds.get("ValueDicts", {}) if vds is None else vds
+        self.restart_tokens = ds.get("RT")
+        self.complete = ds.get("IC", True)
+        prev: dict = {}
+        for ph in ds.get("PH", []):
+            for level, dm in _dm_lists(ph):
+                yield from self._rows(level, dm, vds, None, prev.setdefault(level, {}))
+
+    def _rows(self, level, dm, vds, parent, prev):
+        schema = self.schemas.get(level)
+        for row in dm:
+            if "S" in row:
+                schema = self.schemas[level] = row["S"]
+            C, R, O = row.get("C", []), row.get("R", 0), row.get("Ø", 0)
+            cols = schema if schema is not None else [{"N": f"C{i}"} for i in range(len(C))]
+            cur, ci = {}, 0
+            for i, desc in enumerate(cols):
+                name = desc.get("N", f"C{i}")
+                if self.named_cells and name in row:
+                    v = row[name]
+                elif O >> i & 1:
+                    v = None
+                elif R >> i & 1:
+                    v = prev.get(name)
+                else:
+                    v = C[ci] if ci < len(C) else None
+                    ci += 1
+                vd = vds.get(desc.get("DN")) if desc.get("DN") else None
+                if vd and isinstance(v, int) and 0 <= v < len(vd):
+                    v = vd[v]
+                cur[name] = v
+            prev.clear()
+            prev.update(cur)
+            out = DSRRow(level, cur, parent, row.get("X", []), row)
+            yield out
+            for child in row.get("M", []):
+                for sub, sub_dm in _dm_lists(child):
+                    yield from self._rows(sub, sub_dm, vds, out, {})
+
+
+def iter_dsr(bodies, *, schemas=None):
+    """`DSRRow`s from an iterable of bodies, through one shared `DSRDecoder`
+    (so descriptors seen in an early page decode the later ones). Pass a
+    generator to keep a paginated scrape at one body in memory."""
+    decoder = DSRDecoder(schemas)
+    for body in bodies:
+        yield from decoder.feed(body)
+
+
 def _dm0_rows(ds):
-    """Decompress a DataSet's DM0 rows.
+    """Decompress a DataSet's top-level DM0 rows.
 
     DSR is columnar + compressed: `C` carries only the columns that are neither
     repeated nor null; the `R` bitmask marks columns carried over from the
     previous row; the `Ø` bitmask marks nulls; per-column `DN` names a
     `ValueDicts` entry mapping the integer code to a string. Bit i (LSB-first)
-    corresponds to column i. Yields fully-reconstructed value lists."""
+    corresponds to column i. Yields `(values in Select order, raw row)`; the
+    decoding itself is `DSRDecoder`'s, positional only — a `"G0"` key on the
+    row is left to the callers that look for it (`group_counts`)."""
+    for r in DSRDecoder(named_cells=False).dataset(ds):
+        if r.level == "DM0" and r.parent is None:
+            yield list(r.values.values()), r.raw
+
+
+def _dm0_columns(ds):
+    """Columnar twin of `_dm0_rows`: decode a DataSet's DM0 block into one
+    value list per column. Returns `(columns, raw_rows)`; the raw row dicts
+    ride along for `X`/`G0` consumers.
+
+    The only per-row Python work is pulling `R`, `Ø` and `C` out of each dict;
+    every `C` is concatenated into one flat array. Column i of row j then sits
+    at `offset[j] + (#explicit columns before i)` — a running count kept as a
+    numpy vector — so each column is one masked gather. The `ValueDicts`
+    lookup is a second gather over the column's integer codes, and `R` becomes
+    a forward fill (`maximum.accumulate` over source-row indices). Output is
+    identical to `_dm0_rows`. Only the shape Power BI actually emits — the `S`
+    descriptor on the first row and nowhere else, < 63 columns, values only in
+    `C` — is decoded here; for anything irregular `columns` is None and callers
+    use `_dm0_rows`."""
+    from itertools import chain
+
+    import numpy as np
+
     vds = ds.get("ValueDicts", {})
-    col_dn = None
-    prev: list = []
-    for ph in ds.get("PH", []):
-        for row in ph.get("DM0", []):
-            if "S" in row:                     # column descriptor (first row carries it)
-                col_dn = [c.get("DN") for c in row["S"]]
-            n = len(col_dn) if col_dn else len(row.get("C", []))
-            R = row.get("R", 0)
-            O = row.get("Ø", 0)
-            C = row.get("C", [])
-            cur, ci = [None] * n, 0
-            for i in range(n):
-                if O >> i & 1:
-                    cur[i] = None
-                elif R >> i & 1:
-                    cur[i] = prev[i] if i < len(prev) else None
-                else:
-                    cur[i] = C[ci] if ci < len(C) else None
-                    ci += 1
-                dn = col_dn[i] if col_dn and i < len(col_dn) else None
-                if dn and dn in vds and isinstance(cur[i], int) and 0 <= cur[i] < len(vds[dn]):
-                    cur[i] = vds[dn][cur[i]]
-            prev = cur
-            yield cur, row
+    rows = [row for ph in ds.get("PH", []) for row in ph.get("DM0", [])]
+    if not rows or "S" not in rows[0] or any("S" in row for row in rows[1:]):
+        return None, rows
+    dns = [c.get("DN") for c in rows[0]["S"]]
+    n, N = len(dns), len(rows)
+    if n > 62 or {c.get("N") for c in rows[0]["S"]} & set(chain.from_iterable(rows)):
+        return None, rows                          # wide masks, or cells keyed by name
+
+    Cs = [row.get("C", ()) for row in rows]
+    L = np.fromiter(map(len, Cs), dtype=np.int64, count=N)
+    R = np.fromiter((row.get("R", 0) for row in rows), dtype=np.int64, count=N)
+    O = np.fromiter((row.get("Ø", 0) for row in rows), dtype=np.int64, count=N)
+    flat = np.fromiter(chain.from_iterable(Cs), dtype=object, count=int(L.sum()))
+    offset = np.cumsum(L) - L
+    taken = np.zeros(N, dtype=np.int64)            # C entries consumed so far, per row
+    rows_idx = np.arange(N)
+
+    out = []
+    for i in range(n):
+        null, rep = (O >> i & 1).astype(bool), (R >> i & 1).astype(bool)
+        explicit = ~null & ~rep
+        have = explicit & (taken < L)
+        col = np.empty(N + 1, dtype=object)        # slot N stays None: target of src -1
+        col[:N][have] = flat[(offset + taken)[have]]
+        taken += explicit
+
+        vd = vds.get(dns[i]) if dns[i] else None
+        if vd:
+            if set(map(type, col)) <= {int, type(None)}:
+                where = np.flatnonzero(np.not_equal(col, None))
+                codes = col[where].astype(np.int64)
+                ok = (codes >= 0) & (codes < len(vd))
+                lut = np.empty(len(vd), dtype=object)
+                lut[:] = vd
+                col[where[ok]] = lut[codes[ok]]
+            else:                                  # mixed cell types: per-cell rule
+                col[:] = [vd[v] if isinstance(v, int) and 0 <= v < len(vd) else v for v in col]
+
+        src = np.where(rep & ~null, -1, rows_idx)  # Ø wins over R, as in `_dm0_rows`
+        out.append(col[np.maximum.accumulate(src)].tolist())
+    return out, rows
+
+
+def _dm0_table(ds):
+    """`(decoded rows, raw rows)` for a DataSet — columnar decode, transposed
+    back to row lists at C speed; `_dm0_rows` for the irregular shapes.
+
+    The cyclic GC is paused for the transpose: allocating ~10^5 small lists
+    otherwise triggers repeated full scans that cost more than the decode."""
+    import gc
+
+    columns, raw = _dm0_columns(ds)
+    if columns is None:
+        return [cur for cur, _ in _dm0_rows(ds)], raw
+    if not columns:
+        return [[] for _ in raw], raw
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return list(map(list, zip(*columns))), raw
+    finally:
+        if enabled:
+            gc.enable()
 
 
 def group_counts(body, *, measure=0):
@@ -274,11 +978,15 @@ def group_counts(body, *, measure=0):
     Handles both DM0 shapes: the flat categorical form (`C:[dim,measure]`, with
     R/Ø/ValueDict compression) and the measure-matrix form (`G0` + `X[].M0`,
     where `measure` picks which series). Sums duplicates."""
+    return _group_counts(body, measure, _dm0_table)
+
+
+def _group_counts(body, measure, table):
     out: dict = {}
     for res in body.get("results", []):
         dsr = (res.get("result") or {}).get("data", {}).get("dsr", {})
         for ds in dsr.get("DS", []):
-            for cur, row in _dm0_rows(ds):
+            for cur, row in zip(*table(ds)):
                 if "X" in row:                 # measure-matrix form
                     label = cur[0] if cur else row.get("G0")
                     xs = row.get("X", [])
@@ -298,8 +1006,161 @@ def parse_dsr(body):
     Select order). The general escape hatch when `group_counts` is too narrow —
     e.g. multi-measure visuals or time series."""
     rows = []
+    for res in body.get("results", []):
+        dsr = (res.get("result") or {}).get("data", {}).get("dsr", {})
+        for ds in dsr.get("DS", []):
+            rows.extend(_dm0_table(ds)[0])
+    return rows
+
+
+def dsr_columns(body):
+    """Every DataSet's DM0 block as a list of columns (Select order) — the
+    columnar form of `parse_dsr`, without ever materialising per-row lists."""
+    out = []
+    for res in body.get("results", []):
+        dsr = (res.get("result") or {}).get("data", {}).get("dsr", {})
+        for ds in dsr.get("DS", []):
+            columns, _ = _dm0_columns(ds)
+            if columns is None:                # irregular block: pad ragged rows
+                decoded = _dm0_table(ds)[0]
+                n = max((len(cur) for cur in decoded), default=0)
+                columns = [[cur[i] if i < len(cur) else None for cur in decoded] for i in range(n)]
+            out.append(columns)
+    return out
+
+
+def dsr_frame(body, names=None):
+    """`dsr_columns` stacked into one polars DataFrame. `names` labels the
+    columns (default `c0`, `c1`, …); every DataSet must share one width.
+    Mixed-type columns are coerced by polars (`strict=False`) — use
+    `parse_dsr` when exact Python values matter."""
+    import polars as pl
+
+    frames = [pl.DataFrame({(names[i] if names else f"c{i}"): col for i, col in enumerate(columns)},
+                           strict=False)
+              for columns in dsr_columns(body) if columns]
+    return pl.concat(frames, how="vertical_relaxed") if frames else pl.DataFrame()
+
+
+def _parse_dsr_rowwise(body):
+    """`parse_dsr` via the per-cell `_dm0_rows` walk — the reference the
+    columnar decoder is benchmarked and tested against."""
+    rows = []
     for res in body.get("results", []):
         dsr = (res.get("result") or {}).get("data", {}).get("dsr", {})
         for ds in dsr.get("DS", []):
             rows.extend(cur for cur, _ in _dm0_rows(ds))
     return rows
+
+
+def _group_counts_rowwise(body, *, measure=0):
+    """`group_counts` over the `_dm0_rows` walk (reference, see above)."""
+    return _group_counts(body, measure, lambda ds: tuple(zip(*_dm0_rows(ds))) or ((), ()))
+
+
+# ---------------------------------------------------------------------------
+# benchmark CLI
+# ---------------------------------------------------------------------------
+def _bodies_in(obj):
+    """Every querydata response body inside a captured dump: a bare body, a
+    list of bodies (landlaeknir, maelabord_nautgripa) or `{url, data}`
+    wrappers (ferdamalastofa, vinnumalastofnun)."""
+    if isinstance(obj, list):
+        for it in obj:
+            yield from _bodies_in(it)
+    elif isinstance(obj, dict):
+        if "results" in obj:
+            yield obj
+        elif isinstance(obj.get("data"), dict):
+            yield from _bodies_in(obj["data"])
+
+
+def _synthetic_body(nrows, *, seed=0):
+    """A DM0 body shaped like a big categorical visual: two dictionary-coded
+    dimensions, an integer and a decimal-string measure, R/Ø compression."""
+    import random
+
+    rnd = random.Random(seed)
+    dims = [f"flokkur {i}" for i in range(40)], [f"{y}" for y in range(1990, 2027)]
+    rows, prev = [], None
+    for j in range(nrows):
+        full = [rnd.randrange(len(dims[0])), rnd.randrange(len(dims[1])),
+                rnd.randrange(10_000), f"{rnd.random():.4f}"]
+        R = sum(1 << i for i in range(2) if prev and rnd.random() < 0.6)
+        O = 8 if rnd.random() < 0.1 else 0
+        row = {"C": [v for i, v in enumerate(full) if not (R | O) >> i & 1]}
+        if R:
+            row["R"] = R
+        if O:
+            row["Ø"] = O
+        rows.append(row)
+        prev = full
+    rows[0]["S"] = [{"N": "G0", "DN": "D0"}, {"N": "G1", "DN": "D1"}, {"N": "M0"}, {"N": "M1"}]
+    ds = {"ValueDicts": {"D0": dims[0], "D1": dims[1]}, "PH": [{"DM0": rows}]}
+    return {"results": [{"result": {"data": {"dsr": {"DS": [ds]}}}}]}
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def cmd_bench(args):
+    bodies = []
+    for f in args.files:
+        bodies.extend(_bodies_in(json.loads(Path(f).read_text(encoding="utf-8"))))
+    if not bodies:
+        print(f"no captured bodies given — using a synthetic {args.rows:,}-row DM0 body", file=sys.stderr)
+        bodies = [_synthetic_body(args.rows)]
+
+    ref = [_parse_dsr_rowwise(b) for b in bodies]
+    if ref != [parse_dsr(b) for b in bodies]:
+        sys.exit("columnar decode differs from the row-wise reference")
+    if [group_counts(b) for b in bodies] != [_group_counts_rowwise(b) for b in bodies]:
+        sys.exit("group_counts differs from the row-wise reference")
+
+    nrows = sum(len(r) for r in ref)
+    t_row = _best_of(lambda: [_parse_dsr_rowwise(b) for b in bodies], args.repeat)
+    t_col = _best_of(lambda: [parse_dsr(b) for b in bodies], args.repeat)
+    t_raw = _best_of(lambda: [dsr_columns(b) for b in bodies], args.repeat)
+    print(f"{len(bodies)} bodies, {nrows:,} DM0 rows (outputs identical)")
+    print(f"  parse_dsr, row-wise    {t_row * 1000:9.1f} ms")
+    print(f"  parse_dsr, columnar    {t_col * 1000:9.1f} ms   ({t_row / t_col:.1f}x)")
+    print(f"  dsr_columns            {t_raw * 1000:9.1f} ms   ({t_row / t_raw:.1f}x)")
+
+
+@register("dsr_decode", setup=lambda: [_synthetic_body(50_000)])
+def _bench_dsr(stage, bodies):
+    """Columnar DSR decode of a synthetic 50k-row DM0 body."""
+    with stage("parse_dsr"):
+        for b in bodies:
+            parse_dsr(b)
+    with stage("dsr_columns"):
+        for b in bodies:
+            dsr_columns(b)
+    with stage("group_counts"):
+        for b in bodies:
+            group_counts(b)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("bench", help="time the columnar DSR decoder against the row-wise reference")
+    b.add_argument("files", nargs="*",
+                   help="captured querydata dumps, e.g. data/raw/landlaeknir/*.json (default: synthetic body)")
+    b.add_argument("--rows", type=int, default=200_000, help="synthetic body size (default 200000)")
+    b.add_argument("--repeat", type=int, default=5, help="best-of-N timing (default 5)")
+    b.set_defaults(func=cmd_bench)
+
+    args = ap.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,12 +31,14 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import contextlib
 import datetime as dt
 import sys
 from pathlib import Path
 
 import polars as pl
 import powerbi as pb
+from utils.browser import borrow_page
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
@@ -126,52 +128,70 @@ def _parse_where(specs):
 # commands
 # ---------------------------------------------------------------------------
 async def _run_fetch(args):
-    from playwright.async_api import async_playwright
-
     cfg = REPORTS[args.report]
     dim_col = cfg["dims"][args.dimension]
     wheres = _parse_where(args.where)
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(viewport={"width": 1600, "height": 1200})
-        disc = await pb.discover(page, BASE_SPA, anchor=cfg["anchor"])
-        if dim_col not in disc.templates:
+    async with contextlib.AsyncExitStack() as stack:
+        async def discover_report():
+            # Only reached on a first run, a republished report, or a rejected
+            # plain-HTTP session — otherwise no browser is started at all.
+            page = await stack.enter_async_context(borrow_page(viewport={"width": 1600, "height": 1200}))
+            return await pb.discover(page, BASE_SPA, anchor=cfg["anchor"])
+
+        dash = await pb.open_dashboard(f"samgongustofa-{args.report}", discover_report,
+                                       refresh=args.rediscover)
+        target = dash.target
+        stack.push_async_callback(target.aclose)
+        if dim_col not in dash.templates:
             raise SystemExit(f"dimension '{args.dimension}' ({dim_col}) not among "
-                             f"{args.report} visuals: {sorted(disc.templates)}")
-        template = disc.templates[dim_col]
+                             f"{args.report} visuals: {sorted(dash.templates)} (try --rediscover)")
+        template = dash.templates[dim_col]
         records, header = [], [args.dimension]
 
+        cache = None if args.no_cache else pb.QueryCache()
+        print(f"templates: {'discovered' if dash.discovered else 'registry'}; "
+              f"replay transport: {target.mode} ({target.api_host or pb.DEFAULT_API_HOST})", file=sys.stderr)
+
         async def pull(payload):
-            return pb.group_counts(await pb.replay(disc.frame, disc.key, payload, retries=1))
+            return pb.group_counts(await pb.replay(target, dash.key, payload, retries=1, cache=cache))
 
         if cfg["temporal"]:
             years = _parse_years(args.years)
             months = MONTHS[: args.through] if args.monthly else [None]
             header += ["year"] + (["month"] if args.monthly else []) + ["count"]
-            print(f"report={args.report} key={disc.key} dim={dim_col} years={years} "
+            print(f"report={args.report} key={dash.key} dim={dim_col} years={years} "
                   f"months={'Jan..' + months[-1] if args.monthly else 'all'}", file=sys.stderr)
-            for year in years:
-                for month in months:
-                    rows = await pull(_apply_cross(
-                        _slicer_payload(template, year=year, month=month, import_state=args.import_state), wheres))
-                    for name, cnt in sorted(rows.items(), key=lambda kv: -kv[1]):
-                        rec = {args.dimension: name, "year": year, "count": int(cnt)}
-                        if args.monthly:
-                            rec["month"] = int(month[:2])
-                        records.append(rec)
-                    print(f"  {year}{' ' + month if month else ''}: {len(rows)} "
-                          f"{args.dimension}s, {int(sum(rows.values())):,}", file=sys.stderr)
-                    await asyncio.sleep(2.5)
+            cells = [(year, month) for year in years for month in months]
+            stats: dict = {}
+            bodies = await pb.replay_many(target, dash.key, [
+                _apply_cross(_slicer_payload(template, year=year, month=month,
+                                             import_state=args.import_state), wheres)
+                for year, month in cells
+            ], concurrency=args.concurrency, stats=stats, cache=cache,
+               ttls=[pb.period_ttl(year, int(month[:2]) if month else None) for year, month in cells])
+            for (year, month), body in zip(cells, bodies):
+                rows = pb.group_counts(body)
+                for name, cnt in sorted(rows.items(), key=lambda kv: -kv[1]):
+                    rec = {args.dimension: name, "year": year, "count": int(cnt)}
+                    if args.monthly:
+                        rec["month"] = int(month[:2])
+                    records.append(rec)
+                print(f"  {year}{' ' + month if month else ''}: {len(rows)} "
+                      f"{args.dimension}s, {int(sum(rows.values())):,}", file=sys.stderr)
+            print(f"  {stats['requests']} requests, {stats['throttled']} throttled, "
+                  f"concurrency {stats['concurrency']} (peak {stats['peak']})", file=sys.stderr)
         else:
             header += ["count"]
-            print(f"report={args.report} key={disc.key} dim={dim_col} (current fleet snapshot)", file=sys.stderr)
+            print(f"report={args.report} key={dash.key} dim={dim_col} (current fleet snapshot)", file=sys.stderr)
             rows = await pull(_apply_cross(_slicer_payload(template, import_state=args.import_state), wheres))
             for name, cnt in sorted(rows.items(), key=lambda kv: -kv[1]):
                 records.append({args.dimension: name, "count": int(cnt)})
             print(f"  {len(rows)} {args.dimension}s on road, {int(sum(rows.values())):,} total", file=sys.stderr)
 
-        await browser.close()
+        if cache is not None:
+            print(f"  {cache.summary()}", file=sys.stderr)
+            cache.close()
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     parts = [args.report, args.dimension]
@@ -188,11 +208,7 @@ async def _run_fetch(args):
 
 
 async def _run_list(args):
-    from playwright.async_api import async_playwright
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page(viewport={"width": 1600, "height": 1200})
+    async with borrow_page(viewport={"width": 1600, "height": 1200}) as page:
         for name, cfg in REPORTS.items():
             disc = await pb.discover(page, BASE_SPA, anchor=cfg["anchor"])
             inv = {v: k for k, v in cfg["dims"].items()}
@@ -210,7 +226,6 @@ async def _run_list(args):
         print("  fetch --dimension make --years 2020-2026             # imports by brand per year")
         print("  fetch --dimension fuel --years 2025,2026 --monthly")
         print("  fetch --dimension make --years 2026 --where 'Orkugjafi=Rafmagn'   # BEV imports by brand")
-        await browser.close()
 
 
 def main():
@@ -233,6 +248,12 @@ def main():
     pf.add_argument("--where", action="append", metavar="COL=VALUE",
                     help="cross-filter by any model column, repeatable; ';' OR-joins values, "
                          "e.g. --where 'Orkugjafi=Rafmagn' (see column names in `list`)")
+    pf.add_argument("--concurrency", type=int, default=4, metavar="N",
+                    help="queries in flight to start with; adapts to throttling (default 4, max 8)")
+    pf.add_argument("--no-cache", action="store_true",
+                    help="replay every query; skip data/cache/powerbi/ (closed months are otherwise cached forever)")
+    pf.add_argument("--rediscover", action="store_true",
+                    help="ignore the stored query templates and re-run browser discovery")
     pf.add_argument("--out", help="output CSV path (default data/processed/samgongustofa/)")
     pf.set_defaults(func=lambda a: asyncio.run(_run_fetch(a)))
 
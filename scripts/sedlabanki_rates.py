@@ -17,6 +17,9 @@ import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 PROCESSED_DIR = Path(__file__).parent.parent / "data" / "processed"
 
 EMBED_URL = "https://gagnabanki.is/report/interests"
@@ -148,15 +151,11 @@ def parse_pbi_timeseries(responses: list[dict]) -> list[dict]:
     return rows
 
 
-async def fetch_interest_rates() -> list[dict]:
+async def fetch_interest_rates(pool: BrowserPool | None = None) -> list[dict]:
     """Load gagnabanki.is interest rates page and intercept Power BI data."""
-    from playwright.async_api import async_playwright
-
     captured = []
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    async with borrow_page(pool) as page:
 
         async def handle_response(response):
             url = response.url
@@ -197,8 +196,6 @@ async def fetch_interest_rates() -> list[dict]:
         else:
             print("WARNING: Timed out waiting for data (90s)", file=sys.stderr)
 
-        await browser.close()
-
     if not captured:
         print("ERROR: No Power BI responses captured.", file=sys.stderr)
         return []
@@ -34,6 +34,10 @@ from pathlib import Path
 import httpx
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.bench import register  # noqa: E402
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 if hasattr(sys.stderr, "reconfigure"):
@@ -1460,14 +1464,15 @@ async def _scrape_article(page, url: str, topic: str = "parties") -> dict:
     }
 
 
-async def _fetch_targets(targets: list[dict]) -> tuple[list[tuple[dict, dict]], list[dict]]:
+async def _fetch_targets(targets: list[dict], pool: BrowserPool | None = None
+                         ) -> tuple[list[tuple[dict, dict]], list[dict]]:
     """Fetch every target in order, printing progress as each completes.
 
-    One Chromium instance is launched lazily on the first RÚV article and
-    reused (one page per article) for the rest of the batch, instead of a
-    fresh browser per article — see _scrape_article's docstring. Vísir
-    articles are plain httpx (fetch_visir_article) and never touch the
-    browser at all.
+    One Chromium instance (a `BrowserPool`, unless the caller passes its
+    own) is launched lazily on the first RÚV article and its page recycled
+    for the rest of the batch, instead of a fresh browser per article — see
+    _scrape_article's docstring. Vísir articles are plain httpx
+    (fetch_visir_article) and never touch the browser at all.
 
     A single article's failure must not lose every already-fetched article
     in this batch (verified: a RÚV Playwright page.goto TimeoutError, 9
@@ -1480,40 +1485,34 @@ async def _fetch_targets(targets: list[dict]) -> tuple[list[tuple[dict, dict]],
     listing are each scraped with the right vocabulary automatically,
     without the caller having to split the batch by topic.
     """
-    from playwright.async_api import async_playwright
-
     results: list[tuple[dict, dict]] = []
     failed: list[dict] = []
-    browser = None
+    own_pool = None
     try:
-        async with async_playwright() as p:
-            for meta in targets:
-                topic = meta.get("topic") or "parties"
-                print(f"  fetching [{meta['id']}] ({topic}) {meta['title']} ...")
-                try:
-                    if meta["source"] == "visir":
-                        result = fetch_visir_article(meta["url"], topic)
-                    else:
-                        if browser is None:
-                            browser = await p.chromium.launch(headless=True)
-                        page = await browser.new_page()
-                        try:
-                            result = await _scrape_article(page, meta["url"], topic)
-                        finally:
-                            await page.close()
-                except Exception as exc:
-                    print(f"    FAILED: {type(exc).__name__}: {exc}")
-                    failed.append({"id": meta["id"], "url": meta["url"], "error": f"{type(exc).__name__}: {exc}"})
-                    continue
-                if not result["parties"]:
-                    print(f"    no chart and no prose figures extracted ({len(result['prose_skipped'])} sentences skipped)")
+        for meta in targets:
+            topic = meta.get("topic") or "parties"
+            print(f"  fetching [{meta['id']}] ({topic}) {meta['title']} ...")
+            try:
+                if meta["source"] == "visir":
+                    result = fetch_visir_article(meta["url"], topic)
                 else:
-                    print(f"    {len(result['parties'])} parties via {result['source']}"
-                          + (f", {len(result['prose_skipped'])} sentences skipped" if result["source"] == "prose" else ""))
-                results.append((meta, result))
+                    if pool is None:
+                        pool = own_pool = await BrowserPool(contexts=1).start()
+                    async with borrow_page(pool) as page:
+                        result = await _scrape_article(page, meta["url"], topic)
+            except Exception as exc:
+                print(f"    FAILED: {type(exc).__name__}: {exc}")
+                failed.append({"id": meta["id"], "url": meta["url"], "error": f"{type(exc).__name__}: {exc}"})
+                continue
+            if not result["parties"]:
+                print(f"    no chart and no prose figures extracted ({len(result['prose_skipped'])} sentences skipped)")
+            else:
+                print(f"    {len(result['parties'])} parties via {result['source']}"
+                      + (f", {len(result['prose_skipped'])} sentences skipped" if result["source"] == "prose" else ""))
+            results.append((meta, result))
     finally:
-        if browser is not None:
-            await browser.close()
+        if own_pool is not None:
+            await own_pool.close()
     return results, failed
 
 
@@ -1640,6 +1639,37 @@ def cmd_fetch(args):
     print(f"{len(rows)} poll-figure rows written -> {out_file}")
 
 
+# Verified article phrasings (the regression tests' cases), cycled into a
+# long synthetic article body for the prose-extraction benchmark.
+_BENCH_PARAGRAPHS = [
+    "Samfylkingin stendur nú í um 25% fylgi",
+    "Sjálfstæðisflokkurinn fékk 30% í kosningunum",
+    "Fylgi Framsóknarflokksins fór úr 6,7 prósentum í 5,3 prósent",
+    "Samfylkingin hlaut 30% í síðustu könnun",
+    "48,5% svarenda segjast já, 48,5% nei og 1% óákveðin",
+    "46 prósent segjast vera andvíg aðild í dag en sá fjöldi var "
+    "39,8 prósent þegar könnunin var framkvæmd á svipuðum tíma í fyrra.",
+    "Samkvæmt honum er svo mjótt á munum fylkinganna að hann er ekki "
+    "tölfræðilega marktækur en 51,5% þeirra sem tóku afstöðu sögðust "
+    "ætla að greiða atkvæði með og 48,5% þeirra á móti.",
+    "72 prósent aðspurðra eru jákvæð gagnvart aðild að varnarbandalaginu.",
+    "Heildarúrtak var 12.102 og þátttökuhlutfall 38,5 prósent.",
+    "Könnunin var gerð dagana 21. janúar til 2. febrúar. "
+    "1.672 voru í úrtaki og var þátttökuhlutfallið 48,8%.",
+]
+
+
+@register("skodanakannanir_prose", setup=lambda: _BENCH_PARAGRAPHS * 100)
+def _bench_prose(stage, paragraphs):
+    """Prose extraction (parties, ESB, methodology) over 1,000 paragraphs."""
+    with stage("parties"):
+        extract_prose_poll_figures(paragraphs)
+    with stage("esb"):
+        extract_esb_prose_figures(paragraphs)
+    with stage("methodology"):
+        extract_methodology(paragraphs)
+
+
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
     sub = parser.add_subparsers(dest="command", required=True)
@@ -15,6 +15,9 @@ from pathlib import Path
 
 import httpx
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 if hasattr(sys.stderr, "reconfigure"):
@@ -58,59 +61,52 @@ def cmd_token(args=None):
     print(f"  embedToken : [{len(tok.get('embedToken', ''))} chars]")
 
 
-async def _scrape() -> list[dict]:
+async def _scrape(pool: BrowserPool | None = None) -> list[dict]:
     """Drive the Angular SPA and capture Power BI responses.
 
     Returns a list of {section, url, body | text} dicts.
     """
-    from playwright.async_api import async_playwright
-
     captured: list[dict] = []
     current_section = {"name": "initial"}
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            page = await browser.new_page()
-
-            async def on_response(r):
-                u = r.url.lower()
-                is_pbi_data = (
-                    u.startswith("blob:")
-                    or "querydata" in u
-                    or "executequeries" in u
-                    or "modelsandexploration" in u
-                    or "conceptualschema" in u
-                )
-                if is_pbi_data and r.status == 200:
-                    entry = {"section": current_section["name"], "url": r.url}
+    async with borrow_page(pool) as page:
+
+        async def on_response(r):
+            u = r.url.lower()
+            is_pbi_data = (
+                u.startswith("blob:")
+                or "querydata" in u
+                or "executequeries" in u
+                or "modelsandexploration" in u
+                or "conceptualschema" in u
+            )
+            if is_pbi_data and r.status == 200:
+                entry = {"section": current_section["name"], "url": r.url}
+                try:
+                    entry["body"] = await r.json()
+                except Exception:
                     try:
-                        entry["body"] = await r.json()
+                        entry["text"] = (await r.text())[:200000]
                     except Exception:
-                        try:
-                            entry["text"] = (await r.text())[:200000]
-                        except Exception:
-                            return
-                    captured.append(entry)
-
-            page.on("response", on_response)
-
-            # Visit each report route directly. The SPA fetches a token and
-            # initializes the Power BI embed on each route.
-            for slug, url in REPORTS:
-                current_section["name"] = slug
-                print(f"  section: {slug} → {url}", file=sys.stderr)
-                try:
-                    await page.goto(url, wait_until="networkidle", timeout=60000)
-                except Exception as e:
-                    print(f"    [warn] goto failed: {e}", file=sys.stderr)
-                    continue
-                # Power BI does not reliably fire networkidle; wait for the
-                # DAX calls to flow. 20s is enough for modelsAndExploration
-                # + a couple of executeQueries.
-                await asyncio.sleep(20)
-        finally:
-            await browser.close()
+                        return
+                captured.append(entry)
+
+        page.on("response", on_response)
+
+        # Visit each report route directly. The SPA fetches a token and
+        # initializes the Power BI embed on each route.
+        for slug, url in REPORTS:
+            current_section["name"] = slug
+            print(f"  section: {slug} → {url}", file=sys.stderr)
+            try:
+                await page.goto(url, wait_until="networkidle", timeout=60000)
+            except Exception as e:
+                print(f"    [warn] goto failed: {e}", file=sys.stderr)
+                continue
+            # Power BI does not reliably fire networkidle; wait for the
+            # DAX calls to flow. 20s is enough for modelsAndExploration
+            # + a couple of executeQueries.
+            await asyncio.sleep(20)
     return captured
 
 
@@ -13,12 +13,16 @@ Usage:
 
 import argparse
 import json
+import sys
 from datetime import datetime, date
 from pathlib import Path
 
 import httpx
 import polars as pl
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.bench import register  # noqa: E402
+
 WFS_BASE = "https://gagnaveita.vegagerdin.is/geoserver/gis/ows"
 LAYER_REALTIME = "gis:umferdvika_2021_1"
 LAYER_STATIONS = "gis:umf_talningar_stefnugreint_stadir"
@@ -153,14 +157,9 @@ def cmd_snapshot():
 # collect
 # ---------------------------------------------------------------------------
 
-def cmd_collect():
-    """Collect rolling 7-day data and accumulate into Parquet history."""
-    print("Fetching real-time data for collection...")
-    features = fetch_wfs(LAYER_REALTIME)
-    print(f"  {len(features)} measurement points received")
-
-    # Unpivot wide DAGUR1..7 columns into long format
-    today = date.today().isoformat()
+def unpivot_realtime(features: list[dict], collected_at: str) -> pl.DataFrame:
+    """Unpivot the wide DAGUR1..7 columns of the real-time layer into one
+    row per station, direction and day."""
     long_rows = []
     for f in features:
         props = {k.lower(): v for k, v in f.get("properties", {}).items()}
@@ -173,7 +172,7 @@ def cmd_collect():
             "maelistod_tegund": props.get("maelistod_tegund"),
             "lon": coords[0],
             "lat": coords[1],
-            "collected_at": today,
+            "collected_at": collected_at,
         }
 
         for i in range(1, 8):
@@ -188,33 +187,44 @@ def cmd_collect():
             long_rows.append(row)
 
     if not long_rows:
-        print("  No data to collect.")
-        return
-
-    new_df = pl.DataFrame(long_rows).with_columns(
+        return pl.DataFrame()
+    return pl.DataFrame(long_rows).with_columns(
         pl.col("date").str.to_date("%Y-%m-%d"),
         pl.col("collected_at").str.to_date("%Y-%m-%d"),
     )
-    new_count = len(new_df)
-    print(f"  Unpivoted {new_count} daily records from rolling 7-day window")
 
-    # Load existing history and merge
-    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
-    if HISTORY_FILE.exists():
-        existing = pl.read_parquet(HISTORY_FILE)
-        combined = pl.concat([existing, new_df], how="diagonal_relaxed")
-    else:
-        combined = new_df
 
-    # Deduplicate: keep latest collection for each station+direction+date
-    deduped = (
+def merge_history(existing: pl.DataFrame | None, new_df: pl.DataFrame) -> pl.DataFrame:
+    """Append a collection to the history, keeping the latest collection
+    for each station+direction+date."""
+    combined = new_df if existing is None else pl.concat([existing, new_df], how="diagonal_relaxed")
+    return (
         combined
         .sort("collected_at")
         .unique(subset=["idstod", "stefna", "date"], keep="last")
         .sort(["idstod", "date"])
     )
 
-    before = len(combined) - len(new_df) if HISTORY_FILE.exists() else 0
+
+def cmd_collect():
+    """Collect rolling 7-day data and accumulate into Parquet history."""
+    print("Fetching real-time data for collection...")
+    features = fetch_wfs(LAYER_REALTIME)
+    print(f"  {len(features)} measurement points received")
+
+    new_df = unpivot_realtime(features, date.today().isoformat())
+    if new_df.is_empty():
+        print("  No data to collect.")
+        return
+    new_count = len(new_df)
+    print(f"  Unpivoted {new_count} daily records from rolling 7-day window")
+
+    # Load existing history and merge
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+    existing = pl.read_parquet(HISTORY_FILE) if HISTORY_FILE.exists() else None
+    deduped = merge_history(existing, new_df)
+
+    before = len(existing) if existing is not None else 0
     deduped.write_parquet(HISTORY_FILE)
 
     added = len(deduped) - before
@@ -226,6 +236,48 @@ def cmd_collect():
     print(f"  Date range:     {date_min} to {date_max}")
 
 
+def _bench_fixture(stations: int = 300, days: int = 365) -> tuple[list[dict], pl.DataFrame]:
+    """Real-time features for ``stations`` two-way counters, and a history
+    of ``days`` daily collections for the same stations."""
+    import random
+    from datetime import timedelta
+
+    rnd = random.Random(0)
+    today = date(2026, 4, 20)
+    features = []
+    for sid in range(stations):
+        for stefna in ("A", "B"):
+            props = {"IDSTOD": sid, "NAFN": f"Stöð {sid}", "STEFNA": stefna,
+                     "MAELISTOD_TEGUND": 2}
+            for i in range(1, 8):
+                props[f"UMF_DAGUR{i}"] = rnd.randrange(50, 20_000)
+                props[f"DAGS_DAGUR{i}"] = f"{today - timedelta(days=i)}T23:59:59Z"
+            features.append({"properties": props,
+                             "geometry": {"coordinates": [-21 + sid / 100, 64 + sid / 300]}})
+    history = pl.DataFrame({
+        "idstod": [sid for sid in range(stations) for _ in range(days) for _ in "AB"],
+        "stefna": [s for _ in range(stations) for _ in range(days) for s in "AB"],
+        "date": [today - timedelta(days=d + 1) for _ in range(stations)
+                 for d in range(days) for _ in "AB"],
+        "daily_count": [rnd.randrange(50, 20_000) for _ in range(stations * days * 2)],
+    }).with_columns(pl.col("date").alias("collected_at"))
+    return features, history
+
+
+@register("umferd_collect", setup=_bench_fixture)
+def _bench_collect(stage, fixture):
+    """Unpivot 600 counters' 7-day window and merge into a year of history."""
+    import io
+
+    features, history = fixture
+    with stage("unpivot"):
+        new_df = unpivot_realtime(features, "2026-04-20")
+    with stage("merge"):
+        merged = merge_history(history, new_df)
+    with stage("write"):
+        merged.write_parquet(io.BytesIO())
+
+
 # ---------------------------------------------------------------------------
 # report
 # ---------------------------------------------------------------------------
@@ -6,9 +6,12 @@ gradient from cool (low) to hot (high). The road network provides context.
 """
 
 import argparse
+import sys
 from pathlib import Path
 
-GEODATA = Path(__file__).parent.parent / "data" / "geodata"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.cache import base_layer  # noqa: E402
+
 PROCESSED = Path(__file__).parent.parent / "data" / "processed"
 OUT = Path(__file__).parent.parent / "reports" / "umferd-map.png"
 
@@ -48,7 +51,6 @@ def main():
     args = parser.parse_args()
 
     global pe
-    import geopandas as gpd
     import matplotlib.colors as mcolors
     import matplotlib.patheffects as pe
     import matplotlib.pyplot as plt
@@ -58,12 +60,12 @@ def main():
     from matplotlib.lines import Line2D
 
     # --- Load layers ---
-    land     = gpd.read_file(GEODATA / "Landmask.geojson")
-    islands  = gpd.read_file(GEODATA / "IslandArea.geojson")
-    glaciers = gpd.read_file(GEODATA / "LandIceArea.geojson")
-    lakes    = gpd.read_file(GEODATA / "Lake_Reservoir.geojson")
-    roads    = gpd.read_file(GEODATA / "RoadLines.geojson")
-    towns    = gpd.read_file(GEODATA / "BuiltupAreaPoints.geojson")
+    land     = base_layer("Landmask", "EPSG:4326")
+    islands  = base_layer("IslandArea", "EPSG:4326")
+    glaciers = base_layer("LandIceArea", "EPSG:4326")
+    lakes    = base_layer("Lake_Reservoir", "EPSG:4326")
+    roads    = base_layer("RoadLines", "EPSG:4326")
+    towns    = base_layer("BuiltupAreaPoints", "EPSG:4326")
 
     # --- Traffic data: deduplicate to one row per station ---
     df = pl.read_csv(PROCESSED / "umferd_snapshot.csv")
@@ -0,0 +1,122 @@
+"""Offline benchmark registry.
+
+Any script registers a hot path with ``@register``; ``scripts/bench_maps.py
+micro`` imports the registering modules, times each bench on its fixture
+and gates regressions against the last recorded run::
+
+    from utils.bench import register
+
+    @register("json_stat", setup=_bench_fixture)
+    def _bench_json_stat(stage, js):
+        with stage("flatten"):
+            json_stat_to_long(js)
+
+A bench is ``fn(stage, fixture)``. ``setup()`` builds the fixture once per
+measurement — offline, deterministic, recorded dumps where the repo has
+them and seeded synthetic data where it does not — and ``teardown(fixture)``
+disposes of it. ``stage(name)`` is a context manager; time spent inside it
+is reported per stage next to the total.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import statistics
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+
+DEFAULT_REPEAT = 7
+DEFAULT_WARMUP = 1
+
+
+@dataclass(frozen=True)
+class Bench:
+    name: str
+    fn: Callable
+    setup: Callable | None
+    teardown: Callable | None
+    module: str
+    help: str
+
+
+BENCHES: dict[str, Bench] = {}
+
+
+def register(name: str, *, setup: Callable | None = None,
+             teardown: Callable | None = None, help: str | None = None) -> Callable:
+    """Decorator adding ``fn(stage, fixture)`` to ``BENCHES`` as ``name``.
+    Re-registering a name replaces it (a module imported twice)."""
+    def deco(fn: Callable) -> Callable:
+        doc = (fn.__doc__ or "").strip().splitlines()
+        BENCHES[name] = Bench(name, fn, setup, teardown, fn.__module__,
+                              help if help is not None else (doc[0] if doc else ""))
+        return fn
+    return deco
+
+
+class Stages:
+    """Per-stage wall time of one run; call as ``with stage("parse"):``."""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = defaultdict(float)
+
+    @contextlib.contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - t0
+
+
+def summary(samples: list[float]) -> dict:
+    """Median, interquartile range and best of a list of seconds."""
+    if len(samples) > 1:
+        q1, _, q3 = statistics.quantiles(samples, n=4, method="inclusive")
+    else:
+        q1 = q3 = samples[0]
+    return {"median_s": round(statistics.median(samples), 6),
+            "iqr_s": round(q3 - q1, 6), "min_s": round(min(samples), 6)}
+
+
+def measure(bench: Bench, *, repeat: int = DEFAULT_REPEAT,
+            warmup: int = DEFAULT_WARMUP) -> dict:
+    """Run ``bench`` ``warmup + repeat`` times on one fixture; summarise the
+    timed runs in total and per stage. The bench's own stdout is swallowed."""
+    fixture = bench.setup() if bench.setup else None
+    totals: list[float] = []
+    stages: dict[str, list[float]] = defaultdict(list)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(warmup):
+                bench.fn(Stages(), fixture)
+            for _ in range(repeat):
+                st = Stages()
+                t0 = time.perf_counter()
+                bench.fn(st, fixture)
+                totals.append(time.perf_counter() - t0)
+                for k, v in st.seconds.items():
+                    stages[k].append(v)
+    finally:
+        if bench.teardown:
+            bench.teardown(fixture)
+    return {"name": bench.name, "runs": repeat, **summary(totals),
+            "stages": {k: summary(v) for k, v in stages.items()}}
+
+
+def regressions(results: list[dict], baseline: dict[str, float],
+                fail_over: float) -> list[dict]:
+    """Results whose median is more than ``fail_over`` percent above the
+    baseline median of the same name. Names without a baseline pass."""
+    out = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if not base or "median_s" not in r:
+            continue
+        pct = (r["median_s"] - base) / base * 100
+        if pct > fail_over:
+            out.append({"name": r["name"], "baseline_s": base,
+                        "median_s": r["median_s"], "delta_pct": round(pct, 1)})
+    return out
@@ -0,0 +1,236 @@
+"""Shared Chromium pool for the Playwright-based scrapers.
+
+Every dashboard scraper used to launch its own ``async_playwright()`` browser,
+and a multi-dashboard run (``landlaeknir.py fetch --all``) launched one per
+dashboard. A ``BrowserPool`` holds one Chromium process for the whole run:
+
+- ``contexts`` isolated browser contexts (separate cookies/storage), one per
+  concurrent borrower — a borrower waits when all are busy;
+- each context keeps its page warm between borrows (reset to ``about:blank``,
+  borrower listeners removed, cookies cleared) and replaces it after
+  ``recycle_after`` uses, so a long run does not grow a renderer without bound;
+- a context-level route aborts fonts, images, media and known analytics /
+  telemetry hosts — none of which carry data, all of which cost bandwidth
+  and renderer memory.
+
+Scripts borrow pages through ``borrow_page(pool)``; with ``pool=None`` a
+one-off single-context pool is started, so each scrape function works on its
+own and inside a batch::
+
+    from utils.browser import BrowserPool, borrow_page
+
+    async def _scrape_one(url, pool=None):
+        async with borrow_page(pool) as page:
+            page.on("response", on_response)
+            await page.goto(url, wait_until="networkidle")
+
+    async with BrowserPool(contexts=2) as pool:      # one browser, many scrapes
+        for url in urls:
+            await _scrape_one(url, pool)
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+# Headless Chromium announces itself as "HeadlessChrome", which some of the
+# agency sites' WAFs turn away. Opt-in per pool (``user_agent=USER_AGENT``) —
+# a pinned Chrome version ages, and sites that serve the default are better
+# left seeing it.
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+BLOCKED_RESOURCE_TYPES = frozenset({"font", "image", "media"})
+
+# Suffix-matched. Power BI's own telemetry (App Insights, the 1DS collector)
+# fires dozens of beacons per report load and never carries report data.
+BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "siteimproveanalytics.com",
+    "siteimproveanalytics.io",
+    "plausible.io",
+    "dc.services.visualstudio.com",
+    "browser.events.data.microsoft.com",
+    "js.monitor.azure.com",
+)
+
+
+def blocked(url: str, resource_type: str) -> bool:
+    """Whether the pool aborts a request (see BLOCKED_RESOURCE_TYPES/HOSTS)."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(url).hostname or ""
+    return any(host == h or host.endswith("." + h) for h in BLOCKED_HOSTS)
+
+
+class _Slot:
+    """One isolated context plus its warm page."""
+
+    def __init__(self, context):
+        self.context = context
+        self.page = None
+        self.uses = 0
+
+
+class BrowserPool:
+    """One Chromium process, ``contexts`` isolated contexts, recycled pages.
+
+    ``context_options`` go to every ``browser.new_context`` (pass
+    ``user_agent=USER_AGENT`` for a site that turns away HeadlessChrome); a
+    per-borrow ``viewport`` is applied to the page.
+    ``stats`` counts launches, pages created/reused and blocked requests.
+    """
+
+    def __init__(self, contexts: int = 2, *, headless: bool = True, block: bool = True,
+                 recycle_after: int = 20, **context_options):
+        self.size = contexts
+        self.headless = headless
+        self.block = block
+        self.recycle_after = recycle_after
+        self.context_options = context_options
+        self.stats = {"launches": 0, "pages": 0, "reused": 0, "blocked": 0}
+        self._pw = None
+        self._browser = None
+        self._slots: asyncio.Queue | None = None
+
+    async def start(self) -> BrowserPool:
+        from playwright.async_api import async_playwright
+
+        self._pw = await async_playwright().start()
+        self._browser = await self._pw.chromium.launch(headless=self.headless)
+        self.stats["launches"] += 1
+        self._slots = asyncio.Queue()
+        for _ in range(self.size):
+            self._slots.put_nowait(_Slot(await self._new_context()))
+        return self
+
+    async def _new_context(self):
+        context = await self._browser.new_context(**self.context_options)
+        if self.block:
+            await context.route("**/*", self._route)
+        return context
+
+    async def _route(self, route):
+        request = route.request
+        if blocked(request.url, request.resource_type):
+            self.stats["blocked"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+    async def __aenter__(self) -> BrowserPool:
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def page(self, *, viewport: dict | None = None):
+        """Borrow a page from a free context (waits while all are busy)."""
+        slot = await self._slots.get()
+        ok, borrowed = False, None
+        try:
+            if slot.page is None or slot.page.is_closed():
+                slot.page, slot.uses = await slot.context.new_page(), 0
+                self.stats["pages"] += 1
+            else:
+                self.stats["reused"] += 1
+            slot.uses += 1
+            page = slot.page
+            if viewport:
+                await page.set_viewport_size(viewport)
+            borrowed = _BorrowedPage(page)
+            yield borrowed
+            ok = True
+        finally:
+            try:
+                await self._release(slot, borrowed, ok)
+            finally:
+                self._slots.put_nowait(slot)
+
+    async def _release(self, slot: _Slot, borrowed: _BorrowedPage | None, ok: bool) -> None:
+        page = slot.page
+        if page is None:
+            return
+        if borrowed is not None:
+            borrowed.detach()
+        try:
+            if not ok or slot.uses >= self.recycle_after or page.is_closed():
+                # A borrower that raised may have left the page mid-navigation
+                # or wedged; don't hand that state to the next one.
+                slot.page = None
+                if not page.is_closed():
+                    await page.close()
+                return
+            if hasattr(page, "unroute_all"):
+                await page.unroute_all()
+            await page.goto("about:blank")
+            await slot.context.clear_cookies()
+        except Exception as e:  # a dead page must not take the pool down
+            print(f"  [browser pool] dropping page: {type(e).__name__}: {e}", file=sys.stderr)
+            slot.page = None
+
+
+class _BorrowedPage:
+    """What a borrower holds: the pool's page, with ``on`` / ``once`` /
+    ``remove_listener`` recorded so the pool can detach exactly what the
+    borrower attached. Everything else is the page itself."""
+
+    def __init__(self, page):
+        self._page = page
+        self._listeners: list = []
+
+    def __getattr__(self, name):
+        return getattr(self._page, name)
+
+    def on(self, event, handler):
+        self._listeners.append((event, handler))
+        return self._page.on(event, handler)
+
+    def once(self, event, handler):
+        self._listeners.append((event, handler))
+        return self._page.once(event, handler)
+
+    def remove_listener(self, event, handler):
+        if (event, handler) in self._listeners:
+            self._listeners.remove((event, handler))
+        return self._page.remove_listener(event, handler)
+
+    def detach(self) -> None:
+        for event, handler in self._listeners:
+            try:
+                self._page.remove_listener(event, handler)
+            except (KeyError, ValueError):    # a ``once`` handler that already fired
+                pass
+        self._listeners.clear()
+
+
+@asynccontextmanager
+async def borrow_page(pool: BrowserPool | None = None, *, user_agent: str | None = None,
+                      **page_options):
+    """A page from ``pool`` — or, with no pool, from a one-off pool that is
+    closed on exit (a single scrape run on its own). ``user_agent`` configures
+    that one-off pool; a passed ``pool`` keeps its own."""
+    if pool is not None:
+        async with pool.page(**page_options) as page:
+            yield page
+        return
+    options = {"user_agent": user_agent} if user_agent else {}
+    async with BrowserPool(contexts=1, **options) as own, own.page(**page_options) as page:
+        yield page
@@ -8,10 +8,20 @@ Three on-disk tiers live under ``data/cache/`` (gitignored, see ``.gitignore``):
 - ``data/cache/rasters/<name>.tif`` — LZW-compressed, ISN93 (EPSG:3057) projected
                                        GeoTIFFs derived from
                                        ``data/raw/lmi_hrl/*.tif``. Built by
-                                       ``scripts/build_cache.py rasters``.
+                                       ``scripts/build_cache.py rasters``,
+                                       with internal overview levels.
 - ``data/cache/arrays/<name>.npy``  — opportunistic numpy memos written by render
                                        scripts on first run (e.g. decoded GRAVPI
-                                       probability grid).
+                                       probability grid, stored as uint8 codes +
+                                       LUT), read back memory-mapped.
+- ``data/cache/geodata/<Layer>.<EPSG>.parquet``
+                                     — the LMI GeoJSON layers as GeoParquet,
+                                       pre-projected to ISN93 and WGS84 (plus
+                                       simplified variants on demand). Written
+                                       by ``scripts/lmi.py download`` and on a
+                                       stale read; see ``base_layer``.
+- ``data/cache/tiles/<layer>/``     — z/x/y tile pyramids of the above for the
+                                       Leaflet pages; see ``utils/tiles.py``.
 
 This module exposes thin readers; it never builds. Render scripts call:
 
@@ -27,13 +37,18 @@ from __future__ import annotations
 
 import hashlib
 import json
+import threading
 from pathlib import Path
 
+import numpy as np
+
 ROOT = Path(__file__).resolve().parent.parent.parent
 CACHE = ROOT / "data" / "cache"
 CONSTANTS_PATH = CACHE / "constants.json"
 RASTERS_DIR = CACHE / "rasters"
 ARRAYS_DIR = CACHE / "arrays"
+GEO_DIR = CACHE / "geodata"
+GEODATA = ROOT / "data" / "geodata"      # lmi.py's GeoJSON downloads (Tier 1)
 
 
 class CacheMissingError(RuntimeError):
@@ -75,17 +90,121 @@ def cached_raster(name: str) -> Path:
     return p
 
 
-def cached_array(name: str) -> Path:
-    """Path to a Tier 5 numpy memo (e.g. ``"gravpi_prob_3057"``).
+def overview_level(path: Path, out_shape: tuple[int, int]) -> int | None:
+    """The coarsest internal overview of ``path`` that still has at least
+    ``out_shape`` (rows, cols) pixels, as an index for
+    ``rasterio.open(..., overview_level=)``; None when only full resolution
+    will do (or the file has no overviews)."""
+    import rasterio
 
-    Returns the path even if it doesn't exist — this tier is *opportunistic*,
-    written by render scripts on first run. Use ``.exists()`` on the returned
-    Path to decide whether to recompute.
-    """
+    rows, cols = out_shape
+    best = None
+    with rasterio.open(path) as src:
+        for i, f in enumerate(src.overviews(1)):
+            if -(-src.height // f) >= rows and -(-src.width // f) >= cols:
+                best = i
+    return best
+
+
+def open_cached_raster(name: str, *, out_shape: tuple[int, int] | None = None):
+    """Open a Tier 3 raster at the coarsest pyramid level that covers
+    ``out_shape`` — ``read(out_shape=...)`` then decodes a fraction of the
+    blocks a full-resolution decimation would. Bounds and CRS are unchanged;
+    only the grid is coarser. Use as a context manager."""
+    import rasterio
+
+    p = cached_raster(name)
+    level = overview_level(p, out_shape) if out_shape else None
+    if level is None:
+        return rasterio.open(p)
+    return rasterio.open(p, overview_level=level)
+
+
+def _rel(path: Path) -> str:
+    path = path.resolve()
+    return path.relative_to(ROOT).as_posix() if path.is_relative_to(ROOT) else str(path)
+
+
+def array_path(name: str) -> Path:
+    """Path to a Tier 5 numpy memo (e.g. ``"gravpi_prob_3057"``), whether or
+    not it exists yet. Its sidecar is the same path with a ``.json`` suffix."""
     ARRAYS_DIR.mkdir(parents=True, exist_ok=True)
     return ARRAYS_DIR / f"{name}.npy"
 
 
+def cached_array(name: str, *, source: Path | None = None) -> tuple[np.ndarray, dict]:
+    """Read-only memory-mapped view of a Tier 5 memo, plus its sidecar.
+
+    The view is ``np.load(mmap_mode="r")`` — nothing is read until a page is
+    touched, so a render that plots a window pays only for that window. The
+    sidecar carries ``dtype``, ``shape``, ``extent`` and, for LUT-coded grids
+    (see ``lut_encode``), the ``lut`` mapping each uint8 code to its value.
+
+    With ``source``, the memo must have been written from a file with the same
+    SHA-256. Raises ``CacheMissingError`` when absent or stale — this tier is
+    opportunistic, so callers recompute and ``write_array`` on a miss.
+    """
+    npy = array_path(name)
+    sidecar = npy.with_suffix(".json")
+    hint = f"Re-run the script that writes arrays/{npy.name} — it rebuilds on a miss"
+    if not (npy.exists() and sidecar.exists()):
+        raise CacheMissingError(f"Missing {_rel(npy)}", hint=hint)
+    meta = json.loads(sidecar.read_text(encoding="utf-8"))
+    if source is not None and meta.get("source_sha256") != fingerprint(source):
+        raise CacheMissingError(f"{_rel(npy)} is stale — {source.name} changed", hint=hint)
+    arr = np.load(npy, mmap_mode="r")
+    if str(arr.dtype) != meta.get("dtype") or list(arr.shape) != meta.get("shape"):
+        raise CacheMissingError(f"{_rel(npy)} does not match its sidecar", hint=hint)
+    return arr, meta
+
+
+def write_array(name: str, arr: np.ndarray, *, source: Path | None = None,
+                extent=None, lut=None) -> Path:
+    """Write a Tier 5 memo and its sidecar (array first, sidecar last, both
+    via rename, so a reader never sees a sidecar describing a partial file)."""
+    npy = array_path(name)
+    tmp = npy.with_suffix(".tmp.npy")
+    np.save(tmp, arr)
+    tmp.replace(npy)
+    meta = {"dtype": str(arr.dtype), "shape": list(arr.shape)}
+    if extent is not None:
+        meta["extent"] = [float(v) for v in extent]
+    if lut is not None:
+        meta["lut"] = [None if np.isnan(v) else float(v) for v in np.asarray(lut, dtype=np.float64)]
+    if source is not None:
+        meta["source"] = _rel(source)
+        meta["source_sha256"] = fingerprint(source)
+    side = npy.with_suffix(".json")
+    side_tmp = side.with_suffix(".tmp.json")
+    side_tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    side_tmp.replace(side)
+    return npy
+
+
+def lut_encode(arr: np.ndarray, values) -> tuple[np.ndarray, np.ndarray]:
+    """Encode a grid that only takes a few float values (e.g. probability-bin
+    centres) as uint8 codes + a lookup table: ``lut[codes]`` restores it.
+
+    Code 0 is NaN; codes 1..n are ``values`` in the given order. Entries not
+    in ``values`` map to their nearest value. A quarter of the float32 size.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if not 0 < len(values) <= 255:
+        raise ValueError(f"{len(values)} values do not fit a uint8 code")
+    order = np.argsort(values)
+    sorted_vals = values[order]
+    valid = ~np.isnan(arr)
+    v = arr[valid]
+    # Nearest of the two neighbouring sorted values.
+    hi = np.clip(np.searchsorted(sorted_vals, v), 0, len(values) - 1)
+    lo = np.clip(hi - 1, 0, None)
+    nearest = np.where(np.abs(v - sorted_vals[lo]) <= np.abs(v - sorted_vals[hi]), lo, hi)
+    codes = np.zeros(arr.shape, dtype=np.uint8)
+    codes[valid] = order[nearest] + 1
+    lut = np.concatenate([[np.nan], values]).astype(np.float32)
+    return codes, lut
+
+
 def ensure_cache(*, tier: int = 4) -> None:
     """Preflight check used at the top of refactored render scripts.
 
@@ -114,3 +233,187 @@ def sha256_file(path: Path, *, chunk: int = 1 << 20) -> str:
                 break
             h.update(buf)
     return h.hexdigest()
+
+
+# ── fingerprint index ────────────────────────────────────────────────────
+#
+# ``fingerprint`` memoizes digests in ``data/cache/fingerprints.json`` keyed
+# by path and validated against (size, mtime_ns, inode): while the stat tuple
+# is unchanged the stored digest is returned without reading the file, so
+# staleness checks over the 826 MB TIFF cost one ``stat``. A file modified in
+# the last couple of seconds is hashed but not memoized — a rewrite within
+# the same mtime tick would otherwise go unnoticed (git's "racy clean" rule).
+
+FINGERPRINTS_PATH = CACHE / "fingerprints.json"
+RACY_NS = 2_000_000_000
+PARTIAL_SAMPLES = 16
+PARTIAL_CHUNK = 1 << 20
+
+_index: dict | None = None
+_index_lock = threading.Lock()
+
+
+def _load_index() -> dict:
+    global _index
+    if _index is None:
+        try:
+            _index = json.loads(FINGERPRINTS_PATH.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            _index = {}
+    return _index
+
+
+def _save_index() -> None:
+    FINGERPRINTS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = FINGERPRINTS_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(_index, indent=1, sort_keys=True), encoding="utf-8")
+    tmp.replace(FINGERPRINTS_PATH)
+
+
+def partial_sha256(path: Path, *, samples: int = PARTIAL_SAMPLES, chunk: int = PARTIAL_CHUNK) -> str:
+    """Sampled digest: the size plus ``samples`` evenly spaced ``chunk``-byte
+    reads, always including the first and last. Reads ~16 MB of any file.
+
+    Catches appended, truncated and header-rewritten files (every GeoTIFF
+    re-export rewrites its IFD) but can miss an in-place edit that falls
+    between samples — use it as a fast pre-check, never as the recorded
+    ``source_sha256``. Prefixed ``partial:`` so it is never mistaken for one.
+    """
+    size = path.stat().st_size
+    h = hashlib.sha256(str(size).encode())
+    with path.open("rb") as f:
+        if size <= samples * chunk:
+            h.update(f.read())
+        else:
+            step = (size - chunk) / (samples - 1)
+            for i in range(samples):
+                f.seek(int(i * step))
+                h.update(f.read(chunk))
+    return "partial:" + h.hexdigest()
+
+
+def fingerprint(path: Path, *, partial: bool = False) -> str:
+    """``sha256_file(path)`` (or ``partial_sha256`` with ``partial=True``),
+    memoized by (path, size, mtime_ns, inode) across runs."""
+    import time
+
+    st = path.stat()
+    stat_key = [st.st_size, st.st_mtime_ns, st.st_ino]
+    key = str(path.resolve())
+    kind = "partial" if partial else "sha256"
+    index = _load_index()
+    entry = index.get(key)
+    if entry is None or entry.get("stat") != stat_key:
+        entry = {"stat": stat_key}
+    if kind in entry:
+        return entry[kind]
+    digest = partial_sha256(path) if partial else sha256_file(path)
+    if time.time_ns() - st.st_mtime_ns > RACY_NS:
+        with _index_lock:   # build_cache.py fingerprints from worker threads
+            entry[kind] = digest
+            index[key] = entry
+            _save_index()
+    return digest
+
+
+def known_fingerprint(path: Path) -> str | None:
+    """The memoized full digest of ``path`` if its stat tuple still matches,
+    else ``None`` — never reads the file."""
+    st = path.stat()
+    entry = _load_index().get(str(path.resolve()))
+    if entry is None or entry.get("stat") != [st.st_size, st.st_mtime_ns, st.st_ino]:
+        return None
+    return entry.get("sha256")
+
+
+# ── GeoParquet base layers ───────────────────────────────────────────────
+#
+# Every render used to ``gpd.read_file`` the LMI GeoJSON and ``to_crs`` it —
+# for the base layers that parse + reprojection dominated a warm map build.
+# The store keeps each layer as GeoParquet (WKB, columnar) in the CRSes the
+# renderers draw in; a read is a ``read_parquet`` with no projection work.
+# Staleness follows the GeoJSON's SHA-256 (via ``fingerprint``), recorded in
+# ``<Layer>.json``; a stale or missing store entry is rebuilt on read.
+
+BASE_CRSES = ("EPSG:3057", "EPSG:4326")
+
+
+def base_layer_path(name: str, crs: str = "EPSG:3057", tolerance: float | None = None) -> Path:
+    """Store path of ``name`` in ``crs``, simplified to ``tolerance`` (CRS
+    units: metres for 3057, degrees for 4326) when given."""
+    code = crs.split(":")[-1]
+    return GEO_DIR / f"{name}.{code}{f'.s{tolerance:g}' if tolerance else ''}.parquet"
+
+
+def base_layer_is_fresh(name: str) -> bool:
+    """Whether the store holds ``name`` built from the current GeoJSON (a
+    store whose GeoJSON has since been deleted still counts)."""
+    side = GEO_DIR / f"{name}.json"
+    if not side.exists():
+        return False
+    source = GEODATA / f"{name}.geojson"
+    if not source.exists():
+        return True
+    return json.loads(side.read_text(encoding="utf-8")).get("source_sha256") == fingerprint(source)
+
+
+def _write_parquet(gdf, path: Path) -> None:
+    tmp = path.with_suffix(".tmp.parquet")
+    gdf.to_parquet(tmp, index=False)
+    tmp.replace(path)
+
+
+def write_base_layer(name: str, *, crses=BASE_CRSES) -> list[Path]:
+    """Parse ``data/geodata/<name>.geojson`` once and store it in each of
+    ``crses``. Drops variants built from an older GeoJSON."""
+    import geopandas as gpd
+
+    source = GEODATA / f"{name}.geojson"
+    if not source.exists():
+        raise CacheMissingError(f"Missing {_rel(source)}",
+                                hint="Run: uv run python scripts/lmi.py download")
+    gdf = gpd.read_file(source)
+    GEO_DIR.mkdir(parents=True, exist_ok=True)
+    for old in GEO_DIR.glob(f"{name}.*.parquet"):
+        old.unlink()
+    paths = []
+    for crs in crses:
+        paths.append(base_layer_path(name, crs))
+        _write_parquet(gdf.to_crs(crs), paths[-1])
+    side = GEO_DIR / f"{name}.json"
+    side_tmp = side.with_suffix(".tmp.json")
+    side_tmp.write_text(json.dumps({
+        "source": _rel(source),
+        "source_sha256": fingerprint(source),
+        "features": len(gdf),
+        "crses": list(crses),
+    }, indent=2), encoding="utf-8")
+    side_tmp.replace(side)
+    return paths
+
+
+def base_layer(name: str, crs: str = "EPSG:3057", *, tolerance: float | None = None):
+    """An LMI layer (e.g. ``"Landmask"``) as a GeoDataFrame in ``crs``.
+
+    Reads the GeoParquet store, (re)building it from the GeoJSON first when
+    it is missing or stale. A CRS outside BASE_CRSES, or a ``tolerance``
+    (``simplify(..., preserve_topology=True)``, for zoomed-out tiles and
+    previews — never for area sums), is derived once and kept alongside.
+    Raises ``CacheMissingError`` when neither store nor GeoJSON exists.
+    """
+    import geopandas as gpd
+
+    if not base_layer_is_fresh(name):
+        write_base_layer(name)
+    path = base_layer_path(name, crs, tolerance)
+    if not path.exists():
+        base = base_layer_path(name, crs)
+        gdf = (gpd.read_parquet(base) if base.exists()
+               else gpd.read_parquet(base_layer_path(name, BASE_CRSES[0])).to_crs(crs))
+        if not base.exists():
+            _write_parquet(gdf, base)
+        if tolerance:
+            gdf = gdf.set_geometry(gdf.geometry.simplify(tolerance, preserve_topology=True))
+            _write_parquet(gdf, path)
+        return gdf
+    return gpd.read_parquet(path)
@@ -0,0 +1,338 @@
+"""Stage-level profiling: spans for network, parse, transform and write.
+
+A script wraps its stages in spans and its ``main`` in ``profiled``::
+
+    from utils.profiling import add_profile_argument, profiled, span
+
+    with span("network", "GET thingmalalisti") as s:
+        resp = client.get(url)
+        s.add(bytes=len(resp.content))
+
+    with profiled("althingi", args.profile):
+        args.func(args)
+
+Off — the default — a span is a no-op. On (``--profile``, or
+``ICELANDIC_DATA_PROFILE=1``) each run writes
+``data/cache/profiles/<script>-<UTC stamp>.json``: every span with its
+nesting, seconds, self seconds, bytes and rows; per-kind totals of *self*
+time, so nested spans partition the run instead of double-counting it; the
+time outside any span; and the process's peak RSS, sampled by psutil.
+A generator must not hold a span open across ``yield`` — the span would
+swallow its consumer's work. Time it with a ``stopwatch`` instead::
+
+    watch = stopwatch("parse", path)
+    try:
+        watch.start()
+        for item in source:
+            watch.stop()
+            yield item
+            watch.start()
+        watch.stop()
+    finally:
+        watch.close()
+
+``--cprofile`` (``ICELANDIC_DATA_PROFILE=cprofile``) also writes a
+cProfile ``.prof`` beside the trace — ``uvx snakeviz <file>.prof`` draws it
+as an icicle/flame graph.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+KINDS = ("network", "parse", "transform", "write")
+ENV = "ICELANDIC_DATA_PROFILE"
+MODES = ("trace", "cprofile")
+PROFILE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "cache" / "profiles"
+SAMPLE_SECONDS = 0.05
+
+
+class Span:
+    __slots__ = ("kind", "name", "parent", "depth", "start", "seconds",
+                 "child_seconds", "bytes", "rows", "rss_mb")
+
+    def __init__(self, kind: str, name: str, parent: int | None, depth: int, start: float):
+        self.kind, self.name, self.parent, self.depth = kind, name, parent, depth
+        self.start, self.seconds, self.child_seconds = start, 0.0, 0.0
+        self.bytes = self.rows = 0
+        self.rss_mb: float | None = None
+
+    def add(self, *, bytes: int = 0, rows: int = 0) -> None:
+        self.bytes += bytes
+        self.rows += rows
+
+
+class _NullSpan:
+    def add(self, *, bytes: int = 0, rows: int = 0) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+_trace: Trace | None = None
+_current: ContextVar[int | None] = ContextVar("profiling_span", default=None)
+
+
+def _rss_mb(proc) -> float | None:
+    if proc is None:
+        return None
+    try:
+        return proc.memory_info().rss / 1e6
+    except Exception:
+        return None
+
+
+class Trace:
+    """The spans of one profiled run, plus a psutil RSS sampler thread."""
+
+    def __init__(self, script: str):
+        self.script = script
+        self.started_at = datetime.now(tz=timezone.utc)
+        self.t0 = time.perf_counter()
+        self.spans: list[Span] = []
+        self.lock = threading.Lock()
+        self.peak_rss_mb = 0.0
+        try:
+            import psutil
+
+            self._proc = psutil.Process()
+        except ImportError:
+            self._proc = None
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        if self._proc is not None:
+            self._sampler.start()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(SAMPLE_SECONDS):
+            self._note_rss()
+
+    def _note_rss(self) -> float | None:
+        rss = _rss_mb(self._proc)
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        return rss
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler.is_alive():
+            self._sampler.join()
+        self._note_rss()
+
+    def to_dict(self, argv: list[str]) -> dict:
+        wall = time.perf_counter() - self.t0
+        totals = {k: {"seconds": 0.0, "bytes": 0, "rows": 0, "spans": 0} for k in KINDS}
+        top = 0.0
+        for s in self.spans:
+            t = totals.setdefault(s.kind, {"seconds": 0.0, "bytes": 0, "rows": 0, "spans": 0})
+            t["seconds"] += s.seconds - s.child_seconds
+            t["bytes"] += s.bytes
+            t["rows"] += s.rows
+            t["spans"] += 1
+            if s.parent is None:
+                top += s.seconds
+        for t in totals.values():
+            t["seconds"] = round(t["seconds"], 6)
+        return {
+            "script": self.script,
+            "argv": argv,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": round(wall, 6),
+            "unattributed_seconds": round(max(wall - top, 0.0), 6),
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self._proc is not None else None,
+            "totals": totals,
+            "spans": [{"kind": s.kind, "name": s.name, "parent": s.parent, "depth": s.depth,
+                       "start": round(s.start - self.t0, 6), "seconds": round(s.seconds, 6),
+                       "self_seconds": round(s.seconds - s.child_seconds, 6),
+                       "bytes": s.bytes, "rows": s.rows,
+                       "rss_mb": None if s.rss_mb is None else round(s.rss_mb, 1)}
+                      for s in self.spans],
+        }
+
+
+def enabled() -> bool:
+    return _trace is not None
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str | None = None, *, bytes: int = 0,
+         rows: int = 0) -> Iterator[Span | _NullSpan]:
+    """Time a stage of ``kind`` (network/parse/transform/write); ``.add()``
+    bytes and rows to the yielded span as they become known."""
+    tr = _trace
+    if tr is None:
+        yield _NULL
+        return
+    parent = _current.get()
+    with tr.lock:
+        depth = 0 if parent is None else tr.spans[parent].depth + 1
+        s = Span(kind, name or kind, parent, depth, time.perf_counter())
+        s.add(bytes=bytes, rows=rows)
+        tr.spans.append(s)
+        index = len(tr.spans) - 1
+    token = _current.set(index)
+    try:
+        yield s
+    finally:
+        _current.reset(token)
+        s.seconds = time.perf_counter() - s.start
+        s.rss_mb = tr._note_rss()
+        if parent is not None:
+            with tr.lock:
+                tr.spans[parent].child_seconds += s.seconds
+
+
+def spanned(kind: str, name: str | None = None) -> Callable:
+    """Decorator form of ``span``; works on plain and async functions."""
+    def deco(fn: Callable) -> Callable:
+        label = name or fn.__name__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                with span(kind, label):
+                    return await fn(*args, **kwargs)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(kind, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+class Stopwatch:
+    """A span timed in pieces. Parented to the span open when it is created,
+    but never the current span itself; ``close`` logs the summed pieces."""
+
+    def __init__(self, tr: Trace, kind: str, name: str, bytes: int, rows: int):
+        self._tr, self.kind, self.name = tr, kind, name
+        self.parent = _current.get()
+        self.first = time.perf_counter()
+        self.seconds, self._since = 0.0, None
+        self.bytes, self.rows = bytes, rows
+
+    def start(self) -> None:
+        self._since = time.perf_counter()
+
+    def stop(self) -> None:
+        if self._since is not None:
+            self.seconds += time.perf_counter() - self._since
+            self._since = None
+
+    def add(self, *, bytes: int = 0, rows: int = 0) -> None:
+        self.bytes += bytes
+        self.rows += rows
+
+    def close(self) -> None:
+        self.stop()
+        tr = self._tr
+        with tr.lock:
+            parent = self.parent
+            depth = 0 if parent is None else tr.spans[parent].depth + 1
+            s = Span(self.kind, self.name, parent, depth, self.first)
+            s.add(bytes=self.bytes, rows=self.rows)
+            s.seconds = self.seconds
+            s.rss_mb = tr._note_rss()
+            tr.spans.append(s)
+            if parent is not None:
+                tr.spans[parent].child_seconds += s.seconds
+
+
+class _NullStopwatch(_NullSpan):
+    def start(self) -> None:
+        pass
+
+    stop = close = start
+
+
+_NULL_WATCH = _NullStopwatch()
+
+
+def stopwatch(kind: str, name: str | None = None, *, bytes: int = 0,
+              rows: int = 0) -> Stopwatch | _NullStopwatch:
+    """A ``span`` for work done in pieces (see the module docstring)."""
+    tr = _trace
+    if tr is None:
+        return _NULL_WATCH
+    return Stopwatch(tr, kind, name or kind, bytes, rows)
+
+
+def add(*, bytes: int = 0, rows: int = 0) -> None:
+    """Credit bytes/rows to the innermost open span, if profiling."""
+    tr, index = _trace, _current.get()
+    if tr is not None and index is not None:
+        tr.spans[index].add(bytes=bytes, rows=rows)
+
+
+def _mode(flag: str | None) -> str | None:
+    value = flag or os.environ.get(ENV, "")
+    if value.lower() in ("", "0", "off", "false", "no"):
+        return None
+    return "cprofile" if value.lower() == "cprofile" else "trace"
+
+
+@contextlib.contextmanager
+def profiled(script: str, flag: str | None = None, *,
+             out_dir: Path | None = None) -> Iterator[Trace | None]:
+    """Profile the enclosed run when ``flag`` (the ``--profile`` value) or
+    ``ICELANDIC_DATA_PROFILE`` asks for it; yields the trace, or None."""
+    global _trace
+    mode = _mode(flag)
+    if mode is None or _trace is not None:
+        yield None
+        return
+    out_dir = out_dir or PROFILE_DIR
+    _trace = tr = Trace(script)
+    prof = None
+    if mode == "cprofile":
+        import cProfile
+
+        prof = cProfile.Profile()
+        prof.enable()
+    try:
+        yield tr
+    finally:
+        if prof is not None:
+            prof.disable()
+        tr.stop()
+        _trace = None
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{script}-{tr.started_at.strftime('%Y%m%dT%H%M%SZ')}"
+        out = out_dir / f"{stem}.json"
+        out.write_text(json.dumps(tr.to_dict(sys.argv[1:]), ensure_ascii=False, indent=2),
+                       encoding="utf-8")
+        if prof is not None:
+            prof.dump_stats(out_dir / f"{stem}.prof")
+        print(f"  [profile] {summary_line(tr)} → {out}", file=sys.stderr)
+
+
+def summary_line(tr: Trace) -> str:
+    d = tr.to_dict([])
+    parts = [f"{d['wall_seconds']:.2f}s wall"]
+    parts += [f"{k} {t['seconds']:.2f}s" for k, t in d["totals"].items() if t["spans"]]
+    parts.append(f"{sum(t['bytes'] for t in d['totals'].values()) / 1e6:.1f} MB")
+    if d["peak_rss_mb"]:
+        parts.append(f"peak RSS {d['peak_rss_mb']:.0f} MB")
+    return ", ".join(parts)
+
+
+def add_profile_argument(parser) -> None:
+    """``--profile`` / ``--cprofile``, both storing their mode in
+    ``args.profile``. Plain flags: an optional value would swallow the
+    subcommand name that follows them."""
+    parser.add_argument(
+        "--profile", action="store_const", const="trace", default=None,
+        help=f"write a per-stage JSON trace to data/cache/profiles/ (also ${ENV}=1)")
+    parser.add_argument(
+        "--cprofile", dest="profile", action="store_const", const="cprofile",
+        help=f"--profile plus a cProfile .prof beside the trace (also ${ENV}=cprofile)")
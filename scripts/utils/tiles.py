@@ -0,0 +1,448 @@
+"""Static z/x/y tile pyramids for the Leaflet maps.
+
+``kortagerð.py html`` used to inline every LMI layer as GeoJSON, so the page
+weighed tens of MB and the browser parsed all of it before drawing anything.
+The pyramids here live under ``data/cache/tiles/<layer>/`` and the pages only
+reference them; Leaflet then fetches the handful of tiles in view.
+
+- Vector layers (the LMI GeoParquet store, or any GeoDataFrame such as the
+  nautgripa farm points) become ``{z}/{x}/{y}.js`` tiles: the features
+  clipped to the tile, simplified to about half a pixel at that zoom (via
+  ``base_layer(..., tolerance=)``), as a GeoJSON FeatureCollection wrapped in
+  a ``L.GeoJSONTiles.load(...)`` call. A script tag rather than ``fetch``, so
+  a report opened from ``file://`` still loads them. Polygons are split into
+  a fill (drawn without stroke) and their clipped boundary lines, so tile
+  edges never show up as outlines. ``LEAFLET_JS`` is the matching GridLayer.
+- Rasters (Tier 3 GeoTIFFs, habitat masks, Tier 5 memos) become
+  ``{z}/{x}/{y}.png`` RGBA tiles through a value → colour palette, reprojected
+  one tile row at a time from the coarsest overview that still covers the
+  zoom (see ``overview_level``). Fully transparent tiles are not written.
+
+Each layer directory carries a ``tiles.json`` manifest with the source
+SHA-256 and the build parameters; a build whose manifest matches is a no-op,
+so only layers whose source changed are re-cut. A rebuild is written beside
+the old pyramid and swapped in whole. ``scripts/build_cache.py`` holds the
+``tiles:<layer>`` graph nodes.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from . import cache
+from .cache import (CACHE, _rel, base_layer, base_layer_is_fresh, fingerprint, overview_level,
+                    write_base_layer)
+
+TILES_DIR = CACHE / "tiles"
+TILE_PX = 256
+ORIGIN_3857 = 20037508.342789244
+TILES_VERSION = 1                 # bump when the tile encoding changes
+VECTOR_ZOOMS = (5, 10)
+RASTER_ZOOMS = (5, 11)
+COORD_DECIMALS = 6                # ~0.1 m — finer than any zoom we cut
+
+# Per-layer feature properties kept in the tiles — only what the pages'
+# styles and popups read. A layer missing here keeps none.
+VECTOR_LAYERS: dict[str, tuple[str, ...]] = {
+    "Landmask": (),
+    "AdministrativeUnit_level2": ("namn", "namn1", "name"),
+    "AdministrativeAreas": ("namn", "namn1", "name"),
+    "NatureParkArea": ("namn1",),
+    "LandIceArea": (),
+    "Lake_Reservoir": (),
+    "RoadLines": ("namn1", "rtt", "rtn"),
+    "BuiltupAreaPoints": ("namn1", "ppl"),
+}
+
+
+# ── tile maths (spherical Web Mercator, XYZ / "slippy" numbering) ────────
+
+def tile_bounds_3857(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(xmin, ymin, xmax, ymax) of a tile in EPSG:3857 metres."""
+    size = 2 * ORIGIN_3857 / (1 << z)
+    xmin = -ORIGIN_3857 + x * size
+    ymax = ORIGIN_3857 - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(west, south, east, north) of a tile in degrees."""
+    n = 1 << z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def tile_range(bounds: tuple[float, float, float, float], z: int) -> tuple[int, int, int, int]:
+    """Inclusive (x0, y0, x1, y1) of the tiles covering WGS84 ``bounds``."""
+    n = 1 << z
+    west, south, east, north = bounds
+
+    def col(lon: float) -> int:
+        return min(n - 1, max(0, int((lon + 180) / 360 * n)))
+
+    def row(lat: float) -> int:
+        lat = max(-85.0511, min(85.0511, lat))
+        r = math.log(math.tan(math.radians(lat)) + 1 / math.cos(math.radians(lat)))
+        return min(n - 1, max(0, int((1 - r / math.pi) / 2 * n)))
+
+    return col(west), row(north), col(east), row(south)
+
+
+def zoom_tolerance(z: int, lat: float = 65.0) -> float:
+    """Simplification tolerance in degrees: half a screen pixel at ``z``
+    (latitude-corrected, so polygons are not over-simplified north–south)."""
+    return round(0.5 * 360 / (TILE_PX << z) * math.cos(math.radians(lat)), 9)
+
+
+# ── manifests ────────────────────────────────────────────────────────────
+
+def manifest_path(name: str, *, root: Path = TILES_DIR) -> Path:
+    return root / name / "tiles.json"
+
+
+def manifest(name: str, *, root: Path = TILES_DIR) -> dict | None:
+    """A layer's ``tiles.json``, or None if it has never been cut."""
+    p = manifest_path(name, root=root)
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else None
+
+
+def _is_fresh(name: str, source_sha256: str, params: dict, root: Path) -> bool:
+    m = manifest(name, root=root)
+    return (m is not None and m.get("source_sha256") == source_sha256
+            and m.get("params") == json.loads(json.dumps(params)))
+
+
+def _swap_in(name: str, tmp: Path, meta: dict, root: Path) -> dict:
+    """Write the manifest into ``tmp`` and replace the live pyramid with it."""
+    (tmp / "tiles.json").write_text(json.dumps(meta, indent=2, ensure_ascii=False),
+                                    encoding="utf-8")
+    live = root / name
+    if live.exists():
+        old = root / f"{name}.old"
+        shutil.rmtree(old, ignore_errors=True)
+        live.rename(old)
+        tmp.rename(live)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        tmp.rename(live)
+    return meta
+
+
+def _fresh_dir(name: str, root: Path) -> Path:
+    tmp = root / f"{name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    return tmp
+
+
+# ── vector tiles ─────────────────────────────────────────────────────────
+
+def _tile_features(frame, bounds: tuple[float, float, float, float], props: list[dict]) -> list[dict]:
+    """The features of ``frame`` (WGS84) inside ``bounds``, clipped, as
+    GeoJSON dicts; polygons come out as a stroke-less fill plus outline."""
+    import shapely
+
+    west, south, east, north = bounds
+    hits = frame.sindex.query(shapely.box(*bounds))
+    features: list[dict] = []
+    for i in sorted(hits):
+        geom = frame.geometry.iloc[i]
+        if geom is None or geom.is_empty:
+            continue
+        if geom.geom_type in ("Point", "MultiPoint"):
+            # Half-open, so a point on a tile edge lands in exactly one tile.
+            pts = [p for p in getattr(geom, "geoms", [geom])
+                   if west <= p.x < east and south < p.y <= north]
+            pieces = [shapely.multipoints(pts) if len(pts) > 1 else pts[0]] if pts else []
+        elif geom.geom_type in ("Polygon", "MultiPolygon"):
+            pieces = [shapely.clip_by_rect(geom, *bounds),
+                      shapely.clip_by_rect(geom.boundary, *bounds)]
+        else:
+            pieces = [shapely.clip_by_rect(geom, *bounds)]
+        for piece in pieces:
+            piece = shapely.set_precision(piece, 10 ** -COORD_DECIMALS)
+            if piece.is_empty:
+                continue
+            features.append({"type": "Feature", "properties": props[i],
+                             "geometry": json.loads(shapely.to_geojson(piece))})
+    return features
+
+
+def _write_vector_tiles(name: str, frame_at, *, source_sha256: str, properties,
+                        zooms: tuple[int, int], root: Path, force: bool,
+                        source: str | None = None) -> dict:
+    params = {"kind": "vector", "version": TILES_VERSION, "zooms": list(zooms),
+              "properties": list(properties)}
+    if not force and _is_fresh(name, source_sha256, params, root):
+        return manifest(name, root=root)  # type: ignore[return-value]
+    t0 = time.perf_counter()
+    tmp = _fresh_dir(name, root)
+    n_tiles = n_bytes = 0
+    extent = None
+    for z in range(zooms[0], zooms[1] + 1):
+        frame = frame_at(z)
+        if frame.crs is not None and frame.crs.to_epsg() != 4326:
+            frame = frame.to_crs("EPSG:4326")
+        frame = frame[frame.geometry.notna() & ~frame.geometry.is_empty].reset_index(drop=True)
+        if frame.empty:
+            continue
+        extent = extent or [float(v) for v in frame.total_bounds]
+        cols = [c for c in properties if c in frame.columns]
+        props = (json.loads(frame[cols].to_json(orient="records", force_ascii=False))
+                 if cols else [{}] * len(frame))
+        x0, y0, x1, y1 = tile_range(tuple(frame.total_bounds), z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                features = _tile_features(frame, tile_bounds(z, x, y), props)
+                if not features:
+                    continue
+                fc = json.dumps({"type": "FeatureCollection", "features": features},
+                                ensure_ascii=False, separators=(",", ":"))
+                out = tmp / str(z) / str(x) / f"{y}.js"
+                out.parent.mkdir(parents=True, exist_ok=True)
+                out.write_text(f'L.GeoJSONTiles.load("{name}/{z}/{x}/{y}",{fc});\n',
+                               encoding="utf-8")
+                n_tiles += 1
+                n_bytes += out.stat().st_size
+    meta = {"name": name, "kind": "vector", "format": "js", "source": source,
+            "source_sha256": source_sha256, "params": params,
+            "minzoom": zooms[0], "maxzoom": zooms[1], "bounds": extent,
+            "tiles": n_tiles, "bytes": n_bytes,
+            "seconds": round(time.perf_counter() - t0, 1)}
+    print(f"  tiles/{name}: {n_tiles:,} vector tiles, {n_bytes / 1e6:.1f} MB "
+          f"(z{zooms[0]}–{zooms[1]}, {meta['seconds']} s)", file=sys.stderr)
+    return _swap_in(name, tmp, meta, root)
+
+
+def build_layer_tiles(name: str, *, zooms: tuple[int, int] = VECTOR_ZOOMS,
+                      root: Path = TILES_DIR, force: bool = False) -> dict:
+    """Cut an LMI base layer (e.g. ``"RoadLines"``) into vector tiles, unless
+    its pyramid was already cut from the current GeoJSON. Returns the
+    manifest. Raises ``CacheMissingError`` like ``base_layer``."""
+    if not base_layer_is_fresh(name):
+        write_base_layer(name)
+    side = json.loads((cache.GEO_DIR / f"{name}.json").read_text(encoding="utf-8"))
+    return _write_vector_tiles(
+        name, lambda z: base_layer(name, "EPSG:4326", tolerance=zoom_tolerance(z)),
+        source_sha256=side["source_sha256"], properties=VECTOR_LAYERS.get(name, ()),
+        zooms=zooms, root=root, force=force, source=side.get("source"))
+
+
+def build_frame_tiles(name: str, frame, *, source_sha256: str, properties=(),
+                      zooms: tuple[int, int] = VECTOR_ZOOMS, root: Path = TILES_DIR,
+                      force: bool = False) -> dict:
+    """Cut an arbitrary GeoDataFrame into vector tiles. ``source_sha256`` is
+    whatever identifies its content (a CSV's digest, a hash of the rows);
+    an unchanged value skips the build. Point layers are not simplified."""
+    simple = frame.geom_type.isin(["Point", "MultiPoint"]).all()
+    return _write_vector_tiles(
+        name, (lambda z: frame) if simple else
+        (lambda z: frame.set_geometry(frame.geometry.simplify(zoom_tolerance(z),
+                                                              preserve_topology=True))),
+        source_sha256=source_sha256, properties=properties, zooms=zooms,
+        root=root, force=force)
+
+
+# ── raster tiles ─────────────────────────────────────────────────────────
+
+def _palette_lut(palette: dict[int, tuple[int, int, int, int]], dtype) -> np.ndarray:
+    """RGBA lookup indexed by pixel value; unlisted values are transparent."""
+    dtype = np.dtype(dtype)
+    if dtype.kind not in "ub" or dtype.itemsize > 2:
+        raise ValueError(f"raster tiles need a uint8/uint16 class raster, not {dtype}")
+    lut = np.zeros((1 << (8 * dtype.itemsize), 4), dtype=np.uint8)
+    for value, rgba in palette.items():
+        lut[int(value)] = rgba
+    return lut
+
+
+def build_raster_tiles(name: str, source, palette: dict[int, tuple[int, int, int, int]], *,
+                       source_sha256: str | None = None, label: str | None = None,
+                       zooms: tuple[int, int] = RASTER_ZOOMS, root: Path = TILES_DIR,
+                       force: bool = False) -> dict:
+    """Cut a class raster into RGBA PNG tiles. ``source`` is a GeoTIFF path or
+    an ``(array, transform, crs)`` triple (e.g. a memory-mapped Tier 5 memo,
+    which then needs ``source_sha256``). Returns the manifest; a no-op while
+    the source digest and parameters match it."""
+    import rasterio
+    from PIL import Image
+    from rasterio.transform import array_bounds, from_bounds
+    from rasterio.warp import Resampling, reproject, transform_bounds
+
+    if isinstance(source, (str, Path)):
+        source = Path(source)
+        source_sha256 = source_sha256 or fingerprint(source)
+        with rasterio.open(source) as src:
+            dtype, crs, nodata = src.dtypes[0], src.crs, src.nodata
+            shape, bounds, res = (src.height, src.width), src.bounds, src.res
+    else:
+        arr, transform, crs = source
+        arr = np.ascontiguousarray(arr)
+        if source_sha256 is None:
+            raise ValueError("an in-memory raster needs source_sha256")
+        dtype, nodata, shape, res = arr.dtype, None, arr.shape, (transform.a, -transform.e)
+        bounds = array_bounds(*shape, transform)
+    params = {"kind": "raster", "version": TILES_VERSION, "zooms": list(zooms),
+              "palette": {str(k): list(v) for k, v in sorted(palette.items())}, "label": label}
+    if not force and _is_fresh(name, source_sha256, params, root):
+        return manifest(name, root=root)  # type: ignore[return-value]
+
+    t0 = time.perf_counter()
+    lut = _palette_lut(palette, dtype)
+    fill = nodata if nodata is not None and int(nodata) not in palette else 0
+    extent = transform_bounds(crs, "EPSG:4326", *bounds, densify_pts=21)
+    mid_lat = math.radians((extent[1] + extent[3]) / 2)
+    tmp = _fresh_dir(name, root)
+    n_tiles = n_bytes = 0
+    for z in range(zooms[0], zooms[1] + 1):
+        # Ground size of a tile pixel → the source grid that still covers it.
+        px_m = 2 * ORIGIN_3857 / (TILE_PX << z) * math.cos(mid_lat)
+        want = (max(1, int(shape[0] * res[1] / px_m)), max(1, int(shape[1] * res[0] / px_m)))
+        if isinstance(source, Path):
+            level = overview_level(source, want)
+            src = (rasterio.open(source) if level is None
+                   else rasterio.open(source, overview_level=level))
+        else:
+            src = None
+        try:
+            x0, y0, x1, y1 = tile_range(extent, z)
+            width = (x1 - x0 + 1) * TILE_PX
+            for y in range(y0, y1 + 1):
+                # One warp per tile row: GDAL's setup cost dominates per tile.
+                left, bottom, _, top = tile_bounds_3857(z, x0, y)
+                right = tile_bounds_3857(z, x1, y)[2]
+                band = np.full((TILE_PX, width), fill, dtype=dtype)
+                kw = dict(destination=band, dst_transform=from_bounds(left, bottom, right, top,
+                                                                      width, TILE_PX),
+                          dst_crs="EPSG:3857", dst_nodata=fill,
+                          resampling=Resampling.nearest)
+                if src is not None:
+                    reproject(source=rasterio.band(src, 1), src_nodata=nodata, **kw)
+                else:
+                    reproject(source=arr, src_transform=transform,
+                              src_crs=crs, **kw)
+                rgba = lut[band]
+                for i, x in enumerate(range(x0, x1 + 1)):
+                    tile = rgba[:, i * TILE_PX:(i + 1) * TILE_PX]
+                    if not tile[..., 3].any():
+                        continue
+                    out = tmp / str(z) / str(x) / f"{y}.png"
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    Image.fromarray(np.ascontiguousarray(tile), "RGBA").save(out)
+                    n_tiles += 1
+                    n_bytes += out.stat().st_size
+        finally:
+            if src is not None:
+                src.close()
+    meta = {"name": name, "kind": "raster", "format": "png", "label": label,
+            "source": _rel(source) if isinstance(source, Path) else None,
+            "source_sha256": source_sha256, "params": params,
+            "minzoom": zooms[0], "maxzoom": zooms[1], "bounds": [float(v) for v in extent],
+            "tiles": n_tiles, "bytes": n_bytes,
+            "seconds": round(time.perf_counter() - t0, 1)}
+    print(f"  tiles/{name}: {n_tiles:,} PNG tiles, {n_bytes / 1e6:.1f} MB "
+          f"(z{zooms[0]}–{zooms[1]}, {meta['seconds']} s)", file=sys.stderr)
+    return _swap_in(name, tmp, meta, root)
+
+
+# ── Leaflet side ─────────────────────────────────────────────────────────
+
+def tiles_url(html_path: Path, *, root: Path = TILES_DIR) -> str:
+    """The tile root relative to where ``html_path`` will be opened from."""
+    return Path(os.path.relpath(root, html_path.resolve().parent)).as_posix()
+
+
+def cut_layers(kind: str | None = None, *, root: Path = TILES_DIR) -> list[dict]:
+    """Manifests of every cut pyramid (``kind``: "vector" / "raster"), by name."""
+    found = [json.loads(p.read_text(encoding="utf-8")) for p in sorted(root.glob("*/tiles.json"))]
+    return [m for m in found if kind is None or m.get("kind") == kind]
+
+
+def layer_options(name: str, html_path: Path, *, root: Path = TILES_DIR) -> dict | None:
+    """What a page needs to show a cut layer — ``url`` (with Leaflet's
+    ``{z}/{x}/{y}`` placeholders), native zoom range, bounds (as Leaflet
+    ``[[s, w], [n, e]]``) and label — or None if it has no pyramid yet."""
+    m = manifest(name, root=root)
+    if m is None or not m.get("tiles"):
+        return None
+    w, s, e, n = m["bounds"]
+    return {"name": name, "label": m.get("label") or name,
+            "url": f"{tiles_url(html_path, root=root)}/{name}/{{z}}/{{x}}/{{y}}.{m['format']}",
+            "minNativeZoom": m["minzoom"], "maxNativeZoom": m["maxzoom"],
+            "bounds": [[s, w], [n, e]]}
+
+
+# A GridLayer whose tiles are empty divs: each tile loads its .js file, which
+# hands its FeatureCollection to ``L.GeoJSONTiles.load``; the features are
+# drawn through an ordinary ``L.geoJSON`` (so styles, popups and tooltips are
+# the page's) and removed again when Leaflet unloads the tile.
+LEAFLET_JS = r"""
+L.GeoJSONTiles = L.GridLayer.extend({
+  initialize: function (opts, geojson) {
+    L.GridLayer.prototype.initialize.call(this, {
+      minNativeZoom: opts.minNativeZoom, maxNativeZoom: opts.maxNativeZoom,
+      bounds: opts.bounds, pane: opts.pane || 'overlayPane'});
+    this._opts = opts;
+    const base = (geojson && geojson.style) || {};
+    this._geojson = Object.assign({}, geojson, {style: f => {
+      const s = Object.assign({}, typeof base === 'function' ? base(f) : base);
+      // Polygon fills are clipped at tile edges; their outlines ship as lines.
+      if (/Polygon/.test(f.geometry.type)) s.stroke = false;
+      else if (/LineString/.test(f.geometry.type)) s.fill = false;
+      return s;
+    }});
+    this._pieces = {};
+    this.on('tileunload', e => this._drop(this._tileCoordsToKey(e.coords)));
+  },
+  onAdd: function (map) {
+    this._group = L.featureGroup().addTo(map);
+    L.GridLayer.prototype.onAdd.call(this, map);
+  },
+  onRemove: function (map) {
+    L.GridLayer.prototype.onRemove.call(this, map);
+    map.removeLayer(this._group);
+    this._pieces = {};
+  },
+  createTile: function (coords, done) {
+    const key = this._tileCoordsToKey(coords);
+    const id = `${this._opts.name}/${coords.z}/${coords.x}/${coords.y}`;
+    const script = document.createElement('script');
+    const finish = fc => {
+      delete L.GeoJSONTiles._pending[id];
+      script.remove();
+      if (fc && this._tiles[key] && this._group) {
+        this._pieces[key] = L.geoJSON(fc, this._geojson).addTo(this._group);
+      }
+      done(null, tile);
+    };
+    const tile = document.createElement('div');
+    L.GeoJSONTiles._pending[id] = finish;
+    script.onerror = () => finish(null);
+    script.src = L.Util.template(this._opts.url, coords);
+    document.head.appendChild(script);
+    return tile;
+  },
+  _drop: function (key) {
+    if (this._pieces[key]) { this._group.removeLayer(this._pieces[key]); delete this._pieces[key]; }
+  },
+});
+L.GeoJSONTiles._pending = {};
+L.GeoJSONTiles.load = (id, fc) => { const cb = L.GeoJSONTiles._pending[id]; if (cb) cb(fc); };
+// PNG pyramids, drawn above the vector fills. Tiles outside the data are
+// simply not on disk.
+L.pngTiles = opts => L.tileLayer(opts.url, {
+  minNativeZoom: opts.minNativeZoom, maxNativeZoom: opts.maxNativeZoom, bounds: opts.bounds,
+  pane: 'rasterTiles',
+  errorTileUrl: 'data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw=='});
+L.Map.addInitHook(function () { this.createPane('rasterTiles').style.zIndex = 450; });
+"""
@@ -0,0 +1,293 @@
+"""Tiled, concurrent, resumable WCS 2.0 GetCoverage fetcher.
+
+Both GeoServer coverages this repo pulls whole-country (NÍ habitat raster in
+``scripts/natt.py``, the Copernicus HRL layers in ``scripts/lmi_hrl.py``) are
+server-bound: one GetCoverage of a 100–250 km box takes tens of seconds to
+minutes, and a country at 20 m is dozens of them. ``fetch_coverage``:
+
+- cuts the destination grid into ``tile_px`` square requests (``grid``);
+- runs them on one ``httpx.AsyncClient`` whose pool is capped at
+  ``concurrency`` connections, retrying transport errors and 5xx with backoff;
+- spools each response to ``<spool_dir>/<key>.tif`` (written to ``.part``,
+  then renamed), keyed by (url, coverage, bbox, resolution, params) — an
+  interrupted run re-requests only the tiles that never landed;
+- stitches finished tiles, in completion order, straight into a tiled LZW
+  GeoTIFF through windowed writes, so the mosaic never exists in RAM. Each
+  tile is placed by its own georeference rather than the requested bbox.
+
+The output is written to ``<out>.tmp`` and renamed on success; the spool is
+removed after a successful run unless ``keep_spool``.
+
+    from utils.wcs import fetch_coverage, grid
+
+    fetch_coverage(WCS, COVERAGE, out, bounds=NATIVE_BOUNDS, res=50.0,
+                   crs="EPSG:3057", params={"scaleFactor": 0.1},
+                   band_fn=lambda b: (b == 95).astype("uint8"))
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import re
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+DEFAULT_CONCURRENCY = 4     # polite for a shared GeoServer; it is the bottleneck
+DEFAULT_RETRIES = 3
+BLOCK_PX = 512              # output GeoTIFF blocks, as in the Tier 3 cache
+
+
+@dataclass(frozen=True)
+class Tile:
+    """One GetCoverage request: its bbox in CRS units and its slot in the grid."""
+
+    index: int
+    bbox: tuple[float, float, float, float]     # x0, y0, x1, y1
+    row: int                                    # top-left pixel in the output grid
+    col: int
+    height: int
+    width: int
+
+
+def grid(bounds: tuple[float, float, float, float], res: float, *,
+         tile_px: int) -> tuple[int, int, object, list[Tile]]:
+    """Output ``(width, height, transform, tiles)`` for ``bounds`` at ``res``
+    (north-up, anchored at the top-left corner), cut row-major into tiles of
+    at most ``tile_px`` pixels a side."""
+    from rasterio import Affine
+
+    xmin, ymin, xmax, ymax = bounds
+    width = math.ceil(round((xmax - xmin) / res, 6))
+    height = math.ceil(round((ymax - ymin) / res, 6))
+    tiles = []
+    for i0 in range(0, height, tile_px):
+        for j0 in range(0, width, tile_px):
+            i1, j1 = min(i0 + tile_px, height), min(j0 + tile_px, width)
+            tiles.append(Tile(len(tiles),
+                              (xmin + j0 * res, ymax - i1 * res, xmin + j1 * res, ymax - i0 * res),
+                              i0, j0, i1 - i0, j1 - j0))
+    return width, height, Affine(res, 0.0, xmin, 0.0, -res, ymax), tiles
+
+
+def spool_key(url: str, coverage: str, bbox, res: float, params: dict) -> str:
+    """Stable name for a tile's spooled response."""
+    blob = json.dumps([url, coverage, [round(v, 6) for v in bbox], res,
+                       sorted((k, str(v)) for k, v in params.items())])
+    return hashlib.sha256(blob.encode()).hexdigest()[:24]
+
+
+def describe_coverage(url: str, coverage: str, *, timeout: float = 60.0) -> dict:
+    """Envelope, grid size, native resolution, CRS and axis labels of a
+    coverage, from one ``DescribeCoverage`` (a few KB)."""
+    import httpx
+
+    r = httpx.get(url, params={"service": "WCS", "version": "2.0.1",
+                               "request": "DescribeCoverage", "coverageId": coverage},
+                  timeout=timeout, follow_redirects=True)
+    r.raise_for_status()
+    return parse_description(r.text)
+
+
+def parse_description(xml: str) -> dict:
+    def one(pattern: str) -> str:
+        m = re.search(pattern, xml, re.S)
+        if m is None:
+            raise RuntimeError(f"DescribeCoverage: no match for {pattern!r}")
+        return m.group(1)
+
+    labels = one(r'<gml:Envelope[^>]*axisLabels="([^"]+)"').split()
+    srs = one(r'<gml:Envelope[^>]*srsName="([^"]+)"')
+    lower = [float(v) for v in one(r"<gml:lowerCorner>([^<]+)<").split()]
+    upper = [float(v) for v in one(r"<gml:upperCorner>([^<]+)<").split()]
+    low = [int(v) for v in one(r"<gml:GridEnvelope>\s*<gml:low>([^<]+)<").split()]
+    high = [int(v) for v in one(r"<gml:GridEnvelope>.*?<gml:high>([^<]+)<").split()]
+    if labels[0].upper() in ("Y", "N", "LAT", "NORTHING"):    # northing-first CRS
+        labels, lower, upper = labels[::-1], lower[::-1], upper[::-1]
+    width, height = high[0] - low[0] + 1, high[1] - low[1] + 1
+    return {
+        "crs": "EPSG:" + srs.rstrip("/").split("/")[-1],
+        "axis_labels": labels,
+        "bounds": (lower[0], lower[1], upper[0], upper[1]),
+        "width": width,
+        "height": height,
+        "res": (upper[0] - lower[0]) / width,
+    }
+
+
+class _Writer:
+    """Windowed GeoTIFF writer, opened on the first tile (whose dtype and
+    nodata it adopts unless given)."""
+
+    def __init__(self, out: Path, width: int, height: int, transform, crs: str,
+                 dtype: str | None, nodata):
+        self.out, self.tmp = out, out.with_suffix(".tmp" + out.suffix)
+        self.shape, self.transform, self.crs = (height, width), transform, crs
+        self.dtype, self.nodata = dtype, nodata
+        self.dst = None
+
+    def place(self, band: np.ndarray, tile_transform, tile_nodata) -> tuple[int, int, int, int]:
+        import rasterio
+        from rasterio.windows import Window
+
+        if self.dst is None:
+            self.out.parent.mkdir(parents=True, exist_ok=True)
+            dtype = self.dtype or str(band.dtype)
+            nodata = self.nodata if self.nodata is not None else tile_nodata
+            self.dst = rasterio.open(
+                self.tmp, "w", driver="GTiff", dtype=dtype, count=1,
+                width=self.shape[1], height=self.shape[0], crs=self.crs,
+                transform=self.transform, nodata=nodata, compress="lzw", predictor=2,
+                tiled=True, blockxsize=BLOCK_PX, blockysize=BLOCK_PX, BIGTIFF="IF_SAFER")
+        res_x, res_y = self.transform.a, -self.transform.e
+        oi = int(round((self.transform.f - tile_transform.f) / res_y))
+        oj = int(round((tile_transform.c - self.transform.c) / res_x))
+        # Clip to the grid: a server may return a pixel more than asked for.
+        i0, j0 = max(oi, 0), max(oj, 0)
+        i1 = min(oi + band.shape[0], self.shape[0])
+        j1 = min(oj + band.shape[1], self.shape[1])
+        if i1 > i0 and j1 > j0:
+            part = band[i0 - oi:i1 - oi, j0 - oj:j1 - oj].astype(self.dst.dtypes[0], copy=False)
+            self.dst.write(part, 1, window=Window(j0, i0, j1 - j0, i1 - i0))
+        return i0, i1, j0, j1
+
+    def commit(self) -> None:
+        self.dst.close()
+        self.tmp.replace(self.out)
+
+    def abort(self) -> None:
+        if self.dst is not None:
+            self.dst.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+async def _fetch_tile(client, url: str, query: list, dest: Path, *, retries: int) -> None:
+    import httpx
+
+    for attempt in range(retries + 1):
+        try:
+            r = await client.get(url, params=query)
+            if r.content[:5] == b"<?xml" and r.status_code < 500:
+                raise RuntimeError(f"WCS returned an exception: {r.text[:300]}")
+            r.raise_for_status()
+            part = dest.with_suffix(".part")
+            part.write_bytes(r.content)
+            part.replace(dest)
+            return
+        except (httpx.TransportError, httpx.HTTPStatusError) as e:
+            transient = (isinstance(e, httpx.TransportError)
+                         or e.response.status_code >= 500)
+            if not transient or attempt == retries:
+                raise
+            wait = 2 ** attempt
+            print(f"    retry {attempt + 1}/{retries} in {wait} s: {type(e).__name__}: {e}",
+                  file=sys.stderr)
+            await asyncio.sleep(wait)
+
+
+async def _run(url: str, coverage: str, tiles: list[Tile], *, res: float, params: dict,
+               axis_labels: tuple[str, str], spool_dir: Path, writer: _Writer,
+               band_fn: Callable | None, concurrency: int, retries: int, timeout: float,
+               transport) -> dict:
+    import httpx
+    import rasterio
+
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    stats = {"tiles": len(tiles), "spooled": 0, "fetched": 0, "bytes": 0}
+    sem = asyncio.Semaphore(concurrency)
+    t0 = time.perf_counter()
+
+    async def one(client, tile: Tile) -> tuple[Tile, Path]:
+        dest = spool_dir / f"{spool_key(url, coverage, tile.bbox, res, params)}.tif"
+        if dest.exists():
+            stats["spooled"] += 1
+            return tile, dest
+        x0, y0, x1, y1 = tile.bbox
+        query = [("service", "WCS"), ("version", "2.0.1"), ("request", "GetCoverage"),
+                 ("coverageId", coverage), ("format", "image/tiff"),
+                 *((k, str(v)) for k, v in params.items()),
+                 # Repeated keys are how WCS 2.0 expresses a 2-D subset.
+                 ("subset", f"{axis_labels[0]}({x0},{x1})"),
+                 ("subset", f"{axis_labels[1]}({y0},{y1})")]
+        async with sem:
+            await _fetch_tile(client, url, query, dest, retries=retries)
+        stats["fetched"] += 1
+        stats["bytes"] += dest.stat().st_size
+        return tile, dest
+
+    def place(tile: Tile, path: Path) -> str:
+        with rasterio.open(path) as src:
+            band, t, nodata = src.read(1), src.transform, src.nodata
+        if band_fn is not None:
+            band = band_fn(band)
+        i0, i1, j0, j1 = writer.place(band, t, nodata)
+        return f"{band.shape[1]}×{band.shape[0]} px  → [{i0}:{i1}, {j0}:{j1}]"
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True,
+                                 transport=transport) as client:
+        pending = [asyncio.ensure_future(one(client, t)) for t in tiles]
+        try:
+            for n, fut in enumerate(asyncio.as_completed(pending), 1):
+                tile, path = await fut
+                # Decode + windowed write off the loop, one at a time.
+                where = await asyncio.to_thread(place, tile, path)
+                print(f"    tile {n}/{len(tiles)}  {where}  "
+                      f"({time.perf_counter() - t0:.0f} s)", file=sys.stderr)
+        finally:
+            for fut in pending:
+                fut.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    return stats
+
+
+def fetch_coverage(url: str, coverage: str, out: Path, *,
+                   bounds: tuple[float, float, float, float], res: float, crs: str,
+                   params: dict | None = None, axis_labels: tuple[str, str] = ("X", "Y"),
+                   tile_px: int = 5000, band_fn: Callable[[np.ndarray], np.ndarray] | None = None,
+                   dtype: str | None = None, nodata=None,
+                   concurrency: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                   timeout: float = 600.0, spool_dir: Path | None = None,
+                   keep_spool: bool = False, transport=None) -> dict:
+    """Mosaic ``coverage`` over ``bounds`` at ``res`` into the GeoTIFF ``out``.
+
+    ``params`` are extra GetCoverage parameters (``scaleFactor``,
+    ``rangeSubset``); they are part of the spool key. ``band_fn`` maps each
+    tile's band 1 before it is written (e.g. to a class mask); ``dtype`` /
+    ``nodata`` default to the first tile's. ``spool_dir`` defaults to
+    ``<out dir>/.spool/<coverage>``. ``transport`` is handed to the httpx
+    client (tests pass a mock). Returns counts: tiles, spooled (reused from
+    an earlier run), fetched, bytes, seconds.
+    """
+    params = dict(params or {})
+    width, height, transform, tiles = grid(bounds, res, tile_px=tile_px)
+    spool_dir = spool_dir or out.parent / ".spool" / coverage
+    writer = _Writer(out, width, height, transform, crs, dtype, nodata)
+    print(f"  destination grid {width:,} × {height:,} px @ {res:g} "
+          f"({len(tiles)} tiles, {concurrency} concurrent)", file=sys.stderr)
+    t0 = time.perf_counter()
+    try:
+        stats = asyncio.run(_run(url, coverage, tiles, res=res, params=params,
+                                 axis_labels=axis_labels, spool_dir=spool_dir, writer=writer,
+                                 band_fn=band_fn, concurrency=concurrency, retries=retries,
+                                 timeout=timeout, transport=transport))
+    except BaseException:
+        writer.abort()
+        done = len(list(spool_dir.glob("*.tif"))) if spool_dir.exists() else 0
+        print(f"  interrupted — {done}/{len(tiles)} tiles spooled in {spool_dir}; "
+              f"rerun to resume", file=sys.stderr)
+        raise
+    writer.commit()
+    if not keep_spool:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    stats["seconds"] = round(time.perf_counter() - t0, 1)
+    print(f"  {stats['fetched']} fetched ({stats['bytes'] / 1e6:.1f} MB), "
+          f"{stats['spooled']} resumed from spool, {stats['seconds']} s", file=sys.stderr)
+    return stats
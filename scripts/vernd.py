@@ -18,6 +18,9 @@ import json
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 if hasattr(sys.stderr, "reconfigure"):
@@ -51,32 +54,25 @@ def cmd_info(args=None):
     print(f"  embed URL   : {embed_url()}")
 
 
-async def _scrape() -> list[dict]:
-    from playwright.async_api import async_playwright
-
+async def _scrape(pool: BrowserPool | None = None) -> list[dict]:
     results: list[dict] = []
     url = embed_url()
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            page = await browser.new_page()
-
-            async def on_response(r):
-                u = r.url.lower()
-                if ("querydata" in u or "executequeries" in u) and r.status == 200:
-                    try:
-                        results.append(await r.json())
-                    except Exception:
-                        pass
-
-            page.on("response", on_response)
-            print(f"  loading {url}", file=sys.stderr)
-            await page.goto(url, wait_until="networkidle", timeout=90000)
-            # Power BI does not reliably fire networkidle; give DAX calls
-            # time to flow after the visuals mount.
-            await asyncio.sleep(15)
-        finally:
-            await browser.close()
+    async with borrow_page(pool) as page:
+
+        async def on_response(r):
+            u = r.url.lower()
+            if ("querydata" in u or "executequeries" in u) and r.status == 200:
+                try:
+                    results.append(await r.json())
+                except Exception:
+                    pass
+
+        page.on("response", on_response)
+        print(f"  loading {url}", file=sys.stderr)
+        await page.goto(url, wait_until="networkidle", timeout=90000)
+        # Power BI does not reliably fire networkidle; give DAX calls
+        # time to flow after the visuals mount.
+        await asyncio.sleep(15)
     return results
 
 
@@ -18,6 +18,9 @@ from pathlib import Path
 
 import httpx
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.browser import BrowserPool, borrow_page  # noqa: E402
+
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 if hasattr(sys.stderr, "reconfigure"):
@@ -58,30 +61,23 @@ def cmd_excel(args=None):
     print(f"  → {out} ({len(r.content):,} bytes)", file=sys.stderr)
 
 
-async def _scrape_powerbi() -> list[dict]:
-    from playwright.async_api import async_playwright
-
+async def _scrape_powerbi(pool: BrowserPool | None = None) -> list[dict]:
     url = _embed_url()
     results: list[dict] = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        try:
-            page = await browser.new_page()
-
-            async def on_response(r):
-                u = r.url.lower()
-                if ("querydata" in u or "executequeries" in u) and r.status == 200:
-                    try:
-                        results.append(await r.json())
-                    except Exception:
-                        pass
-
-            page.on("response", on_response)
-            print(f"Loading {url}", file=sys.stderr)
-            await page.goto(url, wait_until="networkidle", timeout=90000)
-            await asyncio.sleep(15)
-        finally:
-            await browser.close()
+    async with borrow_page(pool) as page:
+
+        async def on_response(r):
+            u = r.url.lower()
+            if ("querydata" in u or "executequeries" in u) and r.status == 200:
+                try:
+                    results.append(await r.json())
+                except Exception:
+                    pass
+
+        page.on("response", on_response)
+        print(f"Loading {url}", file=sys.stderr)
+        await page.goto(url, wait_until="networkidle", timeout=90000)
+        await asyncio.sleep(15)
     return results
 
 
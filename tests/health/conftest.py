@@ -16,12 +16,13 @@ Probes must not write into data/ — they hold responses in memory.
 from __future__ import annotations
 
 import pathlib
-import re
 from datetime import datetime
 
 import httpx
 import pytest
 
+from scripts.powerbi import api_host_from_shell
+
 # Explicit connect + read timeouts. A hung upstream is a failure, not a wait.
 TIMEOUT = httpx.Timeout(connect=10.0, read=20.0, write=10.0, pool=10.0)
 
@@ -64,9 +65,6 @@ def http() -> httpx.Client:
         yield client
 
 
-_FIXED_CLUSTER_RE = re.compile(r'"FixedClusterUri"\s*:\s*"https://([^"/]+)')
-
-
 class PowerBIPublicEmbed:
     """Plain-HTTP client for the *public* ("publish to web") Power BI backend.
 
@@ -99,22 +97,20 @@ class PowerBIPublicEmbed:
     def cluster_api_host(self, view_url: str) -> str:
         """Resolve the tenant's wabi-* APIM host from the embed shell page.
 
-        Mirrors the shell's own ``getAPIMUrl()``: drop ``-redirect``/``global-``
-        from the first label, append ``-api``.
+        Same resolution the scripts' browserless transport uses
+        (``scripts.powerbi.api_host_from_shell``), so a probe failure here
+        means that transport is broken too.
         """
         r = self._http.get(view_url)
         assert r.status_code == 200, f"{view_url} -> {r.status_code}"
 
-        match = _FIXED_CLUSTER_RE.search(r.text)
-        assert match, (
+        host = api_host_from_shell(r.text)
+        assert host, (
             f"{view_url} -> 200 but no FixedClusterUri in the embed shell — "
             f"Power BI changed the publish-to-web bootstrap; re-check how the "
             f"cluster is resolved"
         )
-        host = match.group(1)
-        label, _, domain = host.partition(".")
-        label = label.replace("-redirect", "").replace("global-", "") + "-api"
-        return f"{label}.{domain}"
+        return host
 
     def model(self, view_url: str, report_key: str) -> dict:
         """Return modelsAndExploration for a public embed. Asserts the key lives."""
@@ -2,19 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+import time
 import types
-import xml.etree.ElementTree as ET
 from datetime import date, datetime
 
+import httpx
 import polars as pl
 
 from scripts import althingi
 
 
 class _Response:
+    status_code = 200
+
     def __init__(self, content: bytes):
         self.content = content
+        self.headers = {}
 
     def raise_for_status(self) -> None:
         pass
@@ -78,7 +83,7 @@ def test_list_is_unlimited_unless_limit_is_given(monkeypatch, capsys):
     assert capsys.readouterr().out.count(" -> ") == 3
 
 
-def test_sitting_and_speech_timestamps_are_typed(monkeypatch):
+def test_sitting_and_speech_timestamps_are_typed(tmp_path, monkeypatch):
     documents = {
         "thingfundir/": """
             <þingfundir><þingfundur númer="1">
@@ -100,10 +105,9 @@ def test_sitting_and_speech_timestamps_are_typed(monkeypatch):
         """,
     }
 
-    def fake_get_xml(client, path, params=None, force=False, max_age=None):
-        return ET.fromstring(documents[path])
-
-    monkeypatch.setattr(althingi, "get_xml", fake_get_xml)
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path)
+    for path, doc in documents.items():
+        althingi._cache_path(path, {"lthing": 156}).write_bytes(doc.strip().encode())
 
     sitting = althingi.fetch_sittings(None, [156], False)["sittings"].row(0, named=True)
     speech = althingi.fetch_speeches(None, [156], False)["speeches"].row(0, named=True)
@@ -115,3 +119,244 @@ def test_sitting_and_speech_timestamps_are_typed(monkeypatch):
     assert isinstance(speech["dagur"], date)
     assert isinstance(speech["hofst"], datetime)
     assert isinstance(speech["lauk"], datetime)
+
+
+def test_iter_xml_streams_top_level_entries_into_row_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path)
+    althingi._cache_path("raedulisti/", {"lthing": 156}).write_bytes(
+        "<ræðulisti><ræða n='1'><ræða n='nested'/></ræða><athugasemd/>"
+        "<ræða n='2'/><ræða n='3'><mál>x</mál></ræða></ræðulisti>".encode())
+
+    seen, rows = [], althingi.RowBatches(batch_rows=2)
+    for node in althingi.iter_xml(None, "raedulisti/", {"lthing": 156}, tag="ræða"):
+        seen.append(node.attrib["n"])
+        rows.append({"n": int(node.attrib["n"]), "mal": althingi.text(node, "mál")})
+    assert seen == ["1", "2", "3"]
+
+    # The first batch's "mal" column is all null; the frames still concatenate.
+    assert len(rows.frames) == 1 and len(rows) == 3
+    df = rows.frame()
+    assert df.schema == {"n": pl.Int64, "mal": pl.String}
+    assert df.rows() == [(1, None), (2, None), (3, "x")]
+    assert althingi.RowBatches().frame().is_empty()
+
+
+def test_fetchers_read_an_explicit_raw_dir_without_touching_raw_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path / "unused")
+    raw = althingi._bench_cache(events=8, mps=3)
+    try:
+        dfs = althingi.fetch_votes(None, [althingi.BENCH_THING], force=False, raw_dir=raw)
+    finally:
+        althingi._bench_cleanup(raw)
+    assert len(dfs["votes"]) == 8 and len(dfs["ballots"]) == 6 * 3
+    assert althingi.RAW_DIR == tmp_path / "unused" and not althingi.RAW_DIR.exists()
+
+
+def _server(requests: list[str]):
+    """MockTransport Alþingi: two parliaments, three votes each (two with a
+    roll call), an MP roster where MP 1 sits in both."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/altext/xml/")
+        q = dict(request.url.params)
+        requests.append(f"{path}?{'&'.join(f'{k}={v}' for k, v in q.items())}")
+        if path == "atkvaedagreidslur/":
+            t = q["lthing"]
+            body = "".join(
+                f'<atkvæðagreiðsla atkvæðagreiðslunúmer="{t}{n}" þingnúmer="{t}" málsnúmer="1">'
+                "<tími>2025-02-18T13:31:07</tími>"
+                + ("<nánar><xml>x</xml></nánar>" if n < 3 else "") + "</atkvæðagreiðsla>"
+                for n in range(1, 4))
+            return httpx.Response(200, content=f"<atkvæðagreiðslur>{body}</atkvæðagreiðslur>".encode())
+        if path == "atkvaedagreidslur/atkvaedagreidsla/":
+            return httpx.Response(200, content=(
+                f'<atkvæðagreiðsla þingnúmer="{q["numer"][:3]}"><atkvæðaskrá>'
+                '<þingmaður id="1"><nafn>A</nafn><atkvæði>já</atkvæði></þingmaður>'
+                "</atkvæðaskrá></atkvæðagreiðsla>").encode())
+        if path == "thingmenn/":
+            ids = ["1", q["lthing"]]
+            body = "".join(f'<þingmaður id="{i}"><nafn>MP {i}</nafn></þingmaður>' for i in ids)
+            return httpx.Response(200, content=f"<þingmannalisti>{body}</þingmannalisti>".encode())
+        if path == "thingmenn/thingmadur/thingseta/":
+            return httpx.Response(200, content="<þingmaður/>".encode())
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def test_crawl_fetches_lists_first_then_details_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path)
+    requests: list[str] = []
+    crawler = althingi.crawl(["votes", "members"], [155, 156], rate=1000, concurrency=3,
+                             transport=_server(requests))
+    lists = [i for i, r in enumerate(requests) if r.startswith(("atkvaedagreidslur/?", "thingmenn/?"))]
+    assert lists == [0, 1, 2, 3]                          # every list before any detail
+    assert sorted(r for r in requests if "numer=" in r) == [
+        "atkvaedagreidslur/atkvaedagreidsla/?numer=1551",
+        "atkvaedagreidslur/atkvaedagreidsla/?numer=1552",
+        "atkvaedagreidslur/atkvaedagreidsla/?numer=1561",
+        "atkvaedagreidslur/atkvaedagreidsla/?numer=1562"]
+    # MP 1 sits in both parliaments: one thingseta request, not two.
+    assert sorted(r for r in requests if "nr=" in r) == [
+        f"thingmenn/thingmadur/thingseta/?nr={n}" for n in ("1", "155", "156")]
+    assert crawler.stats["fetched"] == len(requests) == 11 and not crawler.errors
+
+    # The fetchers now parse from the warmed cache — a client is never needed.
+    votes = althingi.fetch_votes(None, [155, 156], force=False)
+    assert len(votes["votes"]) == 6 and len(votes["ballots"]) == 4
+
+    # A second crawl of closed parliaments costs no requests.
+    again = althingi.crawl(["votes"], [155, 156], rate=1000, transport=_server(requests))
+    assert again.stats == {"fetched": 0, "cached": 6, "revalidated": 0, "bytes": 0}
+
+
+def test_stale_cache_is_revalidated_and_closed_votes_never_are(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path)
+    monkeypatch.setattr(althingi, "REQUEST_DELAY", 0)
+    seen: list[tuple[str, str | None]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/altext/xml/")
+        seen.append((path, request.headers.get("if-none-match")))
+        if path == "atkvaedagreidslur/":
+            body = ('<atkvæðagreiðslur>'
+                    '<atkvæðagreiðsla atkvæðagreiðslunúmer="1" þingnúmer="157" málsnúmer="1">'
+                    '<tími>2025-02-18T13:31:07</tími><samantekt><afgreiðsla>samþykkt</afgreiðsla></samantekt>'
+                    '<nánar><xml>x</xml></nánar></atkvæðagreiðsla>'
+                    '<atkvæðagreiðsla atkvæðagreiðslunúmer="2" þingnúmer="157" málsnúmer="1">'
+                    '<tími>2025-02-18T13:40:12</tími><nánar><xml>x</xml></nánar></atkvæðagreiðsla></atkvæðagreiðslur>')
+        else:
+            body = '<atkvæðagreiðsla þingnúmer="157"><atkvæðaskrá/></atkvæðagreiðsla>'
+        etag = f'"{path}{request.url.params.get("numer", "")}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, content=body.encode(), headers={"ETag": etag})
+
+    def run() -> althingi.Crawler:
+        return althingi.crawl(["votes"], [157], live_thing=157, rate=1000,
+                              transport=httpx.MockTransport(handler))
+
+    assert run().stats["fetched"] == 3 and all(etag is None for _, etag in seen)
+    meta = althingi._read_meta(althingi._cache_path("atkvaedagreidslur/atkvaedagreidsla/",
+                                                    {"numer": "1"}))
+    assert meta["immutable"] is True and meta["etag"]
+
+    # A day later every live document is stale. The list and the open vote
+    # come back 304; the closed vote is not asked about at all.
+    for cache in tmp_path.glob("*.xml"):
+        os.utime(cache, (0, 0))
+    seen.clear()
+    st = run().stats
+    assert st == {"fetched": 0, "cached": 1, "revalidated": 2, "bytes": 0}
+    assert sorted(path for path, etag in seen if etag) == [
+        "atkvaedagreidslur/", "atkvaedagreidslur/atkvaedagreidsla/"]
+    cache = althingi._cache_path("atkvaedagreidslur/", {"lthing": 157})
+    assert time.time() - cache.stat().st_mtime < 60          # the clock restarted
+
+    # The sequential path revalidates the same way.
+    os.utime(cache, (0, 0))
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        votes = althingi.fetch_votes(client, [157], force=False, live_thing=157)
+    assert len(votes["votes"]) == 2 and seen[-1] == ("atkvaedagreidslur/", '"atkvaedagreidslur/"')
+
+
+def test_crawl_collects_failures_instead_of_raising(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path)
+    crawler = althingi.crawl(["bills"], [156], rate=1000, transport=_server([]))
+    assert [(p, q) for p, q, _ in crawler.errors] == [("thingmalalisti/", {"lthing": 156})]
+
+
+def test_a_raising_then_is_recorded_and_forced_again_after_the_crawl(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path)
+    monkeypatch.setattr(althingi, "REQUEST_DELAY", 0)
+    seen: list[str] = []
+    broken = {"155"}      # þing 155's roster comes back without ids, once
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/altext/xml/")
+        seen.append(f"{path}?{request.url.query.decode()}")
+        if path == "thingmenn/thingmadur/thingseta/":
+            return httpx.Response(200, content="<þingmaður/>".encode())
+        mp = ("<þingmaður><nafn>A</nafn></þingmaður>" if request.url.params["lthing"] in broken
+              else '<þingmaður id="1"><nafn>A</nafn></þingmaður>')
+        return httpx.Response(200, content=f"<þingmannalisti>{mp}</þingmannalisti>".encode())
+
+    crawler = althingi.crawl(["members"], [155, 156], force=True, rate=1000,
+                             transport=httpx.MockTransport(handler))
+    assert [(p, q, type(e)) for p, q, e in crawler.errors] == [
+        ("thingmenn/", {"lthing": 155}, KeyError)]
+    assert althingi._cache_path("thingmenn/", {"lthing": 156}) in crawler.done
+
+    # The sequential pass refetches only what the crawl did not handle.
+    broken.clear()
+    seen.clear()
+    with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+        althingi.fetch_members(client, [155, 156], force=althingi.Refetched(crawler.done))
+    assert seen == ["thingmenn/?lthing=155"]
+
+
+def test_token_bucket_keeps_the_average_rate():
+    async def run():
+        bucket = althingi.TokenBucket(rate=100, burst=2)
+        t0 = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(12)))
+        return time.monotonic() - t0
+
+    elapsed = asyncio.run(run())
+    # 2 from the burst, the other 10 at 100/s.
+    assert 0.09 <= elapsed < 0.5
+
+
+def test_upsert_rewrites_only_the_partitions_it_touches(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "PROCESSED_DIR", tmp_path)
+    pl.DataFrame({"atkvgr_nr": [1, 2, 3], "thing": [155, 156, 156], "thingmadur_id": [7, 8, 9],
+                  "nafn": ["A", "B", "C"], "atkvaedi": ["já", "nei", "já"]}
+                 ).write_parquet(tmp_path / "althingi_ballots.parquet")
+    althingi._migrate_legacy("ballots")
+    assert not (tmp_path / "althingi_ballots.parquet").exists()
+    p155 = tmp_path / "althingi_ballots" / "thing=155" / "part.parquet"
+    before = p155.stat().st_mtime_ns
+
+    # A re-fetch of þing 156 changes one ballot and adds another; a new
+    # þing 157 arrives with an all-null column.
+    written = althingi.upsert("ballots", pl.DataFrame(
+        {"atkvgr_nr": [3, 4], "thing": [156, 156], "thingmadur_id": [9, 8],
+         "nafn": ["C", "B"], "atkvaedi": ["nei", "já"]}))
+    written += althingi.upsert("ballots", pl.DataFrame(
+        {"atkvgr_nr": [5], "thing": [157], "thingmadur_id": [None],
+         "nafn": ["E"], "atkvaedi": ["já"]}))
+    assert [p.parent.name for p in written] == ["thing=156", "thing=157"]
+    assert p155.stat().st_mtime_ns == before
+
+    lf = althingi.scan("ballots").filter(pl.col("thing") == 156)
+    assert "thing=155" not in lf.explain()                  # pruned, never opened
+    got = lf.select("atkvgr_nr", "atkvaedi").collect()
+    assert got.rows() == [(2, "nei"), (3, "nei"), (4, "já")]
+    assert althingi.scan("ballots").select(pl.len()).collect().item() == 5
+
+
+def test_partitions_share_one_schema_whatever_is_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "PROCESSED_DIR", tmp_path)
+    # þing 150 has no outcome text at all, þing 151 has one; the other
+    # schema columns are absent from both and arrive as typed nulls.
+    althingi.upsert("votes", pl.DataFrame({"atkvgr_nr": [1], "thing": [150],
+                                           "afgreidsla": [None]}))
+    althingi.upsert("votes", pl.DataFrame({"atkvgr_nr": [2], "thing": [151],
+                                           "afgreidsla": ["samþykkt"]}))
+
+    df = althingi.scan("votes").collect()
+    assert dict(df.schema) == althingi.SCHEMAS["votes"]
+    assert df.sort("atkvgr_nr")["afgreidsla"].to_list() == [None, "samþykkt"]
+    assert althingi.scan("votes").filter(pl.col("thing") == 151).collect()["atkvgr_nr"].to_list() == [2]
+
+
+def test_upsert_keeps_null_key_rows_and_a_refetch_is_stable(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "PROCESSED_DIR", tmp_path)
+    # Two distinct speeches by one MP with no start time share a null key.
+    speeches = pl.DataFrame({"thing": [156, 156, 156], "thingmadur_id": [7, 7, 7],
+                             "hofst": [None, None, datetime(2024, 3, 1, 14)],
+                             "fundarheiti": ["a", "b", "c"]})
+    for _ in range(3):
+        althingi.upsert("speeches", speeches)
+        got = althingi.scan("speeches").collect()
+        assert sorted(got["fundarheiti"].to_list()) == ["a", "b", "c"]
@@ -0,0 +1,75 @@
+"""Offline tests for the Alþingi ballot matrix (scripts/althingi_matrix.py)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import numpy as np
+import polars as pl
+
+from scripts import althingi_matrix as am
+
+
+def _parliament() -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+    """Four votes in þing 156. MPs 1-3 sit for party A, MPs 4-5 for B, and
+    MP 3 crosses to B before the last vote."""
+    votes = pl.DataFrame({
+        "atkvgr_nr": [10, 11, 12, 13, 14],
+        "thing": [156] * 5,
+        "timi": [datetime(2025, 2, d, 14) for d in (4, 5, 6, 20, 21)],
+    })
+    ballot_rows = {
+        10: ["já", "já", "já", "nei", "nei"],
+        11: ["já", "já", "nei", "nei", "nei"],           # MP 3 breaks with A
+        12: ["já", "fjarverandi", "boðaði fjarvist", "já", "greiðir ekki atkvæði"],
+        13: ["nei", "nei", "já", "já", "já"],            # MP 3 now votes with B
+    }                                                    # vote 14: a show of hands
+    ballots = pl.DataFrame(
+        [{"atkvgr_nr": v, "thingmadur_id": mp, "nafn": f"MP {mp}", "atkvaedi": a}
+         for v, row in ballot_rows.items() for mp, a in enumerate(row, 1)])
+    members = pl.DataFrame({
+        "thingmadur_id": [1, 2, 3, 3, 4, 5],
+        "thing": [156] * 6,
+        "thingflokkur_id": [1, 1, 1, 2, 2, 2],
+        "thingflokkur": ["A", "A", "A", "B", "B", "B"],
+        "inn": [date(2024, 12, 1)] * 3 + [date(2025, 2, 15)] + [date(2024, 12, 1)] * 2,
+        "ut": [None, None, date(2025, 2, 14), None, None, None],
+    })
+    return ballots, votes, members
+
+
+def test_build_scatters_codes_and_the_party_at_the_time(tmp_path):
+    m = am.build(*_parliament())
+    assert m.ballots.dtype == np.int8 and m.ballots.shape == (4, 5)
+    assert m.votes["atkvgr_nr"].to_list() == [10, 11, 12, 13]
+    assert m.ballots[2].tolist() == [am.JA, am.FJARVERANDI, am.BODADI_FJARVIST,
+                                     am.JA, am.GREIDIR_EKKI]
+    a, b = m.parties["thingflokkur"].to_list().index("A"), m.parties["thingflokkur"].to_list().index("B")
+    assert m.party[:, 2].tolist() == [a, a, a, b]
+
+    m.save(tmp_path)
+    loaded = am.BallotMatrix.load(tmp_path)
+    assert isinstance(loaded.ballots, np.memmap)
+    assert np.array_equal(loaded.ballots, m.ballots) and np.array_equal(loaded.party, m.party)
+
+
+def test_cohesion_agreement_and_rebels():
+    m = am.build(*_parliament())
+    rows = m.rows([156])
+
+    coh = {r["thingflokkur"]: r for r in am.cohesion(m, rows).iter_rows(named=True)}
+    # A on vote 11: 2 já, 1 nei -> (2 - 1/2) / 3.
+    assert coh["A"]["votes"] == 4
+    assert abs(coh["A"]["agreement_index"] - round((1 + 0.5 + 1 + 1) / 4, 4)) < 1e-4
+    assert coh["B"]["rice"] == 1.0
+
+    same, shared = am.agreement(m, rows)
+    assert np.array_equal(same, same.T)
+    assert (shared[0, 1], same[0, 1]) == (3, 3)           # MP 2 was absent once
+    assert (shared[0, 2], same[0, 2]) == (3, 1)
+    ranked = am.agreement_with(m, rows, 1, min_shared=1)
+    assert ranked["thingmadur_id"].to_list()[0] == 2
+
+    rebels = am.rebels(m, rows)
+    assert rebels.select("atkvgr_nr", "thingmadur_id", "thingflokkur", "atkvaedi",
+                         "flokkslina").rows() == [(11, 3, "A", "nei", "já")]
@@ -0,0 +1,68 @@
+"""Offline tests for the benchmark registry (scripts/utils/bench.py) and the
+``micro`` command of scripts/bench_maps.py."""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import pytest
+
+from scripts import bench_maps
+from scripts.utils import bench
+
+
+def test_measure_reports_median_iqr_and_stages():
+    calls = []
+
+    def fn(stage, fixture):
+        calls.append(fixture)
+        with stage("a"):
+            time.sleep(0.002)
+        with stage("b"):
+            pass
+        with stage("a"):
+            print("swallowed")
+
+    b = bench.Bench("toy", fn, setup=lambda: "fx", teardown=calls.append, module="t", help="")
+    r = bench.measure(b, repeat=5, warmup=2)
+    assert calls == ["fx"] * 7 + ["fx"]                  # teardown gets the fixture once
+    assert r["runs"] == 5 and r["name"] == "toy"
+    assert r["min_s"] <= r["median_s"] and r["iqr_s"] >= 0
+    assert set(r["stages"]) == {"a", "b"} and r["stages"]["a"]["median_s"] >= 0.002
+    assert bench.summary([1.0, 2.0, 3.0, 4.0, 100.0]) == {"median_s": 3.0, "iqr_s": 2.0, "min_s": 1.0}
+
+
+def test_regressions_compare_medians_against_the_baseline():
+    results = [{"name": "a", "median_s": 1.3}, {"name": "b", "median_s": 1.0},
+               {"name": "new", "median_s": 9.0}]
+    bad = bench.regressions(results, {"a": 1.0, "b": 1.0}, 20)
+    assert bad == [{"name": "a", "baseline_s": 1.0, "median_s": 1.3, "delta_pct": 30.0}]
+    assert bench.regressions(results, {"a": 1.0}, 50) == []
+
+
+def test_every_registered_bench_runs_offline():
+    benches, failed = bench_maps.load_benches()
+    assert not failed
+    assert {"dsr_decode", "json_stat", "althingi_votes", "umferd_collect",
+            "skodanakannanir_prose"} <= set(benches)
+    for b in benches.values():
+        r = bench_maps.measure(b, repeat=1, warmup=0)
+        assert r["median_s"] > 0 and r["stages"], b.name
+
+
+def test_micro_fail_over_gates_and_flags_the_regressed_run(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "benchmarks.json"
+    monkeypatch.setattr(bench_maps, "BENCHMARKS_PATH", path)
+    path.write_text(json.dumps([{"mode": "micro", "built_at": "x", "results": [
+        {"name": "json_stat", "median_s": 1e-6, "iqr_s": 0, "stages": {}}]}]))
+    args = argparse.Namespace(only="json_stat", repeat=1, fail_over=50.0)
+    with pytest.raises(SystemExit) as e:
+        bench_maps.cmd_micro(args)
+    assert e.value.code == 1
+    assert "REGRESSION  json_stat" in capsys.readouterr().err
+
+    history = json.loads(path.read_text())
+    assert history[-1]["results"][0]["regressed"] is True
+    # The regressed run is recorded but the old median stays the baseline.
+    assert bench_maps._last_micro_baseline(history, "json_stat") == 1e-6
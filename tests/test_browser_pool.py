@@ -0,0 +1,191 @@
+"""Offline tests for scripts/utils/browser.py — the shared Chromium pool.
+
+No browser is launched: a fake browser/context/page stands in, exercising
+the pool's own bookkeeping (context slots, page recycling, listener cleanup,
+request blocking).
+"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from scripts.utils import browser as bp
+
+
+class _FakePage:
+    def __init__(self):
+        self.listeners: list = []
+        self.closed = False
+        self.url = "about:blank"
+
+    def on(self, event, handler):
+        self.listeners.append((event, handler))
+
+    def once(self, event, handler):
+        self.listeners.append((event, handler))
+
+    def remove_listener(self, event, handler):
+        self.listeners.remove((event, handler))
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def goto(self, url, **_):
+        self.url = url
+
+    async def set_viewport_size(self, viewport):
+        self.viewport = viewport
+
+    async def unroute_all(self):
+        pass
+
+
+class _FakeContext:
+    def __init__(self, options):
+        self.options = options
+        self.pages: list = []
+        self.cleared = 0
+
+    async def route(self, pattern, handler):
+        self.route_handler = handler
+
+    async def new_page(self):
+        self.pages.append(_FakePage())
+        return self.pages[-1]
+
+    async def clear_cookies(self):
+        self.cleared += 1
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.contexts: list = []
+
+    async def new_context(self, **options):
+        self.contexts.append(_FakeContext(options))
+        return self.contexts[-1]
+
+
+async def _fake_pool(contexts=2, **kw):
+    pool = bp.BrowserPool(contexts, **kw)
+    pool._browser = _FakeBrowser()
+    pool._slots = asyncio.Queue()
+    for _ in range(contexts):
+        pool._slots.put_nowait(bp._Slot(await pool._new_context()))
+    return pool
+
+
+def test_blocked_types_and_hosts():
+    assert bp.blocked("https://example.is/logo.png", "image")
+    assert bp.blocked("https://example.is/x.woff2", "font")
+    assert bp.blocked("https://www.google-analytics.com/g/collect", "xhr")
+    assert bp.blocked("https://browser.events.data.microsoft.com/OneCollector", "fetch")
+    assert not bp.blocked("https://wabi-north-europe-api.analysis.windows.net/public/reports/querydata", "fetch")
+    assert not bp.blocked("https://notgoogle-analytics.com/", "script")
+
+
+def test_pages_are_recycled_and_cleaned_between_borrows():
+    async def run():
+        pool = await _fake_pool(1, recycle_after=2)
+        seen = []
+        for _ in range(3):
+            async with pool.page(viewport={"width": 800, "height": 600}) as page:
+                page.on("response", lambda r: None)
+                page.once("load", lambda p: None)
+                seen.append(page._page)
+                assert page.viewport == {"width": 800, "height": 600}
+        return pool, seen
+
+    pool, seen = asyncio.run(run())
+    first, second, third = seen
+    assert first is second and third is not first      # reused once, replaced after 2 uses
+    assert first.closed and not first.listeners          # borrower listeners detached
+    assert not third.listeners and third.url == "about:blank"
+    assert "on" not in vars(third)                       # the page itself is never patched
+    assert pool.stats == {"launches": 0, "pages": 2, "reused": 1, "blocked": 0}
+    assert "user_agent" not in pool._browser.contexts[0].options
+
+
+def test_user_agent_override_is_opt_in_per_pool():
+    async def run():
+        return await _fake_pool(1, user_agent=bp.USER_AGENT)
+
+    pool = asyncio.run(run())
+    assert pool._browser.contexts[0].options["user_agent"] == bp.USER_AGENT
+
+
+def test_listeners_the_borrower_removed_or_that_fired_are_not_detached_twice():
+    async def run():
+        pool = await _fake_pool(1)
+        handler = lambda r: None   # noqa: E731
+        async with pool.page() as page:
+            page.on("response", handler)
+            page.remove_listener("response", handler)
+            page.once("load", handler)
+            page._page.listeners.remove(("load", handler))   # Playwright drops a fired ``once``
+            raw = page._page
+        return raw
+
+    raw = asyncio.run(run())
+    assert raw.listeners == [] and not raw.closed
+
+
+def test_a_failed_borrow_drops_its_page():
+    async def run():
+        pool = await _fake_pool(1)
+        with pytest.raises(RuntimeError):
+            async with pool.page() as page:
+                raise RuntimeError("boom")
+        async with pool.page() as again:
+            pass
+        return page, again
+
+    page, again = asyncio.run(run())
+    assert page.closed and again is not page
+
+
+def test_contexts_bound_concurrency():
+    async def run():
+        pool = await _fake_pool(2)
+        active = peak = 0
+
+        async def job():
+            nonlocal active, peak
+            async with pool.page():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(job() for _ in range(6)))
+        return peak, pool
+
+    peak, pool = asyncio.run(run())
+    assert peak == 2 and len(pool._browser.contexts) == 2
+
+
+def test_route_aborts_blocked_requests():
+    class Route:
+        def __init__(self, url, kind):
+            self.request = type("R", (), {"url": url, "resource_type": kind})()
+            self.outcome = None
+
+        async def abort(self):
+            self.outcome = "abort"
+
+        async def continue_(self):
+            self.outcome = "continue"
+
+    async def run():
+        pool = await _fake_pool(1)
+        img, xhr = Route("https://x.is/a.jpg", "image"), Route("https://x.is/api", "xhr")
+        await pool._route(img)
+        await pool._route(xhr)
+        return pool, img, xhr
+
+    pool, img, xhr = asyncio.run(run())
+    assert (img.outcome, xhr.outcome, pool.stats["blocked"]) == ("abort", "continue", 1)
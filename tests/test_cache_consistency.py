@@ -96,3 +96,232 @@ def test_compressed_raster_matches_source():
         f_dst = dst_hist[v] / dst_arr.size
         assert abs(f_src - f_dst) < 0.05, (
             f"value {v}: src fraction {f_src:.4f} vs dst {f_dst:.4f}")
+
+
+# ── Tier 5 array memos (offline — synthetic data in tmp_path) ─────────────
+
+def test_cached_array_roundtrip_is_mmapped_and_lut_coded(tmp_path, monkeypatch):
+    from scripts.utils import cache
+
+    monkeypatch.setattr(cache, "ARRAYS_DIR", tmp_path)
+    source = tmp_path / "src.tif"
+    source.write_bytes(b"gravpi v1")
+    prob = np.array([[5.5, np.nan, 95.5], [45.5, 45.5, np.nan]], dtype=np.float32)
+    codes, lut = cache.lut_encode(prob, [5.5, 45.5, 95.5])
+    assert codes.dtype == np.uint8 and codes.nbytes * 4 == prob.nbytes
+    cache.write_array("prob", codes, source=source, extent=(0, 3, 0, 2), lut=lut)
+
+    arr, meta = cache.cached_array("prob", source=source)
+    assert isinstance(arr, np.memmap) and not arr.flags.writeable
+    assert meta["dtype"] == "uint8" and meta["shape"] == [2, 3] and meta["extent"] == [0, 3, 0, 2]
+    np.testing.assert_array_equal(np.asarray(meta["lut"], dtype=np.float32)[arr], prob)
+
+    source.write_bytes(b"gravpi v2")
+    with pytest.raises(cache.CacheMissingError, match="stale"):
+        cache.cached_array("prob", source=source)
+    with pytest.raises(cache.CacheMissingError, match="Missing"):
+        cache.cached_array("absent")
+
+
+def test_fingerprint_index_memoizes_by_stat_and_rehashes_on_change(tmp_path, monkeypatch):
+    import os
+
+    from scripts.utils import cache
+
+    monkeypatch.setattr(cache, "FINGERPRINTS_PATH", tmp_path / "fingerprints.json")
+    monkeypatch.setattr(cache, "_index", None)
+    calls = []
+    real = cache.sha256_file
+    monkeypatch.setattr(cache, "sha256_file", lambda p: calls.append(p) or real(p))
+
+    src = tmp_path / "grassland.tif"
+    src.write_bytes(b"\x00" * 4096)
+    os.utime(src, ns=(1_000_000_000, 1_000_000_000))   # well outside the racy window
+    assert cache.known_fingerprint(src) is None
+    first = cache.fingerprint(src)
+    assert cache.known_fingerprint(src) == first
+    assert first == real(src) and cache.fingerprint(src) == first and len(calls) == 1
+
+    monkeypatch.setattr(cache, "_index", None)          # a fresh run reads the index back
+    assert cache.fingerprint(src) == first and len(calls) == 1
+
+    src.write_bytes(b"\x01" * 4096)                      # same size, new mtime
+    os.utime(src, ns=(2_000_000_000, 2_000_000_000))
+    assert cache.known_fingerprint(src) is None and len(calls) == 1
+    assert cache.fingerprint(src) == real(src) != first and len(calls) == 2
+
+
+def test_partial_fingerprint_samples_head_and_tail(tmp_path):
+    from scripts.utils import cache
+
+    src = tmp_path / "big.tif"
+    src.write_bytes(bytes(range(256)) * 4)
+    base = cache.partial_sha256(src, samples=4, chunk=8)
+    assert base.startswith("partial:") and base[8:] != cache.sha256_file(src)
+    data = bytearray(src.read_bytes())
+    data[-1] ^= 0xFF
+    src.write_bytes(bytes(data))
+    assert cache.partial_sha256(src, samples=4, chunk=8) != base
+
+
+def test_block_engine_matches_whole_raster_reproject(tmp_path, monkeypatch):
+    """One block-parallel pass (read → histogram + banded reproject) must
+    produce the raster a single whole-raster ``reproject`` does."""
+    from rasterio.enums import Resampling
+    from affine import Affine
+    from rasterio.warp import calculate_default_transform, reproject
+
+    from scripts import build_cache
+    from scripts.utils.cache import sha256_file
+
+    monkeypatch.setattr(build_cache, "fingerprint", sha256_file)
+    rng = np.random.default_rng(11)
+    data = rng.integers(0, 4, size=(1, 1300, 1100), dtype=np.uint8)
+    data[0, :40] = 255                                     # a nodata strip
+    src = tmp_path / "hrl.tif"
+    profile = {"driver": "GTiff", "dtype": "uint8", "count": 1, "height": 1300, "width": 1100,
+               "crs": "EPSG:3035", "transform": Affine(100, 0, 2_900_000, 0, -100, 4_900_000),
+               "nodata": 255, "tiled": True, "blockxsize": 256, "blockysize": 256}
+    with rasterio.open(src, "w", **profile) as d:
+        d.write(data)
+
+    out = tmp_path / "out.tif"
+    scan = build_cache._scan_source(src, workers=3, histogram=True,
+                                    dst_path=out, dst_crs="EPSG:3057")
+    values, counts = np.unique(data, return_counts=True)
+    assert scan["histogram"] == dict(zip(values.tolist(), counts.tolist()))
+    assert scan["sha256"] == sha256_file(src)
+    assert {"read", "histogram", "reproject", "write", "hash"} <= set(scan["timings"].seconds)
+
+    with rasterio.open(src) as s:
+        t, w, h = calculate_default_transform(s.crs, "EPSG:3057", s.width, s.height, *s.bounds)
+        expected = np.full((h, w), 255, dtype=np.uint8)
+        reproject(rasterio.band(s, 1), expected, dst_transform=t, dst_crs="EPSG:3057",
+                  dst_nodata=255, resampling=Resampling.nearest)
+    with rasterio.open(out) as o:
+        assert (o.height, o.width, o.transform) == (h, w, t)
+        got = o.read(1)
+    # GDAL's approximate transformer (0.125 px error) interpolates per warp
+    # chunk, so even one whole-raster call moves a few nearest-neighbour picks
+    # when its chunking changes (try warp_mem_limit=1). Same bar here.
+    assert (got != expected).mean() < 1e-3
+    assert abs(int((got == 255).sum()) - int((expected == 255).sum())) < 1e-3 * got.size
+
+
+def test_overviews_pick_the_coarsest_level_covering_the_output(tmp_path):
+    from affine import Affine
+
+    from scripts import build_cache
+    from scripts.utils.cache import overview_level
+
+    data = np.zeros((1, 2100, 2100), dtype=np.uint8)
+    data[0, 1000:1300, 700:900] = 1
+    tif = tmp_path / "grassland_isn93.tif"
+    with rasterio.open(tif, "w", driver="GTiff", dtype="uint8", count=1, height=2100, width=2100,
+                       crs="EPSG:3057", transform=Affine(20, 0, 240_000, 0, -20, 700_000),
+                       tiled=True, blockxsize=512, blockysize=512) as d:
+        d.write(data)
+
+    fields = build_cache._build_overviews(tif, {"overview_resampling": "mode"},
+                                          workers=1, timings=build_cache._Timings())
+    assert fields == {"overviews": [2, 4], "overview_resampling": "mode"}
+    assert overview_level(tif, (1000, 1000)) == 0          # 1050 px still covers it
+    assert overview_level(tif, (500, 520)) == 1
+    assert overview_level(tif, (1200, 600)) is None        # only full resolution will do
+    with rasterio.open(tif) as full, rasterio.open(tif, overview_level=1) as lvl:
+        assert lvl.shape == (525, 525) and tuple(lvl.bounds) == pytest.approx(tuple(full.bounds))
+        assert lvl.read(1)[250:325, 175:225].all() and lvl.read(1).sum() == 75 * 50
+
+
+def test_cache_graph_rebuilds_only_dirty_nodes_in_order(tmp_path, monkeypatch):
+    import threading
+
+    from scripts import build_cache as bc
+    from scripts.utils.cache import sha256_file
+
+    monkeypatch.setattr(bc, "GRAPH_PATH", tmp_path / "graph.json")
+    monkeypatch.setattr(bc, "fingerprint", lambda p, partial=False: sha256_file(p))
+    src_a, src_c = tmp_path / "a.src", tmp_path / "c.src"
+    src_a.write_text("a1")
+    src_c.write_text("c1")
+    calls: list[str] = []
+    side_by_side = threading.Barrier(2, timeout=5)   # a and c share no edge
+
+    def step(node, force, workers):
+        if node.name in ("a", "c") and not tmp_path.joinpath("graph.json").exists():
+            side_by_side.wait()
+        calls.append(node.name)
+        text = "".join(p.read_text() for p in node.inputs) if node.inputs else node.name
+        if node.deps:
+            text += tmp_path.joinpath(f"{node.deps[0]}.out").read_text()
+        node.output.write_text(text + str(node.params.get("v", "")))
+
+    def nodes(c_version=1):
+        out = lambda n: tmp_path / f"{n}.out"   # noqa: E731
+        return bc._toposort({
+            "b": bc.Node("b", out("b"), step, deps=("a",)),
+            "a": bc.Node("a", out("a"), step, inputs=(src_a,)),
+            "c": bc.Node("c", out("c"), step, inputs=(src_c,), params={"v": c_version}),
+            "remote": bc.Node("remote", out("remote"), step, remote=True),
+        })
+
+    monkeypatch.setattr(bc, "graph", nodes)
+    first = bc.run_graph(workers=4)
+    assert first == {"a": "built", "b": "built", "c": "built", "remote": "skipped"}
+    assert calls.index("a") < calls.index("b")
+
+    calls.clear()
+    tmp_path.joinpath("remote.out").write_text("downloaded earlier")
+    assert set(bc.run_graph(workers=4).values()) == {"clean"} and calls == []
+
+    src_a.write_text("a2")                                   # a and, through its output, b
+    assert bc.run_graph(workers=4) == {"a": "built", "b": "built", "c": "clean", "remote": "clean"}
+    monkeypatch.setattr(bc, "graph", lambda: nodes(c_version=2))
+    assert bc.run_graph(["c"], workers=4) == {"c": "built"}
+    assert calls == ["a", "b", "c"]
+    assert bc._dirty(nodes(2)["b"], nodes(2), bc._load_records()) is None
+
+
+def test_cache_graph_loads_no_plotting_stack():
+    """``status`` builds the graph on every call; matplotlib and geopandas
+    belong to the node build functions, not to the graph's constants."""
+    import subprocess
+    import sys
+
+    code = ("import sys; sys.path.insert(0, 'scripts'); import build_cache; build_cache.graph(); "
+            "print(sorted(m for m in ('matplotlib', 'geopandas') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_base_layer_store_matches_geojson_and_tracks_its_sha(tmp_path, monkeypatch):
+    import geopandas as gpd
+    from shapely.geometry import Polygon
+
+    from scripts.utils import cache
+
+    monkeypatch.setattr(cache, "GEODATA", tmp_path / "geodata")
+    monkeypatch.setattr(cache, "GEO_DIR", tmp_path / "store")
+    monkeypatch.setattr(cache, "FINGERPRINTS_PATH", tmp_path / "fingerprints.json")
+    monkeypatch.setattr(cache, "_index", None)
+    cache.GEODATA.mkdir()
+    src = cache.GEODATA / "Landmask.geojson"
+    square = Polygon([(-22, 64), (-21, 64), (-21, 64.5), (-21.5, 64.51), (-22, 64.5)])
+    gpd.GeoDataFrame({"name": ["a"]}, geometry=[square], crs="EPSG:4326").to_file(src)
+
+    isn93 = cache.base_layer("Landmask")
+    expected = gpd.read_file(src).to_crs("EPSG:3057")
+    assert isn93.crs == expected.crs and isn93.geometry.geom_equals_exact(expected.geometry, 1e-6).all()
+    assert sorted(p.name for p in cache.GEO_DIR.glob("*.parquet")) == \
+        ["Landmask.3057.parquet", "Landmask.4326.parquet"]
+    coarse = cache.base_layer("Landmask", "EPSG:3057", tolerance=5000)
+    assert len(coarse.geometry.iloc[0].exterior.coords) < len(square.exterior.coords)
+    assert cache.base_layer_path("Landmask", "EPSG:3057", 5000).exists()
+
+    gpd.GeoDataFrame({"name": ["b"]}, geometry=[square.buffer(0.1)], crs="EPSG:4326").to_file(src)
+    assert not cache.base_layer_is_fresh("Landmask")
+    assert cache.base_layer("Landmask", "EPSG:4326")["name"].tolist() == ["b"]
+    assert not cache.base_layer_path("Landmask", "EPSG:3057", 5000).exists()   # variant dropped
+    with pytest.raises(cache.CacheMissingError, match="Missing"):
+        cache.base_layer("CoastalLine")
@@ -0,0 +1,52 @@
+"""Offline regression test for the GRAVPI RGB → probability-bin decoder in
+scripts/grassland_probability_heatmap.py.
+
+The lookup-table decoder must agree pixel for pixel with the original
+broadcast nearest-swatch decoder, reproduced here as the reference.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from scripts import grassland_probability_heatmap as ghm
+
+
+def _reference_decode(rgb: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    h, w, _ = rgb.shape
+    flat = rgb.reshape(-1, 3).astype(np.int32)
+    diffs = flat[:, None, :] - ghm.LEGEND_RGB[None, :, :]
+    d2 = (diffs * diffs).sum(axis=2)
+    nearest = d2.argmin(axis=1)
+    prob = ghm.LEGEND_PROB[nearest].astype(np.float32)
+    bin_idx = (nearest + 1).astype(np.int8)
+    too_far = d2.min(axis=1) > ghm.MAX_SWATCH_DIST_SQ
+    prob[too_far] = np.nan
+    bin_idx[too_far] = 0
+    return prob.reshape(h, w), bin_idx.reshape(h, w)
+
+
+def test_lut_decoder_matches_the_broadcast_decoder():
+    rng = np.random.default_rng(2015)
+    n = 600 * 500
+    # A third uniform noise, a third swatches plus small jitter (anti-aliasing),
+    # a third right at the rejection radius, plus the legend's own colours.
+    swatch = ghm.LEGEND_RGB[rng.integers(0, len(ghm.LEGEND_RGB), n)]
+    noise = rng.integers(0, 256, (n, 3))
+    jitter = np.clip(swatch + rng.integers(-12, 13, (n, 3)), 0, 255)
+    direction = rng.normal(size=(n, 3))
+    direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+    radius = np.sqrt(ghm.MAX_SWATCH_DIST_SQ) + rng.uniform(-1.5, 1.5, (n, 1))
+    edge = np.clip(np.rint(swatch + direction * radius), 0, 255)
+    pick = rng.integers(0, 3, n)
+    flat = np.where(pick[:, None] == 0, noise, np.where(pick[:, None] == 1, jitter, edge))
+    flat[:len(ghm.LEGEND_RGB)] = ghm.LEGEND_RGB
+    flat[len(ghm.LEGEND_RGB):len(ghm.LEGEND_RGB) + 2] = [ghm.NON_GRASSLAND_RGB, ghm.OUTSIDE_RGB]
+    rgb = flat.reshape(600, 500, 3).astype(np.uint8)
+
+    prob, bins = ghm.decode_rgb_to_probability(rgb)
+    ref_prob, ref_bins = _reference_decode(rgb)
+    assert prob.dtype == np.float32 and bins.dtype == np.int8 and bins.shape == (600, 500)
+    assert np.array_equal(bins, ref_bins)
+    assert np.array_equal(prob, ref_prob, equal_nan=True)
+    # The synthetic image exercises both sides of the rejection radius.
+    assert 0 < (bins == 0).mean() < 0.9 and set(np.unique(bins)) == set(range(11))
@@ -0,0 +1,98 @@
+"""Offline tests for the class-raster path of scripts/natt.py.
+
+A small synthetic code raster stands in for the fetched WCS mosaic; masks,
+area tables and zone histograms are cut from it with no requests.
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from scripts import natt
+
+RES = 50.0
+TRANSFORM = from_origin(400_000, 500_000, RES, RES)
+CODES = (np.arange(1300 * 40) % 5 * 3).astype(np.uint8).reshape(1300, 40)   # 0, 3, 6, 9, 12
+TABLE = [(3, "L1.1 Aa"), (6, "L2.2 Bb"), (9, "L14.2 Tún og akurlendi"), (77, "L9.9 Absent")]
+
+
+def _write_classes(path):
+    with rasterio.open(path, "w", driver="GTiff", width=40, height=1300, count=1,
+                       dtype="uint8", crs=natt.CRS, transform=TRANSFORM,
+                       tiled=True, blockxsize=16, blockysize=16) as dst:
+        dst.write(CODES, 1)
+    return path
+
+
+def test_histogram_and_area_table_match_a_plain_count(tmp_path):
+    path = _write_classes(tmp_path / "classes.tif")
+    counts = natt.class_histogram(path)            # 1300 rows = three row bands
+    assert counts.shape == (256,)
+    assert np.array_equal(counts, np.bincount(CODES.ravel(), minlength=256))
+
+    rows = natt.area_table(counts, RES, TABLE)
+    assert [r["dn"] for r in rows] == [3, 6, 9]    # 12 and 0 aren't in the table; 77 absent
+    assert rows[2] == {"dn": 9, "code": "L14.2", "htxt": "L14.2 Tún og akurlendi",
+                       "pixels": int((CODES == 9).sum()),
+                       "area_km2": round(int((CODES == 9).sum()) * RES ** 2 / 1e6, 3)}
+
+
+def test_zone_histogram_splits_counts_by_polygon(tmp_path):
+    from shapely.geometry import box
+
+    path = _write_classes(tmp_path / "classes.tif")
+    # Zone A: the top 600 rows; zone B: columns 20–39 of the next 300 rows.
+    a = box(400_000, 500_000 - 600 * RES, 400_000 + 40 * RES, 500_000)
+    b = box(400_000 + 20 * RES, 500_000 - 900 * RES, 400_000 + 40 * RES, 500_000 - 600 * RES)
+    hist = natt.class_histogram(path, [a, b])
+    assert hist.shape == (3, 256)
+    assert np.array_equal(hist[1], np.bincount(CODES[:600].ravel(), minlength=256))
+    assert np.array_equal(hist[2], np.bincount(CODES[600:900, 20:].ravel(), minlength=256))
+    assert np.array_equal(hist.sum(axis=0), natt.class_histogram(path))
+
+
+def test_build_mask_cuts_from_the_class_raster_without_fetching(tmp_path, monkeypatch):
+    monkeypatch.setattr(natt, "RAW", tmp_path)
+    monkeypatch.setattr(natt, "fetch_mask", lambda *a, **k: (_ for _ in ()).throw(
+        AssertionError("fetched")))
+    _write_classes(natt.class_raster_path(RES))
+
+    out = natt.build_mask(9, RES, label="L14.2 Tún og akurlendi")
+    assert out == tmp_path / "vistgerd_dn9_50m.tif"
+    with rasterio.open(out) as src:
+        assert src.dtypes[0] == "uint8" and src.nodata == 0 and src.transform == TRANSFORM
+        assert np.array_equal(src.read(1), (CODES == 9).astype(np.uint8))
+    side = json.loads(out.with_suffix(".json").read_text(encoding="utf-8"))
+    assert side["pixel_count"] == int((CODES == 9).sum()) and side["code"] == "L14.2"
+    assert not list(tmp_path.glob("*.tmp.tif"))
+
+
+
+def test_municipalities_require_the_named_level2_layer(monkeypatch):
+    import utils.cache   # the copy natt imports (scripts/ is on sys.path via natt)
+
+    def missing(name, crs):
+        raise utils.cache.CacheMissingError(f"Missing {name}",
+                                            "uv run python scripts/lmi.py download")
+
+    monkeypatch.setattr(utils.cache, "base_layer", missing)
+    with pytest.raises(SystemExit, match="lmi.py download"):
+        natt._municipalities()
+
+
+def test_cache_graph_takes_the_class_raster_as_the_mask_input(tmp_path, monkeypatch):
+    from scripts import build_cache
+
+    import natt as graph_natt   # build_cache.graph() imports natt off scripts/
+
+    monkeypatch.setattr(graph_natt, "RAW", tmp_path)
+    node = build_cache.graph()["vistgerd_dn95_50m"]
+    assert node.inputs == () and node.remote
+
+    _write_classes(graph_natt.class_raster_path(50.0))
+    node = build_cache.graph()["vistgerd_dn95_50m"]
+    assert node.inputs == (graph_natt.class_raster_path(50.0),) and not node.remote
@@ -111,3 +111,16 @@ def test_parse_matrix_handles_repeat_and_null_masks():
     assert r["nautgripir"] == 629
     assert r["total_upphaed"] == 31944512
     assert r["nautgripa_upphaed"] == 12868227
+
+
+def test_matrix_template_picks_the_row_hierarchy():
+    from scripts.maelabord_nautgripa import _matrix_template
+
+    def body(groupings, tag):
+        return {"tag": tag, "queries": [{"Query": {"Commands": [{"SemanticQueryDataShapeCommand": {
+            "Query": {}, "Binding": {"Primary": {"Groupings": [{"Projections": [i]} for i in range(groupings)]}},
+        }}]}}]}
+
+    assert _matrix_template([body(1, "card")]) is None
+    picked = _matrix_template([body(1, "card"), body(2, "matrix"), body(1, "slicer"), body(2, "matrix-2025")])
+    assert picked["tag"] == "matrix-2025"
@@ -0,0 +1,549 @@
+"""Offline tests for scripts/powerbi.py — DSR decoding.
+
+The columnar decoder must reproduce the per-cell `_dm0_rows` walk exactly:
+same values, same Python types, same row count; the streaming `DSRDecoder`
+must walk nested matrix levels and carry schemas across pages. Bodies are
+synthetic but use the real wire shapes (S descriptor on the first row, R/Ø
+bitmasks, ValueDicts, M children, RT continuation).
+"""
+from __future__ import annotations
+
+import hashlib
+
+import pytest
+
+from scripts import powerbi as pb
+
+
+def _body(rows, value_dicts=None):
+    ds = {"PH": [{"DM0": rows}]}
+    if value_dicts is not None:
+        ds["ValueDicts"] = value_dicts
+    return {"results": [{"result": {"data": {"dsr": {"DS": [ds]}}}}]}
+
+
+S3 = [{"N": "G0", "DN": "D0"}, {"N": "G1"}, {"N": "M0"}]
+
+
+@pytest.mark.parametrize("rows", [
+    # plain, no compression
+    [{"S": S3, "C": [0, "a", 1]}, {"C": [1, "b", 2]}],
+    # R carries G0+G1, Ø nulls the measure
+    [{"S": S3, "C": [0, "a", 1]}, {"C": [5], "R": 3}, {"C": [1, "b"], "Ø": 4}],
+    # R on the very first row has nothing to carry
+    [{"S": S3, "C": [7], "R": 3}],
+    # Ø wins over R on the same bit; a repeat of a null stays null
+    [{"S": S3, "C": [0, "a"], "Ø": 4}, {"C": [], "R": 7, "Ø": 1}, {"C": [], "R": 7}],
+    # C shorter than the explicit columns -> trailing None
+    [{"S": S3, "C": [0]}],
+    # out-of-range and negative codes pass through untouched
+    [{"S": S3, "C": [9, "x", 1]}, {"C": [-1, "y", 2]}],
+    # mixed cell types in a dictionary column (bool is an int, str is not)
+    [{"S": S3, "C": [True, "x", 1.5]}, {"C": ["raw", "y", 2]}],
+    # S repeated mid-block: irregular, decoded row-wise
+    [{"S": S3, "C": [0, "a", 1]}, {"S": S3[:2], "C": [1, "b"]}],
+    # no S at all: row width follows len(C)
+    [{"C": [1, 2]}, {"C": [3]}],
+])
+def test_columnar_decode_matches_rowwise(rows):
+    body = _body(rows, {"D0": ["Reykjavík", "Akureyri"]})
+    assert pb.parse_dsr(body) == pb._parse_dsr_rowwise(body)
+    assert pb.group_counts(body) == pb._group_counts_rowwise(body)
+
+
+def test_columnar_decode_preserves_python_types():
+    body = _body([{"S": S3, "C": [1, "þ", 3]}, {"C": ["0.25"], "R": 3}], {"D0": ["a", "b"]})
+    rows = pb.parse_dsr(body)
+    assert rows == [["b", "þ", 3], ["b", "þ", "0.25"]]
+    assert [type(v) for v in rows[0]] == [str, str, int]
+
+
+def test_synthetic_bench_body_matches_rowwise():
+    body = pb._synthetic_body(5_000)
+    assert pb.parse_dsr(body) == pb._parse_dsr_rowwise(body)
+    assert pb.group_counts(body) == pb._group_counts_rowwise(body)
+
+
+def test_group_counts_measure_matrix_form():
+    body = _body([
+        {"S": [{"N": "G0", "DN": "D0"}], "C": [0], "X": [{"M0": 3}, {"M0": 4}]},
+        {"C": [1], "X": [{"M0": 5}, {"M0": 6}]},
+        {"C": [0], "X": [{"M0": 1}]},
+    ], {"D0": ["Rafmagn", "Bensín"]})
+    assert pb.group_counts(body) == {"Rafmagn": 4, "Bensín": 5}
+    assert pb.group_counts(body, measure=1) == {"Rafmagn": 5, "Bensín": 6}
+
+
+def test_dsr_columns_and_frame():
+    body = _body([{"S": S3, "C": [0, "a", 1]}, {"C": [2], "R": 3}], {"D0": ["x"]})
+    assert pb.dsr_columns(body) == [[["x", "x"], ["a", "a"], [1, 2]]]
+    df = pb.dsr_frame(body, names=["flokkur", "undirflokkur", "fjoldi"])
+    assert df.columns == ["flokkur", "undirflokkur", "fjoldi"]
+    assert df["fjoldi"].to_list() == [1, 2]
+
+
+def test_bodies_in_unwraps_capture_shapes():
+    body = _body([{"S": S3, "C": [0, "a", 1]}])
+    assert list(pb._bodies_in(body)) == [body]
+    assert list(pb._bodies_in([body, body])) == [body, body]
+    assert list(pb._bodies_in([{"url": "u", "data": body}])) == [body]
+
+
+# --------------------------------------------------------------------------
+# Streaming decoder (every DM level)
+# --------------------------------------------------------------------------
+
+
+def _matrix_page(farms, *, with_schema, rt=None):
+    dm1 = []
+    for i, (label, amount) in enumerate(farms):
+        row = {"G0": label, "M": [{"DM2": [{"C": [0, amount]}]}]}
+        if with_schema and i == 0:
+            row["S"] = [{"N": "G0"}]
+            row["M"][0]["DM2"][0]["S"] = [{"N": "G1", "DN": "D0"}, {"N": "M0"}]
+        dm1.append(row)
+    ds = {"PH": [{"DM1": dm1}], "ValueDicts": {"D0": ["Nautgriparækt"]}, "IC": rt is None}
+    if rt is not None:
+        ds["RT"] = rt
+    return {"results": [{"result": {"data": {"dsr": {"DS": [ds]}}}}]}
+
+
+def test_decoder_walks_nested_levels_depth_first():
+    rows = list(pb.DSRDecoder().feed(_matrix_page([("A", 1), ("B", 2)], with_schema=True)))
+    assert [(r.level, r.values) for r in rows] == [
+        ("DM1", {"G0": "A"}), ("DM2", {"G1": "Nautgriparækt", "M0": 1}),
+        ("DM1", {"G0": "B"}), ("DM2", {"G1": "Nautgriparækt", "M0": 2}),
+    ]
+    assert rows[1].parent is rows[0] and rows[3].parent is rows[2]
+
+
+def test_decoder_remembers_schemas_across_pages_and_exposes_restart_tokens():
+    pages = [_matrix_page([("A", 1)], with_schema=True, rt=[["'A'"]]),
+             _matrix_page([("B", 2)], with_schema=False)]
+    decoder = pb.DSRDecoder()
+    first = list(decoder.feed(pages[0]))
+    assert decoder.restart_tokens == [["'A'"]] and decoder.complete is False
+    second = list(decoder.feed(pages[1]))
+    assert second[1].values == {"G1": "Nautgriparækt", "M0": 2}
+    assert decoder.restart_tokens is None and decoder.complete is True
+    assert len(list(pb.iter_dsr(iter(pages)))) == len(first) + len(second)
+
+
+def test_decoder_seeded_schema_and_positional_fallback():
+    page = _matrix_page([("B", 2)], with_schema=False)
+    rows = list(pb.DSRDecoder(schemas={"DM2": ["G1", "M0"]}).feed(page))
+    assert rows[1].values == {"G1": 0, "M0": 2}          # no DN seeded: code stays
+    rows = list(pb.DSRDecoder().feed(page))
+    assert rows[1].values == {"C0": 0, "C1": 2}          # nothing known: positional
+
+
+def test_named_cells_are_read_by_the_decoder_but_not_by_parse_dsr():
+    body = _body([
+        {"S": [{"N": "G0"}, {"N": "M0"}], "G0": "Reykjavík", "C": [3]},
+        {"G0": "Akureyri", "C": [4]},
+    ])
+    # parse_dsr / group_counts keep their historical positional output...
+    assert pb.parse_dsr(body) == pb._parse_dsr_rowwise(body) == [[3, None], [4, None]]
+    assert pb.group_counts(body) == {3: 0, 4: 0}
+    # ...while the DSRDecoder API honours the cell keyed by column name.
+    assert [r.values for r in pb.DSRDecoder().feed(body)] == [
+        {"G0": "Reykjavík", "M0": 3}, {"G0": "Akureyri", "M0": 4}]
+
+
+# --------------------------------------------------------------------------
+# Concurrent replay
+# --------------------------------------------------------------------------
+
+
+class _FakeFrame:
+    """Stands in for the iframe: answers `fetch()` replays after a short delay,
+    throttling (429) the first `throttle` calls and anything beyond `cap` in flight."""
+
+    def __init__(self, *, throttle=0, cap=None, status=None):
+        self.calls = self.in_flight = self.peak = 0
+        self.throttle, self.cap, self.status = throttle, cap, status
+
+    async def evaluate(self, _js, arg):
+        import asyncio
+
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.001 * (arg["payload"] % 3))
+            if self.status:
+                return {"__status": self.status}
+            if self.calls <= self.throttle or (self.cap and self.in_flight > self.cap):
+                return {"__status": 429}
+            return {"echo": arg["payload"]}
+        finally:
+            self.in_flight -= 1
+
+
+def test_replay_many_returns_results_in_input_order():
+    import asyncio
+
+    frame = _FakeFrame()
+    out = asyncio.run(pb.replay_many(frame, "k", list(range(40)), url="u", concurrency=4))
+    assert [o["echo"] for o in out] == list(range(40))
+    assert frame.peak <= 8
+
+
+def test_replay_many_backs_off_and_adapts_to_throttling():
+    import asyncio
+
+    frame, stats = _FakeFrame(throttle=3, cap=2), {}
+    out = asyncio.run(pb.replay_many(frame, "k", list(range(30)), url="u", concurrency=8,
+                                     backoff=0.001, max_backoff=0.005, retries=10, stats=stats))
+    assert [o["echo"] for o in out] == list(range(30))
+    assert stats["throttled"] >= 3
+    assert stats["requests"] == 30 + stats["throttled"]
+    assert stats["concurrency"] < 8
+
+
+def test_replay_many_raises_on_hard_errors():
+    import asyncio
+
+    with pytest.raises(RuntimeError, match="HTTP 400"):
+        asyncio.run(pb.replay_many(_FakeFrame(status=400), "k", [1, 2], url="u"))
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    delays = [pb._backoff_delay(a, 1.0, 5.0) for a in range(8) for _ in range(20)]
+    assert all(0.5 <= d <= 5.0 for d in delays)
+    assert len(set(delays)) > 1
+
+
+# --------------------------------------------------------------------------
+# Query-result cache
+# --------------------------------------------------------------------------
+
+
+def _query(year, *, query_id="a"):
+    return {"version": "1.0.0", "modelId": 42, "cancelQueries": [],
+            "queries": [{"QueryId": query_id, "ApplicationContext": {"Sources": [{"VisualId": query_id}]},
+                         "Query": {"Commands": [{"SemanticQueryDataShapeCommand": {"Query": {
+                             "Where": [pb.in_condition("Ár", [f"{year}L"])]}}}]}}]}
+
+
+def test_cache_key_ignores_volatile_fields_only():
+    assert pb.cache_key("k", _query(2020, query_id="a")) == pb.cache_key("k", _query(2020, query_id="b"))
+    assert pb.cache_key("k", _query(2020)) != pb.cache_key("k", _query(2021))
+    assert pb.cache_key("k", _query(2020)) != pb.cache_key("other", _query(2020))
+    assert pb.cache_key("k", _query(2020)) != pb.cache_key("k", {**_query(2020), "modelId": 43})
+
+
+def test_period_ttl_closed_periods_are_forever():
+    import datetime as dt
+
+    today = dt.date(2026, 10, 17)
+    assert pb.period_ttl(2025, today=today) == pb.FOREVER
+    assert pb.period_ttl(2026, 8, today=today) == pb.FOREVER
+    assert pb.period_ttl(2026, 9, today=today, current=60) == 60      # inside the grace window
+    assert pb.period_ttl(2026, today=today, current=60) == 60
+    assert pb.period_ttl(today=today, current=60) == 60               # snapshot
+
+
+def test_query_cache_roundtrip_expiry_and_lru(tmp_path):
+    with pb.QueryCache(tmp_path / "q.sqlite", max_bytes=10**9) as cache:
+        cache.put("k", _query(2020), {"v": 2020}, ttl=pb.FOREVER)
+        cache.put("k", _query(2021), {"v": 2021}, ttl=-1)              # already stale
+        assert cache.get("k", _query(2020, query_id="z")) == {"v": 2020}
+        assert cache.get("k", _query(2021)) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    pad = "".join(hashlib.sha256(str(i).encode()).hexdigest() for i in range(40))  # ~1.3 kB zlib'd
+    with pb.QueryCache(tmp_path / "q.sqlite", max_bytes=10**9) as cache:
+        assert cache.get("k", _query(2020)) == {"v": 2020}             # persisted
+        for year in (2001, 2002, 2003):
+            cache.put("k", _query(year), {"pad": pad, "v": year})
+        cache.get("k", _query(2001))                                   # 2001 is now the freshest
+        cache.max_bytes = 3000                                         # room for two padded entries
+        cache.put("k", _query(2004), {"v": 2004})
+        assert cache.get("k", _query(2002)) is None                    # least recently used went first
+        assert cache.get("k", _query(2001))["v"] == 2001
+        assert cache.get("k", _query(2003))["v"] == 2003
+        assert cache.get("k", _query(2004)) == {"v": 2004}
+
+
+def test_replay_many_serves_cache_hits_without_replaying(tmp_path):
+    import asyncio
+
+    payloads = [_query(y) for y in (2020, 2021, 2022)]
+
+    class Frame(_FakeFrame):
+        async def evaluate(self, _js, arg):
+            self.calls += 1
+            return {"year": arg["payload"]["queries"][0]["Query"]["Commands"][0]
+                    ["SemanticQueryDataShapeCommand"]["Query"]["Where"][0]}
+
+    with pb.QueryCache(tmp_path / "q.sqlite") as cache:
+        frame, stats = Frame(), {}
+        first = asyncio.run(pb.replay_many(frame, "k", payloads, url="u", cache=cache,
+                                           ttls=[pb.FOREVER] * 3))
+        again = asyncio.run(pb.replay_many(frame, "k", payloads, url="u", cache=cache, stats=stats))
+    assert first == again
+    assert frame.calls == 3
+    assert stats["cached"] == 3 and stats["requests"] == 0
+
+
+# --------------------------------------------------------------------------
+# Browserless transport
+# --------------------------------------------------------------------------
+
+SHELL = '<script>var resolvedClusterUri = {"FixedClusterUri":"https://wabi-north-europe-q-primary-redirect.analysis.windows.net/"};</script>'
+
+
+def test_api_host_from_shell_mirrors_getapimurl():
+    assert pb.api_host_from_shell(SHELL) == "wabi-north-europe-q-primary-api.analysis.windows.net"
+    assert pb.api_host_from_shell('"FixedClusterUri": "https://global-wabi-x.analysis.windows.net"') \
+        == "wabi-x-api.analysis.windows.net"
+    assert pb.api_host_from_shell("<html></html>") is None
+
+
+def _mock_client(query_status):
+    import httpx
+
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.host, request.url.path))
+        if request.url.host == "app.powerbi.com":
+            return httpx.Response(200, text=SHELL)
+        if request.url.path.endswith("/modelsAndExploration"):
+            return httpx.Response(200, json={"models": [{"id": 7}]})
+        assert request.headers["x-powerbi-resourcekey"] == "k"
+        return httpx.Response(query_status, json={"results": []})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), seen
+
+
+def _view_url():
+    return pb.embed_url("k", "t")
+
+
+def test_auto_transport_stays_browserless_when_http_is_accepted():
+    import asyncio
+
+    async def run():
+        client, seen = _mock_client(200)
+        opened = []
+
+        async def open_frame():
+            opened.append(1)
+
+        target = await pb.AutoTransport(_view_url(), open_frame, client=client).start()
+        out = await pb.replay(target, "k", {"modelId": 7})
+        await target.aclose()
+        return target, out, seen, opened
+
+    target, out, seen, opened = asyncio.run(run())
+    assert out == {"results": []} and target.mode == "http" and not opened
+    assert ("POST", "wabi-north-europe-q-primary-api.analysis.windows.net",
+            "/public/reports/querydata") in seen
+
+
+def test_auto_transport_falls_back_to_the_iframe_when_rejected():
+    import asyncio
+
+    frame = _FakeFrame()
+
+    async def run():
+        client, _ = _mock_client(403)
+
+        async def open_frame():
+            return frame
+
+        target = await pb.AutoTransport(_view_url(), open_frame, client=client).start()
+        out = await pb.replay_many(target, "k", [1, 2, 3])
+        await target.aclose()
+        return target, out
+
+    target, out = asyncio.run(run())
+    assert target.mode == "browser"
+    assert [o["echo"] for o in out] == [1, 2, 3]
+    assert frame.calls == 3
+
+
+def test_auto_transport_treats_401_as_a_throttle_not_a_rejection():
+    import asyncio
+
+    import httpx
+
+    statuses = iter([401, 200])
+
+    def handler(request):
+        if request.url.host == "app.powerbi.com":
+            return httpx.Response(200, text=SHELL)
+        if request.url.path.endswith("/modelsAndExploration"):
+            return httpx.Response(200, json={"models": [{"id": 7}]})
+        return httpx.Response(next(statuses), json={"results": []})
+
+    async def run():
+        opened = []
+
+        async def open_frame():
+            opened.append(1)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        target = await pb.AutoTransport(_view_url(), open_frame, client=client).start()
+        stats = {}
+        out = await pb.replay_many(target, "k", [1], backoff=0.001, stats=stats)
+        await target.aclose()
+        return target, out, stats, opened
+
+    target, out, stats, opened = asyncio.run(run())
+    assert target.mode == "http" and not opened
+    assert out == [{"results": []}] and stats["throttled"] == 1
+
+
+def test_auto_transport_falls_back_when_401s_keep_coming():
+    import asyncio
+
+    frame = _FakeFrame()
+    opened = []
+
+    async def run():
+        client, _ = _mock_client(401)
+
+        async def open_frame():
+            opened.append(1)
+            return frame
+
+        target = await pb.AutoTransport(_view_url(), open_frame, client=client).start()
+        out = await pb.replay(target, "k", 7, backoff=0.001)
+        await target.aclose()
+        return target, out
+
+    target, out = asyncio.run(run())
+    assert opened == [1] and target.mode == "browser"
+    assert out["echo"] == 7 and frame.calls == 1
+
+
+# --- template registry ------------------------------------------------------
+
+def _model(*pages, model_id=7):
+    return {"models": [{"id": model_id}],
+            "exploration": {"sections": [{"name": f"s{i}", "displayName": p} for i, p in enumerate(pages)]}}
+
+
+def test_report_fingerprint_tracks_pages_and_model_only():
+    base = pb.report_fingerprint(_model("Yfirlit", "Tegundir"))
+    refreshed = _model("Yfirlit", "Tegundir")
+    refreshed["models"][0]["LastRefreshTime"] = "2026-10-17"
+    assert pb.report_fingerprint(refreshed) == base
+    assert pb.report_fingerprint(_model("Yfirlit")) != base
+    assert pb.report_fingerprint(_model("Yfirlit", "Tegundir", model_id=8)) != base
+
+
+def _registry_run(tmp_path, monkeypatch, model, *, refresh=False):
+    import asyncio
+    from types import SimpleNamespace
+
+    import httpx
+
+    monkeypatch.setattr(pb, "TEMPLATES_DIR", tmp_path)
+    discovered = []
+
+    def handler(request):
+        if request.url.path.startswith("/view"):
+            return httpx.Response(200, text='{"FixedClusterUri":"https://wabi-north-europe-q-primary-redirect.analysis.windows.net/"}')
+        return httpx.Response(200, json=model)
+
+    async def discover_fn():
+        discovered.append(1)
+        frame = SimpleNamespace(url=_view_url())
+        return pb.Discovery(frame=frame, key="k", templates={"Tegund": {"modelId": 7, "version": "1.0.0"}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await pb.open_dashboard("demo", discover_fn, refresh=refresh, client=client)
+
+    return asyncio.run(run()), discovered
+
+
+def test_open_dashboard_reuses_templates_until_the_report_changes(tmp_path, monkeypatch):
+    dash, found = _registry_run(tmp_path, monkeypatch, _model("Yfirlit"))
+    assert dash.discovered and found == [1]
+    entry = pb.load_templates("demo")
+    assert entry["model_id"] == 7 and entry["version"] == "1.0.0" and entry["key"] == "k"
+
+    dash, found = _registry_run(tmp_path, monkeypatch, _model("Yfirlit"))
+    assert not dash.discovered and not found
+    assert dash.templates == {"Tegund": {"modelId": 7, "version": "1.0.0"}} and dash.target.mode == "http"
+
+    dash, found = _registry_run(tmp_path, monkeypatch, _model("Yfirlit"), refresh=True)
+    assert dash.discovered and found == [1]
+
+    dash, found = _registry_run(tmp_path, monkeypatch, _model("Yfirlit", "Nýtt"))
+    assert dash.discovered and found == [1]
+    assert pb.load_templates("demo")["fingerprint"] == pb.report_fingerprint(_model("Yfirlit", "Nýtt"))
+
+
+# --- window paging ------------------------------------------------------------
+
+def _template():
+    return {"version": "1.0.0", "modelId": 7, "queries": [{"Query": {"Commands": [{
+        "SemanticQueryDataShapeCommand": {
+            "Query": {"Select": [{"Column": {"Property": "Bú"}}]},
+            "Binding": {"Primary": {"Groupings": [{"Projections": [0]}]},
+                        "DataReduction": {"DataVolume": 3, "Primary": {"Top": {"Count": 100}},
+                                          "Secondary": {"Top": {"Count": 60}}}},
+        }}]}}]}
+
+
+def test_with_window_rewrites_only_the_primary_reduction():
+    t = _template()
+    b = pb.with_window(t, 2, [["'b'"]])
+    assert pb.binding_of(b)["DataReduction"] == {
+        "DataVolume": 3, "Primary": {"Window": {"Count": 2, "RestartTokens": [["'b'"]]}},
+        "Secondary": {"Top": {"Count": 60}}}
+    assert pb.binding_of(t)["DataReduction"]["Primary"] == {"Top": {"Count": 100}}
+    assert "RestartTokens" not in pb.binding_of(pb.with_window(t, 2))["DataReduction"]["Primary"]["Window"]
+
+
+class _PagingFrame:
+    """Serves `farms` in windows, continuing from the request's RestartTokens."""
+
+    def __init__(self, farms):
+        self.farms, self.calls = farms, 0
+
+    async def evaluate(self, _js, arg):
+        self.calls += 1
+        window = pb.binding_of(arg["payload"])["DataReduction"]["Primary"]["Window"]
+        start = self.farms.index(window["RestartTokens"][0][0]) + 1 if "RestartTokens" in window else 0
+        page = self.farms[start:start + window["Count"]]
+        rows = [{"C": [f]} for f in page]
+        if start == 0:
+            rows[0]["S"] = [{"N": "G0"}]
+        ds = {"PH": [{"DM0": rows}]}
+        if start + len(page) < len(self.farms):
+            ds["RT"] = [[page[-1]]]
+        return {"results": [{"result": {"data": {"dsr": {"DS": [ds]}}}}]}
+
+
+def test_replay_pages_follows_restart_tokens_through_the_decoder():
+    import asyncio
+
+    farms = [f"bú{i}" for i in range(7)]
+    frame = _PagingFrame(farms)
+
+    async def run():
+        decoder = pb.DSRDecoder()
+        return [r.values["G0"] async for body in pb.replay_pages(frame, "k", _template(), count=3)
+                for r in decoder.feed(body)]
+
+    assert asyncio.run(run()) == farms
+    assert frame.calls == 3
+    assert pb.restart_tokens_of({"results": []}) is None
+
+
+def test_replay_pages_gives_up_after_max_pages():
+    import asyncio
+
+    async def run():
+        return [b async for b in pb.replay_pages(_PagingFrame(list("abcdef")), "k", _template(),
+                                                   count=1, max_pages=2)]
+
+    with pytest.raises(RuntimeError, match="did not finish"):
+        asyncio.run(run())
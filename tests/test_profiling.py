@@ -0,0 +1,117 @@
+"""Offline tests for scripts/utils/profiling.py — stage spans and traces."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from scripts import althingi
+from scripts.utils import profiling
+
+
+def test_spans_are_no_ops_unless_profiling(tmp_path, monkeypatch):
+    monkeypatch.delenv(profiling.ENV, raising=False)
+    with profiling.profiled("demo", None, out_dir=tmp_path) as tr:
+        assert tr is None
+        with profiling.span("network") as s:
+            s.add(bytes=10)
+    assert not profiling.enabled() and not list(tmp_path.iterdir())
+
+
+def test_trace_partitions_self_time_and_counts_bytes_and_rows(tmp_path):
+    @profiling.spanned("parse")
+    def parse():
+        time.sleep(0.01)
+        profiling.add(rows=7)
+
+    @profiling.spanned("network", "fetch")
+    async def fetch():
+        await asyncio.sleep(0.01)
+        profiling.add(bytes=2048)
+
+    with profiling.profiled("demo", "trace", out_dir=tmp_path):
+        with profiling.span("transform", "build") as s:
+            asyncio.run(fetch())
+            parse()
+            s.add(rows=3)
+        with profiling.span("write", "out.parquet", bytes=100, rows=3):
+            pass
+
+    (out,) = tmp_path.glob("demo-*.json")
+    d = json.loads(out.read_text(encoding="utf-8"))
+    names = [(s["name"], s["depth"], s["parent"]) for s in d["spans"]]
+    assert names == [("build", 0, None), ("fetch", 1, 0), ("parse", 1, 0), ("out.parquet", 0, None)]
+    build = d["spans"][0]
+    assert build["self_seconds"] < build["seconds"] - 0.015        # children subtracted
+    t = d["totals"]
+    assert (t["network"]["bytes"], t["parse"]["rows"], t["transform"]["rows"]) == (2048, 7, 3)
+    assert t["write"] == {"seconds": t["write"]["seconds"], "bytes": 100, "rows": 3, "spans": 1}
+    assert sum(v["seconds"] for v in t.values()) + d["unattributed_seconds"] <= d["wall_seconds"] + 1e-3
+    assert d["peak_rss_mb"] > 0 and d["spans"][0]["rss_mb"] > 0
+    assert not profiling.enabled()
+
+
+def test_env_var_enables_cprofile_capture(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.ENV, "cprofile")
+    with profiling.profiled("demo", None, out_dir=tmp_path) as tr:
+        assert tr is not None
+        sum(range(1000))
+    assert len(list(tmp_path.glob("demo-*.json"))) == 1
+    assert len(list(tmp_path.glob("demo-*.prof"))) == 1
+
+
+def test_althingi_get_xml_reports_network_and_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path / "raw")
+    monkeypatch.setattr(althingi, "REQUEST_DELAY", 0)
+    body = "<löggjafarþing><þing númer='157'/></löggjafarþing>".encode()
+
+    class Client:
+        def get(self, *a, **k):
+            return type("R", (), {"content": body, "status_code": 200, "headers": {},
+                                  "raise_for_status": lambda self: None})()
+
+    # althingi imports the module as utils.profiling (scripts/ on sys.path).
+    with althingi.profiled("althingi", "trace", out_dir=tmp_path):
+        althingi.get_xml(Client(), "loggjafarthing/yfirstandandi/")
+        althingi.get_xml(Client(), "loggjafarthing/yfirstandandi/")     # from the raw cache
+    d = json.loads(next(tmp_path.glob("althingi-*.json")).read_text(encoding="utf-8"))
+    assert [s["kind"] for s in d["spans"]] == ["network", "parse", "parse"]
+    assert d["totals"]["network"]["bytes"] == len(body)
+
+
+def test_iter_xml_leaves_the_consumer_out_of_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(althingi, "RAW_DIR", tmp_path / "raw")
+    path, params = "raedulisti/", {"lthing": 157}
+    cache = althingi._cache_path(path, params)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    cache.write_text("<r>" + "<ræða/>" * 3 + "</r>", encoding="utf-8")
+
+    with althingi.profiled("althingi", "trace", out_dir=tmp_path):
+        with althingi.span("transform", "consumer"):
+            for _ in althingi.iter_xml(None, path, params, tag="ræða"):
+                with althingi.span("write", "row"):
+                    time.sleep(0.01)
+            for _ in althingi.iter_xml(None, path, params, tag="ræða"):
+                break                                   # closed early, still logged
+    d = json.loads(next(tmp_path.glob("althingi-*.json")).read_text(encoding="utf-8"))
+    consumer = next(i for i, s in enumerate(d["spans"]) if s["kind"] == "transform")
+    parses = [s for s in d["spans"] if s["kind"] == "parse"]
+    assert len(parses) == 2 and all(s["parent"] == consumer for s in parses)
+    assert all(s["bytes"] == cache.stat().st_size for s in parses)
+    assert parses[0]["seconds"] < 0.03                  # the sleeps are not parsing
+    rows = [s for s in d["spans"] if s["kind"] == "write"]
+    assert len(rows) == 3 and all(s["parent"] == consumer for s in rows)
+
+
+def test_profile_flags_leave_the_subcommand_alone():
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    profiling.add_profile_argument(parser)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("fetch").add_argument("--dataset")
+
+    args = parser.parse_args(["--profile", "fetch", "--dataset", "votes"])
+    assert (args.profile, args.command, args.dataset) == ("trace", "fetch", "votes")
+    assert parser.parse_args(["--cprofile", "fetch"]).profile == "cprofile"
+    assert parser.parse_args(["fetch"]).profile is None
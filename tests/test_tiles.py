@@ -0,0 +1,114 @@
+"""Offline tests for scripts/utils/tiles.py — the Leaflet tile pyramids.
+
+Synthetic layers only: a polygon, a few points and a small class raster, cut
+into a temporary tile root.
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from scripts.utils import tiles
+
+
+def _load_tile(path) -> dict:
+    text = path.read_text(encoding="utf-8")
+    head, _, body = text.partition(",")
+    assert head.startswith('L.GeoJSONTiles.load("')
+    return json.loads(body.rstrip().removesuffix(");"))
+
+
+def test_tile_maths_round_trip():
+    for z, x, y in [(0, 0, 0), (6, 28, 16), (10, 953, 489)]:
+        w, s, e, n = tiles.tile_bounds(z, x, y)
+        assert tiles.tile_range((w + 1e-9, s + 1e-9, e - 1e-9, n - 1e-9), z) == (x, y, x, y)
+    xmin, ymin, xmax, ymax = tiles.tile_bounds_3857(1, 0, 0)
+    assert (xmin, ymax) == (-tiles.ORIGIN_3857, tiles.ORIGIN_3857) and xmax == ymin == 0
+    assert tiles.zoom_tolerance(6) == pytest.approx(2 * tiles.zoom_tolerance(7))
+
+
+def test_vector_tiles_clip_split_and_rebuild_only_on_a_new_sha(tmp_path):
+    import geopandas as gpd
+    from shapely.geometry import Point, Polygon, shape
+
+    square = Polygon([(-22, 64), (-19, 64), (-19, 65.5), (-22, 65.5)])
+    frame = gpd.GeoDataFrame({"namn1": ["Land", "A", "B"], "skip": [1, 2, 3]},
+                             geometry=[square, Point(-21.5, 64.2), Point(-19.5, 65.2)],
+                             crs="EPSG:4326")
+    m = tiles.build_frame_tiles("demo", frame, source_sha256="v1", properties=("namn1",),
+                                zooms=(5, 8), root=tmp_path)
+    assert m["tiles"] > 4 and m["minzoom"] == 5 and m["bounds"] == pytest.approx([-22, 64, -19, 65.5])
+    files = sorted(tmp_path.glob("demo/8/*/*.js"))
+
+    points = fills = outlines = 0
+    for f in files:
+        w, s, e, n = tiles.tile_bounds(8, int(f.parent.name), int(f.stem))
+        for feat in _load_tile(f)["features"]:
+            assert set(feat["properties"]) == {"namn1"}
+            kind = feat["geometry"]["type"]
+            gw, gs, ge, gn = shape(feat["geometry"]).bounds
+            assert gw >= w - 1e-6 and gs >= s - 1e-6 and ge <= e + 1e-6 and gn <= n + 1e-6
+            points += kind == "Point"
+            fills += "Polygon" in kind
+            outlines += "LineString" in kind
+    assert points == 2                      # each point in exactly one tile
+    assert fills == len(files) and 0 < outlines < fills   # inner tiles have no edge
+
+    stamp = files[0].stat().st_mtime_ns
+    assert tiles.build_frame_tiles("demo", frame, source_sha256="v1", properties=("namn1",),
+                                   zooms=(5, 8), root=tmp_path) == m
+    assert files[0].stat().st_mtime_ns == stamp
+    moved = frame.assign(geometry=frame.geometry.translate(xoff=-1))
+    m2 = tiles.build_frame_tiles("demo", moved, source_sha256="v2", properties=("namn1",),
+                                 zooms=(5, 8), root=tmp_path)
+    assert m2["source_sha256"] == "v2" and m2["bounds"][0] == pytest.approx(-23)
+    assert not (tmp_path / "demo.tmp").exists() and not (tmp_path / "demo.old").exists()
+
+
+def test_raster_tiles_colour_classes_and_skip_empty_tiles(tmp_path):
+    import rasterio
+    from PIL import Image
+    from rasterio.transform import from_origin
+
+    # ISN93 grid, 1 km pixels; the class-1 block sits around 64.1°N 21.9°W.
+    arr = np.zeros((200, 300), dtype=np.uint8)
+    arr[120:160, 20:60] = 1
+    arr[0:10, 290:300] = 2
+    transform = from_origin(300_000, 500_000, 1000, 1000)
+    src = tmp_path / "classes.tif"
+    with rasterio.open(src, "w", driver="GTiff", width=300, height=200, count=1,
+                       dtype="uint8", crs="EPSG:3057", transform=transform) as dst:
+        dst.write(arr, 1)
+
+    root = tmp_path / "tiles"
+    m = tiles.build_raster_tiles("classes", src, {1: (10, 200, 30, 255)}, zooms=(5, 8),
+                                 label="Classes", root=root)
+    assert m["kind"] == "raster" and m["source_sha256"] and m["label"] == "Classes"
+    pngs = sorted(root.glob("classes/8/*/*.png"))
+    x0, y0, x1, y1 = tiles.tile_range(tuple(m["bounds"]), 8)
+    assert 0 < len(pngs) < (x1 - x0 + 1) * (y1 - y0 + 1)   # empty tiles not written
+
+    # The class-1 block lands in the tile under its centre, in the palette colour.
+    from pyproj import Transformer
+    lon, lat = Transformer.from_crs("EPSG:3057", "EPSG:4326", always_xy=True).transform(
+        *(transform * (40, 140)))
+    x, y, _, _ = tiles.tile_range((lon, lat, lon, lat), 8)
+    img = np.asarray(Image.open(root / "classes" / "8" / str(x) / f"{y}.png"))
+    colours = {tuple(c) for c in img.reshape(-1, 4)}
+    assert colours <= {(0, 0, 0, 0), (10, 200, 30, 255)} and (10, 200, 30, 255) in colours
+
+    # Same source, same params: untouched. In-memory sources need a digest.
+    assert tiles.build_raster_tiles("classes", src, {1: (10, 200, 30, 255)}, zooms=(5, 8),
+                                    label="Classes", root=root) == m
+    with pytest.raises(ValueError, match="source_sha256"):
+        tiles.build_raster_tiles("mem", (arr, transform, "EPSG:3057"), {1: (0, 0, 0, 255)},
+                                 root=root)
+    mem = tiles.build_raster_tiles("mem", (arr, transform, "EPSG:3057"), {1: (10, 200, 30, 255)},
+                                   source_sha256="x", zooms=(8, 8), root=root)
+    assert mem["tiles"] == len(pngs)
+
+    opts = tiles.layer_options("classes", tmp_path / "report" / "map.html", root=root)
+    assert opts["url"] == "../tiles/classes/{z}/{x}/{y}.png" and opts["maxNativeZoom"] == 8
+    assert [c["name"] for c in tiles.cut_layers("raster", root=root)] == ["classes", "mem"]
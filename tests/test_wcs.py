@@ -0,0 +1,117 @@
+"""Offline tests for scripts/utils/wcs.py — the tiled WCS fetcher.
+
+An ``httpx.MockTransport`` plays GeoServer: it cuts GetCoverage subsets out
+of an in-memory class raster and serves them as GeoTIFFs.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+
+import httpx
+import numpy as np
+import pytest
+import rasterio
+from rasterio.io import MemoryFile
+from rasterio.transform import from_origin
+
+from scripts.utils import wcs
+
+RES = 10.0
+ORIGIN = (1000.0, 5000.0)          # top-left x, y
+SOURCE = (np.arange(230 * 170, dtype=np.uint32) % 7).astype(np.uint8).reshape(230, 170)
+BOUNDS = (ORIGIN[0], ORIGIN[1] - 230 * RES, ORIGIN[0] + 170 * RES, ORIGIN[1])
+
+
+class FakeWCS:
+    def __init__(self, fail_after: int | None = None):
+        self.requests = 0
+        self.in_flight = self.peak = 0
+        self.fail_after = fail_after
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.fail_after is not None and self.requests > self.fail_after:
+            return httpx.Response(400, text="<?xml version='1.0'?><ExceptionReport/>")
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.005)
+        self.in_flight -= 1
+        subset = {m.group(1): (float(m.group(2)), float(m.group(3)))
+                  for m in (re.fullmatch(r"(\w)\(([^,]+),([^)]+)\)", s)
+                            for s in request.url.params.get_list("subset"))}
+        (x0, x1), (y0, y1) = subset["X"], subset["Y"]
+        j0, j1 = round((x0 - ORIGIN[0]) / RES), round((x1 - ORIGIN[0]) / RES)
+        i0, i1 = round((ORIGIN[1] - y1) / RES), round((ORIGIN[1] - y0) / RES)
+        band = SOURCE[i0:i1, j0:j1]
+        with MemoryFile() as mem:
+            with mem.open(driver="GTiff", width=band.shape[1], height=band.shape[0], count=1,
+                          dtype="uint8", crs="EPSG:3057", nodata=255,
+                          transform=from_origin(x0, y1, RES, RES)) as dst:
+                dst.write(band, 1)
+            return httpx.Response(200, content=mem.read(),
+                                  headers={"content-type": "image/tiff"})
+
+
+def test_grid_tiles_cover_the_output_exactly():
+    width, height, transform, tiles = wcs.grid(BOUNDS, RES, tile_px=64)
+    assert (width, height) == (170, 230) and transform.c == ORIGIN[0] and transform.f == ORIGIN[1]
+    assert len(tiles) == 3 * 4
+    covered = np.zeros((height, width), dtype=int)
+    for t in tiles:
+        covered[t.row:t.row + t.height, t.col:t.col + t.width] += 1
+        assert t.bbox[2] - t.bbox[0] == pytest.approx(t.width * RES)
+    assert (covered == 1).all()
+
+
+def test_fetch_mosaics_with_bounded_concurrency_and_resumes_from_the_spool(tmp_path):
+    out, spool = tmp_path / "classes.tif", tmp_path / "spool"
+    # First run dies after 5 of 12 tiles: those stay spooled, no output is left.
+    broken = FakeWCS(fail_after=5)
+    with pytest.raises(RuntimeError, match="WCS returned an exception"):
+        wcs.fetch_coverage("https://wcs.test/wcs", "cov", out, bounds=BOUNDS, res=RES,
+                           crs="EPSG:3057", tile_px=64, concurrency=1, spool_dir=spool,
+                           transport=httpx.MockTransport(broken))
+    assert not out.exists() and not out.with_suffix(".tmp.tif").exists()
+    assert len(list(spool.glob("*.tif"))) == 5
+
+    server = FakeWCS()
+    stats = wcs.fetch_coverage("https://wcs.test/wcs", "cov", out, bounds=BOUNDS, res=RES,
+                               crs="EPSG:3057", tile_px=64, concurrency=3, spool_dir=spool,
+                               transport=httpx.MockTransport(server))
+    assert (stats["spooled"], stats["fetched"], server.requests) == (5, 7, 7)
+    assert 1 < server.peak <= 3
+    with rasterio.open(out) as src:
+        assert src.nodata == 255 and src.crs.to_epsg() == 3057
+        assert src.profile["tiled"] and src.transform == from_origin(*ORIGIN, RES, RES)
+        assert np.array_equal(src.read(1), SOURCE)
+    assert not spool.exists()                          # cleaned after success
+
+
+def test_band_fn_masks_each_tile_before_it_is_written(tmp_path):
+    out = tmp_path / "mask.tif"
+    wcs.fetch_coverage("https://wcs.test/wcs", "cov", out, bounds=BOUNDS, res=RES,
+                       crs="EPSG:3057", tile_px=100, band_fn=lambda b: b == 3,
+                       dtype="uint8", nodata=0, spool_dir=tmp_path / "spool", keep_spool=True,
+                       transport=httpx.MockTransport(FakeWCS()))
+    with rasterio.open(out) as src:
+        assert src.dtypes[0] == "uint8" and src.nodata == 0
+        assert np.array_equal(src.read(1), (SOURCE == 3).astype(np.uint8))
+    assert len(list((tmp_path / "spool").glob("*.tif"))) == 6
+
+
+def test_parse_description_reads_grid_and_axis_order():
+    xml = """<wcs:CoverageDescriptions><wcs:CoverageDescription>
+      <gml:boundedBy><gml:Envelope srsName="http://www.opengis.net/def/crs/EPSG/0/5325"
+        axisLabels="X Y" uomLabels="m m" srsDimension="2">
+        <gml:lowerCorner>1400000.0 100000.0</gml:lowerCorner>
+        <gml:upperCorner>1900000.0 500000.0</gml:upperCorner>
+      </gml:Envelope></gml:boundedBy>
+      <gml:domainSet><gml:RectifiedGrid dimension="2"><gml:limits><gml:GridEnvelope>
+        <gml:low>0 0</gml:low><gml:high>24999 19999</gml:high>
+      </gml:GridEnvelope></gml:limits></gml:RectifiedGrid></gml:domainSet>
+    </wcs:CoverageDescription></wcs:CoverageDescriptions>"""
+    desc = wcs.parse_description(xml)
+    assert desc == {"crs": "EPSG:5325", "axis_labels": ["X", "Y"],
+                    "bounds": (1400000.0, 100000.0, 1900000.0, 500000.0),
+                    "width": 25000, "height": 20000, "res": 20.0}